@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for PolyglotDB on deterministic synthetic corpora
+
+Run ``python -m benchmarks --help`` from the repository root for usage.  Benchmarks other than corpus
+generation and parsing need running Neo4j and InfluxDB servers.
+"""
@@ -0,0 +1,124 @@
+import argparse
+import os
+import sys
+
+from .parsing import PARSING_DURATIONS, PARSING_FORMATS, benchmark_parsing, parsing_scaling
+from .suite import (benchmark_report, compare_reports, ensure_corpus, git_revision, load_report, run_benchmarks,
+                    write_report)
+from .synthetic import FORMATS, generate_corpus
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--directory', default=os.path.join(BENCHMARK_DIR, 'data'),
+                        help='Directory of the synthetic corpus')
+    parser.add_argument('--speakers', type=int, default=2, help='Number of speakers')
+    parser.add_argument('--discourses', type=int, default=4, help='Number of discourses')
+    parser.add_argument('--hours', type=float, default=0.1, help='Total duration of the corpus in hours')
+    parser.add_argument('--phones-per-word', type=int, default=4, help='Average number of phones per word')
+    parser.add_argument('--words', type=int, default=500, help='Number of distinct words')
+    parser.add_argument('--format', choices=FORMATS, default='mfa', help='Format of the corpus files')
+    parser.add_argument('--no-audio', action='store_true', help='Skip generating WAV files')
+    parser.add_argument('--seed', type=int, default=1234, help='Random seed')
+
+
+def corpus_parameters(args):
+    return {'num_speakers': args.speakers, 'num_discourses': args.discourses, 'hours': args.hours,
+            'phones_per_word': args.phones_per_word, 'num_words': args.words, 'format': args.format,
+            'audio': not args.no_audio, 'seed': args.seed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmark PolyglotDB on synthetic corpora')
+    subparsers = parser.add_subparsers(dest='command')
+
+    generate_parser = subparsers.add_parser('generate', help='Generate a synthetic corpus')
+    add_corpus_arguments(generate_parser)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks and save the results as JSON')
+    add_corpus_arguments(run_parser)
+    run_parser.add_argument('--output', help='Path to save results, defaults to results/<commit>.json')
+    run_parser.add_argument('--corpus-name', default='polyglotdb_benchmark', help='Name of the benchmark corpus')
+    run_parser.add_argument('--host', default='localhost', help='Host of the Neo4j and InfluxDB servers')
+    run_parser.add_argument('--graph-http-port', type=int, default=7474)
+    run_parser.add_argument('--graph-bolt-port', type=int, default=7687)
+    run_parser.add_argument('--acoustic-http-port', type=int, default=8086)
+    run_parser.add_argument('--skip-acoustics', action='store_true', help='Skip acoustic analysis benchmarks')
+    run_parser.add_argument('--keep', action='store_true', help='Keep the benchmark corpus in the database')
+    run_parser.add_argument('--instrumentation-log',
+                            help='Path to save a JSON log of every database call and phase, with a summary of '
+                                 'the slowest statements saved alongside it')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two saved results')
+    compare_parser.add_argument('baseline', help='Results to compare against')
+    compare_parser.add_argument('current', help='Results to check')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='Relative slowdown that counts as a regression, defaults to 0.1')
+
+    parsing_parser = subparsers.add_parser('parsing', help='Time the file parsers on synthetic discourses of '
+                                                           'increasing length, without a database')
+    parsing_parser.add_argument('--directory', default=os.path.join(BENCHMARK_DIR, 'data', 'parsing'),
+                                help='Directory to save the synthetic files to')
+    parsing_parser.add_argument('--formats', nargs='+', choices=PARSING_FORMATS, default=list(PARSING_FORMATS),
+                                help='Formats to benchmark')
+    parsing_parser.add_argument('--durations', nargs='+', type=int, default=list(PARSING_DURATIONS),
+                                help='Lengths of the discourses in seconds')
+    parsing_parser.add_argument('--repeats', type=int, default=3, help='Number of times to parse each discourse')
+    parsing_parser.add_argument('--seed', type=int, default=1234, help='Random seed')
+    parsing_parser.add_argument('--output', help='Path to save the results as JSON')
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        summary = generate_corpus(args.directory, **corpus_parameters(args))
+        print('Generated {} discourses with {} words and {} phones in {}'.format(
+            summary['num_discourses'], summary['word_tokens'], summary['phone_tokens'], args.directory))
+    elif args.command == 'run':
+        summary = ensure_corpus(args.directory, **corpus_parameters(args))
+        connection = {'host': args.host, 'graph_http_port': args.graph_http_port,
+                      'graph_bolt_port': args.graph_bolt_port, 'acoustic_http_port': args.acoustic_http_port}
+        instrumentation = None
+        if args.instrumentation_log:
+            from polyglotdb.instrumentation import Instrumentation, StatementAggregator, JsonLogExporter
+            aggregator = StatementAggregator()
+            instrumentation = Instrumentation([aggregator, JsonLogExporter(args.instrumentation_log)])
+        results = run_benchmarks(args.directory, args.corpus_name, connection, acoustics=not args.skip_acoustics,
+                                 keep=args.keep, call_back=print, instrumentation=instrumentation)
+        if instrumentation is not None:
+            from polyglotdb.instrumentation import write_instrumentation_report
+            write_instrumentation_report(os.path.splitext(args.instrumentation_log)[0] + '_summary.json', aggregator)
+        report = benchmark_report(results, summary)
+        output = args.output
+        if output is None:
+            commit, dirty = git_revision()
+            name = commit[:10] if commit is not None else 'results'
+            if dirty:
+                name += '-dirty'
+            output = os.path.join(BENCHMARK_DIR, 'results', name + '.json')
+        write_report(report, output)
+        print('Saved results to {}'.format(output))
+    elif args.command == 'parsing':
+        results = benchmark_parsing(args.directory, args.formats, args.durations, repeats=args.repeats,
+                                    seed=args.seed, call_back=print)
+        scaling = parsing_scaling(results)
+        for format, ratio in sorted(scaling.items()):
+            print('{:<10}time per phone grew {:.2f}x from the shortest to the longest discourse'.format(format, ratio))
+        if args.output:
+            write_report({'results': results, 'scaling': scaling}, args.output)
+            print('Saved results to {}'.format(args.output))
+    elif args.command == 'compare':
+        comparison = compare_reports(load_report(args.baseline), load_report(args.current), args.threshold)
+        regressions = 0
+        for name, old, new, change, regression in comparison:
+            print('{:<28}{:>10.3f}{:>10.3f}{:>+9.1%}{}'.format(name, old, new, change,
+                                                                '  REGRESSION' if regression else ''))
+            regressions += regression
+        return 1 if regressions else 0
+    else:
+        parser.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import os
+import time
+
+import numpy as np
+
+from .synthetic import (PAUSE_LABEL, generate_discourse, generate_lexicon, word_frequencies, write_buckeye,
+                        write_partitur, write_timit)
+
+PARSING_FORMATS = ('buckeye', 'timit', 'partitur')
+
+PARSING_DURATIONS = (120, 240, 480, 960, 1920)
+
+
+def write_parsing_discourse(directory, format, name, words, speaker='s01'):
+    """
+    Write a synthetic discourse in one of the formats of :data:`PARSING_FORMATS`
+
+    Parameters
+    ----------
+    directory : str
+        Directory to save the files to
+    format : str
+        Format of the files
+    name : str
+        Name of the discourse
+    words : list
+        Output of :func:`~benchmarks.synthetic.generate_discourse`
+    speaker : str
+        Speaker of the discourse
+
+    Returns
+    -------
+    str
+        Path of the file to pass to the parser
+    """
+    if format == 'buckeye':
+        base = os.path.join(directory, name)
+        write_buckeye(base + '.words', base + '.phones', words)
+        return base + '.words'
+    if format == 'timit':
+        speaker_dir = os.path.join(directory, speaker)
+        os.makedirs(speaker_dir, exist_ok=True)
+        base = os.path.join(speaker_dir, name)
+        write_timit(base + '.wrd', base + '.phn', words)
+        return base + '.wrd'
+    if format == 'partitur':
+        path = os.path.join(directory, name + '.par,2')
+        write_partitur(path, words, speaker)
+        return path
+    raise ValueError('Format must be one of: {}.'.format(', '.join(PARSING_FORMATS)))
+
+
+def inspect_parsing_format(path, format):
+    from polyglotdb.io import inspect_buckeye, inspect_timit, inspect_partitur
+    if format == 'buckeye':
+        return inspect_buckeye(path)
+    if format == 'timit':
+        return inspect_timit(path)
+    return inspect_partitur(path)
+
+
+def benchmark_parsing(directory, formats=PARSING_FORMATS, durations=PARSING_DURATIONS, num_words=500,
+                      phones_per_word=4, repeats=3, seed=1234, call_back=None):
+    """
+    Time the parsers of several formats on synthetic discourses of increasing length
+
+    Each discourse is parsed ``repeats`` times and the fastest time is kept.  With linear parsers the time per
+    phone stays roughly constant as discourses get longer, see :func:`parsing_scaling`.  No database is needed.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to save the synthetic files to
+    formats : iterable
+        Formats to benchmark, from :data:`PARSING_FORMATS`
+    durations : iterable
+        Lengths of the discourses in seconds
+    num_words : int
+        Number of distinct words in the lexicon
+    phones_per_word : int
+        Average number of phones per word
+    repeats : int
+        Number of times to parse each discourse
+    seed : int
+        Seed for the random state
+    call_back : callable, optional
+        Function to report each result
+
+    Returns
+    -------
+    list
+        Results with the format, duration, numbers of words and phones, and seconds taken for each discourse
+    """
+    rng = np.random.RandomState(seed)
+    lexicon = generate_lexicon(rng, num_words, phones_per_word)
+    frequencies = word_frequencies(len(lexicon))
+    discourses = [(d, generate_discourse(rng, lexicon, frequencies, d)) for d in durations]
+    results = []
+    for format in formats:
+        format_dir = os.path.join(directory, format)
+        os.makedirs(format_dir, exist_ok=True)
+        for duration, words in discourses:
+            path = write_parsing_discourse(format_dir, format, 'd{:05d}'.format(duration), words)
+            parser = inspect_parsing_format(path, format)
+            best = None
+            for _ in range(repeats):
+                begin = time.perf_counter()
+                parser.parse_discourse(path)
+                elapsed = time.perf_counter() - begin
+                if best is None or elapsed < best:
+                    best = elapsed
+            num_phones = sum(len(w[3]) for w in words)
+            result = {'name': 'parse_{}'.format(format), 'format': format, 'duration': duration,
+                      'words': sum(1 for w in words if w[0] != PAUSE_LABEL), 'phones': num_phones,
+                      'seconds': best, 'microseconds_per_phone': best / num_phones * 1e6}
+            results.append(result)
+            if call_back is not None:
+                call_back('{:<10}{:>8} s{:>9} phones{:>10.3f} s{:>9.2f} us/phone'.format(
+                    format, duration, num_phones, best, result['microseconds_per_phone']))
+    return results
+
+
+def parsing_scaling(results):
+    """
+    Compare the time per phone of the longest and shortest discourse of each format
+
+    Parameters
+    ----------
+    results : list
+        Output of :func:`benchmark_parsing`
+
+    Returns
+    -------
+    dict
+        Ratio of the time per phone for the longest discourse to that of the shortest, for each format; values
+        near 1 show linear scaling, while quadratic parsing grows with the ratio of the lengths
+    """
+    scaling = {}
+    for format in sorted(set(r['format'] for r in results)):
+        runs = sorted((r for r in results if r['format'] == format), key=lambda r: r['phones'])
+        scaling[format] = runs[-1]['microseconds_per_phone'] / runs[0]['microseconds_per_phone']
+    return scaling
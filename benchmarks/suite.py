@@ -0,0 +1,291 @@
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from .synthetic import PAUSE_LABEL, VOWELS, generate_corpus
+
+
+class BenchmarkRecorder(object):
+    """
+    Collects timings of named benchmark steps
+
+    Parameters
+    ----------
+    call_back : callable, optional
+        Function to report each result as it is recorded
+    """
+
+    def __init__(self, call_back=None):
+        self.results = []
+        self.call_back = call_back
+
+    @contextmanager
+    def measure(self, name, **info):
+        """
+        Time the body of a ``with`` block as a benchmark step
+
+        Parameters
+        ----------
+        name : str
+            Name of the step
+        info : kwargs
+            Extra information to store with the timing
+        """
+        begin = time.perf_counter()
+        yield
+        self.record(name, time.perf_counter() - begin, **info)
+
+    def record(self, name, seconds, **info):
+        result = {'name': name, 'seconds': seconds}
+        result.update(info)
+        self.results.append(result)
+        if self.call_back is not None:
+            self.call_back('{}: {:.3f} s'.format(name, seconds))
+
+    def skip(self, name, reason):
+        self.results.append({'name': name, 'seconds': None, 'skipped': reason})
+        if self.call_back is not None:
+            self.call_back('{}: skipped ({})'.format(name, reason))
+
+
+def git_revision():
+    """
+    Get the current commit of the repository and whether the working tree has uncommitted changes
+
+    Returns
+    -------
+    tuple
+        Commit hash (or None outside of a git checkout) and a flag for uncommitted changes
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=root,
+                                         stderr=subprocess.DEVNULL).decode('utf8').strip()
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                         stderr=subprocess.DEVNULL).decode('utf8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit, bool(status)
+
+
+def discourse_paths(directory, format):
+    extension = '.TextGrid' if format == 'mfa' else '.words'
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        paths.extend(os.path.join(root, f) for f in files if f.endswith(extension))
+    return sorted(paths)
+
+
+def inspect_corpus(directory, format):
+    from polyglotdb.io import inspect_mfa, inspect_buckeye
+    if format == 'mfa':
+        return inspect_mfa(directory)
+    return inspect_buckeye(directory)
+
+
+def run_benchmarks(directory, corpus_name='polyglotdb_benchmark', connection=None, acoustics=True, keep=False,
+                   call_back=None, instrumentation=None):
+    """
+    Run the benchmark suite on a synthetic corpus generated by :func:`~benchmarks.synthetic.generate_corpus`
+
+    The corpus is parsed, imported, enriched with pauses, utterances and syllables, queried, exported
+    and (optionally) analyzed for pitch, timing each step.  Any existing corpus with the same name is reset
+    first.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the synthetic corpus
+    corpus_name : str
+        Name to import the corpus under
+    connection : dict, optional
+        Connection settings passed to :class:`~polyglotdb.CorpusContext`
+    acoustics : bool
+        Whether to run the acoustic benchmarks, which need synthetic audio and Praat or REAPER
+    keep : bool
+        Whether to keep the imported corpus after the benchmarks, defaults to resetting it
+    call_back : callable, optional
+        Function to report results as they are recorded
+    instrumentation : :class:`~polyglotdb.instrumentation.Instrumentation`, optional
+        Instrumentation to report database calls and phases to while the benchmarks run
+
+    Returns
+    -------
+    list
+        Benchmark results
+    """
+    from polyglotdb import CorpusContext
+    from polyglotdb.query.base.func import Count, Average
+
+    if connection is None:
+        connection = {}
+    with open(os.path.join(directory, 'corpus.json'), encoding='utf8') as f:
+        summary = json.load(f)
+    format = summary['format']
+    recorder = BenchmarkRecorder(call_back)
+
+    parser = inspect_corpus(directory, format)
+    paths = discourse_paths(directory, format)
+    with recorder.measure('parse', discourses=len(paths)):
+        for path in paths:
+            parser.parse_discourse(path)
+
+    with CorpusContext(corpus_name, **connection) as c:
+        if instrumentation is not None:
+            c.instrument(instrumentation)
+        c.reset()
+        parser = inspect_corpus(directory, format)
+        with recorder.measure('import', word_tokens=summary['word_tokens'], phone_tokens=summary['phone_tokens']):
+            c.load(parser, directory)
+
+        pause_labels = [x for x in c.words if x.upper() == PAUSE_LABEL]
+        with recorder.measure('encode_pauses', pauses=summary['pauses']):
+            c.encode_pauses(pause_labels)
+        with recorder.measure('encode_utterances'):
+            c.encode_utterances(min_pause_length=0.15)
+
+        syllabics = [x for x in c.phones if x.upper() in VOWELS]
+        with recorder.measure('encode_syllables'):
+            c.encode_type_subset('phone', syllabics, 'syllabic')
+            c.encode_syllables(syllabic_label='syllabic')
+
+        with recorder.measure('query_count'):
+            c.query_graph(c.word).count()
+
+        q = c.query_graph(c.phone).filter(c.phone.subset == 'syllabic')
+        q = q.columns(c.phone.label.column_name('phone'),
+                      c.phone.previous.label.column_name('previous'),
+                      c.phone.following.label.column_name('following'),
+                      c.phone.word.label.column_name('word'),
+                      c.phone.syllable.label.column_name('syllable'),
+                      c.phone.duration.column_name('duration'))
+        with recorder.measure('query_context'):
+            q.all()
+
+        with recorder.measure('query_aggregate'):
+            agg = c.query_graph(c.phone).group_by(c.phone.label.column_name('phone'))
+            agg.aggregate(Count().column_name('count'), Average(c.phone.duration).column_name('average_duration'))
+
+        with recorder.measure('query_utterance_initial'):
+            initial = c.query_graph(c.word).filter(c.word.begin == c.word.utterance.begin)
+            initial = initial.columns(c.word.label.column_name('word'),
+                                      c.word.speaker.name.column_name('speaker'))
+            initial.all()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with recorder.measure('export_csv'):
+                q.to_csv(os.path.join(temp_dir, 'phones.csv'))
+
+        if not acoustics or not summary['audio']:
+            recorder.skip('analyze_pitch', 'acoustic benchmarks disabled or corpus generated without audio')
+        elif not c.config.reaper_path and not c.config.praat_path:
+            recorder.skip('analyze_pitch', 'neither REAPER nor Praat could be found')
+        else:
+            source = 'reaper' if c.config.reaper_path else 'praat'
+            with recorder.measure('analyze_pitch', source=source):
+                c.analyze_pitch(source=source)
+            with recorder.measure('query_pitch_track'):
+                pitch = c.query_graph(c.phone).filter(c.phone.subset == 'syllabic')
+                pitch = pitch.columns(c.phone.label.column_name('phone'), c.phone.pitch.track)
+                pitch.all()
+        if not keep:
+            with recorder.measure('reset'):
+                c.reset()
+    return recorder.results
+
+
+def benchmark_report(results, summary):
+    """
+    Assemble benchmark results with information about the run for saving
+
+    Parameters
+    ----------
+    results : list
+        Output of :func:`run_benchmarks`
+    summary : dict
+        Description of the synthetic corpus
+
+    Returns
+    -------
+    dict
+        Report to save as JSON
+    """
+    commit, dirty = git_revision()
+    summary = {k: v for k, v in summary.items() if k != 'discourses'}
+    return {'commit': commit,
+            'dirty': dirty,
+            'timestamp': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'corpus': summary,
+            'benchmarks': results}
+
+
+def write_report(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load_report(path):
+    with open(path, encoding='utf8') as f:
+        return json.load(f)
+
+
+def compare_reports(baseline, current, threshold=0.1):
+    """
+    Compare the timings of two benchmark reports
+
+    Parameters
+    ----------
+    baseline : dict
+        Report to compare against
+    current : dict
+        Report to check
+    threshold : float
+        Relative slowdown above which a step counts as a regression, defaults to 10%
+
+    Returns
+    -------
+    list
+        List of (name, baseline seconds, current seconds, relative change, regression flag) tuples for steps
+        timed in both reports
+    """
+    old = {x['name']: x['seconds'] for x in baseline['benchmarks'] if x.get('seconds') is not None}
+    comparison = []
+    for x in current['benchmarks']:
+        name = x['name']
+        if x.get('seconds') is None or name not in old:
+            continue
+        change = (x['seconds'] - old[name]) / old[name] if old[name] else 0.0
+        comparison.append((name, old[name], x['seconds'], change, change > threshold))
+    return comparison
+
+
+def ensure_corpus(directory, **parameters):
+    """
+    Generate a synthetic corpus unless one with the same parameters already exists in the directory.  A
+    previously generated corpus with different parameters is removed first.
+
+    Returns
+    -------
+    dict
+        Description of the corpus
+    """
+    path = os.path.join(directory, 'corpus.json')
+    if os.path.exists(path):
+        with open(path, encoding='utf8') as f:
+            summary = json.load(f)
+        if all(summary.get(k) == v for k, v in parameters.items()):
+            return summary
+        shutil.rmtree(directory)
+    return generate_corpus(directory, **parameters)
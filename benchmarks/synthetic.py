@@ -0,0 +1,395 @@
+import json
+import os
+import wave
+
+import numpy as np
+
+VOWELS = ('AA1', 'AE1', 'AH0', 'EH1', 'ER0', 'IH1', 'IY1', 'OW1', 'UH1', 'UW1')
+
+CONSONANTS = ('B', 'D', 'F', 'G', 'HH', 'K', 'L', 'M', 'N', 'P', 'R', 'S', 'SH', 'T', 'V', 'W', 'Z')
+
+PAUSE_LABEL = '<SIL>'
+
+FORMATS = ('mfa', 'buckeye')
+
+VOWEL_DURATION = (60, 160)
+
+CONSONANT_DURATION = (40, 110)
+
+PAUSE_DURATION = (150, 900)
+
+UTTERANCE_WORDS = (3, 16)
+
+
+def generate_lexicon(rng, num_words, phones_per_word):
+    """
+    Generate a lexicon of unique words built from alternating consonants and vowels
+
+    Parameters
+    ----------
+    rng : :class:`numpy.random.RandomState`
+        Random state to draw from
+    num_words : int
+        Number of words in the lexicon
+    phones_per_word : int
+        Average number of phones per word, individual words vary by one phone either way
+
+    Returns
+    -------
+    list
+        List of (label, phones) tuples, ordered from most to least frequent
+    """
+    lexicon = []
+    seen = set()
+    attempts = 0
+    while len(lexicon) < num_words:
+        attempts += 1
+        if attempts > num_words * 100:
+            raise ValueError('Could not generate {} unique words of {} phones.'.format(num_words, phones_per_word))
+        length = max(1, phones_per_word + rng.randint(-1, 2))
+        vowel_first = rng.rand() < 0.3
+        phones = []
+        for i in range(length):
+            if (i % 2 == 0) == vowel_first:
+                phones.append(VOWELS[rng.randint(len(VOWELS))])
+            else:
+                phones.append(CONSONANTS[rng.randint(len(CONSONANTS))])
+        label = ''.join(p.rstrip('0123456789') for p in phones).lower()
+        if label in seen:
+            continue
+        seen.add(label)
+        lexicon.append((label, phones))
+    return lexicon
+
+
+def word_frequencies(num_words):
+    """
+    Get Zipfian probabilities for a lexicon ordered by frequency rank
+
+    Parameters
+    ----------
+    num_words : int
+        Number of words in the lexicon
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        Probability of each word
+    """
+    weights = 1 / np.arange(1, num_words + 1)
+    return weights / weights.sum()
+
+
+def generate_discourse(rng, lexicon, frequencies, duration):
+    """
+    Generate the word and phone intervals of a discourse, as utterances of words separated by pauses
+
+    Times are in integer milliseconds so that boundaries are exact in every output format.
+
+    Parameters
+    ----------
+    rng : :class:`numpy.random.RandomState`
+        Random state to draw from
+    lexicon : list
+        Lexicon from :func:`generate_lexicon`
+    frequencies : :class:`numpy.ndarray`
+        Probability of each lexicon entry
+    duration : float
+        Length of the discourse in seconds
+
+    Returns
+    -------
+    list
+        List of (word, begin, end, phones) tuples, where phones is a list of (label, begin, end) tuples
+    """
+    total = int(duration * 1000)
+    words = []
+    time = 0
+    while True:
+        pause = rng.randint(*PAUSE_DURATION)
+        if time + pause >= total:
+            break
+        words.append((PAUSE_LABEL, time, time + pause, [(PAUSE_LABEL, time, time + pause)]))
+        time += pause
+        num_words = rng.randint(*UTTERANCE_WORDS)
+        for index in rng.choice(len(lexicon), size=num_words, p=frequencies):
+            label, phones = lexicon[index]
+            durations = [rng.randint(*(VOWEL_DURATION if p in VOWELS else CONSONANT_DURATION)) for p in phones]
+            if time + sum(durations) >= total:
+                break
+            begin = time
+            phone_intervals = []
+            for p, d in zip(phones, durations):
+                phone_intervals.append((p, time, time + d))
+                time += d
+            words.append((label, begin, time, phone_intervals))
+        else:
+            continue
+        break
+    if time < total:
+        words.append((PAUSE_LABEL, time, total, [(PAUSE_LABEL, time, total)]))
+    return words
+
+
+def write_textgrid(path, words, duration):
+    """
+    Write a discourse as a Montreal Forced Aligner style TextGrid with ``words`` and ``phones`` tiers
+
+    Parameters
+    ----------
+    path : str
+        Path to save the TextGrid
+    words : list
+        Output of :func:`generate_discourse`
+    duration : float
+        Length of the discourse in seconds
+    """
+    from textgrid import TextGrid, IntervalTier
+    max_time = int(duration * 1000) / 1000
+    tg = TextGrid(maxTime=max_time)
+    word_tier = IntervalTier('words', 0, max_time)
+    phone_tier = IntervalTier('phones', 0, max_time)
+    for label, begin, end, phones in words:
+        word_tier.add(begin / 1000, end / 1000, label)
+        for p, p_begin, p_end in phones:
+            phone_tier.add(p_begin / 1000, p_end / 1000, p)
+    tg.append(word_tier)
+    tg.append(phone_tier)
+    tg.write(path)
+
+
+def write_buckeye(word_path, phone_path, words):
+    """
+    Write a discourse as Buckeye style ``.words`` and ``.phones`` files
+
+    Parameters
+    ----------
+    word_path : str
+        Path to save the word file
+    phone_path : str
+        Path to save the phone file
+    words : list
+        Output of :func:`generate_discourse`
+    """
+    header = 'signal {}\nnfields 1\n#\n'
+    with open(word_path, 'w', encoding='utf8') as f:
+        f.write(header.format(os.path.splitext(os.path.basename(word_path))[0]))
+        for label, begin, end, phones in words:
+            if label == PAUSE_LABEL:
+                f.write('{:>11.6f} 122 {}; S; S; null\n'.format(end / 1000, label))
+                continue
+            transcription = ' '.join(p[0].lower() for p in phones)
+            f.write('{:>11.6f} 122 {}; {}; {}; NN\n'.format(end / 1000, label, transcription, transcription))
+    with open(phone_path, 'w', encoding='utf8') as f:
+        f.write(header.format(os.path.splitext(os.path.basename(phone_path))[0]))
+        for label, begin, end, phones in words:
+            for p, p_begin, p_end in phones:
+                if p == PAUSE_LABEL:
+                    p = 'SIL'
+                f.write('{:>11.6f} 122 {}\n'.format(p_end / 1000, p.lower()))
+
+
+def write_timit(word_path, phone_path, words, sample_rate=16000):
+    """
+    Write a discourse as TIMIT style ``.wrd`` and ``.phn`` files, with times in samples and pauses only in the
+    phone file
+
+    Parameters
+    ----------
+    word_path : str
+        Path to save the word file
+    phone_path : str
+        Path to save the phone file
+    words : list
+        Output of :func:`generate_discourse`
+    sample_rate : int
+        Sampling rate used for the times
+    """
+    factor = sample_rate // 1000
+    with open(word_path, 'w', encoding='utf8') as f:
+        for label, begin, end, phones in words:
+            if label != PAUSE_LABEL:
+                f.write('{} {} {}\n'.format(begin * factor, end * factor, label))
+    with open(phone_path, 'w', encoding='utf8') as f:
+        for label, begin, end, phones in words:
+            for p, p_begin, p_end in phones:
+                if p == PAUSE_LABEL:
+                    p = 'h#'
+                f.write('{} {} {}\n'.format(p_begin * factor, p_end * factor, p.lower()))
+
+
+def write_partitur(path, words, speaker):
+    """
+    Write a discourse as a BAS Partitur file with ``ORT``, ``KAN`` and ``MAU`` tiers, where pauses are phones
+    that belong to no word
+
+    Parameters
+    ----------
+    path : str
+        Path to save the file
+    words : list
+        Output of :func:`generate_discourse`
+    speaker : str
+        Speaker of the discourse
+    """
+    spoken = [w for w in words if w[0] != PAUSE_LABEL]
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('LHD: Partitur 1.3\nSAM: 16000\nSPN: {}\nLBD:\n'.format(speaker))
+        for i, (label, begin, end, phones) in enumerate(spoken):
+            f.write('ORT:\t{}\t{}\n'.format(i, label))
+        for i, (label, begin, end, phones) in enumerate(spoken):
+            f.write('KAN:\t{}\t{}\n'.format(i, ''.join(p[0].lower() for p in phones)))
+        index = 0
+        for label, begin, end, phones in words:
+            if label == PAUSE_LABEL:
+                f.write('MAU:\t{}\t{}\t-1\t<p:>\n'.format(begin * 10, (end - begin) * 10 - 1))
+                continue
+            for p, p_begin, p_end in phones:
+                f.write('MAU:\t{}\t{}\t{}\t{}\n'.format(p_begin * 10, (p_end - p_begin) * 10 - 1, index, p))
+            index += 1
+
+
+def synthesize_phone(rng, label, num_samples, sample_rate, f0):
+    """
+    Synthesize a crude signal for a phone: a harmonic series for vowels, low amplitude noise for consonants
+    and silence for pauses
+
+    Parameters
+    ----------
+    rng : :class:`numpy.random.RandomState`
+        Random state to draw from
+    label : str
+        Phone label
+    num_samples : int
+        Number of samples to generate
+    sample_rate : int
+        Sampling rate of the signal
+    f0 : float
+        Fundamental frequency of the speaker
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        Signal as 16-bit integers
+    """
+    if label == PAUSE_LABEL:
+        return np.zeros(num_samples, dtype=np.int16)
+    if label in VOWELS:
+        t = np.arange(num_samples) / sample_rate
+        contour = f0 * (1 + 0.05 * np.sin(2 * np.pi * 3 * t))
+        phase = 2 * np.pi * np.cumsum(contour) / sample_rate
+        signal = sum(np.sin(h * phase) / h for h in range(1, 6))
+        signal = 0.3 * signal / np.abs(signal).max()
+    else:
+        signal = 0.05 * rng.randn(num_samples)
+    return (signal * 32767).astype(np.int16)
+
+
+def write_wav(path, words, duration, sample_rate, rng, f0):
+    """
+    Write a synthetic 16-bit mono WAV file matching the phone intervals of a discourse
+
+    Parameters
+    ----------
+    path : str
+        Path to save the WAV file
+    words : list
+        Output of :func:`generate_discourse`
+    duration : float
+        Length of the discourse in seconds
+    sample_rate : int
+        Sampling rate of the file
+    rng : :class:`numpy.random.RandomState`
+        Random state to draw from
+    f0 : float
+        Fundamental frequency of the speaker
+    """
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        written = 0
+        for label, begin, end, phones in words:
+            for p, p_begin, p_end in phones:
+                num_samples = int(p_end * sample_rate / 1000) - written
+                f.writeframes(synthesize_phone(rng, p, num_samples, sample_rate, f0).tobytes())
+                written += num_samples
+        remaining = int(duration * sample_rate) - written
+        if remaining > 0:
+            f.writeframes(np.zeros(remaining, dtype=np.int16).tobytes())
+
+
+def generate_corpus(directory, num_speakers=2, num_discourses=4, hours=0.1, phones_per_word=4, num_words=500,
+                    format='mfa', audio=True, sample_rate=16000, seed=1234):
+    """
+    Generate a deterministic synthetic corpus for benchmarking
+
+    The same parameters always produce the same files, so benchmark results from different commits can be
+    compared.  Discourses are assigned to speakers in turn and share the requested number of hours equally.
+    A ``corpus.json`` file describing the parameters and size of the corpus is saved alongside the data.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to save the corpus to
+    num_speakers : int
+        Number of speakers
+    num_discourses : int
+        Number of discourses
+    hours : float
+        Total duration of the corpus in hours
+    phones_per_word : int
+        Average number of phones per word
+    num_words : int
+        Number of distinct words in the lexicon
+    format : str
+        Either ``mfa`` for TextGrids in speaker directories or ``buckeye`` for Buckeye style files
+    audio : bool
+        Whether to generate synthetic WAV files for each discourse
+    sample_rate : int
+        Sampling rate of the WAV files
+    seed : int
+        Seed for the random state
+
+    Returns
+    -------
+    dict
+        Parameters and size of the corpus
+    """
+    if format not in FORMATS:
+        raise ValueError('Format must be one of: {}.'.format(', '.join(FORMATS)))
+    if num_speakers < 1 or num_discourses < num_speakers:
+        raise ValueError('There must be at least one speaker and at least one discourse per speaker.')
+    rng = np.random.RandomState(seed)
+    lexicon = generate_lexicon(rng, num_words, phones_per_word)
+    frequencies = word_frequencies(len(lexicon))
+    duration = hours * 3600 / num_discourses
+    speakers = ['s{:02d}'.format(i + 1) for i in range(num_speakers)]
+    f0s = {s: float(rng.uniform(90, 230)) for s in speakers}
+    os.makedirs(directory, exist_ok=True)
+    summary = {'num_speakers': num_speakers, 'num_discourses': num_discourses, 'hours': hours,
+               'phones_per_word': phones_per_word, 'num_words': num_words, 'format': format,
+               'audio': audio, 'sample_rate': sample_rate, 'seed': seed,
+               'word_tokens': 0, 'phone_tokens': 0, 'pauses': 0, 'discourses': []}
+    for i in range(num_discourses):
+        speaker = speakers[i % num_speakers]
+        name = '{}{:04d}'.format(speaker, i + 1)
+        words = generate_discourse(rng, lexicon, frequencies, duration)
+        if format == 'mfa':
+            speaker_dir = os.path.join(directory, speaker)
+            os.makedirs(speaker_dir, exist_ok=True)
+            base = os.path.join(speaker_dir, name)
+            write_textgrid(base + '.TextGrid', words, duration)
+        else:
+            base = os.path.join(directory, name)
+            write_buckeye(base + '.words', base + '.phones', words)
+        if audio:
+            write_wav(base + '.wav', words, duration, sample_rate, rng, f0s[speaker])
+        pauses = sum(1 for w in words if w[0] == PAUSE_LABEL)
+        summary['pauses'] += pauses
+        summary['word_tokens'] += len(words) - pauses
+        summary['phone_tokens'] += sum(len(w[3]) for w in words if w[0] != PAUSE_LABEL)
+        summary['discourses'].append(name)
+    with open(os.path.join(directory, 'corpus.json'), 'w', encoding='utf8') as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+    return summary
@@ -6,11 +6,7 @@ __version__ = "%d.%d.%d" % __ver_tuple__
 
 __all__ = ['query', 'io', 'corpus', 'config', 'exceptions', 'CorpusContext', 'CorpusConfig']
 
-import polyglotdb.query.annotations as graph
-
-import polyglotdb.io as io
-
-import polyglotdb.corpus as corpus
+import importlib
 
 import polyglotdb.exceptions as exceptions
 
@@ -18,4 +14,25 @@ import polyglotdb.config as config
 
 CorpusConfig = config.CorpusConfig
 
-CorpusContext = corpus.CorpusContext
+# Submodules that pull in the database drivers, parsers and signal processing stack are imported on first use
+_lazy_modules = {
+    'graph': 'polyglotdb.query.annotations',
+    'query': 'polyglotdb.query',
+    'io': 'polyglotdb.io',
+    'corpus': 'polyglotdb.corpus',
+}
+
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        value = importlib.import_module(_lazy_modules[name])
+    elif name == 'CorpusContext':
+        value = importlib.import_module('polyglotdb.corpus').CorpusContext
+    else:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_modules) + ['CorpusContext'])
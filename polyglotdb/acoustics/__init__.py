@@ -1,9 +1,31 @@
-from .formants import analyze_formant_points, analyze_formant_points_refinement, analyze_formant_tracks
+import importlib
 
-from .pitch import analyze_pitch, analyze_utterance_pitch, update_utterance_pitch_track
+# Analysis functions depend on the signal processing stack (conch, librosa and scipy), so they are only imported
+# when first used
+_lazy_imports = {
+    'analyze_formant_points': '.formants',
+    'analyze_formant_points_refinement': '.formants',
+    'analyze_formant_tracks': '.formants',
+    'analyze_pitch': '.pitch',
+    'analyze_utterance_pitch': '.pitch',
+    'update_utterance_pitch_track': '.pitch',
+    'update_utterance_pitch_tracks': '.pitch',
+    'analyze_vot': '.vot',
+    'analyze_intensity': '.intensity',
+    'analyze_script': '.other',
+    'analyze_track_script': '.other',
+}
 
-from .vot import analyze_vot
+__all__ = sorted(_lazy_imports)
 
-from .intensity import analyze_intensity
 
-from .other import analyze_script, analyze_track_script
+def __getattr__(name):
+    if name in _lazy_imports:
+        value = getattr(importlib.import_module(_lazy_imports[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
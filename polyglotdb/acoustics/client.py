@@ -0,0 +1,332 @@
+import numbers
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+WRITE_BATCH_SIZE = 5000
+
+FLUSH_INTERVAL = 1.0
+
+MAX_PENDING = 50000
+
+WRITE_RETRIES = 3
+
+RETRY_DELAY = 0.5
+
+READ_DEPTH = 4
+
+NANOSECONDS_PER_UNIT = {'n': 1, 'u': 10 ** 3, 'ms': 10 ** 6, 's': 10 ** 9, 'm': 60 * 10 ** 9, 'h': 3600 * 10 ** 9}
+
+
+def transient_errors():
+    """
+    Get the exception types of InfluxDB failures that are worth retrying: connection problems, timeouts and
+    server (5xx) errors.  Client (4xx) errors, such as malformed points, are not retried.
+
+    Returns
+    -------
+    tuple
+        Exception types
+    """
+    from influxdb.exceptions import InfluxDBServerError
+    from requests.exceptions import ConnectionError, Timeout
+    return InfluxDBServerError, ConnectionError, Timeout
+
+
+def convert_time(time_point, from_precision, to_precision):
+    """
+    Convert an integer time stamp between InfluxDB precisions
+
+    Parameters
+    ----------
+    time_point : int
+        Time stamp
+    from_precision : str
+        Precision of the time stamp, one of ``'n'``, ``'u'``, ``'ms'``, ``'s'``, ``'m'`` or ``'h'``
+    to_precision : str
+        Precision to convert to
+
+    Returns
+    -------
+    int
+        Time stamp in the new precision, truncated if the new precision is coarser
+    """
+    if from_precision == to_precision:
+        return time_point
+    return int(time_point) * NANOSECONDS_PER_UNIT[from_precision] // NANOSECONDS_PER_UNIT[to_precision]
+
+
+def points_to_lines(points, time_precision='ms', write_precision=None):
+    """
+    Convert points to InfluxDB line protocol
+
+    A point can give the precision of its own time with a ``time_precision`` key, so that points of different
+    precisions can be sent in the same request.
+
+    Parameters
+    ----------
+    points : list
+        Points as dictionaries with ``measurement``, ``tags``, ``time`` and ``fields`` keys
+    time_precision : str
+        Precision of the times of points without their own ``time_precision``
+    write_precision : str, optional
+        Precision of the times in the lines, defaults to ``time_precision``
+
+    Returns
+    -------
+    list
+        Lines of line protocol
+    """
+    from influxdb.line_protocol import make_line
+    if write_precision is None:
+        write_precision = time_precision
+    lines = []
+    for p in points:
+        time_point = p.get('time')
+        if isinstance(time_point, numbers.Integral):
+            time_point = convert_time(time_point, p.get('time_precision', time_precision), write_precision)
+        lines.append(make_line(p['measurement'], tags=p.get('tags') or {}, fields=p.get('fields'),
+                               precision=write_precision, time=time_point))
+    return lines
+
+
+class BatchingWriter(object):
+    """
+    Buffers points for an InfluxDB database and writes them in batches from a background thread
+
+    Points are converted to line protocol as they are added and sent once a full batch has accumulated or
+    ``flush_interval`` seconds have passed.  Adding points blocks while ``max_pending`` points are waiting to be
+    sent, so that producers cannot outrun the database.  Writes that fail because of connection or server errors
+    are retried with exponential backoff; any other failure is raised from the next call to :meth:`write`,
+    :meth:`flush` or :meth:`close`, and the points that were waiting are discarded.
+
+    Parameters
+    ----------
+    client : :class:`influxdb.InfluxDBClient`
+        Client to write with
+    batch_size : int
+        Number of points per write
+    flush_interval : float
+        Maximum number of seconds to buffer points before writing them
+    max_pending : int
+        Number of buffered points at which :meth:`write` blocks
+    max_retries : int
+        Number of times to retry a batch after a transient failure
+    retry_delay : float
+        Seconds to wait before the first retry, doubling for each later retry
+    time_precision : str
+        Precision of the times of points without their own ``time_precision``
+    write_precision : str
+        Precision of the times sent to the database, fine enough for every point added
+    """
+
+    def __init__(self, client, batch_size=WRITE_BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING,
+                 max_retries=WRITE_RETRIES, retry_delay=RETRY_DELAY, time_precision='ms', write_precision='n'):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, batch_size)
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.time_precision = time_precision
+        self.write_precision = write_precision
+        self._lines = deque()
+        self._in_flight = 0
+        self._flush_waiters = 0
+        self._error = None
+        self._closed = False
+        self._thread = None
+        self._condition = threading.Condition()
+        self.points_written = 0
+        self.batches_written = 0
+        self.retries = 0
+        self.write_time = 0.0
+
+    @property
+    def pending(self):
+        """
+        Number of points that have been added but not yet written
+        """
+        with self._condition:
+            return len(self._lines) + self._in_flight
+
+    def statistics(self):
+        """
+        Get the throughput of the writer
+
+        Returns
+        -------
+        dict
+            Numbers of points and batches written, retries and points waiting, and the time spent writing and
+            points written per second of writing
+        """
+        with self._condition:
+            return {'points': self.points_written,
+                    'batches': self.batches_written,
+                    'retries': self.retries,
+                    'pending': len(self._lines) + self._in_flight,
+                    'seconds': self.write_time,
+                    'points_per_second': self.points_written / self.write_time if self.write_time else 0.0}
+
+    def write(self, points):
+        """
+        Add points to be written
+
+        Parameters
+        ----------
+        points : iterable
+            Points as dictionaries with ``measurement``, ``tags``, ``time`` and ``fields`` keys, and optionally
+            the ``time_precision`` of their time
+        """
+        lines = points_to_lines(points, self.time_precision, self.write_precision)
+        if not lines:
+            return
+        with self._condition:
+            self._raise_error()
+            if self._closed:
+                raise RuntimeError('Cannot write to a closed writer.')
+            self._start()
+            for i in range(0, len(lines), self.batch_size):
+                while len(self._lines) + self._in_flight >= self.max_pending and self._error is None:
+                    self._condition.wait()
+                self._raise_error()
+                self._lines.extend(lines[i:i + self.batch_size])
+                if len(self._lines) >= self.batch_size:
+                    self._condition.notify_all()
+
+    def flush(self):
+        """
+        Block until all added points have been written
+        """
+        with self._condition:
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            try:
+                while (self._lines or self._in_flight) and self._error is None:
+                    self._condition.wait()
+            finally:
+                self._flush_waiters -= 1
+            self._raise_error()
+
+    def discard(self):
+        """
+        Drop any points that have not been sent yet, waiting for the batch being sent to finish, and clear the
+        error of any failed batch
+        """
+        with self._condition:
+            self._lines.clear()
+            self._condition.notify_all()
+            while self._in_flight:
+                self._condition.wait()
+            self._error = None
+
+    def close(self, flush=True):
+        """
+        Stop the background thread
+
+        Parameters
+        ----------
+        flush : bool
+            Whether to write the remaining points first, otherwise they are discarded
+        """
+        if not flush:
+            self.discard()
+        try:
+            self.flush()
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+            if self._thread is not None:
+                self._thread.join()
+                self._thread = None
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='polyglotdb-acoustic-writer', daemon=True)
+            self._thread.start()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._lines) < self.batch_size and not self._flush_waiters and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._lines:
+                    if self._closed:
+                        return
+                    continue
+                batch = [self._lines.popleft() for _ in range(min(self.batch_size, len(self._lines)))]
+                self._in_flight = len(batch)
+            error = None
+            try:
+                self._send(batch)
+            except Exception as e:
+                error = e
+            with self._condition:
+                self._in_flight = 0
+                if error is not None:
+                    self._error = error
+                    self._lines.clear()
+                self._condition.notify_all()
+
+    def _send(self, batch):
+        errors = transient_errors()
+        for attempt in range(self.max_retries + 1):
+            begin = time.perf_counter()
+            try:
+                self.client.write_points(batch, time_precision=self.write_precision, protocol='line')
+            except errors:
+                if attempt == self.max_retries:
+                    raise
+                with self._condition:
+                    self.retries += 1
+                time.sleep(self.retry_delay * 2 ** attempt)
+                continue
+            with self._condition:
+                self.write_time += time.perf_counter() - begin
+                self.points_written += len(batch)
+                self.batches_written += 1
+            return
+
+
+def pipelined_queries(client, queries, epoch=None, depth=READ_DEPTH):
+    """
+    Run InfluxDB queries with several in flight at once, yielding results in the order of the queries
+
+    At most ``depth`` results are held at a time, so memory stays bounded however many queries are run.
+
+    Parameters
+    ----------
+    client : :class:`influxdb.InfluxDBClient`
+        Client to query with, which should allow at least ``depth`` simultaneous connections
+    queries : iterable
+        Queries to run
+    epoch : str, optional
+        Precision of integer time stamps to return
+    depth : int
+        Number of queries to keep in flight
+
+    Yields
+    ------
+    :class:`influxdb.resultset.ResultSet`
+        Results of each query
+    """
+    depth = max(depth, 1)
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        in_flight = deque()
+        for q in queries:
+            in_flight.append(executor.submit(client.query, q, epoch=epoch))
+            if len(in_flight) >= depth:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
@@ -87,6 +87,9 @@ def analyze_formant_tracks(corpus_context, vowel_label=None, source='praat', cal
             formant_function = generate_base_formants_function(corpus_context, gender=gender, source=source)
         else:
             formant_function = generate_base_formants_function(corpus_context, source=source)
-        output = analyze_segments(v, formant_function, stop_check=stop_check, multiprocessing=multiprocessing)
+        with corpus_context.span('analysis_batch', analysis='formants', source=source, speaker=speaker,
+                                 segments=len(v)):
+            output = analyze_segments(v, formant_function, stop_check=stop_check, multiprocessing=multiprocessing)
         corpus_context.save_acoustic_tracks('formants', output, speaker)
 
+    corpus_context.flush_acoustic_writes()
@@ -2,6 +2,7 @@ import os
 import sys
 from functools import partial
 import csv
+from collections import defaultdict
 
 from statistics import mean, stdev
 import numpy as np
@@ -18,7 +19,7 @@ from pyraat.parse_outputs import parse_point_script_output
 
 from ...exceptions import AcousticError
 
-from ..io import point_measures_from_csv, point_measures_to_csv
+from ..io import save_point_measures
 
 from ..classes import Track, TimePoint
 
@@ -160,42 +161,34 @@ def get_mean_SD(data, prototype_parameters=None):
     """
     if prototype_parameters is None:
         prototype_parameters = ['F1', 'F2', 'F3', 'B1', 'B2', 'B3']
-    metadata = {}
-    phones = set()
+    observations = defaultdict(list)
     for seg, value in data.items():
-        phones.add(seg['label'])
-
-    for phone in phones:
-
-        observation_list = []
-        for seg, value in data.items():
-            if seg['label'] == phone:
-                observation = [value[pp] for pp in prototype_parameters]
-                # observation = [
-                #     value['F1'],
-                #     value['F2'],
-                #     value['F3'],
-                #     value['B1'],
-                #     value['B2'],
-                #     value['B3']
-                # ]
-                observation_list.append([x if x else 0 for x in observation])
-
-        # f1_mean, f2_mean, f3_mean = mean(x[0] for x in observation_list), mean(x[1] for x in observation_list), mean(
-        #     x[2] for x in observation_list)
-        # b1_mean, b2_mean, b3_mean = mean(x[3] for x in observation_list), mean(x[4] for x in observation_list), mean(
-        #     x[5] for x in observation_list)
-        # all_means = [f1_mean, f2_mean, f3_mean, b1_mean, b2_mean, b3_mean]
-        all_means = [mean(x[i] for x in observation_list) for i, pp in enumerate(prototype_parameters)]
-
-        observation_list = np.array(observation_list)
-        cov = np.cov(observation_list.T)
-
-        measurements = [all_means, cov.tolist()]
-        metadata[phone] = measurements
+        observation = [value[pp] for pp in prototype_parameters]
+        observations[seg['label']].append([x if x else 0 for x in observation])
+
+    metadata = {}
+    for phone, observation_list in observations.items():
+        observation_list = np.array(observation_list, dtype=float)
+        metadata[phone] = get_mean_covariance(observation_list)
     return metadata
 
 
+def get_mean_covariance(observations):
+    """Gets the mean and covariance matrix of a set of observations.
+
+    Parameters
+    ----------
+    observations : :class:`numpy.ndarray`
+        Array of observations, with one row per observation and one column per parameter.
+
+    Returns
+    -------
+    list
+        The means of each parameter and the covariance matrix, as lists.
+    """
+    return [observations.mean(axis=0).tolist(), np.cov(observations.T).tolist()]
+
+
 def get_mahalanobis(prototype, observation, inverse_covariance):
     """Gets the Mahalanobis distance between an observation and the prototype.
 
@@ -224,7 +217,6 @@ def save_formant_point_data(corpus_context, data, num_formants=False):
     header = ['id', 'F1', 'F2', 'F3', 'B1', 'B2', 'B3', 'A1', 'A2', 'A3', 'Ax', 'drop_formant']
     if num_formants:
         header += ['num_formants']
-    point_measures_to_csv(corpus_context, data, header)
     header_info = {}
     for h in header:
         if h == 'id':
@@ -235,7 +227,7 @@ def save_formant_point_data(corpus_context, data, num_formants=False):
         #     header_info[h] = str
         else:
             header_info[h] = int
-    point_measures_from_csv(corpus_context, header_info)
+    save_point_measures(corpus_context, data, header_info)
 
 def extract_and_save_formant_tracks(corpus_context, data, num_formants=False, stop_check=None, multiprocessing=True):
     '''This function takes a dictionary with the best parameters for each vowels, then recalculates the formants
@@ -284,6 +276,7 @@ def extract_and_save_formant_tracks(corpus_context, data, num_formants=False, st
 
     for speaker, track_dict in tracks.items():
         corpus_context.save_acoustic_tracks('formants', track_dict, speaker)
+    corpus_context.flush_acoustic_writes()
 
 
 def generate_base_formants_function(corpus_context, gender=None, source='praat'):
@@ -319,3 +312,25 @@ def generate_base_formants_function(corpus_context, gender=None, source='praat')
                                                 time_step=0.01, num_formants=5,
                                                 window_length=0.025)
     return formant_function
+
+
+def get_mahalanobis_batch(prototype, observations, inverse_covariance):
+    """Gets the Mahalanobis distances between the prototype and any number of observations at once.
+
+    Parameters
+    ----------
+    prototype : list
+        Prototype data.
+    observations : :class:`numpy.ndarray`
+        Observations of vowel instances, the last axis must match the length of the prototype.
+    inverse_covariance : list
+        The inverse of the covariance matrix for the vowel class.
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        The Mahalanobis distances, with the shape of ``observations`` minus its last axis.
+    """
+    difference = np.asarray(observations, dtype=float) - np.asarray(prototype, dtype=float)
+    squared = np.einsum('...i,ij,...j->...', difference, np.asarray(inverse_covariance, dtype=float), difference)
+    return np.sqrt(np.maximum(squared, 0))
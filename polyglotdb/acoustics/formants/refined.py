@@ -1,284 +1,356 @@
-import math
-import os
-import numpy as np
-
-from conch import analyze_segments
-
-from ..segments import generate_vowel_segments
-from .helper import generate_variable_formants_point_function, get_mahalanobis, get_mean_SD, save_formant_point_data, extract_and_save_formant_tracks
-
-
-def read_prototypes(vowel_prototypes_path):
-    """Reads pre-measured means and covariance matrices from a file.
-    """
-    # print ('READING PROTOTYPES FROM /phon/SPADE/test_priors.csv')
-    # print ('READING PROTOTYPES FROM /phon/SPADE/ral_prototypes.csv')
-    means_covar_d = {}
-
-    with open(vowel_prototypes_path) as means_covar_file:
-        means_covar_lines = means_covar_file.readlines()
-        means_covar_header = means_covar_lines.pop(0)
-        prototype_parameters = means_covar_header.strip().split(',')
-        prototype_parameters = [p.split('_')[0] for p in prototype_parameters if not p in ['type', 'phone']]
-        print(
-            'READING PROTOTYPES FROM ' + vowel_prototypes_path + ' with parameters ' + ', '.join(prototype_parameters))
-        for line in means_covar_lines:
-            splitline = line.strip().split(',')
-            means_covar_info_type = splitline[0]
-            means_covar_phone = splitline[1]
-            means_covar_values = [float(v) for v in splitline[2:]]
-
-            if not means_covar_phone in means_covar_d:
-                means_covar_d[means_covar_phone] = [[], []]
-
-            if means_covar_info_type == 'means':
-                means_covar_d[means_covar_phone][0] = means_covar_values
-            elif means_covar_info_type == 'matrix':
-                means_covar_d[means_covar_phone][1].append(means_covar_values)
-
-    return means_covar_d, prototype_parameters
-
-
-def analyze_formant_points_refinement(corpus_context, vowel_label='vowel', duration_threshold=0, num_iterations=1,
-                                      call_back=None,
-                                      stop_check=None,
-                                      vowel_prototypes_path='',
-                                      drop_formant=False,
-                                      multiprocessing=True,
-                                      output_tracks=False
-                                      ):
-    """Extracts F1, F2, F3 and B1, B2, B3.
-
-    Parameters
-    ----------
-    corpus_context : :class:`~polyglot.corpus.context.CorpusContext`
-        The CorpusContext object of the corpus.
-    vowel_label : str
-        The subset of phones to analyze.
-    duration_threshold : float, optional
-        Segments with length shorter than this value (in milliseconds) will not be analyzed.
-    num_iterations : int, optional
-        How many times the algorithm should iterate before returning values.
-    output_tracks : bool, optional
-        Whether to save only the formant values as a point at 0.33 if false or have a track over the entire
-        vowel duration if true.
-
-    Returns
-    -------
-    prototype_metadata : dict
-        Means of F1, F2, F3, B1, B2, B3 and covariance matrices per vowel class.
-    """
-    if not corpus_context.hierarchy.has_type_subset('phone', vowel_label) and not corpus_context.hierarchy.has_token_subset('phone', vowel_label):
-        raise Exception('Phones do not have a "{}" subset.'.format(vowel_label))
-    # ------------- Step 2: Varying formants -------------
-    # Encodes vowel inventory into a phone class if it's specified
-
-    use_vowel_prototypes = vowel_prototypes_path and os.path.exists(vowel_prototypes_path)
-    base_formant_columns = ['F1', 'F2', 'F3', 'B1', 'B2', 'B3']
-    if use_vowel_prototypes:
-        vowel_prototype_metadata, prototype_parameters = read_prototypes(vowel_prototypes_path)
-    else:
-        prototype_parameters = base_formant_columns
-
-    # Gets segment mapping of phones that are vowels
-    segment_mapping = generate_vowel_segments(corpus_context, duration_threshold=duration_threshold, padding=0.1,
-                                              vowel_label=vowel_label)
-    best_data = {}
-
-    # we used to have just columns, a list of output columns and prototype columns. Now these are not the same thing
-    # so we have extra_columns (a list of columns in the output but not the prototypes) and prototype_parameters (a list of columns in the prototypes)
-    # columns = ['F1', 'F2', 'F3', 'B1', 'B2', 'B3']
-    # extra_columns = ['A1', 'A2', 'A3', 'Ax']
-    output_columns = ['F1', 'F2', 'F3', 'B1', 'B2', 'B3', 'A1', 'A2', 'A3', 'Ax', 'A1A2diff', 'A2A3diff']
-
-    # print ('columns:', columns)
-    # print ('extra_columns:', extra_columns)
-    # print('output_columns:', output_columns)
-
-    log_output = []
-    # Measure with varying levels of formants
-    min_formants = 4  # Off by one error, due to how Praat measures it from F0
-    # This really measures with 3 formants: F1, F2, F3. And so on.
-    if drop_formant:
-        max_formants = 8
-    else:
-        max_formants = 7
-    default_formant = 5
-    formant_function = generate_variable_formants_point_function(corpus_context, min_formants, max_formants)
-    best_prototype_metadata = {}
-
-    # For each vowel token, collect the formant measurements
-    # Pick the best track that is closest to the averages gotten from prototypes
-
-    total_speaker_vowel_pairs = len(segment_mapping.grouped_mapping('speaker', 'label').items())
-    for i, ((speaker, vowel), seg) in enumerate(segment_mapping.grouped_mapping('speaker', 'label').items()):
-
-        if len(seg) == 0:
-            continue
-        print(speaker + ' ' + vowel + ': ' + str(i + 1) + ' of ' + str(total_speaker_vowel_pairs) + ': ' + str(
-            len(seg)) + ' tokens')
-        output = analyze_segments(seg, formant_function, stop_check=stop_check,
-                                  multiprocessing=multiprocessing)  # Analyze the phone
-
-        if len(seg) < 6:
-            print("Not enough observations of vowel {}, at least 6 are needed, only found {}.".format(vowel, len(seg)))
-            for s, data in output.items():
-                best_track = data[default_formant]
-                best_data[s] = {k: best_track[k] for j, k in enumerate(base_formant_columns)}
-            continue
-
-        if drop_formant:
-            # ADD ALL THE LEAVE-ONE-OUT CANDIDATES
-            for s, data in output.items():
-                new_data = {}
-                ignored_candidates = []
-                for candidate, measurements in data.items():
-
-                    try:
-                        As = [measurements['A1'], measurements['A2'], measurements['A3'], measurements['A4']]
-                        Fs = [math.log2(measurements['F1']), math.log2(measurements['F2']),
-                              math.log2(measurements['F3']), math.log2(measurements['F4'])]
-                        Farray = np.array([Fs, np.ones(len(Fs))])
-                        [slope, intercept] = np.linalg.lstsq(Farray.T, As)[0]
-
-                    except:
-                        try:
-                            As = [measurements['A1'], measurements['A2'], measurements['A3']]
-                            Fs = [math.log2(measurements['F1']), math.log2(measurements['F2']),
-                                  math.log2(measurements['F3'])]
-                            Farray = np.array([Fs, np.ones(len(Fs))])
-                            [slope, intercept] = np.linalg.lstsq(Farray.T, As)[0]
-
-                        except:
-                            try:
-                                As = [measurements['A1'], measurements['A2']]
-                                Fs = [math.log2(measurements['F1']), math.log2(measurements['F2'])]
-                                [slope, intercept] = [0, 0]
-                            except:
-                                # Lack of formants for these settings
-                                ignored_candidates.append(candidate)
-                                continue
-
-                    for leave_out in range(1, 1 + min(3, candidate)):
-                        new_measurements = {}
-                        new_measurements['Ax'] = measurements['A' + str(leave_out)]
-                        candidate_name = str(candidate) + 'x' + str(leave_out)
-
-                        if leave_out < len(As) and As[leave_out - 1] < intercept + slope * Fs[leave_out - 1]:
-                            this_is_droppable = True
-                        else:
-                            this_is_droppable = False
-                        if this_is_droppable:
-                            for parameter in measurements.keys():
-                                if int(parameter[-1]) < leave_out:
-                                    new_measurements[parameter] = measurements[parameter]
-                                elif int(parameter[-1]) > leave_out:
-                                    new_measurements[parameter[0] + str(int(parameter[-1]) - 1)] = measurements[
-                                        parameter]
-                            new_data[candidate_name] = new_measurements
-
-                    data[candidate]['Ax'] = data[candidate]['A4']
-                data = {k: v for k,v in data.items() if k not in ignored_candidates}
-                output[s] = {**data, **new_data}
-        else:
-            for s, data in output.items():
-                for candidate, measurements in data.items():
-                    output[s][candidate]['Ax'] = output[s][candidate]['A4']
-        output = {k: v for k,v in output.items() if v}
-        for s, data in output.items():
-            for candidate, measurements in data.items():
-                try:
-                    output[s][candidate]['A1A2diff'] = data[candidate]['A1'] - data[candidate]['A2']
-                    try:
-                        output[s][candidate]['A2A3diff'] = data[candidate]['A2'] - data[candidate]['A3']
-                    except:
-                        try:
-                            output[s][candidate]['A2A3diff'] = data[candidate]['A2']
-                        except:
-                            output[s][candidate]['A2A3diff'] = 0
-                except:
-                    try:
-                        output[s][candidate]['A1A2diff'] = data[candidate]['A1']
-                    except:
-                        output[s][candidate]['A1A2diff'] = 0
-                    output[s][candidate]['A2A3diff'] = 0
-        selected_tracks = {}
-        for s, data in output.items():
-
-            try:
-                selected_tracks[s] = data[default_formant]
-            except:
-                print(s)
-                print(data)
-                raise
-        if not use_vowel_prototypes:
-            print('no prototypes, using get_mean_SD()')
-            prev_prototype_metadata = get_mean_SD(selected_tracks, prototype_parameters)
-        elif not vowel in vowel_prototype_metadata:
-            print('no prototype for', vowel, 'so using get_mean_SD()')
-            prev_prototype_metadata = get_mean_SD(selected_tracks, prototype_parameters)
-        else:
-            prev_prototype_metadata = vowel_prototype_metadata
-
-        if num_iterations > 1 and len(seg) < 6:
-            print("Skipping iterations for vowel {}, at least 6 tokens are needed, only found {}.".format(vowel,
-                                                                                                          len(seg)))
-            my_iterations = [0]
-        else:
-            my_iterations = range(num_iterations)
-        for _ in my_iterations:
-            best_numbers = []
-            selected_tracks = {}
-            prototype_means = prev_prototype_metadata[vowel][0]
-            # Get Mahalanobis distance between every new observation and the sample/means
-            covariance = np.array(prev_prototype_metadata[vowel][1])
-            inverse_covariance = np.linalg.pinv(covariance)
-            best_number = 5
-            for s, data in output.items():
-                best_distance = math.inf
-                best_track = 0
-                for number, point in data.items():
-                    point = [point[x] if point[x] else 0 for x in prototype_parameters]
-                    distance = get_mahalanobis(prototype_means, point, inverse_covariance)
-                    if distance < best_distance:  # Update "best" measures when new best distance is found
-                        best_distance = distance
-                        best_track = point
-                        best_number = number
-                # selected_tracks[s] = {k: best_track[i] for i, k in enumerate(columns)}
-                selected_tracks[s] = {k: best_track[i] for i, k in enumerate(prototype_parameters)}
-                # best_data[s] = {k: best_track[i] for i, k in enumerate(output_columns)}
-                # best_data[s] = {k: best_track[i] for i, k in enumerate(columns)}
-                best_data[s] = {}
-                for output_column in output_columns:
-                    best_data[s][output_column] = output[s][best_number][output_column]
-
-                best_data[s]['num_formants'] = float(str(best_number).split('x')[0])
-                best_data[s]['Fx'] = int(str(best_number)[0])
-                if 'x' in str(best_number):
-                    best_data[s]['drop_formant'] = int(str(best_number).split('x')[-1])
-                else:
-                        best_data[s]['drop_formant'] = 0
-
-                best_numbers.append(best_number)
-
-            if len(seg) >= 6:
-                prototype_metadata = get_mean_SD(selected_tracks, prototype_parameters)
-                prev_prototype_metadata = prototype_metadata
-                best_prototype_metadata.update(prototype_metadata)
-
-            if _ > 0:
-                changed_numbers = 0
-                for i, bn in enumerate(best_numbers):
-                    if bn != last_iteration_best_numbers[i]:
-                        changed_numbers += 1
-                if changed_numbers == 0:
-                    break
-            last_iteration_best_numbers = best_numbers
-        log_output.append([speaker, vowel, str(len(output)), str(_ + 1)])
-    for i in log_output:
-        print('Speaker {} for vowel {} had {} tokens and completed refinement in {} iterations'.format(*i))
-    if output_tracks:
-        extract_and_save_formant_tracks(corpus_context, best_data, num_formants=True, multiprocessing=multiprocessing, stop_check=stop_check)
-    else:
-        save_formant_point_data(corpus_context, best_data, num_formants=True)
-    return best_prototype_metadata
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from conch import analyze_segments
+
+from ...exceptions import AcousticError
+from ..segments import generate_vowel_segments
+from .helper import generate_variable_formants_point_function, get_mean_SD, get_mean_covariance, \
+    get_mahalanobis_batch, save_formant_point_data, extract_and_save_formant_tracks
+
+BASE_FORMANT_COLUMNS = ['F1', 'F2', 'F3', 'B1', 'B2', 'B3']
+
+OUTPUT_COLUMNS = ['F1', 'F2', 'F3', 'B1', 'B2', 'B3', 'A1', 'A2', 'A3', 'Ax', 'A1A2diff', 'A2A3diff']
+
+DEFAULT_FORMANT = 5
+
+MINIMUM_TOKENS = 6
+
+
+def read_prototypes(vowel_prototypes_path):
+    """Reads pre-measured means and covariance matrices from a file.
+    """
+    # print ('READING PROTOTYPES FROM /phon/SPADE/test_priors.csv')
+    # print ('READING PROTOTYPES FROM /phon/SPADE/ral_prototypes.csv')
+    means_covar_d = {}
+
+    with open(vowel_prototypes_path) as means_covar_file:
+        means_covar_lines = means_covar_file.readlines()
+        means_covar_header = means_covar_lines.pop(0)
+        prototype_parameters = means_covar_header.strip().split(',')
+        prototype_parameters = [p.split('_')[0] for p in prototype_parameters if not p in ['type', 'phone']]
+        print(
+            'READING PROTOTYPES FROM ' + vowel_prototypes_path + ' with parameters ' + ', '.join(prototype_parameters))
+        for line in means_covar_lines:
+            splitline = line.strip().split(',')
+            means_covar_info_type = splitline[0]
+            means_covar_phone = splitline[1]
+            means_covar_values = [float(v) for v in splitline[2:]]
+
+            if not means_covar_phone in means_covar_d:
+                means_covar_d[means_covar_phone] = [[], []]
+
+            if means_covar_info_type == 'means':
+                means_covar_d[means_covar_phone][0] = means_covar_values
+            elif means_covar_info_type == 'matrix':
+                means_covar_d[means_covar_phone][1].append(means_covar_values)
+
+    return means_covar_d, prototype_parameters
+
+
+def _amplitude_fit(measurements):
+    """Fits a line to amplitudes over log frequencies, using as many of the first four formants as are available."""
+    for num_formants in (4, 3):
+        try:
+            amplitudes = [measurements['A{}'.format(i)] for i in range(1, num_formants + 1)]
+            frequencies = [math.log2(measurements['F{}'.format(i)]) for i in range(1, num_formants + 1)]
+            slope, intercept = np.polyfit(frequencies, amplitudes, 1)
+            return amplitudes, frequencies, slope, intercept
+        except (KeyError, TypeError, ValueError, np.linalg.LinAlgError):
+            continue
+    try:
+        amplitudes = [measurements['A1'], measurements['A2']]
+        frequencies = [math.log2(measurements['F1']), math.log2(measurements['F2'])]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return amplitudes, frequencies, 0, 0
+
+
+def add_leave_one_out_candidates(data):
+    """Adds candidates that drop one of the first three formants, when that formant's amplitude is below the
+    amplitude trend line of the candidate.
+
+    Parameters
+    ----------
+    data : dict
+        Measurements of a single token, keyed by the number of formants used
+
+    Returns
+    -------
+    dict
+        Measurements for the original candidates that had enough formants to assess, and for each droppable
+        formant, keyed by strings like ``'5x2'``
+    """
+    candidates = {}
+    dropped = {}
+    for candidate, measurements in data.items():
+        fit = _amplitude_fit(measurements)
+        if fit is None:
+            # Lack of formants for these settings
+            continue
+        amplitudes, frequencies, slope, intercept = fit
+        for leave_out in range(1, 1 + min(3, candidate)):
+            if leave_out >= len(amplitudes) or \
+                    amplitudes[leave_out - 1] >= intercept + slope * frequencies[leave_out - 1]:
+                continue
+            new_measurements = {'Ax': measurements['A' + str(leave_out)]}
+            for parameter, value in measurements.items():
+                number = int(parameter[-1])
+                if number < leave_out:
+                    new_measurements[parameter] = value
+                elif number > leave_out:
+                    new_measurements[parameter[0] + str(number - 1)] = value
+            dropped['{}x{}'.format(candidate, leave_out)] = new_measurements
+        measurements['Ax'] = measurements.get('A4')
+        candidates[candidate] = measurements
+    candidates.update(dropped)
+    return candidates
+
+
+def _add_amplitude_differences(measurements):
+    try:
+        measurements['A1A2diff'] = measurements['A1'] - measurements['A2']
+    except (KeyError, TypeError):
+        measurements['A1A2diff'] = measurements.get('A1') or 0
+        measurements['A2A3diff'] = 0
+        return
+    try:
+        measurements['A2A3diff'] = measurements['A2'] - measurements['A3']
+    except (KeyError, TypeError):
+        measurements['A2A3diff'] = measurements['A2']
+
+
+def candidate_array(output, prototype_parameters):
+    """Collects formant candidates for a set of tokens into a dense array.
+
+    Parameters
+    ----------
+    output : dict
+        Candidate measurements per token
+    prototype_parameters : list
+        Parameters to include in the array
+
+    Returns
+    -------
+    list
+        Tokens, in the order of the first axis
+    list
+        Candidate names, in the order of the second axis
+    :class:`numpy.ndarray`
+        Array of tokens by candidates by parameters, missing values are 0
+    :class:`numpy.ndarray`
+        Boolean array of tokens by candidates for whether the token has a measurement for the candidate
+    """
+    segments = list(output.keys())
+    candidates = list(dict.fromkeys(c for data in output.values() for c in data))
+    candidate_indices = {c: i for i, c in enumerate(candidates)}
+    values = np.zeros((len(segments), len(candidates), len(prototype_parameters)))
+    present = np.zeros((len(segments), len(candidates)), dtype=bool)
+    for i, s in enumerate(segments):
+        for candidate, measurements in output[s].items():
+            j = candidate_indices[candidate]
+            present[i, j] = True
+            values[i, j] = [measurements.get(x) or 0 for x in prototype_parameters]
+    return segments, candidates, values, present
+
+
+def refine_formant_candidates(output, vowel, prototype_parameters, num_iterations=1, drop_formant=False,
+                              vowel_prototype_metadata=None):
+    """Selects the best formant candidate for each token of a single speaker's vowel, iteratively refining the
+    vowel's prototype from the selected candidates.
+
+    Parameters
+    ----------
+    output : dict
+        Measurements per token, keyed by the number of formants used
+    vowel : str
+        Label of the vowel
+    prototype_parameters : list
+        Parameters to compare against the prototype
+    num_iterations : int, optional
+        Maximum number of refinement iterations, stops early once the selected candidates do not change
+    drop_formant : bool, optional
+        Whether to add candidates that leave out one of the first three formants
+    vowel_prototype_metadata : dict, optional
+        Pre-measured means and covariance matrices per vowel
+
+    Returns
+    -------
+    dict
+        Selected measurements per token
+    dict
+        Means and covariance matrix for the vowel, empty if there were too few tokens to refine
+    int
+        Number of iterations run
+    """
+    best_data = {}
+    if len(output) < MINIMUM_TOKENS:
+        for s, data in output.items():
+            best_track = data[DEFAULT_FORMANT]
+            best_data[s] = {k: best_track[k] for k in BASE_FORMANT_COLUMNS}
+        return best_data, {}, 0
+    if drop_formant:
+        output = {s: add_leave_one_out_candidates(data) for s, data in output.items()}
+    else:
+        for data in output.values():
+            for measurements in data.values():
+                measurements['Ax'] = measurements.get('A4')
+    output = {k: v for k, v in output.items() if v}
+    for data in output.values():
+        for measurements in data.values():
+            _add_amplitude_differences(measurements)
+
+    segments, candidates, values, present = candidate_array(output, prototype_parameters)
+    if vowel_prototype_metadata is not None and vowel in vowel_prototype_metadata:
+        means, covariance = vowel_prototype_metadata[vowel]
+    else:
+        if DEFAULT_FORMANT not in candidates:
+            raise AcousticError('No measurements with {} formants were found for {}.'.format(DEFAULT_FORMANT, vowel))
+        default_index = candidates.index(DEFAULT_FORMANT)
+        means, covariance = get_mean_covariance(values[present[:, default_index], default_index])
+
+    token_indices = np.arange(len(segments))
+    best = None
+    iterations = 0
+    for iterations in range(1, max(num_iterations, 1) + 1):
+        distances = get_mahalanobis_batch(means, values, np.linalg.pinv(np.array(covariance)))
+        distances[~present] = np.inf
+        new_best = distances.argmin(axis=1)
+        means, covariance = get_mean_covariance(values[token_indices, new_best])
+        converged = best is not None and np.array_equal(best, new_best)
+        best = new_best
+        if converged:
+            break
+
+    for i, s in enumerate(segments):
+        best_number = candidates[best[i]]
+        measurements = output[s][best_number]
+        best_data[s] = {k: measurements.get(k) for k in OUTPUT_COLUMNS}
+        best_data[s]['num_formants'] = float(str(best_number).split('x')[0])
+        best_data[s]['Fx'] = int(str(best_number)[0])
+        if 'x' in str(best_number):
+            best_data[s]['drop_formant'] = int(str(best_number).split('x')[-1])
+        else:
+            best_data[s]['drop_formant'] = 0
+    return best_data, {vowel: [means, covariance]}, iterations
+
+
+def analyze_formant_points_refinement(corpus_context, vowel_label='vowel', duration_threshold=0, num_iterations=1,
+                                      call_back=None,
+                                      stop_check=None,
+                                      vowel_prototypes_path='',
+                                      drop_formant=False,
+                                      multiprocessing=True,
+                                      output_tracks=False
+                                      ):
+    """Extracts F1, F2, F3 and B1, B2, B3.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglot.corpus.context.CorpusContext`
+        The CorpusContext object of the corpus.
+    vowel_label : str
+        The subset of phones to analyze.
+    duration_threshold : float, optional
+        Segments with length shorter than this value (in milliseconds) will not be analyzed.
+    num_iterations : int, optional
+        How many times the algorithm should iterate before returning values.
+    call_back : callable, optional
+        Function to report progress
+    stop_check : callable, optional
+        Function to check whether to terminate early
+    vowel_prototypes_path : str, optional
+        Path to a CSV file of pre-measured vowel means and covariance matrices
+    drop_formant : bool, optional
+        Whether to consider candidates that leave out one of the first three formants
+    multiprocessing : bool, optional
+        Whether to analyze and refine (speaker, vowel) groups in parallel worker processes
+    output_tracks : bool, optional
+        Whether to save only the formant values as a point at 0.33 if false or have a track over the entire
+        vowel duration if true.
+
+    Returns
+    -------
+    prototype_metadata : dict
+        Means of F1, F2, F3, B1, B2, B3 and covariance matrices per vowel class.
+    """
+    if not corpus_context.hierarchy.has_type_subset('phone', vowel_label) and not corpus_context.hierarchy.has_token_subset('phone', vowel_label):
+        raise Exception('Phones do not have a "{}" subset.'.format(vowel_label))
+    # ------------- Step 2: Varying formants -------------
+    # Encodes vowel inventory into a phone class if it's specified
+
+    use_vowel_prototypes = vowel_prototypes_path and os.path.exists(vowel_prototypes_path)
+    if use_vowel_prototypes:
+        vowel_prototype_metadata, prototype_parameters = read_prototypes(vowel_prototypes_path)
+    else:
+        vowel_prototype_metadata = None
+        prototype_parameters = BASE_FORMANT_COLUMNS
+
+    # Gets segment mapping of phones that are vowels
+    segment_mapping = generate_vowel_segments(corpus_context, duration_threshold=duration_threshold, padding=0.1,
+                                              vowel_label=vowel_label)
+    best_data = {}
+
+    # Measure with varying levels of formants
+    min_formants = 4  # Off by one error, due to how Praat measures it from F0
+    # This really measures with 3 formants: F1, F2, F3. And so on.
+    if drop_formant:
+        max_formants = 8
+    else:
+        max_formants = 7
+    formant_function = generate_variable_formants_point_function(corpus_context, min_formants, max_formants)
+    best_prototype_metadata = {}
+
+    # For each vowel token, collect the formant measurements
+    # Pick the best track that is closest to the averages gotten from prototypes
+
+    if call_back is not None:
+        call_back('Analyzing formant candidates for {} vowel tokens...'.format(len(segment_mapping)))
+    # Analyze every token at once so that all groups share a single worker pool
+    output = analyze_segments(segment_mapping, formant_function, call_back=call_back, stop_check=stop_check,
+                              multiprocessing=multiprocessing)
+    if stop_check is not None and stop_check():
+        return best_prototype_metadata
+    groups = defaultdict(dict)
+    for seg, data in output.items():
+        groups[(seg['speaker'], seg['label'])][seg] = data
+
+    if call_back is not None:
+        call_back('Refining formants for {} speaker and vowel pairs...'.format(len(groups)))
+        call_back(0, len(groups))
+    arguments = {'prototype_parameters': prototype_parameters, 'num_iterations': num_iterations,
+                 'drop_formant': drop_formant, 'vowel_prototype_metadata': vowel_prototype_metadata}
+    if multiprocessing:
+        executor = ProcessPoolExecutor()
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+    with executor:
+        futures = [((speaker, vowel), executor.submit(refine_formant_candidates, group_output, vowel, **arguments))
+                   for (speaker, vowel), group_output in sorted(groups.items())]
+        # Results are collected in submission order, so that when several speakers share a vowel the prototype
+        # metadata does not depend on which group finishes last
+        for i, ((speaker, vowel), future) in enumerate(futures):
+            if stop_check is not None and stop_check():
+                for _, f in futures:
+                    f.cancel()
+                return best_prototype_metadata
+            group_data, prototype_metadata, iterations = future.result()
+            best_data.update(group_data)
+            best_prototype_metadata.update(prototype_metadata)
+            if call_back is not None:
+                call_back(i + 1)
+                if iterations:
+                    call_back('Speaker {} for vowel {} had {} tokens and completed refinement in {} iterations'.format(
+                        speaker, vowel, len(group_data), iterations))
+                else:
+                    call_back('Not enough observations of vowel {} for speaker {}, at least {} are needed, '
+                              'only found {}.'.format(vowel, speaker, MINIMUM_TOKENS, len(group_data)))
+    if output_tracks:
+        extract_and_save_formant_tracks(corpus_context, best_data, num_formants=True, multiprocessing=multiprocessing, stop_check=stop_check)
+    else:
+        save_formant_point_data(corpus_context, best_data, num_formants=True)
+    return best_prototype_metadata
@@ -36,8 +36,10 @@ def analyze_intensity(corpus_context,
         corpus_context.encode_hierarchy()
     for i, ((speaker,), v) in enumerate(segment_mapping.items()):
         intensity_function = generate_base_intensity_function(corpus_context)
-        output = analyze_segments(v, intensity_function, stop_check=stop_check, multiprocessing=multiprocessing)
+        with corpus_context.span('analysis_batch', analysis='intensity', speaker=speaker, segments=len(v)):
+            output = analyze_segments(v, intensity_function, stop_check=stop_check, multiprocessing=multiprocessing)
         corpus_context.save_acoustic_tracks('intensity', output, speaker)
+    corpus_context.flush_acoustic_writes()
 
 
 def generate_base_intensity_function(corpus_context):
@@ -3,13 +3,11 @@ import subprocess
 import shutil
 import re
 import csv
-import librosa
-import audioread
-
-from conch.utils import write_wav
 
 from ..io.importer.from_csv import make_path_safe
 
+POINT_MEASURE_BATCH_SIZE = 1000
+
 
 def resample_audio(file_path, new_file_path, new_sr):
     """
@@ -31,6 +29,8 @@ def resample_audio(file_path, new_file_path, new_sr):
         subprocess.call(['sox', file_path.replace('\\', '/'), new_file_path.replace('\\', '/'),
                          'gain', '-1', 'rate', '-I', str(new_sr)])
     else:
+        import librosa
+        from conch.utils import write_wav
         sig, sr = librosa.load(file_path, sr=new_sr, mono=False)
         if len(sig.shape) > 1:
             sig = sig.T
@@ -38,6 +38,7 @@ def resample_audio(file_path, new_file_path, new_sr):
 
 
 def add_discourse_sound_info(corpus_context, discourse, filepath):
+    import audioread
     with audioread.audio_open(filepath) as f:
         sample_rate = f.samplerate
         n_channels = f.channels
@@ -91,6 +92,9 @@ def add_discourse_sound_info(corpus_context, discourse, filepath):
                                   low_freq_filepath=low_freq_path,
                                   duration=duration, sampling_rate=sample_rate,
                                   n_channels=n_channels, discourse_name=discourse)
+    if corpus_context.config.precompute_audio_pyramids:
+        from .pyramid import build_pyramid
+        build_pyramid(consonant_path, corpus_context.discourse_pyramid_directory(discourse))
 
 
 def setup_audio(corpus_context, data):
@@ -100,21 +104,89 @@ def setup_audio(corpus_context, data):
 
 
 def point_measures_to_csv(corpus_context, data, header):
+    """
+    Write point measures to a CSV file per speaker, keeping each speaker's file open for the whole pass
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.AudioContext`
+        CorpusContext to use
+    data : dict
+        Dictionary of segments to measurements
+    header : list
+        Properties to write
+    """
     if header[0] != 'id':
         header.insert(0, 'id')
-    for s in corpus_context.speakers:
-        path = os.path.join(corpus_context.config.temporary_directory('csv'),
-                            '{}_point_measures.csv'.format(s))
-        with open(path, 'w', newline='', encoding='utf8') as f:
-            writer = csv.DictWriter(f, header, delimiter=',')
-            writer.writeheader()
-    for seg, seg_data in data.items():
-        path = os.path.join(corpus_context.config.temporary_directory('csv'),
-                            '{}_point_measures.csv'.format(seg['speaker']))
-        with open(path, 'a', newline='', encoding='utf8') as f:
-            writer = csv.DictWriter(f, header, delimiter=',')
+    directory = corpus_context.config.temporary_directory('csv')
+    files = {}
+    writers = {}
+    try:
+        for s in corpus_context.speakers:
+            path = os.path.join(directory, '{}_point_measures.csv'.format(s))
+            files[s] = open(path, 'w', newline='', encoding='utf8')
+            writers[s] = csv.DictWriter(files[s], header, delimiter=',')
+            writers[s].writeheader()
+        for seg, seg_data in data.items():
             row = dict(id=seg['id'], **{k: v for k, v in seg_data.items() if k in header and k != 'id'})
-            writer.writerow(row)
+            writers[seg['speaker']].writerow(row)
+    finally:
+        for f in files.values():
+            f.close()
+
+
+def _convert_point_measure(value, t):
+    if value is None or value == '':
+        return None
+    if t == bool:
+        return value not in ('False', False)
+    try:
+        return t(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def save_point_measures(corpus_context, data, header_info, annotation_type="phone", batch_size=POINT_MEASURE_BATCH_SIZE):
+    """
+    Save point measures directly to the graph database in batches, without going through temporary CSV files
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.AudioContext`
+        CorpusContext to use
+    data : dict
+        Dictionary of segments to measurements
+    header_info : dict
+        Dictionary of property names to their types
+    annotation_type : str
+        Annotation type to save measures to, defaults to 'phone'
+    batch_size : int
+        Number of annotations to update per transaction
+    """
+    header_info = {k: v for k, v in header_info.items() if k != 'id'}
+    statement = '''UNWIND {{data}} AS row
+    MATCH (n:{annotation_type}:{corpus_name}) WHERE n.id = row.id
+    SET n += row.props'''.format(annotation_type=annotation_type, corpus_name=corpus_context.cypher_safe_name)
+    batch = []
+    for seg, seg_data in data.items():
+        props = {k: _convert_point_measure(seg_data.get(k, None), t) for k, t in header_info.items()}
+        batch.append({'id': seg['id'], 'props': props})
+        if len(batch) >= batch_size:
+            corpus_context.execute_cypher(statement, data=batch)
+            batch = []
+    if batch:
+        corpus_context.execute_cypher(statement, data=batch)
+    _finalize_point_measures(corpus_context, header_info, annotation_type)
+
+
+def _finalize_point_measures(corpus_context, header_info, annotation_type):
+    new_properties = [(h, t) for h, t in header_info.items()
+                      if h != 'id' and not corpus_context.hierarchy.has_token_property(annotation_type, h)]
+    for h, t in new_properties:
+        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % (annotation_type, h))
+    corpus_context.hierarchy.add_token_properties(corpus_context, annotation_type,
+                                                  [(h, t) for h, t in header_info.items() if h != 'id'])
+    corpus_context.encode_hierarchy()
 
 
 def point_measures_from_csv(corpus_context, header_info, annotation_type="phone"):
@@ -154,10 +226,4 @@ def point_measures_from_csv(corpus_context, header_info, annotation_type="phone"
                                             annotation_type=annotation_type,
                                             new_properties=properties)
         corpus_context.execute_cypher(statement)
-    for h in header_info.keys():
-        if h == 'id':
-            continue
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % (annotation_type, h))
-    corpus_context.hierarchy.add_token_properties(corpus_context, annotation_type,
-                                                  [(h, t) for h, t in header_info.items() if h != 'id'])
-    corpus_context.encode_hierarchy()
+    _finalize_point_measures(corpus_context, header_info, annotation_type)
@@ -6,7 +6,7 @@ from conch.analysis.praat import PraatAnalysisFunction
 
 from .segments import generate_segments, generate_utterance_segments
 
-from .io import point_measures_to_csv, point_measures_from_csv
+from .io import save_point_measures
 from .utils import PADDING
 
 
@@ -103,8 +103,7 @@ def analyze_script(corpus_context,
         call_back("time analyzing segments: " + str(time.time() - time_section))
     header = sorted(list(output.values())[0].keys())
     header_info = {h: float for h in header}
-    point_measures_to_csv(corpus_context, output, header)
-    point_measures_from_csv(corpus_context, header_info, annotation_type=annotation_type)
+    save_point_measures(corpus_context, output, header_info, annotation_type=annotation_type)
     return [x for x in header if x != 'id']
 
 
@@ -135,5 +134,8 @@ def analyze_track_script(corpus_context,
     praat_path = corpus_context.config.praat_path
     script_function = generate_praat_script_function(praat_path, script_path, arguments=arguments)
     for i, ((speaker,), v) in enumerate(segment_mapping.items()):
-        output = analyze_segments(v, script_function, stop_check=stop_check, multiprocessing=multiprocessing)
+        with corpus_context.span('analysis_batch', analysis=acoustic_name, script=script_path, speaker=speaker,
+                                 segments=len(v)):
+            output = analyze_segments(v, script_function, stop_check=stop_check, multiprocessing=multiprocessing)
         corpus_context.save_acoustic_tracks(acoustic_name, output, speaker)
+    corpus_context.flush_acoustic_writes()
@@ -1,2 +1,2 @@
 
-from .base import analyze_pitch, analyze_utterance_pitch, update_utterance_pitch_track
\ No newline at end of file
+from .base import analyze_pitch, analyze_utterance_pitch, update_utterance_pitch_track, update_utterance_pitch_tracks
\ No newline at end of file
@@ -1,4 +1,5 @@
 import math
+from bisect import bisect_right
 from datetime import datetime
 
 from conch import analyze_segments
@@ -58,58 +59,36 @@ def analyze_utterance_pitch(corpus_context, utterance, source='praat', min_pitch
     return track
 
 
-def update_utterance_pitch_track(corpus_context, utterance, new_track):
-    from ...corpus.audio import s_to_ms, s_to_nano
-    if isinstance(utterance, str):
-        utterance_id = utterance
-    else:
-        utterance_id = utterance.id
-    today = datetime.utcnow()
+def _utterance_pitch_info(corpus_context, utterance_ids):
     utt_type = corpus_context.hierarchy.highest
     phone_type = corpus_context.hierarchy.lowest
-    time_stamp = today.timestamp()
-    statement = '''MATCH (s:Speaker:{corpus_name})-[r:speaks_in]->(d:Discourse:{corpus_name}),
+    depth = corpus_context.hierarchy.get_depth(phone_type, utt_type)
+    statement = '''UNWIND {{utterance_ids}} AS utterance_id
+                MATCH (s:Speaker:{corpus_name})-[r:speaks_in]->(d:Discourse:{corpus_name}),
                 (u:{utt_type}:{corpus_name})-[:spoken_by]->(s),
                 (u)-[:spoken_in]->(d),
-                (p:{phone_type}:{corpus_name})-[:contained_by*]->(u)
-                WHERE u.id = {{utterance_id}}
-                SET u.pitch_last_edited = {{date}}
-                RETURN u, d, r, s, collect(p) as p'''.format(corpus_name=corpus_context.cypher_safe_name,
-                                                             utt_type=utt_type, phone_type=phone_type)
-    results = corpus_context.execute_cypher(statement, utterance_id=utterance_id, date=time_stamp)
-
-    for r in results:
-        channel = r['r']['channel']
-        discourse = r['d']['name']
-        speaker = r['s']['name']
-        u = r['u']
-        phones = r['p']
+                (p:{phone_type}:{corpus_name})-[:contained_by*{depth}]->(u)
+                WHERE u.id = utterance_id
+                RETURN u, d.name AS discourse, r.channel AS channel, s.name AS speaker,
+                collect(p.begin) AS begins, collect(p.label) AS labels'''.format(
+        corpus_name=corpus_context.cypher_safe_name, utt_type=utt_type, phone_type=phone_type, depth=depth)
+    info = {}
+    for r in corpus_context.execute_cypher(statement, utterance_ids=utterance_ids):
+        phones = sorted(zip(r['begins'], r['labels']))
+        info[r['u']['id']] = {'begin': r['u']['begin'], 'end': r['u']['end'],
+                              'discourse': r['discourse'], 'speaker': r['speaker'], 'channel': r['channel'],
+                              'begins': [x[0] for x in phones], 'labels': [x[1] for x in phones]}
+    return info
 
-    client = corpus_context.acoustic_client()
-    query = '''DELETE from "pitch"
-                    where "discourse" = '{}' 
-                    and "speaker" = '{}' 
-                    and "time" >= {} 
-                    and "time" <= {};'''.format(discourse, speaker, s_to_nano(u['begin']), s_to_nano(u['end']))
-    result = client.query(query)
 
-    data = []
+def _track_to_points(new_track, begins, labels):
+    from ...corpus.audio import s_to_ms
+    points = {}
     for data_point in new_track:
-        speaker, discourse, channel = speaker, discourse, channel
         time_point, value = data_point['time'], data_point['F0']
-        t_dict = {'speaker': speaker, 'discourse': discourse, 'channel': channel}
-        label = None
-        for i, p in enumerate(sorted(phones, key=lambda x: x['begin'])):
-            if p['begin'] > time_point:
-                break
-            label = p['label']
-            if i == len(phones) - 1:
-                break
-        else:
-            label = None
-        if label is None:
+        index = bisect_right(begins, time_point) - 1
+        if index < 0:
             continue
-        fields = {'phone': label, 'utterance_id': u['id']}
         try:
             if value is None:
                 continue
@@ -118,20 +97,104 @@ def update_utterance_pitch_track(corpus_context, utterance, new_track):
             continue
         if value <= 0:
             continue
-        fields['F0'] = value
-        d = {'measurement': 'pitch',
-             'tags': t_dict,
-             'time': s_to_ms(time_point),
-             'fields': fields
-             }
-        data.append(d)
-    client.write_points(data, batch_size=1000, time_precision='ms')
+        points[s_to_ms(time_point)] = (labels[index], value)
+    return points
+
+
+def _changed_range(old_points, new_points):
+    changed = [t for t in set(old_points) | set(new_points) if old_points.get(t) != new_points.get(t)]
+    if not changed:
+        return None
+    return min(changed), max(changed)
+
+
+def update_utterance_pitch_tracks(corpus_context, tracks):
+    """
+    Save edited pitch tracks for a set of utterances, only rewriting the range of each track that changed
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.audio.AudioContext`
+        Corpus to update
+    tracks : dict
+        Mapping of utterance IDs to pitch tracks (lists of dictionaries with ``time`` and ``F0`` keys
+        or :class:`~polyglotdb.acoustics.classes.Track` objects)
+
+    Returns
+    -------
+    float
+        Time stamp of update
+    """
+    from ...corpus.audio import s_to_ms, decode_points
+    tracks = {(k if isinstance(k, str) else k.id): v for k, v in tracks.items()}
+    time_stamp = datetime.utcnow().timestamp()
+    info = _utterance_pitch_info(corpus_context, list(tracks.keys()))
+    statement = '''UNWIND {{utterance_ids}} AS utterance_id
+                MATCH (u:{utt_type}:{corpus_name})
+                WHERE u.id = utterance_id
+                SET u.pitch_last_edited = {{date}}'''.format(corpus_name=corpus_context.cypher_safe_name,
+                                                             utt_type=corpus_context.hierarchy.highest)
+    corpus_context.execute_cypher(statement, utterance_ids=sorted(info.keys()), date=time_stamp)
+
+    client = corpus_context.acoustic_client()
+    utterance_ids = [x for x in tracks if x in info]
+    filter_strings = {x: '''"discourse" = '{}' and "speaker" = '{}' '''.format(
+        info[x]['discourse'].replace("'", r"\'"), info[x]['speaker'].replace("'", r"\'")) for x in utterance_ids}
+    queries = ('''select "phone", "F0" from "pitch"
+                        where {} and time >= {}ms and time <= {}ms;'''.format(
+        filter_strings[x], s_to_ms(info[x]['begin']), s_to_ms(info[x]['end'])) for x in utterance_ids)
+    deletes = []
+    data = []
+    for utterance_id, result in zip(utterance_ids, corpus_context.execute_influxdb_many(queries, epoch='ms')):
+        u = info[utterance_id]
+        new_points = _track_to_points(tracks[utterance_id], u['begins'], u['labels'])
+        times, values = decode_points(result, ['phone', 'F0'])
+        old_points = {int(t): (p, v) for t, p, v in zip(times, values['phone'], values['F0'])}
+        changed = _changed_range(old_points, new_points)
+        if changed is None:
+            continue
+        begin, end = changed
+        deletes.append('''DELETE FROM "pitch" WHERE {} and time >= {}ms and time <= {}ms'''.format(
+            filter_strings[utterance_id], begin, end))
+        t_dict = {'speaker': u['speaker'], 'discourse': u['discourse'], 'channel': u['channel']}
+        for time_point, (label, value) in sorted(new_points.items()):
+            if time_point < begin or time_point > end:
+                continue
+            data.append(corpus_context.acoustic_point('pitch', t_dict, time_point, {'phone': label, 'F0': value},
+                                                      utterance_id=utterance_id))
+    if deletes:
+        client.query(';'.join(deletes))
+    corpus_context.write_acoustic_points(data)
+    corpus_context.flush_acoustic_writes()
     if 'pitch' not in corpus_context.hierarchy.acoustics:
         corpus_context.hierarchy.acoustics.add('pitch')
         corpus_context.encode_hierarchy()
     return time_stamp
 
 
+def update_utterance_pitch_track(corpus_context, utterance, new_track):
+    """
+    Save an edited pitch track for an utterance, see :func:`update_utterance_pitch_tracks`
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.audio.AudioContext`
+        Corpus to update
+    utterance : str
+        Utterance ID
+    new_track : list or :class:`~polyglotdb.acoustics.classes.Track`
+        Pitch track
+
+    Returns
+    -------
+    float
+        Time stamp of update
+    """
+    if not isinstance(utterance, str):
+        utterance = utterance.id
+    return update_utterance_pitch_tracks(corpus_context, {utterance: new_track})
+
+
 def analyze_pitch(corpus_context,
                   source='praat',
                   algorithm='base',
@@ -223,8 +286,11 @@ def analyze_pitch(corpus_context,
                 max_pitch = absolute_max_pitch
             pitch_function = generate_pitch_function(source, min_pitch, max_pitch,
                                                      path=path)
-        output = analyze_segments(v, pitch_function, stop_check=stop_check, multiprocessing=multiprocessing)
+        with corpus_context.span('analysis_batch', analysis='pitch', source=source, speaker=speaker,
+                                 segments=len(v)):
+            output = analyze_segments(v, pitch_function, stop_check=stop_check, multiprocessing=multiprocessing)
         corpus_context.save_acoustic_tracks('pitch', output, speaker)
         today = datetime.utcnow()
         corpus_context.query_graph(corpus_context.utterance).set_properties(pitch_last_edited=today.timestamp())
         corpus_context.encode_hierarchy()
+    corpus_context.flush_acoustic_writes()
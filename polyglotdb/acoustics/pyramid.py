@@ -0,0 +1,495 @@
+import json
+import os
+import shutil
+import wave
+
+import numpy as np
+
+#: Version of the on-disk pyramid layout, pyramids with other versions are rebuilt
+PYRAMID_VERSION = 1
+
+#: Number of samples summarized by each min/max pair of the finest waveform envelope
+ENVELOPE_BLOCK_SIZE = 16
+
+#: Reduction in resolution between consecutive levels of the pyramid
+LEVEL_FACTOR = 4
+
+#: Levels are added until the coarsest one has at most this many columns
+MIN_LEVEL_LENGTH = 1024
+
+#: Time between frames of the finest spectrogram level, in seconds
+SPECTROGRAM_HOP = 0.005
+
+#: Length of the analysis window of the spectrogram, in seconds
+SPECTROGRAM_WINDOW = 0.005
+
+#: Minimum number of FFT points of the spectrogram
+SPECTROGRAM_FFT_SIZE = 256
+
+#: Number of samples read from the audio file at a time while building
+READ_BLOCK_SIZE = 2 ** 20
+
+PRE_EMPHASIS = 0.95
+
+POOL_CHUNK_SIZE = 2 ** 16
+
+
+def audio_info(path):
+    """
+    Get the sampling rate and number of samples of an audio file
+
+    Parameters
+    ----------
+    path : str
+        Path to the audio file
+
+    Returns
+    -------
+    int
+        Sampling rate
+    int
+        Number of samples
+    """
+    try:
+        with wave.open(path, 'rb') as f:
+            return f.getframerate(), f.getnframes()
+    except (wave.Error, EOFError):
+        import librosa
+        signal, sr = librosa.load(path, sr=None)
+        return sr, len(signal)
+
+
+def _decode_frames(frames, sample_width, channels):
+    if sample_width == 1:
+        signal = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        signal = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 2 ** 15
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        values = raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16)
+        values[values >= 2 ** 23] -= 2 ** 24
+        signal = values.astype(np.float32) / 2 ** 23
+    else:
+        signal = np.frombuffer(frames, dtype='<i4').astype(np.float32) / 2 ** 31
+    if channels > 1:
+        signal = signal.reshape(-1, channels).mean(axis=1)
+    return signal
+
+
+def iter_samples(path, block_size=READ_BLOCK_SIZE):
+    """
+    Read the samples of an audio file in blocks, mixing channels down to mono
+
+    Parameters
+    ----------
+    path : str
+        Path to the audio file
+    block_size : int
+        Number of samples per block
+
+    Yields
+    ------
+    numpy.array
+        Samples scaled to the range -1 to 1
+    """
+    try:
+        f = wave.open(path, 'rb')
+    except (wave.Error, EOFError):
+        import librosa
+        signal, sr = librosa.load(path, sr=None)
+        for i in range(0, len(signal), block_size):
+            yield signal[i:i + block_size].astype(np.float32)
+        return
+    with f:
+        sample_width, channels = f.getsampwidth(), f.getnchannels()
+        while True:
+            frames = f.readframes(block_size)
+            if not frames:
+                break
+            yield _decode_frames(frames, sample_width, channels)
+
+
+def read_samples(path, begin, count):
+    """
+    Read a range of samples from an audio file, mixing channels down to mono
+
+    Parameters
+    ----------
+    path : str
+        Path to the audio file
+    begin : int
+        Index of the first sample
+    count : int
+        Number of samples to read
+
+    Returns
+    -------
+    numpy.array
+        Samples scaled to the range -1 to 1
+    """
+    try:
+        f = wave.open(path, 'rb')
+    except (wave.Error, EOFError):
+        import librosa
+        sr = librosa.get_samplerate(path)
+        signal, sr = librosa.load(path, sr=None, offset=begin / sr, duration=count / sr)
+        return signal.astype(np.float32)
+    with f:
+        f.setpos(min(begin, f.getnframes()))
+        return _decode_frames(f.readframes(count), f.getsampwidth(), f.getnchannels())
+
+
+def gaussian_window(window_length, n_fft):
+    """
+    Gaussian analysis window centred in an FFT frame, matching the window used by
+    :func:`~polyglotdb.acoustics.utils.generate_spectrogram`
+    """
+    std = 0.45 * window_length / 2
+    n = np.arange(window_length) - (window_length - 1) / 2
+    window = np.zeros(n_fft, dtype=np.float32)
+    offset = (n_fft - window_length) // 2
+    window[offset:offset + window_length] = np.exp(-0.5 * (n / std) ** 2)
+    return window
+
+
+def _power_to_db(power):
+    return 10 * np.log10(np.maximum(power, 1e-20))
+
+
+def _db_to_power(db):
+    return 10 ** (db.astype(np.float32) / 10)
+
+
+def _pool_envelope(data, factor):
+    length = int(np.ceil(len(data) / factor))
+    pooled = np.empty((length, 2), dtype=np.float32)
+    edges = np.arange(0, len(data), factor)
+    pooled[:, 0] = np.minimum.reduceat(data[:, 0], edges)
+    pooled[:, 1] = np.maximum.reduceat(data[:, 1], edges)
+    return pooled
+
+
+def _pool_frames(data, factor):
+    edges = np.arange(0, len(data), factor)
+    counts = np.diff(np.append(edges, len(data)))
+    return _power_to_db(np.add.reduceat(_db_to_power(data), edges, axis=0) / counts[:, None])
+
+
+class _SpectrogramWriter(object):
+    """
+    Computes spectrogram frames from consecutive blocks of a signal, centring frames on multiples of the hop
+    with the signal zero padded on either side
+    """
+
+    def __init__(self, output, hop, window_length, n_fft):
+        self.output = output
+        self.hop = hop
+        self.n_fft = n_fft
+        self.window = gaussian_window(window_length, n_fft)
+        self.buffer = np.zeros(n_fft // 2, dtype=np.float32)
+        self.buffer_start = 0
+        self.frame = 0
+        self.previous = 0.0
+
+    def add(self, block):
+        emphasized = np.empty_like(block)
+        emphasized[0] = block[0] - PRE_EMPHASIS * self.previous
+        emphasized[1:] = block[1:] - PRE_EMPHASIS * block[:-1]
+        self.previous = block[-1]
+        self.buffer = np.concatenate([self.buffer, emphasized])
+        self._emit()
+
+    def finish(self):
+        self.buffer = np.concatenate([self.buffer, np.zeros(self.n_fft, dtype=np.float32)])
+        self._emit()
+
+    def _emit(self):
+        buffer_end = self.buffer_start + len(self.buffer)
+        last = min((buffer_end - self.n_fft) // self.hop + 1, len(self.output))
+        if last > self.frame:
+            starts = np.arange(self.frame, last) * self.hop - self.buffer_start
+            frames = np.lib.stride_tricks.sliding_window_view(self.buffer, self.n_fft)[starts]
+            magnitude = np.abs(np.fft.rfft(frames * self.window, axis=1))
+            self.output[self.frame:last] = 20 * np.log10(np.maximum(magnitude, 1e-10))
+            self.frame = last
+        drop = self.frame * self.hop - self.buffer_start
+        if drop > 0:
+            self.buffer = self.buffer[drop:]
+            self.buffer_start += drop
+
+
+def _level_count(length):
+    levels = 1
+    while length > MIN_LEVEL_LENGTH:
+        length = int(np.ceil(length / LEVEL_FACTOR))
+        levels += 1
+    return levels
+
+
+def build_pyramid(path, directory):
+    """
+    Precompute min/max waveform envelopes and spectrograms of an audio file at several resolutions
+
+    The finest envelope summarizes every :data:`ENVELOPE_BLOCK_SIZE` samples and the finest spectrogram has a
+    frame every :data:`SPECTROGRAM_HOP` seconds; each further level is :data:`LEVEL_FACTOR` times coarser.
+    Levels are saved as NumPy arrays in ``directory`` along with an ``index.json`` describing them.  The audio
+    file is read in blocks, so memory use does not depend on its length.
+
+    Parameters
+    ----------
+    path : str
+        Path to the audio file
+    directory : str
+        Directory to save the pyramid to, replacing any existing pyramid
+    """
+    sr, num_samples = audio_info(path)
+    hop = max(int(round(SPECTROGRAM_HOP * sr)), 1)
+    window_length = max(int(SPECTROGRAM_WINDOW * sr), 1)
+    n_fft = max(SPECTROGRAM_FFT_SIZE, window_length)
+    temp_directory = directory + '.tmp'
+    if os.path.exists(temp_directory):
+        shutil.rmtree(temp_directory)
+    os.makedirs(temp_directory)
+
+    num_blocks = int(np.ceil(num_samples / ENVELOPE_BLOCK_SIZE))
+    num_frames = 1 + num_samples // hop
+    envelope = np.lib.format.open_memmap(os.path.join(temp_directory, 'envelope_0.npy'), mode='w+',
+                                         dtype=np.float32, shape=(max(num_blocks, 1), 2))
+    spectrogram = np.lib.format.open_memmap(os.path.join(temp_directory, 'spectrogram_0.npy'), mode='w+',
+                                            dtype=np.float16, shape=(num_frames, n_fft // 2 + 1))
+    spectrogram_writer = _SpectrogramWriter(spectrogram, hop, window_length, n_fft)
+    remainder = np.zeros(0, dtype=np.float32)
+    block_index = 0
+    for block in iter_samples(path):
+        if not len(block):
+            continue
+        spectrogram_writer.add(block)
+        block = np.concatenate([remainder, block])
+        usable = len(block) // ENVELOPE_BLOCK_SIZE * ENVELOPE_BLOCK_SIZE
+        if usable:
+            reshaped = block[:usable].reshape(-1, ENVELOPE_BLOCK_SIZE)
+            envelope[block_index:block_index + len(reshaped), 0] = reshaped.min(axis=1)
+            envelope[block_index:block_index + len(reshaped), 1] = reshaped.max(axis=1)
+            block_index += len(reshaped)
+        remainder = block[usable:]
+    if len(remainder):
+        envelope[block_index] = remainder.min(), remainder.max()
+        block_index += 1
+    spectrogram_writer.finish()
+    envelope.flush()
+    spectrogram.flush()
+
+    index = {'version': PYRAMID_VERSION,
+             'source': os.path.abspath(path),
+             'source_size': os.path.getsize(path),
+             'source_mtime': os.path.getmtime(path),
+             'sample_rate': sr,
+             'num_samples': num_samples,
+             'n_fft': n_fft,
+             'envelope_levels': [],
+             'spectrogram_levels': []}
+    for name, data, unit, pool in [('envelope', envelope, ENVELOPE_BLOCK_SIZE, _pool_envelope),
+                                   ('spectrogram', spectrogram, hop, _pool_frames)]:
+        for level in range(_level_count(len(data))):
+            if level > 0:
+                # Pool in chunks that are a multiple of the factor so that the whole level is never in memory
+                chunk = POOL_CHUNK_SIZE * LEVEL_FACTOR
+                length = int(np.ceil(len(data) / LEVEL_FACTOR))
+                pooled = np.lib.format.open_memmap(os.path.join(temp_directory, '{}_{}.npy'.format(name, level)),
+                                                   mode='w+', dtype=data.dtype, shape=(length,) + data.shape[1:])
+                for i in range(0, len(data), chunk):
+                    values = pool(np.asarray(data[i:i + chunk]), LEVEL_FACTOR)
+                    pooled[i // LEVEL_FACTOR:i // LEVEL_FACTOR + len(values)] = values
+                pooled.flush()
+                data = pooled
+                unit *= LEVEL_FACTOR
+            index['{}_levels'.format(name)].append({'unit': unit, 'length': len(data)})
+    del envelope, spectrogram, data
+    with open(os.path.join(temp_directory, 'index.json'), 'w', encoding='utf8') as f:
+        json.dump(index, f)
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.replace(temp_directory, directory)
+
+
+def pyramid_is_current(path, directory):
+    """
+    Check whether a pyramid exists for an audio file and was built from its current contents
+
+    Parameters
+    ----------
+    path : str
+        Path to the audio file
+    directory : str
+        Directory of the pyramid
+
+    Returns
+    -------
+    bool
+    """
+    index_path = os.path.join(directory, 'index.json')
+    if not os.path.exists(index_path):
+        return False
+    with open(index_path, encoding='utf8') as f:
+        index = json.load(f)
+    return (index.get('version') == PYRAMID_VERSION and index['source'] == os.path.abspath(path) and
+            index['source_size'] == os.path.getsize(path) and index['source_mtime'] == os.path.getmtime(path))
+
+
+def _pool_columns(length, width):
+    return np.arange(width) * length // width
+
+
+class AudioPyramid(object):
+    """
+    Read access to a pyramid built by :func:`build_pyramid`
+
+    Levels are memory mapped and only the columns covering a requested window are read, at the coarsest level
+    that still has at least one column per pixel, so requests take roughly the same time however long the
+    window is.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the pyramid
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'index.json'), encoding='utf8') as f:
+            index = json.load(f)
+        self.source = index['source']
+        self.sample_rate = index['sample_rate']
+        self.num_samples = index['num_samples']
+        self.n_fft = index['n_fft']
+        self.envelope_levels = [(x['unit'], np.load(os.path.join(directory, 'envelope_{}.npy'.format(i)),
+                                                    mmap_mode='r'))
+                                for i, x in enumerate(index['envelope_levels'])]
+        self.spectrogram_levels = [(x['unit'], np.load(os.path.join(directory, 'spectrogram_{}.npy'.format(i)),
+                                                       mmap_mode='r'))
+                                   for i, x in enumerate(index['spectrogram_levels'])]
+
+    @property
+    def duration(self):
+        return self.num_samples / self.sample_rate
+
+    @property
+    def freq_step(self):
+        return self.sample_rate / self.n_fft
+
+    def _window(self, begin, end):
+        if begin is None:
+            begin = 0
+        if end is None:
+            end = self.duration
+        return max(float(begin), 0), min(float(end), self.duration)
+
+    @staticmethod
+    def _select_level(levels, samples_per_pixel):
+        selected = None
+        for unit, data in levels:
+            if unit <= samples_per_pixel:
+                selected = unit, data
+        return selected
+
+    def waveform(self, begin=None, end=None, width=1000):
+        """
+        Get the minimum and maximum amplitude of the audio for each pixel of a window
+
+        Parameters
+        ----------
+        begin : float, optional
+            Start of the window in seconds, defaults to the beginning of the file
+        end : float, optional
+            End of the window in seconds, defaults to the end of the file
+        width : int
+            Number of pixels, windows shorter than ``width`` samples return one column per sample
+
+        Returns
+        -------
+        numpy.array
+            Minimum amplitude of each column
+        numpy.array
+            Maximum amplitude of each column
+        float
+            Time of the start of the first column
+        float
+            Duration of each column
+        """
+        begin, end = self._window(begin, end)
+        if end <= begin or width < 1:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32), begin, 0.0
+        samples_per_pixel = (end - begin) * self.sample_rate / width
+        level = self._select_level(self.envelope_levels, samples_per_pixel)
+        if level is None:
+            unit = 1
+            first = int(begin * self.sample_rate)
+            last = min(int(np.ceil(end * self.sample_rate)), self.num_samples)
+            samples = read_samples(self.source, first, last - first)
+            minima, maxima = samples, samples
+        else:
+            unit, data = level
+            first = int(begin * self.sample_rate // unit)
+            last = min(int(np.ceil(end * self.sample_rate / unit)), len(data))
+            values = np.asarray(data[first:last])
+            minima, maxima = values[:, 0], values[:, 1]
+        length = len(minima)
+        time_step = unit / self.sample_rate
+        if length > width:
+            edges = _pool_columns(length, width)
+            minima = np.minimum.reduceat(minima, edges)
+            maxima = np.maximum.reduceat(maxima, edges)
+            time_step *= length / width
+        return minima, maxima, first * unit / self.sample_rate, time_step
+
+    def spectrogram(self, begin=None, end=None, width=500, height=None):
+        """
+        Get the spectrogram of a window, pooled to a number of pixels
+
+        Parameters
+        ----------
+        begin : float, optional
+            Start of the window in seconds, defaults to the beginning of the file
+        end : float, optional
+            End of the window in seconds, defaults to the end of the file
+        width : int
+            Number of time columns, windows with fewer frames at the finest level return one column per frame
+        height : int, optional
+            Number of frequency rows, defaults to one per frequency bin
+
+        Returns
+        -------
+        numpy.array
+            Power in decibels, with frequency bins as rows and time columns as columns
+        float
+            Time of the first column
+        float
+            Time step between columns
+        float
+            Frequency step between rows
+        """
+        begin, end = self._window(begin, end)
+        freq_step = self.freq_step
+        if end <= begin or width < 1:
+            return np.zeros((self.n_fft // 2 + 1, 0), dtype=np.float32), begin, 0.0, freq_step
+        samples_per_pixel = (end - begin) * self.sample_rate / width
+        level = self._select_level(self.spectrogram_levels, samples_per_pixel)
+        if level is None:
+            level = self.spectrogram_levels[0]
+        unit, data = level
+        first = int(round(begin * self.sample_rate / unit))
+        last = min(int(round(end * self.sample_rate / unit)) + 1, len(data))
+        values = np.asarray(data[first:last], dtype=np.float32)
+        length = len(values)
+        time_step = unit / self.sample_rate
+        if length > width:
+            edges = _pool_columns(length, width)
+            counts = np.diff(np.append(edges, length))
+            values = _power_to_db(np.add.reduceat(_db_to_power(values), edges, axis=0) / counts[:, None])
+            time_step *= length / width
+        if height is not None and 0 < height < values.shape[1]:
+            edges = _pool_columns(values.shape[1], height)
+            counts = np.diff(np.append(edges, values.shape[1]))
+            values = _power_to_db(np.add.reduceat(_db_to_power(values), edges, axis=1) / counts[None, :])
+            freq_step *= (self.n_fft // 2 + 1) / height
+        return values.T.astype(np.float32), first * unit / self.sample_rate, time_step, freq_step
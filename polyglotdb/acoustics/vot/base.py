@@ -1,16 +1,22 @@
+import os
+import subprocess
 import tempfile
 
 from uuid import uuid1
 from conch import analyze_segments
 from conch.analysis.segments import SegmentMapping, FileSegment
-from conch.analysis.autovot import AutoVOTAnalysisFunction
+from conch.analysis.autovot import AutoVOTAnalysisFunction, MeasureVOTPretrained
 
 from ..segments import generate_utterance_segments, generate_segments
 from ...query.annotations.models import LinguisticAnnotation
-from ...exceptions import SpeakerAttributeError
+from ...exceptions import SpeakerAttributeError, AcousticError
 from ..classes import Track, TimePoint
 from ..utils import PADDING
 
+VOT_STOPS_PER_JOB = 100
+
+VOT_BATCH_SIZE = 1000
+
 
 def get_default_for_type(t):
     if t == float:
@@ -24,6 +30,110 @@ def get_default_for_type(t):
     return None
 
 
+def chunk_stops(stops, stops_per_job):
+    """
+    Split stops into time-ordered chunks of bounded size
+
+    Parameters
+    ----------
+    stops : list
+        Tuples of stop information, beginning with the begin and end times of the stop
+    stops_per_job : int
+        Maximum number of stops in each chunk
+
+    Returns
+    -------
+    list
+        List of chunks of stops
+    """
+    stops = sorted(stops, key=lambda x: x[0])
+    return [stops[i:i + stops_per_job] for i in range(0, len(stops), stops_per_job)]
+
+
+def window_vot_marks(vot_marks, offset):
+    """
+    Shift stop times to be relative to the start of a window of a sound file
+
+    Parameters
+    ----------
+    vot_marks : list
+        Tuples of stop information, beginning with the begin and end times of the stop
+    offset : float
+        Begin time of the window in the sound file
+
+    Returns
+    -------
+    list
+        Tuples with the begin and end times shifted
+    """
+    return [(b - offset, e - offset) + tuple(extra) for b, e, *extra in vot_marks]
+
+
+def unwindow_vot_output(output, offset):
+    """
+    Shift VOT measurements from a window of a sound file back to times in the whole file
+
+    Parameters
+    ----------
+    output : list
+        Tuples of VOT information, beginning with the begin time of the VOT
+    offset : float
+        Begin time of the window in the sound file
+
+    Returns
+    -------
+    list
+        Tuples with the begin times shifted
+    """
+    return [(time + offset,) + tuple(rest) for time, *rest in output]
+
+
+class MeasureVOTWindow(MeasureVOTPretrained):
+    """
+    Run AutoVOT on only the window of the sound file covered by a segment
+
+    AutoVOT reads (and if needed resamples) the whole file it is given, so the window is cut out first and the
+    results are shifted back by its begin time.
+    """
+
+    def __call__(self, segment):
+        begin = segment["begin"]
+        end = segment["end"]
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            window_path = os.path.join(tmpdirname, "window.wav")
+            try:
+                subprocess.check_call(["sox", os.path.expanduser(segment["file_path"]), "-c", "1", "-r", "16000",
+                                       "-b", "16", window_path, "trim", str(begin), str(end - begin)])
+            except (subprocess.CalledProcessError, OSError) as e:
+                raise AcousticError('Could not cut the window from {} to {} out of {} with sox: {}'.format(
+                    begin, end, segment["file_path"], e))
+            window = {"file_path": window_path, "begin": 0, "end": end - begin,
+                      "vot_marks": window_vot_marks(segment["vot_marks"], begin)}
+            output = super(MeasureVOTWindow, self).__call__(window)
+        return unwindow_vot_output(output, begin)
+
+
+class WindowedAutoVOTAnalysisFunction(AutoVOTAnalysisFunction):
+    """
+    AutoVOT analysis function that only processes the window of the sound file covered by each segment
+    """
+
+    def __init__(self, classifier_to_use=None, min_vot_length=15, max_vot_length=250, window_max=30, window_min=30,
+                 debug=False, arguments=None):
+        super(WindowedAutoVOTAnalysisFunction, self).__init__(classifier_to_use=classifier_to_use,
+                                                              min_vot_length=min_vot_length,
+                                                              max_vot_length=max_vot_length, window_max=window_max,
+                                                              window_min=window_min, debug=debug, arguments=arguments)
+        self._function = MeasureVOTWindow(classifier_to_use=classifier_to_use, min_vot_length=min_vot_length,
+                                          max_vot_length=max_vot_length, window_max=window_max,
+                                          window_min=window_min, debug=debug)
+
+
+def _execute_in_batches(corpus_context, statement, data, batch_size=VOT_BATCH_SIZE):
+    for i in range(0, len(data), batch_size):
+        corpus_context.execute_cypher(statement, data=data[i:i + batch_size])
+
+
 def analyze_vot(corpus_context, classifier, stop_label='stops',
                   vot_min=5,
                   vot_max=100,
@@ -31,10 +141,14 @@ def analyze_vot(corpus_context, classifier, stop_label='stops',
                   window_max=30,
                   overwrite_edited=False,
                   call_back=None,
-                  stop_check=None, multiprocessing=False):
+                  stop_check=None, multiprocessing=False, stops_per_job=VOT_STOPS_PER_JOB):
     """
     Analyze VOT for stops using a pretrained AutoVOT classifier.
 
+    Stops are analyzed in jobs of at most ``stops_per_job`` stops, each covering only the time window around its
+    stops, so that work is evenly sized across workers.  Each job cuts its window out of the sound file before
+    running AutoVOT, so the file is not reloaded in full for every job.
+
     Parameters
     ----------
     corpus_context : :class:`~polyglotdb.corpus.AudioContext`
@@ -58,6 +172,8 @@ def analyze_vot(corpus_context, classifier, stop_label='stops',
         stop check function, optional
     multiprocessing : bool
         Flag to use multiprocessing, otherwise will use threading
+    stops_per_job : int
+        Maximum number of stops to analyze in a single AutoVOT job
     """
     if not corpus_context.hierarchy.has_token_subset('phone', stop_label) and not corpus_context.hierarchy.has_type_subset('phone', stop_label):
         raise Exception('Phones do not have a "{}" subset.'.format(stop_label))
@@ -66,12 +182,13 @@ def analyze_vot(corpus_context, classifier, stop_label='stops',
 
     stop_mapping = generate_segments(corpus_context, annotation_type='phone', subset=stop_label, padding=PADDING, file_type="consonant", fetch_subannotations=True).grouped_mapping('discourse')
     segment_mapping = SegmentMapping()
-    vot_func = AutoVOTAnalysisFunction(classifier_to_use=classifier,
+    vot_func = WindowedAutoVOTAnalysisFunction(classifier_to_use=classifier,
             min_vot_length=vot_min,
             max_vot_length=vot_max,
             window_min=window_min,
             window_max=window_max
             )
+    window_padding = PADDING + max(abs(window_min), abs(window_max), vot_max) / 1000
     for discourse in corpus_context.discourses:
         if (discourse,) in stop_mapping:
             sf = corpus_context.discourse_sound_file(discourse)
@@ -99,12 +216,21 @@ def analyze_vot(corpus_context, classifier, stop_label='stops',
                 else:
                     speaker_mapped_stops[x["speaker"]] = [stop_info]
             for speaker in speaker_mapped_stops:
-                segment_mapping.add_file_segment(sf["consonant_file_path"], \
-                        0, sf["duration"], sf["channel"],\
-                        name="{}-{}".format(speaker, discourse), vot_marks=speaker_mapped_stops[speaker])
-    output = analyze_segments(segment_mapping.segments, vot_func, stop_check=stop_check, multiprocessing=multiprocessing)
-
+                for i, chunk in enumerate(chunk_stops(speaker_mapped_stops[speaker], stops_per_job)):
+                    begin = max(0, chunk[0][0] - window_padding)
+                    end = min(sf["duration"], chunk[-1][1] + window_padding)
+                    segment_mapping.add_file_segment(sf["consonant_file_path"],
+                            begin, end, sf["channel"],
+                            name="{}-{}-{}".format(speaker, discourse, i), vot_marks=chunk)
+    if call_back is not None:
+        call_back('Analyzing VOT in {} jobs...'.format(len(segment_mapping)))
+    output = analyze_segments(segment_mapping.segments, vot_func, call_back=call_back, stop_check=stop_check,
+                              multiprocessing=multiprocessing)
+    if stop_check is not None and stop_check():
+        return
 
+    if call_back is not None:
+        call_back('Saving VOTs...')
     if already_encoded_vots:
         new_data = []
         updated_data = []
@@ -112,8 +238,8 @@ def analyze_vot(corpus_context, classifier, stop_label='stops',
                 if prop not in ["begin", "id", "end", "confidence"]]
         all_props = [x[0] for x in custom_props]+["id", "begin", "end", "confidence"]
 
-        for discourse, discourse_output in output.items():
-            for (begin, end, confidence, stop_id, vot_id) in discourse_output:
+        for chunk_output in output.values():
+            for (begin, end, confidence, stop_id, vot_id) in chunk_output:
                 if vot_id == "new_vot":
                     props = {"id":str(uuid1()),
                              "begin":begin,
@@ -131,32 +257,44 @@ def analyze_vot(corpus_context, classifier, stop_label='stops',
                     for prop, val in custom_props:
                         props["props"][prop] = val
                     updated_data.append(props)
+        corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:vot) ASSERT node.id IS UNIQUE')
         if updated_data:
             statement = """
             UNWIND {{data}} as d
-            MERGE (n:vot:{corpus_name} {{id: d.id}})
+            MATCH (n:vot:{corpus_name}) WHERE n.id = d.id
             SET n += d.props
             """.format(corpus_name=corpus_context.cypher_safe_name)
-            corpus_context.execute_cypher(statement, data=updated_data)
+            _execute_in_batches(corpus_context, statement, updated_data)
 
         if new_data:
             default_node = ", ".join(["{}: d.{}".format(p, p) for p in all_props])
             statement = """
             UNWIND {{data}} as d
-            MATCH (annotated:phone:{corpus_name} {{id: d.annotated_id}})
+            MATCH (annotated:phone:{corpus_name}) WHERE annotated.id = d.annotated_id
             CREATE (annotated) <-[:annotates]-(annotation:vot:{corpus_name}
                 {{{default_node}}})
             """.format(corpus_name=corpus_context.cypher_safe_name, default_node=default_node)
-            corpus_context.execute_cypher(statement, data=new_data)
+            _execute_in_batches(corpus_context, statement, new_data)
     else:
         list_of_stops = []
         property_types = [("begin", float), ("end", float), ("confidence", float)]
-        for discourse, discourse_output in output.items():
-            for (begin, end, confidence, stop_id) in discourse_output:
+        for chunk_output in output.values():
+            for (begin, end, confidence, stop_id) in chunk_output:
                 list_of_stops.append({"begin":begin,
                                       "end":begin+end,
-                                      "id":uuid1(),
+                                      "id":str(uuid1()),
                                       "confidence":confidence,
                                       "annotated_id":stop_id})
 
-        corpus_context.import_subannotations(list_of_stops, property_types, "vot", "phone")
+        corpus_context.hierarchy.add_subannotation_type(corpus_context, "phone", "vot", properties=property_types)
+        corpus_context.encode_hierarchy()
+        corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:vot) ASSERT node.id IS UNIQUE')
+        statement = """
+        UNWIND {{data}} as d
+        MATCH (annotated:phone:{corpus_name}) WHERE annotated.id = d.annotated_id
+        CREATE (annotated) <-[:annotates]-(annotation:vot:{corpus_name}
+            {{id: d.id, begin: d.begin, end: d.end, confidence: d.confidence}})
+        """.format(corpus_name=corpus_context.cypher_safe_name)
+        _execute_in_batches(corpus_context, statement, list_of_stops)
+        for p, _ in property_types:
+            corpus_context.execute_cypher('CREATE INDEX ON :vot(%s)' % p)
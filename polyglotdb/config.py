@@ -69,6 +69,27 @@ class CorpusConfig(object):
     base_dir : str
         Base directory to store information and temporary files for the corpus
         defaults to ".pgdb" under the current user's home directory
+    acoustic_pool_size : int
+        Number of HTTP connections to keep open to the acoustic database
+    acoustic_write_batch_size : int
+        Number of points to send to the acoustic database per write
+    acoustic_flush_interval : float
+        Maximum number of seconds that written points are buffered before being sent
+    acoustic_max_pending : int
+        Number of buffered points at which writes block until earlier points are sent
+    acoustic_write_retries : int
+        Number of times to retry writes that fail because of connection or server errors
+    acoustic_read_depth : int
+        Number of acoustic queries to keep in flight when reading many tracks
+    precompute_audio_pyramids : bool
+        Whether to build waveform envelopes and spectrograms when sound files are added, rather than when they
+        are first requested
+    query_cache : bool
+        Whether to cache the results of annotation queries on disk, invalidated whenever the corpus changes
+    query_cache_size : int
+        Maximum size in bytes of cached query results, beyond which the least recently used are removed
+    query_cache_entries : int
+        Maximum number of cached query results
     """
 
     def __init__(self, corpus_name, data_dir=None, **kwargs):
@@ -76,6 +97,16 @@ class CorpusConfig(object):
         self.acoustic_user = None
         self.acoustic_password = None
         self.acoustic_http_port = 8086
+        self.acoustic_pool_size = 10
+        self.acoustic_write_batch_size = 5000
+        self.acoustic_flush_interval = 1.0
+        self.acoustic_max_pending = 50000
+        self.acoustic_write_retries = 3
+        self.acoustic_read_depth = 4
+        self.precompute_audio_pyramids = False
+        self.query_cache = False
+        self.query_cache_size = 1024 ** 3
+        self.query_cache_entries = 1000
         self.graph_user = None
         self.graph_password = None
         self.host = 'localhost'
@@ -100,6 +131,7 @@ class CorpusConfig(object):
         os.makedirs(self.data_dir, exist_ok=True)
         self.audio_dir = os.path.join(self.data_dir, 'audio')
         os.makedirs(self.audio_dir, exist_ok=True)
+        self.query_cache_directory = os.path.join(self.base_dir, 'query_cache')
 
         self.engine = 'sqlite'
         self.db_path = os.path.join(self.data_dir, self.corpus_name)
@@ -138,7 +170,8 @@ class CorpusConfig(object):
         """
         kwargs = {'host': self.host,
                   'port': self.acoustic_http_port,
-                  'database': self.corpus_name}
+                  'database': self.corpus_name,
+                  'pool_size': self.acoustic_pool_size}
         if self.acoustic_user is not None:
             kwargs['username'] = self.acoustic_user
         if self.acoustic_password is not None:
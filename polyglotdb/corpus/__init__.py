@@ -12,3 +12,5 @@ from .syllabic import SyllabicContext
 from .spoken import SpokenContext
 from .summarized import SummarizedContext
 from .annotated import AnnotatedContext
+from .enrichment import (EnrichmentContext, EnrichmentPipeline, EnrichmentStep, enrichment_step,
+                         register_enrichment_step)
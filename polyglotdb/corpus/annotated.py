@@ -15,5 +15,7 @@ class AnnotatedContext(SummarizedContext):
         subannotations_data_to_csv(self, subannotation_name, data)
         import_subannotation_csv(self, subannotation_name, annotation_type, ["id", "annotated_id"] + [x[0] for x in property_data])
 
-    def enrich_tokens_with_csv(self, path, annotated_type, id_column, properties=None):
-        import_token_csv(self, path, annotated_type, id_column, properties=properties)
+    def enrich_tokens_with_csv(self, path, annotated_type, id_column, properties=None, call_back=None,
+                               stop_check=None):
+        import_token_csv(self, path, annotated_type, id_column, properties=properties, call_back=call_back,
+                         stop_check=stop_check)
@@ -1,18 +1,31 @@
 import os
 import re
-import librosa
 import subprocess
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from decimal import Decimal
 
-from influxdb import InfluxDBClient
-from influxdb.exceptions import InfluxDBClientError
-
-from ..acoustics import analyze_pitch, analyze_formant_tracks, analyze_intensity, \
-    analyze_script, analyze_track_script, analyze_utterance_pitch, update_utterance_pitch_track, analyze_vot
 from ..acoustics.classes import Track, TimePoint
 from .syllabic import SyllabicContext
-from ..acoustics.utils import load_waveform, generate_spectrogram
+
+#: Version of the InfluxDB storage layout, version 1 stored utterance IDs as fields, version 2 stores them as tags
+ACOUSTIC_SCHEMA_VERSION = 2
+
+ACOUSTIC_SCHEMA_MEASUREMENT = 'acoustic_schema'
+
+ACOUSTIC_MIGRATION_MEASUREMENT = 'acoustic_schema_migration'
+
+ACOUSTIC_MIGRATION_SUFFIX = '_v2'
+
+ACOUSTIC_TAGS = ('speaker', 'discourse', 'channel', 'utterance_id')
+
+REASSESS_CHUNK_SIZE = 500
+
+ACOUSTIC_DELETE_BATCH_SIZE = 100
+
+ACOUSTIC_STATISTICS = ('mean', 'median', 'stddev', 'sum', 'mode', 'count')
 
 
 def sanitize_value(value, type):
@@ -157,11 +170,220 @@ def to_seconds(time_string):
     return s
 
 
+def ms_to_seconds(milliseconds):
+    """
+    Converts integer milliseconds (as returned by InfluxDB queries with ``epoch='ms'``) to seconds
+
+    Parameters
+    ----------
+    milliseconds : int
+        Milliseconds
+
+    Returns
+    -------
+    Decimal
+        Time stamp in seconds, with millisecond precision
+    """
+    return Decimal(int(milliseconds)).scaleb(-3)
+
+
+def decode_points(result, properties):
+    """
+    Decode the series of an InfluxDB result set (queried with ``epoch='ms'``) into arrays
+
+    Parameters
+    ----------
+    result : :class:`influxdb.resultset.ResultSet`
+        Result of an InfluxDB query
+    properties : list
+        Names of the columns to extract
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        Integer times in milliseconds
+    dict
+        Arrays of values for each property, missing values are None
+    """
+    times = []
+    values = {x: [] for x in properties}
+    for series in result.raw.get('series', []):
+        columns = series['columns']
+        time_index = columns.index('time')
+        indices = [(x, columns.index(x)) for x in properties if x in columns]
+        missing = [x for x in properties if x not in columns]
+        for row in series['values']:
+            times.append(row[time_index])
+            for name, i in indices:
+                values[name].append(row[i])
+            for name in missing:
+                values[name].append(None)
+    return np.array(times, dtype=np.int64), {k: np.array(v, dtype=object) for k, v in values.items()}
+
+
+def points_to_track(times, values, begin=None, end=None):
+    """
+    Create a Track from decoded InfluxDB points
+
+    Parameters
+    ----------
+    times : :class:`numpy.ndarray`
+        Integer times in milliseconds
+    values : dict
+        Arrays of values for each property
+    begin : Decimal, optional
+        Beginning of the time range, if specified along with end, times will be relative to the range
+    end : Decimal, optional
+        End of the time range
+
+    Returns
+    -------
+    :class:`polyglotdb.acoustics.classes.Track`
+        Track object
+    """
+    track = Track()
+    names = list(values.keys())
+    columns = [values[x] for x in names]
+    for i, t in enumerate(times):
+        s = ms_to_seconds(t)
+        if begin is not None and end is not None:
+            s = (s - begin) / (end - begin)
+        p = TimePoint(s)
+        for name, column in zip(names, columns):
+            p.add_value(name, column[i])
+        track.add(p)
+    return track
+
+
+def match_intervals(times, begins, ends):
+    """
+    Find the interval that each time point belongs to, with points between intervals assigned to the preceding
+    interval (or the first interval if they precede all intervals) and points on the boundary of two intervals
+    assigned to the earlier one
+
+    Parameters
+    ----------
+    times : :class:`numpy.ndarray`
+        Time points
+    begins : :class:`numpy.ndarray`
+        Sorted beginnings of the intervals
+    ends : :class:`numpy.ndarray`
+        Ends of the intervals
+
+    Returns
+    -------
+    :class:`numpy.ndarray`
+        Index of the interval for each time point
+    """
+    indices = np.searchsorted(begins, times, side='right') - 1
+    previous = indices - 1
+    on_boundary = (previous >= 0) & (times <= ends[np.clip(previous, 0, None)])
+    indices[on_boundary] = previous[on_boundary]
+    return np.clip(indices, 0, None)
+
+
+def mask_runs(times, mask):
+    """
+    Get the time ranges of consecutive runs of points that are selected by a mask
+
+    Parameters
+    ----------
+    times : :class:`numpy.ndarray`
+        Sorted time points
+    mask : :class:`numpy.ndarray`
+        Boolean mask of selected points
+
+    Returns
+    -------
+    list
+        List of (begin, end) tuples of the first and last time in each run
+    """
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.nonzero(edges == 1)[0]
+    stops = np.nonzero(edges == -1)[0] - 1
+    return [(int(times[b]), int(times[e])) for b, e in zip(starts, stops)]
+
+
+def summarize_values(values, statistic):
+    """
+    Compute a summary statistic over an array of values, matching the corresponding InfluxDB aggregate
+
+    Parameters
+    ----------
+    values : :class:`numpy.ndarray`
+        Values to summarize, missing values should already be removed
+    statistic : str
+        One of `mean`, `median`, `stddev`, `sum`, `mode`, `count`
+
+    Returns
+    -------
+    float or int or None
+        Summary statistic, None if it is undefined for the number of values
+    """
+    if statistic == 'count':
+        return int(values.shape[0])
+    if values.shape[0] == 0:
+        return None
+    if statistic == 'mean':
+        return float(np.mean(values))
+    elif statistic == 'median':
+        return float(np.median(values))
+    elif statistic == 'stddev':
+        if values.shape[0] < 2:
+            return None
+        return float(np.std(values, ddof=1))
+    elif statistic == 'sum':
+        return float(np.sum(values))
+    elif statistic == 'mode':
+        unique, counts = np.unique(values, return_counts=True)
+        return float(unique[np.argmax(counts)])
+    raise ValueError('Statistic name should be one of: {}.'.format(', '.join(ACOUSTIC_STATISTICS)))
+
+
+def statistic_property_name(statistic, measure):
+    """
+    Name of the property that a summary statistic of a measure is stored as (i.e., ``mean_F0``)
+
+    Parameters
+    ----------
+    statistic : str
+        Name of the statistic
+    measure : str
+        Name of the acoustic property
+
+    Returns
+    -------
+    str
+        Property name
+    """
+    return '{}_{}'.format(statistic, measure)
+
+
 class AudioContext(SyllabicContext):
     """
     Class that contains methods for dealing with audio files for corpora
     """
 
+    def __init__(self, *args, **kwargs):
+        super(AudioContext, self).__init__(*args, **kwargs)
+        self._acoustic_client = None
+        self._acoustic_database_ready = False
+        self._acoustic_writer = None
+        self._acoustic_lock = threading.RLock()
+        self._audio_pyramids = {}
+        self._pyramid_lock = threading.RLock()
+
+    def __exit__(self, exc_type, exc, exc_tb):
+        try:
+            self.close_acoustic_client()
+        except Exception:
+            # Do not hide the exception that ended the block
+            if exc_type is None:
+                raise
+        finally:
+            result = super(AudioContext, self).__exit__(exc_type, exc, exc_tb)
+        return result
+
     def load_audio(self, discourse, file_type):
         """
         Loads a given audio file at the specified sampling rate type (``consonant``, ``vowel`` or ``low_freq``).
@@ -191,6 +413,7 @@ class AudioContext(SyllabicContext):
             path = os.path.expanduser(sound_file.low_freq_file_path)
         else:
             path = os.path.expanduser(sound_file.file_path)
+        import librosa
         signal, sr = librosa.load(path, sr=None)
         return signal, sr
 
@@ -226,6 +449,7 @@ class AudioContext(SyllabicContext):
             file_path = sf['low_freq_file_path']
         else:
             file_path = sf['file_path']
+        from ..acoustics.utils import load_waveform
         return load_waveform(file_path, begin, end)
 
     def generate_spectrogram(self, discourse, file_type='consonant', begin=None, end=None):
@@ -254,8 +478,146 @@ class AudioContext(SyllabicContext):
             Frequency step between each frequency bin
         """
         signal, sr = self.load_waveform(discourse, file_type, begin, end)
+        from ..acoustics.utils import generate_spectrogram
         return generate_spectrogram(signal, sr)
 
+    def discourse_pyramid_directory(self, discourse):
+        """
+        Return the directory for the precomputed waveform envelopes and spectrograms of a discourse
+        """
+        return os.path.join(self.discourse_audio_directory(discourse), 'pyramid')
+
+    def build_audio_pyramid(self, discourse, force=False):
+        """
+        Precompute waveform envelopes and spectrograms of a discourse's audio at several resolutions, see
+        :func:`~polyglotdb.acoustics.pyramid.build_pyramid`
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        force : bool
+            Whether to rebuild the pyramid even if it is up to date with the audio file
+        """
+        from ..acoustics.pyramid import build_pyramid, pyramid_is_current
+        path = self.discourse_sound_file(discourse)['consonant_file_path']
+        if path is None:
+            raise ValueError('Discourse {} does not have a sound file.'.format(discourse))
+        directory = self.discourse_pyramid_directory(discourse)
+        with self._pyramid_lock:
+            self._audio_pyramids.pop(discourse, None)
+        if force or not pyramid_is_current(path, directory):
+            build_pyramid(path, directory)
+
+    def build_audio_pyramids(self, num_workers=1, call_back=None, stop_check=None):
+        """
+        Precompute waveform envelopes and spectrograms for every discourse with a sound file
+
+        Parameters
+        ----------
+        num_workers : int
+            Number of discourses to process at once, defaults to 1
+        call_back : callable
+            Function to report progress
+        stop_check : callable
+            Function to check whether to terminate early
+        """
+        discourses = [d for d in sorted(self.discourses) if self.discourse_sound_file(d)['file_path'] is not None]
+        if call_back is not None:
+            call_back('Building audio pyramids...')
+            call_back(0, len(discourses))
+        with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+            futures = [executor.submit(self.build_audio_pyramid, d) for d in discourses]
+            for i, f in enumerate(as_completed(futures)):
+                f.result()
+                if call_back is not None:
+                    call_back(i + 1)
+                if stop_check is not None and stop_check():
+                    for other in futures:
+                        other.cancel()
+
+    def audio_pyramid(self, discourse):
+        """
+        Get the precomputed waveform envelopes and spectrograms of a discourse, building them first if they
+        do not exist or are out of date with the audio file
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+
+        Returns
+        -------
+        :class:`~polyglotdb.acoustics.pyramid.AudioPyramid`
+            Pyramid for the discourse
+        """
+        from ..acoustics.pyramid import AudioPyramid
+        with self._pyramid_lock:
+            if discourse not in self._audio_pyramids:
+                self.build_audio_pyramid(discourse)
+                self._audio_pyramids[discourse] = AudioPyramid(self.discourse_pyramid_directory(discourse))
+            return self._audio_pyramids[discourse]
+
+    def waveform_envelope(self, discourse, begin=None, end=None, width=1000):
+        """
+        Get the minimum and maximum amplitude of a discourse's audio for each pixel of a time window, see
+        :meth:`~polyglotdb.acoustics.pyramid.AudioPyramid.waveform`
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        begin : float, optional
+            Timestamp in seconds
+        end : float, optional
+            Timestamp in seconds
+        width : int
+            Number of pixels
+
+        Returns
+        -------
+        numpy.array
+            Minimum amplitude of each column
+        numpy.array
+            Maximum amplitude of each column
+        float
+            Time of the start of the first column
+        float
+            Duration of each column
+        """
+        return self.audio_pyramid(discourse).waveform(begin, end, width)
+
+    def spectrogram_window(self, discourse, begin=None, end=None, width=500, height=None):
+        """
+        Get the spectrogram of a time window of a discourse's audio, pooled to a number of pixels, see
+        :meth:`~polyglotdb.acoustics.pyramid.AudioPyramid.spectrogram`
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        begin : float, optional
+            Timestamp in seconds
+        end : float, optional
+            Timestamp in seconds
+        width : int
+            Number of time columns
+        height : int, optional
+            Number of frequency rows, defaults to one per frequency bin
+
+        Returns
+        -------
+        numpy.array
+            Power in decibels, with frequency bins as rows and time columns as columns
+        float
+            Time of the first column
+        float
+            Time step between columns
+        float
+            Frequency step between rows
+        """
+        return self.audio_pyramid(discourse).spectrogram(begin, end, width, height)
+
     def analyze_pitch(self, source='praat', algorithm='base', stop_check=None, call_back=None, multiprocessing=True):
         """
         Analyze pitch tracks and save them to the database.
@@ -275,6 +637,7 @@ class AudioContext(SyllabicContext):
         multiprocessing : bool
             Flag whether to use multiprocessing or threading
         """
+        from ..acoustics import analyze_pitch
         analyze_pitch(self, source, algorithm, stop_check, call_back, multiprocessing=multiprocessing)
 
     def analyze_utterance_pitch(self, utterance, source='praat', **kwargs):
@@ -297,6 +660,7 @@ class AudioContext(SyllabicContext):
         :class:`~polyglotdb.acoustics.classes.Track`
             Pitch track
         """
+        from ..acoustics import analyze_utterance_pitch
         return analyze_utterance_pitch(self, utterance, source, **kwargs)
 
     def update_utterance_pitch_track(self, utterance, new_track):
@@ -317,8 +681,28 @@ class AudioContext(SyllabicContext):
         int
             Time stamp of update
         """
+        from ..acoustics import update_utterance_pitch_track
         return update_utterance_pitch_track(self, utterance, new_track)
 
+    def update_utterance_pitch_tracks(self, tracks):
+        """
+        Save pitch tracks for multiple utterances at once.
+
+        See :meth:`polyglotdb.acoustics.pitch.base.update_utterance_pitch_tracks` for more details.
+
+        Parameters
+        ----------
+        tracks : dict
+            Mapping of utterance IDs to pitch tracks
+
+        Returns
+        -------
+        int
+            Time stamp of update
+        """
+        from ..acoustics import update_utterance_pitch_tracks
+        return update_utterance_pitch_tracks(self, tracks)
+
     def analyze_vot(self, classifier,
                     stop_label="stops",
                     stop_check=None,
@@ -328,7 +712,8 @@ class AudioContext(SyllabicContext):
                     vot_min=5,
                     vot_max=100,
                     window_min=-30,
-                    window_max=30):
+                    window_max=30,
+                    stops_per_job=100):
         """
         Compute VOTs for stops and save them to the database.
 
@@ -356,12 +741,15 @@ class AudioContext(SyllabicContext):
             stop check function, optional
         multiprocessing : bool
             Flag to use multiprocessing, otherwise will use threading
+        stops_per_job : int
+            Maximum number of stops to analyze in a single AutoVOT job
         """
+        from ..acoustics import analyze_vot
         analyze_vot(self, classifier, stop_label=stop_label, stop_check=stop_check,
                     call_back=call_back, multiprocessing=multiprocessing,
                     overwrite_edited=overwrite_edited,
                     vot_min=vot_min, vot_max=vot_max, window_min=window_min,
-                    window_max=window_max)
+                    window_max=window_max, stops_per_job=stops_per_job)
 
     def analyze_formant_tracks(self, source='praat', stop_check=None, call_back=None, multiprocessing=True,
                                vowel_label=None):
@@ -383,6 +771,7 @@ class AudioContext(SyllabicContext):
         vowel_label : str, optional
             Optional subset of phones to compute tracks over.  If None, then tracks over utterances are computed.
         """
+        from ..acoustics import analyze_formant_tracks
         analyze_formant_tracks(self, source=source, stop_check=stop_check, call_back=call_back,
                                multiprocessing=multiprocessing, vowel_label=vowel_label)
 
@@ -403,6 +792,7 @@ class AudioContext(SyllabicContext):
         multiprocessing : bool
             Flag to use multiprocessing, defaults to True, if False uses threading
         """
+        from ..acoustics import analyze_intensity
         analyze_intensity(self, source, stop_check, call_back, multiprocessing=multiprocessing)
 
     def analyze_script(self, phone_class=None, subset=None, annotation_type=None, script_path=None, duration_threshold=0.01, arguments=None, stop_check=None,
@@ -441,6 +831,7 @@ class AudioContext(SyllabicContext):
         list
             List of the names of newly added properties to the Neo4j database
         """
+        from ..acoustics import analyze_script
         return analyze_script(self, subset=subset, annotation_type=annotation_type, phone_class=phone_class, script_path=script_path, duration_threshold=duration_threshold,
                               arguments=arguments,
                               stop_check=stop_check, call_back=call_back, multiprocessing=multiprocessing)
@@ -476,6 +867,7 @@ class AudioContext(SyllabicContext):
         file_type : str
             Sampling rate type to use, one of ``consonant``, ``vowel``, or ``low_freq``
         """
+        from ..acoustics import analyze_track_script
         return analyze_track_script(self, acoustic_name, properties, script_path, duration_threshold=duration_threshold,
                               arguments=arguments, phone_class=phone_class,
                               stop_check=stop_check, call_back=call_back, multiprocessing=multiprocessing, file_type=file_type)
@@ -513,7 +905,12 @@ class AudioContext(SyllabicContext):
         """
         Reset all acoustic measures currently encoded
         """
-        self.acoustic_client().drop_database(self.corpus_name)
+        if self._acoustic_writer is not None:
+            self._acoustic_writer.discard()
+        self.mark_data_changed()
+        self._connect_acoustic_client().drop_database(self.corpus_name)
+        self._acoustic_database_ready = False
+        self._acoustic_schema_version = None
         if self.hierarchy.acoustics:
             self.hierarchy.acoustic_properties = {}
             self.encode_hierarchy()
@@ -527,12 +924,65 @@ class AudioContext(SyllabicContext):
         acoustic_type : str
             Name of the acoustic measurement to reset
         """
+        self.mark_data_changed()
         self.acoustic_client().query('''DROP MEASUREMENT "{}";'''.format(acoustic_type))
         if acoustic_type in self.hierarchy.acoustics:
             self.hierarchy.acoustic_properties = {k: v for k, v in self.hierarchy.acoustic_properties.items() if
                                                   k != acoustic_type}
             self.encode_hierarchy()
 
+    def reset_discourse_acoustics(self, discourses):
+        """
+        Remove the acoustic measurements of a set of discourses, leaving other discourses untouched
+
+        Parameters
+        ----------
+        discourses : list
+            Names of the discourses whose measurements should be removed
+        """
+        if not self.hierarchy.acoustics:
+            return
+        self.mark_data_changed()
+        client = self.acoustic_client()
+        statements = ["""DELETE FROM "{}" WHERE "discourse" = '{}'""".format(a, d.replace("'", r"\'"))
+                      for d in sorted(discourses) for a in sorted(self.hierarchy.acoustics)]
+        for i in range(0, len(statements), ACOUSTIC_DELETE_BATCH_SIZE):
+            client.query(';'.join(statements[i:i + ACOUSTIC_DELETE_BATCH_SIZE]))
+
+    def delete_discourses(self, discourses, num_workers=1, batch_size=None, memory_budget=None, call_back=None,
+                          stop_check=None):
+        """
+        Remove the acoustic measurements, nodes and relationships of several discourses, see
+        :meth:`~polyglotdb.corpus.BaseContext.delete_discourses`
+
+        Acoustic measurements are removed first, so that a deletion that is stopped part way can still be
+        resumed from the graph.
+
+        Parameters
+        ----------
+        discourses : list
+            Names of the discourses to remove
+        num_workers : int
+            Number of discourses to delete at once, defaults to 1
+        batch_size : int, optional
+            Number of nodes to delete per transaction, defaults to a size based on ``memory_budget``
+        memory_budget : int, optional
+            Approximate memory in bytes to allow for each deletion transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function the check whether the process should terminate early
+
+        Returns
+        -------
+        bool
+            True if all discourses were removed, False if the deletion was stopped
+        """
+        self.reset_discourse_acoustics(discourses)
+        return super(AudioContext, self).delete_discourses(discourses, num_workers=num_workers,
+                                                           batch_size=batch_size, memory_budget=memory_budget,
+                                                           call_back=call_back, stop_check=stop_check)
+
     def reset_vot(self):
         """
         Reset all VOT measurements in the corpus
@@ -544,21 +994,273 @@ class AudioContext(SyllabicContext):
                 self.hierarchy.subannotations["phone"].remove("vot")
                 self.encode_hierarchy()
 
+    def _connect_acoustic_client(self):
+        with self._acoustic_lock:
+            if self._acoustic_client is None:
+                from influxdb import InfluxDBClient
+                self._acoustic_client = InfluxDBClient(**self.config.acoustic_connection_kwargs)
+            if not self._acoustic_database_ready:
+                databases = [x['name'] for x in self._acoustic_client.get_list_database()]
+                if self.corpus_name not in databases:
+                    self._acoustic_client.create_database(self.corpus_name)
+                    self._write_acoustic_schema_version(self._acoustic_client, ACOUSTIC_SCHEMA_VERSION)
+                self._acoustic_database_ready = True
+            return self._acoustic_client
+
     def acoustic_client(self):
         """
-        Generate a client to connect to the InfluxDB for the corpus
+        Get the client connected to the InfluxDB database for the corpus
+
+        A single client is kept for the lifetime of the context, so its pool of HTTP connections is reused across
+        calls and threads.  Points waiting in the :meth:`acoustic_writer` are written before the client is
+        returned, so queries see all earlier writes.
 
         Returns
         -------
         InfluxDBClient
             Client through which to run queries and writes
         """
-        client = InfluxDBClient(**self.config.acoustic_connection_kwargs)
-        databases = client.get_list_database()
-        if self.corpus_name not in databases:
-            client.create_database(self.corpus_name)
+        client = self._connect_acoustic_client()
+        if self._acoustic_writer is not None:
+            self._acoustic_writer.flush()
+        if self.instrumentation is not None:
+            client = self.instrumentation.wrap_acoustic_client(client)
         return client
 
+    def acoustic_writer(self):
+        """
+        Get the writer that batches points for the InfluxDB database of the corpus in the background
+
+        Returns
+        -------
+        :class:`~polyglotdb.acoustics.client.BatchingWriter`
+            Writer for the corpus
+        """
+        from ..acoustics.client import BatchingWriter
+        with self._acoustic_lock:
+            if self._acoustic_writer is None:
+                client = self._connect_acoustic_client()
+                if self.instrumentation is not None:
+                    client = self.instrumentation.wrap_acoustic_client(client)
+                self._acoustic_writer = BatchingWriter(client, batch_size=self.config.acoustic_write_batch_size,
+                                                       flush_interval=self.config.acoustic_flush_interval,
+                                                       max_pending=self.config.acoustic_max_pending,
+                                                       max_retries=self.config.acoustic_write_retries)
+            return self._acoustic_writer
+
+    def write_acoustic_points(self, points):
+        """
+        Queue points to be written to the InfluxDB database of the corpus, see :meth:`acoustic_writer`
+
+        Parameters
+        ----------
+        points : list
+            Points as constructed by :meth:`acoustic_point`
+        """
+        if points:
+            self.mark_data_changed()
+            self.acoustic_writer().write(points)
+
+    def flush_acoustic_writes(self):
+        """
+        Block until all queued acoustic points have been written
+        """
+        if self._acoustic_writer is not None:
+            self._acoustic_writer.flush()
+
+    def close_acoustic_client(self, flush=True):
+        """
+        Stop the acoustic writer and close the connections of the acoustic client
+
+        Parameters
+        ----------
+        flush : bool
+            Whether to write queued points first, otherwise they are discarded
+        """
+        with self._acoustic_lock:
+            writer, self._acoustic_writer = self._acoustic_writer, None
+            client, self._acoustic_client = self._acoustic_client, None
+            self._acoustic_database_ready = False
+        try:
+            if writer is not None:
+                writer.close(flush=flush)
+        finally:
+            if client is not None:
+                client.close()
+
+    def _write_acoustic_schema_version(self, client, version):
+        client.write_points([{'measurement': ACOUSTIC_SCHEMA_MEASUREMENT,
+                              'tags': {},
+                              'time': 0,
+                              'fields': {'version': version}}], time_precision='ms')
+        self._acoustic_schema_version = version
+
+    def acoustic_schema_version(self):
+        """
+        Get the version of the storage layout used for the corpus's acoustic measurements.  Databases with
+        measurements but no recorded version predate versioning and use version 1.
+
+        Returns
+        -------
+        int
+            Version of the storage layout
+        """
+        version = getattr(self, '_acoustic_schema_version', None)
+        if version is not None:
+            return version
+        client = self.acoustic_client()
+        version = getattr(self, '_acoustic_schema_version', None)
+        if version is not None:
+            return version
+        result = client.query('''SELECT last("version") AS "version" FROM "{}";'''.format(ACOUSTIC_SCHEMA_MEASUREMENT))
+        points = list(result.get_points(ACOUSTIC_SCHEMA_MEASUREMENT))
+        if points:
+            version = int(points[0]['version'])
+        elif list(client.query('''SHOW MEASUREMENTS LIMIT 1;''').get_points()):
+            version = 1
+        else:
+            version = ACOUSTIC_SCHEMA_VERSION
+            self._write_acoustic_schema_version(client, version)
+        self._acoustic_schema_version = version
+        return version
+
+    def acoustic_point(self, acoustic_name, tags, time_point, fields, utterance_id=None, time_precision='ms'):
+        """
+        Construct a point to write to InfluxDB, storing the utterance ID according to the corpus's storage layout
+
+        Parameters
+        ----------
+        acoustic_name : str
+            Name of the acoustic measure
+        tags : dict
+            Tags of the point (speaker, discourse and channel)
+        time_point : int
+            Time of the point, in milliseconds unless ``time_precision`` is given
+        fields : dict
+            Values of the point
+        utterance_id : str, optional
+            ID of the utterance containing the point
+        time_precision : str
+            Precision of ``time_point``, i.e. ``'n'`` for nanoseconds
+
+        Returns
+        -------
+        dict
+            Point for use in :meth:`write_acoustic_points`
+        """
+        if utterance_id is not None:
+            if self.acoustic_schema_version() >= 2:
+                tags = dict(tags, utterance_id=utterance_id)
+            else:
+                fields = dict(fields, utterance_id=utterance_id)
+        point = {'measurement': acoustic_name,
+                 'tags': tags,
+                 'time': time_point,
+                 'fields': fields}
+        if time_precision != 'ms':
+            point['time_precision'] = time_precision
+        return point
+
+    def _acoustic_migration_stages(self, client):
+        result = client.query('''SELECT last("stage") AS "stage" FROM "{}" GROUP BY "measurement";'''.format(
+            ACOUSTIC_MIGRATION_MEASUREMENT))
+        stages = {}
+        for (_, tags), points in result.items():
+            for p in points:
+                stages[tags['measurement']] = p['stage']
+        return stages
+
+    def _write_acoustic_migration_stage(self, client, acoustic_name, stage):
+        client.write_points([{'measurement': ACOUSTIC_MIGRATION_MEASUREMENT,
+                              'tags': {'measurement': acoustic_name},
+                              'time': 0,
+                              'fields': {'stage': stage}}], time_precision='ms')
+
+    def _drop_acoustic_measurement(self, client, acoustic_name):
+        result = client.query('''SHOW MEASUREMENTS WITH MEASUREMENT = "{}";'''.format(acoustic_name))
+        if list(result.get_points()):
+            client.query('''DROP MEASUREMENT "{}";'''.format(acoustic_name))
+
+    def _copy_acoustic_measurement(self, client, acoustic_name, pairs, progress, call_back=None, stop_check=None):
+        copy_name = acoustic_name + ACOUSTIC_MIGRATION_SUFFIX
+        filters = ['''WHERE "discourse" = '{}' AND "speaker" = '{}' '''.format(
+            discourse.replace("'", r"\'"), speaker.replace("'", r"\'")) for discourse, speaker in pairs]
+        # Each discourse and speaker is a separate set of series, so later ones can be read while earlier ones
+        # are copied
+        results = self.execute_influxdb_many(('''SELECT * FROM "{}" {};'''.format(acoustic_name, filter_string)
+                                              for filter_string in filters), epoch='ns')
+        for i, result in enumerate(results):
+            if stop_check is not None and stop_check():
+                return False
+            if call_back is not None:
+                call_back(progress + i + 1)
+            data = []
+            for series in result.raw.get('series', []):
+                columns = series['columns']
+                for row in series['values']:
+                    point = dict(zip(columns, row))
+                    time_point = point.pop('time')
+                    tags = {k: point.pop(k) for k in ACOUSTIC_TAGS if point.get(k, None) is not None}
+                    fields = {k: v for k, v in point.items() if v is not None}
+                    if not fields:
+                        continue
+                    data.append({'measurement': copy_name,
+                                 'tags': tags,
+                                 'time': time_point,
+                                 'time_precision': 'n',
+                                 'fields': fields})
+            self.write_acoustic_points(data)
+        self.flush_acoustic_writes()
+        return True
+
+    def migrate_acoustic_schema(self, call_back=None, stop_check=None):
+        """
+        Rewrite existing acoustic measurements to the current storage layout, storing utterance IDs as tags so
+        that per-utterance queries only read the points of that utterance
+
+        Each measurement is copied to a new measurement with the new layout, which then replaces the original.
+        Dropping the original measurement also drops its ``utterance_id`` field, which would otherwise clash with
+        the new tag.  The progress of each measurement is recorded in the database, so a migration that is
+        stopped or fails can be rerun and resumes where it left off, and the version of the layout is only
+        updated once every measurement has been replaced.  The original points are left untouched until their
+        copy is complete.
+
+        Parameters
+        ----------
+        call_back : callable
+            Function to report progress
+        stop_check : callable
+            Function to check whether to terminate early
+        """
+        if self.acoustic_schema_version() >= ACOUSTIC_SCHEMA_VERSION:
+            return
+        client = self.acoustic_client()
+        pairs = [(d, s) for d in sorted(self.discourses) for s in sorted(self.get_speakers_in_discourse(d))]
+        measurements = sorted(self.hierarchy.acoustics)
+        stages = self._acoustic_migration_stages(client)
+        if call_back is not None:
+            call_back('Migrating acoustic measurements...')
+            call_back(0, len(pairs) * len(measurements))
+        for i, acoustic_name in enumerate(measurements):
+            copy_name = acoustic_name + ACOUSTIC_MIGRATION_SUFFIX
+            stage = stages.get(acoustic_name)
+            if stage is None:
+                self._drop_acoustic_measurement(client, copy_name)
+                if not self._copy_acoustic_measurement(client, acoustic_name, pairs, i * len(pairs),
+                                                       call_back=call_back, stop_check=stop_check):
+                    return
+                self._write_acoustic_migration_stage(client, acoustic_name, 'copied')
+                stage = 'copied'
+            if stage == 'copied':
+                self._drop_acoustic_measurement(client, acoustic_name)
+                client.query('''SELECT * INTO "{}" FROM "{}" GROUP BY *;'''.format(acoustic_name, copy_name))
+                self._write_acoustic_migration_stage(client, acoustic_name, 'swapped')
+            self._drop_acoustic_measurement(client, copy_name)
+            if call_back is not None:
+                call_back((i + 1) * len(pairs))
+        self._write_acoustic_schema_version(client, ACOUSTIC_SCHEMA_VERSION)
+        self._drop_acoustic_measurement(client, ACOUSTIC_MIGRATION_MEASUREMENT)
+
     def discourse_audio_directory(self, discourse):
         """
         Return the directory for the stored audio files for a discourse
@@ -663,7 +1365,7 @@ class AudioContext(SyllabicContext):
                     break
         return self._has_sound_files
 
-    def execute_influxdb(self, query):
+    def execute_influxdb(self, query, epoch=None):
         """
         Execute an InfluxDB query for the corpus
 
@@ -671,21 +1373,45 @@ class AudioContext(SyllabicContext):
         ----------
         query : str
             Query to run
+        epoch : str, optional
+            Precision of integer time stamps to return (i.e., ``'ms'``), if not specified, times are returned
+            as RFC3339 strings
 
         Returns
         -------
         :class:`influxdb.resultset.ResultSet`
             Results of the query
         """
+        from influxdb.exceptions import InfluxDBClientError
         client = self.acoustic_client()
         try:
-            result = client.query(query)
+            result = client.query(query, epoch=epoch)
         except InfluxDBClientError:
             print('There was an issue with the following query:')
             print(query)
             raise
         return result
 
+    def execute_influxdb_many(self, queries, epoch=None):
+        """
+        Execute InfluxDB queries for the corpus with several in flight at once
+
+        Parameters
+        ----------
+        queries : iterable
+            Queries to run
+        epoch : str, optional
+            Precision of integer time stamps to return (i.e., ``'ms'``)
+
+        Yields
+        ------
+        :class:`influxdb.resultset.ResultSet`
+            Results of each query, in the order of the queries
+        """
+        from ..acoustics.client import pipelined_queries
+        return pipelined_queries(self.acoustic_client(), queries, epoch=epoch,
+                                 depth=self.config.acoustic_read_depth)
+
     def get_utterance_acoustics(self, acoustic_name, utterance_id, discourse, speaker):
         """
         Get acoustic for a given utterance and time range
@@ -715,15 +1441,9 @@ class AudioContext(SyllabicContext):
                         WHERE "utterance_id" = '{}'
                         AND "discourse" = '{}'
                         AND "speaker" = '{}';'''.format(columns, acoustic_name, utterance_id, discourse, speaker)
-        result = self.execute_influxdb(query)
-        track = Track()
-        for r in result.get_points(acoustic_name):
-            s = to_seconds(r['time'])
-            p = TimePoint(s)
-            for name in properties:
-                p.add_value(name, r[name])
-            track.add(p)
-        return track
+        result = self.execute_influxdb(query, epoch='ms')
+        times, values = decode_points(result, properties)
+        return points_to_track(times, values)
 
     def get_acoustic_measure(self, acoustic_name, discourse, begin, end, channel=0, relative_time=False, **kwargs):
         """
@@ -759,22 +1479,16 @@ class AudioContext(SyllabicContext):
         properties = [x[0] for x in self.hierarchy.acoustic_properties[acoustic_name]]
         property_names = ["{}".format(x) for x in properties]
         if num_points:
-            columns = ', '.join(['mean({})'.format(x) for x in property_names])
+            columns = ', '.join(['mean("{0}") AS "{0}"'.format(x) for x in property_names])
         else:
             columns = '"time", {}'.format(', '.join(property_names))
         query = '''select {} from "{}"
                         {};'''.format(columns, acoustic_name, filter_string)
-        result = self.execute_influxdb(query)
-        track = Track()
-        for r in result.get_points(acoustic_name):
-            s = to_seconds(r['time'])
-            if relative_time:
-                s = (s - begin) / (end - begin)
-            p = TimePoint(s)
-            for name in properties:
-                p.add_value(name, r[name])
-            track.add(p)
-        return track
+        result = self.execute_influxdb(query, epoch='ms')
+        times, values = decode_points(result, properties)
+        if relative_time:
+            return points_to_track(times, values, begin, end)
+        return points_to_track(times, values)
 
     def _save_measurement_tracks(self, acoustic_name, tracks, speaker):
         data = []
@@ -831,14 +1545,9 @@ class AudioContext(SyllabicContext):
                     continue
                 t_dict = {'speaker': speaker, 'discourse': discourse, 'channel': channel}
                 fields['phone'] = label
-                fields['utterance_id'] = utterance_id
-                d = {'measurement': acoustic_name,
-                     'tags': t_dict,
-                     'time': s_to_ms(time_point),
-                     'fields': fields
-                     }
-                data.append(d)
-        self.acoustic_client().write_points(data, batch_size=1000, time_precision='ms')
+                data.append(self.acoustic_point(acoustic_name, t_dict, s_to_ms(time_point), fields,
+                                                utterance_id=utterance_id))
+        self.write_acoustic_points(data)
 
     def _save_measurement(self, sound_file, track, acoustic_name, **kwargs):
         if not len(track.keys()):
@@ -892,16 +1601,10 @@ class AudioContext(SyllabicContext):
                 continue
             t_dict = {'speaker': speaker}
             t_dict.update(tag_dict)
-            if utterance_id is not None:
-                fields['utterance_id'] = utterance_id
             fields['phone'] = label
-            d = {'measurement': acoustic_name,
-                 'tags': t_dict,
-                 'time': s_to_nano(time_point),
-                 'fields': fields
-                 }
-            data.append(d)
-        self.acoustic_client().write_points(data, batch_size=1000)
+            data.append(self.acoustic_point(acoustic_name, t_dict, s_to_nano(time_point), fields,
+                                            utterance_id=utterance_id, time_precision='n'))
+        self.write_acoustic_points(data)
 
     def save_acoustic_track(self, acoustic_name, discourse, track, **kwargs):
         """
@@ -918,7 +1621,9 @@ class AudioContext(SyllabicContext):
         kwargs: kwargs
             Tags to save for acoustic measurements
         """
-        self._save_measurement(discourse, track, acoustic_name, **kwargs)
+        with self.span('save', acoustic_name=acoustic_name, discourse=discourse):
+            self._save_measurement(discourse, track, acoustic_name, **kwargs)
+            self.flush_acoustic_writes()
 
     def save_acoustic_tracks(self, acoustic_name, tracks, speaker):
         """
@@ -933,7 +1638,9 @@ class AudioContext(SyllabicContext):
         speaker : str
             Name of the speaker of the tracks
         """
-        self._save_measurement_tracks(acoustic_name, tracks, speaker)
+        with self.span('save', acoustic_name=acoustic_name, speaker=speaker, segments=len(tracks)):
+            self._save_measurement_tracks(acoustic_name, tracks, speaker)
+            self.flush_acoustic_writes()
 
     def discourse_has_acoustics(self, acoustic_name, discourse):
         """
@@ -959,177 +1666,186 @@ class AudioContext(SyllabicContext):
             return False
         return True
 
-    def encode_acoustic_statistic(self, acoustic_name, statistic, by_phone=True, by_speaker=False):
+    def _validate_statistics(self, acoustic_name, statistics, by_phone, by_speaker):
+        if acoustic_name not in self.hierarchy.acoustics:
+            raise (ValueError('Acoustic measure must be one of: {}.'.format(', '.join(self.hierarchy.acoustics))))
+        if not by_speaker and not by_phone:
+            raise (Exception('Please specify either by_phone, by_speaker or both.'))
+        if isinstance(statistics, str):
+            statistics = [statistics]
+        for statistic in statistics:
+            if statistic not in ACOUSTIC_STATISTICS:
+                raise ValueError('Statistic name should be one of: {}.'.format(', '.join(ACOUSTIC_STATISTICS)))
+        return list(statistics)
+
+    def _speaker_acoustic_statistics(self, acoustic_name, statistics, measures, phones_only=False):
+        selects = ['{0}("{1}") AS "{2}"'.format(statistic, measure, statistic_property_name(statistic, measure))
+                   for statistic in statistics for measure in measures]
+        where = " where \"phone\" != ''" if phones_only else ''
+        query = '''select {} from "{}"{} group by "speaker";'''.format(', '.join(selects), acoustic_name, where)
+        influx_result = self.execute_influxdb(query)
+        results = []
+        for k, v in influx_result.items():
+            row = list(v)[0]
+            props = {}
+            for statistic in statistics:
+                for measure in measures:
+                    name = statistic_property_name(statistic, measure)
+                    props[name] = row.get(name)
+            results.append({'speaker': k[1]['speaker'], 'props': props})
+        return results
+
+    def _phone_acoustic_statistics(self, acoustic_name, statistics, measures, by_speaker):
+        # Phone labels are fields rather than tags, so InfluxDB cannot group by them; instead points are streamed
+        # one speaker at a time and summarized for every phone (and speaker) in one pass
+        influx_result = self.execute_influxdb('''SHOW TAG VALUES FROM "{}" WITH KEY = "speaker";'''.format(
+            acoustic_name))
+        speakers = [x['value'] for x in influx_result.get_points()]
+        columns = ['phone'] + list(measures)
+        collected = {}
+        for s in speakers:
+            speaker_value = s.replace("'", r"\'")
+            query = '''select {} from "{}" where "speaker" = '{}';'''.format(
+                ', '.join('"{}"'.format(x) for x in columns), acoustic_name, speaker_value)
+            _, values = decode_points(self.execute_influxdb(query, epoch='ms'), columns)
+            phones = values['phone']
+            if not len(phones):
+                continue
+            for p in np.unique(phones[phones != None].astype(str)):
+                if not p:
+                    continue
+                key = (s, p) if by_speaker else p
+                mask = phones == p
+                group = collected.setdefault(key, {x: [] for x in measures})
+                for measure in measures:
+                    v = values[measure][mask]
+                    group[measure].append(v[v != None].astype(np.float64))
+        results = []
+        for key, group in sorted(collected.items()):
+            props = {}
+            for measure in measures:
+                data = np.concatenate(group[measure])
+                for statistic in statistics:
+                    props[statistic_property_name(statistic, measure)] = summarize_values(data, statistic)
+            if by_speaker:
+                results.append({'speaker': key[0], 'phone': key[1], 'props': props})
+            else:
+                results.append({'phone': key, 'props': props})
+        return results
+
+    def encode_acoustic_statistic(self, acoustic_name, statistics, by_phone=True, by_speaker=False):
         """
         Computes and saves as type properties summary statistics on a by speaker or by phone basis (or both) for a
         given acoustic measure.
 
+        All statistics for all numeric properties of the measure are computed in a single pass over InfluxDB
+        (a grouped aggregate query for by-speaker statistics, and one streamed query per speaker for by-phone
+        statistics, as phone labels are not tags) and saved in a single batched statement.
 
         Parameters
         ----------
         acoustic_name : str
             Name of the acoustic type
-        statistic : str
-            One of `mean`, `median`, `stddev`, `sum`, `mode`, `count`
-        by_speaker : bool, defaults to True
-            Flag for calculating summary statistic by speaker
-        by_phone : bool, defaults to False
+        statistics : str or list
+            One or more of `mean`, `median`, `stddev`, `sum`, `mode`, `count`
+        by_phone : bool, defaults to True
             Flag for calculating summary statistic by phone
-
-
+        by_speaker : bool, defaults to False
+            Flag for calculating summary statistic by speaker
         """
-        if not by_speaker and not by_phone:
-            raise (Exception('Please specify either by_phone, by_speaker or both.'))
-        if acoustic_name not in self.hierarchy.acoustics:
-            raise (ValueError('Acoustic measure must be one of: {}.'.format(', '.join(self.hierarchy.acoustics))))
-        available_statistics = ['mean', 'median', 'stddev', 'sum', 'mode', 'count']
-        if statistic not in available_statistics:
-            raise ValueError('Statistic name should be one of: {}.'.format(', '.join(available_statistics)))
-
+        statistics = self._validate_statistics(acoustic_name, statistics, by_phone, by_speaker)
         acoustic_name = acoustic_name.lower()
-        template = statistic + '("{0}") as "{0}"'
-        statistic_template = 'n.{statistic}_{measure} = d.{measure}'
-        measures = {x[0]: template.format(x[0]) for x in self.hierarchy.acoustic_properties[acoustic_name] if
-                    x[1] in [int, float]}
+        measures = [x[0] for x in self.hierarchy.acoustic_properties[acoustic_name] if x[1] in [int, float]]
+        properties = [(statistic_property_name(statistic, x), float) for statistic in statistics for x in measures]
+        if by_phone:
+            results = self._phone_acoustic_statistics(acoustic_name, statistics, measures, by_speaker)
+        else:
+            results = self._speaker_acoustic_statistics(acoustic_name, statistics, measures)
         if by_speaker and by_phone:
-            results = []
-            for p in self.phones:
-                query = '''select {} from "{}"
-                                where "phone" = '{}' group by "speaker";'''.format(
-                    ', '.join(measures), acoustic_name, p)
-
-                influx_result = self.execute_influxdb(query)
-                for k, v in influx_result.items():
-                    result = {'speaker': k[1]['speaker'], 'phone': p}
-                    for measure in measures.keys():
-                        result[measure] = list(v)[0][measure]
-                    results.append(result)
-
-            set_statements = []
-            for measure in measures.keys():
-                set_statements.append(statistic_template.format(statistic=statistic, measure=measure))
-            statement = '''WITH {{data}} as data
-                        UNWIND data as d
-                        MATCH (s:Speaker:{corpus_name}), (p:phone_type:{corpus_name})
-                        WHERE p.label = d.phone AND s.name = d.speaker
-                        WITH p, s, d
-                        MERGE (s)<-[n:spoken_by]-(p)
-                        WITH n, d
-                        SET {set_statements}'''.format(corpus_name=self.cypher_safe_name,
-                                                       set_statements='\nAND '.join(set_statements))
+            statement = '''UNWIND {{data}} as d
+            MATCH (s:Speaker:{corpus_name}), (p:phone_type:{corpus_name})
+            WHERE p.label = d.phone AND s.name = d.speaker
+            MERGE (s)<-[n:spoken_by]-(p)
+            SET n += d.props'''.format(corpus_name=self.cypher_safe_name)
         elif by_phone:
-            results = []
-            for p in self.phones:
-                query = '''select {} from "{}"
-                                where "phone" = '{}';'''.format(', '.join(measures.values()),
-                                                                acoustic_name, p)
-
-                influx_result = self.execute_influxdb(query)
-                result = {'phone': p}
-                for k, v in influx_result.items():
-                    for measure in measures.keys():
-                        result[measure] = list(v)[0][measure]
-                results.append(result)
-            set_statements = []
-            for measure in measures.keys():
-                set_statements.append(statistic_template.format(statistic=statistic, measure=measure))
-            statement = '''WITH {{data}} as data
-                                UNWIND data as d
-                                MATCH (n:phone_type:{corpus_name})
-                                WHERE n.label = d.phone
-                                SET {set_statements}'''.format(corpus_name=self.cypher_safe_name,
-                                                               set_statements='\nAND '.join(set_statements))
-            self.hierarchy.add_type_properties(self, 'phone',
-                                               [('{}_{}'.format(statistic, x), float) for x in measures.keys()])
-        elif by_speaker:
-            query = '''select {} from "{}" group by "speaker";'''.format(', '.join(measures), acoustic_name)
-            influx_result = self.execute_influxdb(query)
-            results = []
-
-            for k, v in influx_result.items():
-                result = {'speaker': k[1]['speaker']}
-                for measure in measures.keys():
-                    result[measure] = list(v)[0][measure]
-                results.append(result)
-
-            set_statements = []
-            for measure in measures.keys():
-                set_statements.append(statistic_template.format(statistic=statistic, measure=measure))
-            statement = '''WITH {{data}} as data
-                            UNWIND data as d
-                            MATCH (n:Speaker:{corpus_name})
-                            WHERE n.name = d.speaker
-                            SET {set_statements}'''.format(corpus_name=self.cypher_safe_name,
-                                                           set_statements='\nAND '.join(set_statements))
-            self.hierarchy.add_speaker_properties(self,
-                                                  [('{}_{}'.format(statistic, x), float) for x in measures.keys()])
+            statement = '''UNWIND {{data}} as d
+            MATCH (n:phone_type:{corpus_name})
+            WHERE n.label = d.phone
+            SET n += d.props'''.format(corpus_name=self.cypher_safe_name)
+            self.hierarchy.add_type_properties(self, 'phone', properties)
+        else:
+            statement = '''UNWIND {{data}} as d
+            MATCH (n:Speaker:{corpus_name})
+            WHERE n.name = d.speaker
+            SET n += d.props'''.format(corpus_name=self.cypher_safe_name)
+            self.hierarchy.add_speaker_properties(self, properties)
         self.execute_cypher(statement, data=results)
         self.encode_hierarchy()
 
-    def get_acoustic_statistic(self, acoustic_name, statistic, by_phone=True, by_speaker=False):
+    def get_acoustic_statistic(self, acoustic_name, statistics, by_phone=True, by_speaker=False):
         """
         Computes summary statistics on a by speaker or by phone basis (or both) for a given acoustic measure.
 
+        Statistics that have not been encoded yet are encoded first with :meth:`encode_acoustic_statistic`.
 
         Parameters
         ----------
         acoustic_name : str
             Name of the acoustic type
-        statistic : str
-            One of `mean`, `median`, `stddev`, `sum`, `mode`, `count`
-        by_speaker : bool, defaults to True
-            Flag for calculating summary statistic by speaker
-        by_phone : bool, defaults to False
+        statistics : str or list
+            One or more of `mean`, `median`, `stddev`, `sum`, `mode`, `count`
+        by_phone : bool, defaults to True
             Flag for calculating summary statistic by phone
+        by_speaker : bool, defaults to False
+            Flag for calculating summary statistic by speaker
 
         Returns
         -------
         dict
-            Dictionary where keys are phone/speaker/phone-speaker pairs and values are the summary statistic
-            of the acoustic measure
+            Dictionary where keys are phone/speaker/phone-speaker pairs and values are the summary statistics
+            of the acoustic measure, ordered by statistic and then by property
 
         """
-        if acoustic_name not in self.hierarchy.acoustics:
-            raise (ValueError('Acoustic measure must be one of: {}.'.format(', '.join(self.hierarchy.acoustics))))
-        if not by_speaker and not by_phone:
-            raise (Exception('Please specify either by_phone, by_speaker or both.'))
-        available_statistics = ['mean', 'median', 'stddev', 'sum', 'mode', 'count']
-        if statistic not in available_statistics:
-            raise ValueError('Statistic name should be one of: {}.'.format(', '.join(available_statistics)))
+        statistics = self._validate_statistics(acoustic_name, statistics, by_phone, by_speaker)
 
         prop_template = 'n.{0} as {0}'
 
-        measures = ['{}_{}'.format(statistic, x[0]) for x in self.hierarchy.acoustic_properties[acoustic_name] if
-                    x[1] in [int, float]]
+        numeric = [x[0] for x in self.hierarchy.acoustic_properties[acoustic_name] if x[1] in [int, float]]
+        measures = [statistic_property_name(statistic, x) for statistic in statistics for x in numeric]
         returns = [prop_template.format(x) for x in measures]
 
         if by_phone and by_speaker:
-            statement = '''MATCH (p:phone_type:{corpus_name})-[n:spoken_by]->(s:Speaker:{corpus_name}) 
+            statement = '''MATCH (p:phone_type:{corpus_name})-[n:spoken_by]->(s:Speaker:{corpus_name})
             return {return_list} LIMIT 1'''.format(corpus_name=self.cypher_safe_name, return_list=', '.join(returns))
             results = self.execute_cypher(statement).records()
             try:
                 first = next(results)
             except StopIteration:
                 first = None
-            if first is None:
-                self.encode_acoustic_statistic(acoustic_name, statistic, by_phone, by_speaker)
+            missing = [s for s in statistics
+                       if first is None or first[statistic_property_name(s, numeric[0])] is None]
+        elif by_phone:
+            missing = [s for s in statistics
+                       if not self.hierarchy.has_type_property('phone', statistic_property_name(s, numeric[0]))]
+        else:
+            missing = [s for s in statistics
+                       if not self.hierarchy.has_speaker_property(statistic_property_name(s, numeric[0]))]
+        if missing:
+            self.encode_acoustic_statistic(acoustic_name, missing, by_phone, by_speaker)
+
+        if by_phone and by_speaker:
             statement = '''MATCH (p:phone_type:{corpus_name})-[n:spoken_by]->(s:Speaker:{corpus_name})
             return p.label as phone, s.name as speaker, {return_list}'''.format(
                 corpus_name=self.cypher_safe_name, return_list=', '.join(returns))
             results = self.execute_cypher(statement).records()
             results = {(x['speaker'], x['phone']): [x[n] for n in measures] for x in results}
-
         elif by_phone:
-            if not self.hierarchy.has_type_property('phone', measures[0]):
-                self.encode_acoustic_statistic(acoustic_name, statistic, by_phone, by_speaker)
             statement = '''MATCH (n:phone_type:{corpus_name})
             return n.label as phone, {return_list}'''.format(
                 corpus_name=self.cypher_safe_name, return_list=', '.join(returns))
             results = self.execute_cypher(statement).records()
             results = {x['phone']: [x[n] for n in measures] for x in results}
-        elif by_speaker:
-            if not self.hierarchy.has_speaker_property(measures[0]):
-                self.encode_acoustic_statistic(acoustic_name, statistic, by_phone, by_speaker)
+        else:
             statement = '''MATCH (n:Speaker:{corpus_name})
             return n.name as speaker, {return_list}'''.format(
                 corpus_name=self.cypher_safe_name, return_list=', '.join(returns))
@@ -1152,8 +1868,11 @@ class AudioContext(SyllabicContext):
             ['"{}"'.format(x[0]) for x in self.hierarchy.acoustic_properties[acoustic_name] if x[1] in [int, float]
              and not x[0].endswith('relativized')])
         to_remove = [x[0] for x in self.hierarchy.acoustic_properties[acoustic_name] if x[0].endswith('relativized')]
+        self.mark_data_changed()
         client = self.acoustic_client()
-        query = """SELECT "phone", {measures}, "utterance_id" 
+        if self.acoustic_schema_version() < 2:
+            measures += ', "utterance_id"'
+        query = """SELECT "phone", {measures}
         INTO "{name}_copy" FROM "{name}" GROUP BY *;""".format(name=acoustic_name, measures=measures)
         client.query(query)
         client.query('DROP MEASUREMENT "{}"'.format(acoustic_name))
@@ -1180,55 +1899,36 @@ class AudioContext(SyllabicContext):
             raise (ValueError('Acoustic measure must be one of: {}.'.format(', '.join(self.hierarchy.acoustics))))
         if not by_speaker and not by_phone:
             raise Exception('Relativization must be by phone, speaker, or both.')
-        client = self.acoustic_client()
-        phone_type = getattr(self, self.phone_name)
-        template = 'mean("{0}") as mean_{0}, stddev("{0}") as sd_{0}'
         summary_data = {}
         props = [x for x in self.hierarchy.acoustic_properties[acoustic_name] if
                       x[1] in [int, float] and not x[0].endswith('relativized')]
-        statistics = {x[0]: template.format(x[0]) for x in props}
-        aliases = {x[0]: ('mean_' + x[0], 'sd_' + x[0]) for x in props}
+        measures = [x[0] for x in props]
+        aliases = {x: (statistic_property_name('mean', x), statistic_property_name('stddev', x)) for x in measures}
         if by_phone:
-            for p in self.phones:
-                if by_speaker:
-                    query = '''select {statistics} from "{acoustic_type}" 
-                    where "phone" = '{phone}' group by "speaker";'''.format(acoustic_type=acoustic_name,
-                                                                            statistics=', '.join(statistics.values()),
-                                                                            phone=p)
-                    result = client.query(query)
-                    for k, v in result.items():
-                        v = list(v)
-                        for measure, (mean_name, sd_name) in aliases.items():
-                            summary_data[(k[1]['speaker'], p, measure)] = v[0][mean_name], v[0][sd_name]
-
-                else:
-                    query = '''select {statistics} from "{acoustic_type}" 
-                    where "phone" = '{phone}';'''.format(acoustic_type=acoustic_name,
-                                                         statistics=', '.join(statistics.values()), phone=p)
-                    result = client.query(query)
-                    for k, v in result.items():
-                        v = list(v)
-                        for measure, (mean_name, sd_name) in aliases.items():
-                            summary_data[(p, measure)] = v[0][mean_name], v[0][sd_name]
+            summaries = self._phone_acoustic_statistics(acoustic_name, ['mean', 'stddev'], measures, by_speaker)
         else:
-            query = '''select {statistics} from "{acoustic_type}" 
-            where "phone" != '' group by "speaker";'''.format(acoustic_type=acoustic_name,
-                                                              statistics=', '.join(statistics.values()))
-            result = client.query(query)
-            for k, v in result.items():
-                v = list(v)
-                for measure, (mean_name, sd_name) in aliases.items():
-                    summary_data[(k[1]['speaker'], measure)] = v[0][mean_name], v[0][sd_name]
-        for s in self.speakers:
-            s = s.replace("'", r"\'")
-            all_query = '''select * from "{acoustic_type}"
-            where "phone" != '' and "speaker" = '{speaker}';'''.format(acoustic_type=acoustic_name, speaker=s)
-            all_results = client.query(all_query)
+            summaries = self._speaker_acoustic_statistics(acoustic_name, ['mean', 'stddev'], measures,
+                                                          phones_only=True)
+        for row in summaries:
+            if by_speaker and by_phone:
+                key = (row['speaker'], row['phone'])
+            elif by_phone:
+                key = (row['phone'],)
+            else:
+                key = (row['speaker'],)
+            for measure, (mean_name, sd_name) in aliases.items():
+                summary_data[key + (measure,)] = row['props'][mean_name], row['props'][sd_name]
+        queries = ('''select * from "{acoustic_type}"
+            where "phone" != '' and "speaker" = '{speaker}';'''.format(acoustic_type=acoustic_name,
+                                                                       speaker=s.replace("'", r"\'"))
+                   for s in self.speakers)
+        for all_results in self.execute_influxdb_many(queries, epoch='ns'):
             data = []
             for _, r in all_results.items():
                 for t_dict in r:
                     phone = t_dict.pop('phone')
-                    utterance_id = t_dict.pop('utterance_id', '')
+                    if self.acoustic_schema_version() < 2:
+                        t_dict.pop('utterance_id', '')
                     time_point = t_dict.pop('time')
                     fields = {}
                     for measure, (mean_name, sd_name) in aliases.items():
@@ -1248,72 +1948,142 @@ class AudioContext(SyllabicContext):
                         fields['{}_relativized'.format(measure)] = new_value
                     if not fields:
                         continue
-                    time_point = s_to_ms(to_seconds(time_point))
                     d = {'measurement': acoustic_name,
                          'tags': t_dict,
                          "time": time_point,
+                         "time_precision": 'n',
                          "fields": fields
                          }
+                    d['tags'] = {k: v for k, v in d['tags'].items() if v is not None}
                     data.append(d)
-            client.write_points(data, batch_size=1000, time_precision='ms')
+            self.write_acoustic_points(data)
+        self.flush_acoustic_writes()
         self.hierarchy.add_acoustic_properties(self, acoustic_name, [(x[0] +'_relativized', float) for x in props])
         self.encode_hierarchy()
 
-    def reassess_utterances(self, acoustic_name):
+    def reassess_utterances(self, acoustic_name, num_workers=1, call_back=None, stop_check=None, discourse=None):
         """
         Update utterance IDs in InfluxDB for more efficient querying if utterances have been re-encoded after acoustic
         measures were encoded
 
+        Points are read in chunks of utterances for each discourse and speaker, matched to utterances by their times,
+        and only points whose utterance ID changed are rewritten.
+
         Parameters
         ----------
         acoustic_name : str
             Name of the measure for which to update utterance IDs
+        num_workers : int
+            Number of discourse and speaker pairs to process at once, defaults to 1
+        call_back : callable
+            Function to report progress
+        stop_check : callable
+            Function to check whether to terminate early
+        discourse : str, optional
+            Only update points in this discourse, defaults to all discourses
 
+        Returns
+        -------
+        int
+            Number of points that were rewritten
         """
         if acoustic_name not in self.hierarchy.acoustics:
             raise (ValueError('Acoustic measure must be one of: {}.'.format(', '.join(self.hierarchy.acoustics))))
+        q = self.query_graph(self.utterance)
+        if discourse is not None:
+            q = q.filter(self.utterance.discourse.name == discourse)
+        q = q.order_by(self.utterance.begin)
+        q = q.columns(self.utterance.discourse.name.column_name('discourse'),
+                      self.utterance.speaker.name.column_name('speaker'),
+                      self.utterance.id.column_name('utterance_id'),
+                      self.utterance.begin.column_name('begin'),
+                      self.utterance.end.column_name('end'))
+        groups = {}
+        for u in q.all():
+            groups.setdefault((u['discourse'], u['speaker']), []).append(
+                (u['utterance_id'], s_to_ms(u['begin']), s_to_ms(u['end'])))
+        tagged = self.acoustic_schema_version() >= 2
+        if call_back is not None:
+            call_back('Reassessing utterances for {}...'.format(acoustic_name))
+            call_back(0, len(groups))
+        changed = 0
+        done = 0
+        with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+            futures = [executor.submit(self._reassess_speaker_utterances, acoustic_name, discourse, speaker,
+                                       utterances, tagged)
+                       for (discourse, speaker), utterances in sorted(groups.items())]
+            for f in as_completed(futures):
+                changed += f.result()
+                done += 1
+                if call_back is not None:
+                    call_back(done)
+                if stop_check is not None and stop_check():
+                    for other in futures:
+                        other.cancel()
+        self.flush_acoustic_writes()
+        return changed
+
+    def _reassess_speaker_utterances(self, acoustic_name, discourse, speaker, utterances, tagged):
         client = self.acoustic_client()
-        q = self.query_discourses()
-        q = q.columns(self.discourse.name.column_name('name'),
-                      self.discourse.speakers.name.column_name('speakers'))
-        discourses = q.all()
-        props = [x[0] for x in self.hierarchy.acoustic_properties[acoustic_name]]
-        for d in discourses:
-            discourse_name = d['name']
+        ids = np.array([x[0] for x in utterances], dtype=object)
+        begins = np.array([x[1] for x in utterances], dtype=np.int64)
+        ends = np.array([x[2] for x in utterances], dtype=np.int64)
+        filter_string = '''"discourse" = '{}' and "speaker" = '{}' '''.format(
+            discourse.replace("'", r"\'"), speaker.replace("'", r"\'"))
+        changed = 0
+        for i in range(0, len(utterances), REASSESS_CHUNK_SIZE):
+            time_filter = ''
+            if i > 0:
+                time_filter += ' and time >= {}ms'.format(begins[i])
+            if i + REASSESS_CHUNK_SIZE < len(utterances):
+                time_filter += ' and time < {}ms'.format(begins[i + REASSESS_CHUNK_SIZE])
+            query = '''select * from "{}" where {}{};'''.format(acoustic_name, filter_string, time_filter)
+            result = client.query(query, epoch='ns')
+            points = []
+            for series in result.raw.get('series', []):
+                columns = series['columns']
+                points.extend(dict(zip(columns, row)) for row in series['values'])
+            if not points:
+                continue
+            times = np.array([x['time'] for x in points], dtype=np.int64)
+            new_ids = ids[match_intervals(times, begins * 10 ** 6, ends * 10 ** 6)]
+            old_ids = np.array([x.get('utterance_id') for x in points], dtype=object)
+            to_update = np.nonzero(new_ids != old_ids)[0]
+            if not len(to_update):
+                continue
             data = []
-            for s in d['speakers']:
-                q = self.query_graph(self.utterance)
-                q = q.filter(self.utterance.discourse.name == discourse_name, self.utterance.speaker.name == s)
-                q = q.order_by(self.utterance.begin)
-                q = q.columns(self.utterance.id.column_name('utterance_id'),
-                              self.utterance.begin.column_name('begin'),
-                              self.utterance.end.column_name('end'))
-                utterances = q.all()
-                s = s.replace("'", r"\'")
-                discourse_name = discourse_name.replace("'", r"\'")
-                all_query = '''select * from "{}"
-                                where "phone" != '' and 
-                                "discourse" = '{}' and 
-                                "speaker" = '{}';'''.format(acoustic_name, discourse_name, s)
-                all_results = client.query(all_query)
-                cur_index = 0
-                for _, r in all_results.items():
-                    for t_dict in r:
-                        phone = t_dict.pop('phone')
-                        utterance_id = t_dict.pop('utterance_id', '')
-                        for m in props:
-                            value = t_dict.pop(m, None)
-
-                        time_point = to_seconds(t_dict.pop('time'))
-                        for i in range(cur_index, len(utterances)):
-                            if utterances[i]['begin'] <= time_point <= utterances[i]['end']:
-                                cur_index = i
-                                break
-                        time_point = s_to_ms(time_point)
-                        d = {'measurement': acoustic_name,
-                             'tags': t_dict,
-                             "time": time_point,
-                             "fields": {'utterance_id': utterances[cur_index]['utterance_id']}
-                             }
-                        data.append(d)
-            client.write_points(data, batch_size=1000, time_precision='ms')
+            for j in to_update:
+                fields = dict(points[j])
+                time_point = fields.pop('time')
+                fields.pop('utterance_id', None)
+                tags = {k: fields.pop(k) for k in ACOUSTIC_TAGS if fields.get(k, None) is not None}
+                if tagged:
+                    # Tags identify the series, so the point is moved to the new series in full
+                    fields = {k: v for k, v in fields.items() if v is not None}
+                else:
+                    fields = {}
+                data.append(self.acoustic_point(acoustic_name, tags, time_point, fields,
+                                                utterance_id=new_ids[j], time_precision='n'))
+            if tagged:
+                client.query(';'.join(self._moved_point_deletes(acoustic_name, points, times,
+                                                                new_ids != old_ids)))
+            self.write_acoustic_points(data)
+            changed += len(data)
+        return changed
+
+    def _moved_point_deletes(self, acoustic_name, points, times, changed):
+        series = {}
+        for j, p in enumerate(points):
+            key = tuple((k, p.get(k) or '') for k in ACOUSTIC_TAGS)
+            series.setdefault(key, []).append(j)
+        deletes = []
+        for key, indices in series.items():
+            indices = np.array(indices)
+            if not changed[indices].any():
+                continue
+            order = np.argsort(times[indices], kind='stable')
+            tag_filter = ' and '.join('"{}" = \'{}\''.format(k, str(v).replace("'", r"\'")) for k, v in key)
+            for begin, end in mask_runs(times[indices][order], changed[indices][order]):
+                deletes.append('''DELETE FROM "{}" WHERE {} and time >= {} and time <= {}'''.format(
+                    acoustic_name, tag_filter, begin, end))
+        return deletes
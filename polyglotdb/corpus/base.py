@@ -3,7 +3,10 @@ import pickle
 import shutil
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from decimal import Decimal
+from threading import Lock
 
 from neo4j import GraphDatabase
 
@@ -18,6 +21,122 @@ from ..exceptions import (CorpusConfigError, GraphQueryError,
                           NetworkAddressError)
 from ..structure import Hierarchy
 
+DELETION_MEMORY_BUDGET = 32 * 1024 * 1024
+
+DELETION_NODE_SIZE = 2048
+
+
+def deletion_batch_size(memory_budget=None, node_size=DELETION_NODE_SIZE):
+    """
+    Get the number of nodes to delete per transaction so that the transaction state stays within a memory budget
+
+    Parameters
+    ----------
+    memory_budget : int, optional
+        Approximate memory in bytes available to a single transaction, defaults to ``DELETION_MEMORY_BUDGET``
+    node_size : int
+        Approximate memory in bytes used by deleting one node along with its relationships
+
+    Returns
+    -------
+    int
+        Number of nodes to delete per transaction
+    """
+    if memory_budget is None:
+        memory_budget = DELETION_MEMORY_BUDGET
+    return max(int(memory_budget // node_size), 1)
+
+
+class _BatchProgress(object):
+    """
+    Thread-safe count of nodes processed in batches, reported through a call back
+    """
+
+    def __init__(self, call_back=None):
+        self.call_back = call_back
+        self.processed = 0
+        self._lock = Lock()
+
+    def update(self, number):
+        with self._lock:
+            self.processed += number
+            if self.call_back is not None:
+                self.call_back(self.processed)
+
+
+class ChangeTrackingDriver(object):
+    """
+    Neo4j driver proxy whose sessions mark the data of a corpus as changed when they write to the database
+
+    Parameters
+    ----------
+    driver : :class:`neo4j.Driver`
+        Driver to wrap
+    corpus_context : :class:`~polyglotdb.corpus.base.BaseContext`
+        Corpus whose data is written
+    """
+
+    def __init__(self, driver, corpus_context):
+        self.driver = driver
+        self.corpus_context = corpus_context
+
+    def session(self, *args, **kwargs):
+        return ChangeTrackingSession(self.driver.session(*args, **kwargs), self.corpus_context)
+
+    def __getattr__(self, key):
+        return getattr(self.driver, key)
+
+
+class ChangeTrackingSession(object):
+    """
+    Neo4j session proxy that marks the data of a corpus as changed for every write or explicit transaction, and
+    for statements run directly in the session whose results report updates once the session is closed
+    """
+
+    def __init__(self, session, corpus_context):
+        self.session = session
+        self.corpus_context = corpus_context
+        self._results = []
+
+    def run(self, statement, parameters=None, **kwparameters):
+        result = self.session.run(statement, parameters, **kwparameters)
+        self._results.append(result)
+        return result
+
+    def begin_transaction(self, *args, **kwargs):
+        self.corpus_context.mark_data_changed()
+        return self.session.begin_transaction(*args, **kwargs)
+
+    def write_transaction(self, unit_of_work, *args, **kwargs):
+        try:
+            return self.session.write_transaction(unit_of_work, *args, **kwargs)
+        finally:
+            self.corpus_context.mark_data_changed()
+
+    def close(self):
+        try:
+            self.session.close()
+        finally:
+            results, self._results = self._results, []
+            for result in results:
+                # Results are buffered when the session closes, so their summaries are available
+                try:
+                    updated = result.summary().counters.contains_updates
+                except Exception:
+                    updated = True
+                if updated:
+                    self.corpus_context.mark_data_changed()
+                    break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, exc_tb):
+        self.close()
+
+    def __getattr__(self, key):
+        return getattr(self.session, key)
+
 
 class BaseContext(object):
     """
@@ -41,13 +160,20 @@ class BaseContext(object):
             self.config = args[0]
         else:
             self.config = CorpusConfig(*args, **kwargs)
-        self.graph_driver = GraphDatabase.driver(self.config.graph_connection_string)
+        self.graph_driver = ChangeTrackingDriver(GraphDatabase.driver(self.config.graph_connection_string), self)
         self.corpus_name = self.config.corpus_name
 
         self.hierarchy = Hierarchy({}, corpus_name=self.corpus_name)
 
         self._has_sound_files = None
         self._has_all_sound_files = None
+        self._metadata_cache = None
+        self._hierarchy_transaction_depth = 0
+        self._hierarchy_dirty = False
+        self._synced_hierarchy = None
+        self._data_changed = False
+        self._result_cache = None
+        self.instrumentation = None
         if getattr(sys, 'frozen', False):
             self.config.reaper_path = os.path.join(sys.path[-1], 'reaper')
         else:
@@ -105,6 +231,55 @@ class BaseContext(object):
         except Exception as e:
             raise
 
+    def instrument(self, instrumentation):
+        """
+        Report every Cypher and InfluxDB call, and processing phases such as parsing, importing, enrichment
+        and acoustic analysis, to an instrumentation object
+
+        Parameters
+        ----------
+        instrumentation : :class:`~polyglotdb.instrumentation.Instrumentation`
+            Instrumentation to report events to
+
+        Returns
+        -------
+        :class:`~polyglotdb.instrumentation.Instrumentation`
+            The instrumentation object
+        """
+        self.remove_instrumentation()
+        self.instrumentation = instrumentation
+        self.graph_driver = instrumentation.wrap_graph_driver(self.graph_driver)
+        return instrumentation
+
+    def remove_instrumentation(self):
+        """
+        Stop reporting events to the current instrumentation object
+        """
+        if self.instrumentation is None:
+            return
+        self.graph_driver = self.graph_driver.driver
+        self.instrumentation = None
+
+    def span(self, name, **info):
+        """
+        Time a processing phase if instrumentation is enabled, for use as a context manager
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase
+        info : kwargs
+            Extra information to record with the phase
+
+        Returns
+        -------
+        context manager
+            Span of the instrumentation object, or a context manager that does nothing
+        """
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.span(name, **info)
+
     @property
     def cypher_safe_name(self):
         """
@@ -127,9 +302,13 @@ class BaseContext(object):
         list
             Discourse names in the corpus
         """
-        res = self.execute_cypher('''MATCH (d:Discourse:{corpus_name}) RETURN d.name as discourse'''.format(
-            corpus_name=self.cypher_safe_name))
-        return [x['discourse'] for x in res]
+
+        def generate():
+            res = self.execute_cypher('''MATCH (d:Discourse:{corpus_name}) RETURN d.name as discourse'''.format(
+                corpus_name=self.cypher_safe_name))
+            return [x['discourse'] for x in res]
+
+        return list(self.cached_metadata('discourses', generate))
 
     @property
     def speakers(self):
@@ -141,14 +320,289 @@ class BaseContext(object):
         list
             Speaker names in the corpus
         """
-        res = self.execute_cypher('''MATCH (s:Speaker:{corpus_name}) RETURN s.name as speaker'''.format(
-            corpus_name=self.cypher_safe_name))
-        return [x['speaker'] for x in res]
+
+        def generate():
+            res = self.execute_cypher('''MATCH (s:Speaker:{corpus_name}) RETURN s.name as speaker'''.format(
+                corpus_name=self.cypher_safe_name))
+            return [x['speaker'] for x in res]
+
+        return list(self.cached_metadata('speakers', generate))
+
+    @property
+    def metadata_cache_path(self):
+        """
+        Get the directory of cached corpus metadata (speakers, discourses, phones and words), which holds a file
+        for each piece of metadata
+
+        Returns
+        -------
+        str
+            Path to the cached metadata on disk
+        """
+        return os.path.join(self.config.base_dir, 'metadata')
+
+    def metadata_version(self):
+        """
+        Get the version stamp of the corpus metadata stored on the Corpus node, which is incremented every time
+        the structure of the corpus changes
+
+        Returns
+        -------
+        int
+            Version of the corpus metadata
+        """
+        statement = '''MATCH (c:Corpus) WHERE c.name = {corpus_name} RETURN c.metadata_version AS version'''
+        for r in self.execute_cypher(statement, corpus_name=self.corpus_name):
+            if r['version'] is not None:
+                return r['version']
+        return 0
+
+    def bump_metadata_version(self):
+        """
+        Increment the version stamp of the corpus metadata, invalidating cached speakers, discourses, phones
+        and words in all processes
+        """
+        statement = '''MATCH (c:Corpus) WHERE c.name = {corpus_name}
+        SET c.metadata_version = coalesce(c.metadata_version, 0) + 1
+        RETURN c.metadata_version AS version'''
+        version = 0
+        for r in self.execute_cypher(statement, corpus_name=self.corpus_name):
+            version = r['version']
+        self._metadata_cache = {'version': version}
+
+    def mark_data_changed(self):
+        """
+        Record that the data of the corpus has changed, so that the data version is incremented before the next
+        cached query.  Writes through the sessions of :attr:`graph_driver` are recorded automatically, other
+        changes (i.e., acoustic measurements) call this directly
+        """
+        self._data_changed = True
+
+    def data_version(self):
+        """
+        Get the version stamp of the corpus data stored on the Corpus node, which is incremented after any change
+        to the corpus and is used to invalidate cached query results
+
+        Returns
+        -------
+        int
+            Version of the corpus data
+        """
+        if self._data_changed:
+            statement = '''MATCH (c:Corpus) WHERE c.name = {corpus_name}
+            SET c.data_version = coalesce(c.data_version, 0) + 1
+            RETURN c.data_version AS version'''
+        else:
+            statement = '''MATCH (c:Corpus) WHERE c.name = {corpus_name} RETURN c.data_version AS version'''
+        version = None
+        for r in self.execute_cypher(statement, corpus_name=self.corpus_name):
+            version = r['version']
+        self._data_changed = False
+        if version is None:
+            return 0
+        return version
+
+    def query_result_cache(self):
+        """
+        Get the cache of query results for the corpus, if enabled by the ``query_cache`` setting of the config
+
+        Returns
+        -------
+        :class:`~polyglotdb.query.result_cache.QueryResultCache`
+            Cache of query results, or None if caching is disabled
+        """
+        if not self.config.query_cache:
+            return None
+        if self._result_cache is None:
+            from ..query.result_cache import QueryResultCache
+            self._result_cache = QueryResultCache(self.config.query_cache_directory,
+                                                  max_size=self.config.query_cache_size,
+                                                  max_entries=self.config.query_cache_entries)
+        return self._result_cache
+
+    def clear_query_cache(self):
+        """
+        Remove all cached query results of the corpus from the disk
+        """
+        from ..query.result_cache import QueryResultCache
+        if os.path.exists(self.config.query_cache_directory):
+            QueryResultCache(self.config.query_cache_directory).clear()
+
+    def clear_metadata_cache(self):
+        """
+        Remove cached corpus metadata from memory and from the disk
+        """
+        self._metadata_cache = None
+        if os.path.isdir(self.metadata_cache_path):
+            shutil.rmtree(self.metadata_cache_path, ignore_errors=True)
+
+    def _metadata_cache_file(self, key):
+        return os.path.join(self.metadata_cache_path, '{}.json'.format(key))
+
+    def load_metadata_cache(self, version=None):
+        """
+        Load cached corpus metadata from the disk, keeping the pieces that match the current version of the corpus,
+        which is read from the database unless given
+
+        Parameters
+        ----------
+        version : int, optional
+            Current version of the corpus metadata, looked up if not specified
+        """
+        import json
+        if version is None:
+            version = self.metadata_version()
+        self._metadata_cache = {'version': version}
+        if not os.path.isdir(self.metadata_cache_path):
+            return
+        for file_name in os.listdir(self.metadata_cache_path):
+            key, ext = os.path.splitext(file_name)
+            if ext != '.json':
+                continue
+            try:
+                with open(os.path.join(self.metadata_cache_path, file_name), 'r', encoding='utf8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data.get('version') == version:
+                self._metadata_cache[key] = data['value']
+
+    def _save_cached_metadata(self, key):
+        import json
+        if not os.path.exists(self.config.base_dir):
+            return
+        os.makedirs(self.metadata_cache_path, exist_ok=True)
+        path = self._metadata_cache_file(key)
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'w', encoding='utf8') as f:
+            json.dump({'version': self._metadata_cache['version'], 'value': self._metadata_cache[key]}, f)
+        os.replace(temp_path, path)
+
+    def cache_metadata(self):
+        """
+        Save corpus metadata to the disk
+        """
+        if self._metadata_cache is None:
+            return
+        for key in self._metadata_cache:
+            if key != 'version':
+                self._save_cached_metadata(key)
+
+    def cached_metadata(self, key, generate):
+        """
+        Get a piece of corpus metadata, generating it only if it has not been cached for the current version of
+        the corpus
+
+        The version stamp is read from the database once per context, when the cache is first used, and is
+        updated by :meth:`bump_metadata_version`, so cached metadata costs no queries afterwards.  Call
+        :meth:`load_metadata_cache` to pick up changes made by other processes since.  Only the generated piece
+        of metadata is written to the disk.
+
+        Parameters
+        ----------
+        key : str
+            Name of the metadata
+        generate : callable
+            Function to generate the metadata from the database
+
+        Returns
+        -------
+        object
+            Cached metadata
+        """
+        if self._metadata_cache is None:
+            self.load_metadata_cache()
+        if key not in self._metadata_cache:
+            self._metadata_cache[key] = generate()
+            self._save_cached_metadata(key)
+        return self._metadata_cache[key]
+
+    @property
+    def statistics_path(self):
+        """
+        Get the path to the stored property statistics of the corpus, kept alongside the cached Hierarchy
+
+        Returns
+        -------
+        str
+            Path to the statistics on disk
+        """
+        return os.path.join(self.config.base_dir, 'statistics')
+
+    def load_statistics(self):
+        """
+        Load the stored property statistics of the corpus, see
+        :meth:`~polyglotdb.query.metadata.query.MetaDataQuery.profile`.  Statistics stored for an earlier
+        :meth:`data_version` of the corpus are out of date and are discarded.
+
+        Returns
+        -------
+        dict
+            Statistics of each level (annotation type, Speaker or Discourse), empty if none are stored
+        """
+        import json
+        from ..query.metadata.profile import PROFILE_VERSION
+        if not os.path.exists(self.statistics_path):
+            return {}
+        try:
+            with open(self.statistics_path, 'r', encoding='utf8') as f:
+                data = json.load(f)
+        except ValueError:
+            return {}
+        if data.get('version') != PROFILE_VERSION or data.get('data_version') != self.data_version():
+            return {}
+        return data['levels']
+
+    def save_statistics(self, statistics):
+        """
+        Store property statistics of the corpus, along with the current :meth:`data_version` of the corpus
+
+        Parameters
+        ----------
+        statistics : dict
+            Statistics of each level (annotation type, Speaker or Discourse)
+        """
+        import json
+        from ..query.metadata.profile import PROFILE_VERSION
+        if not os.path.exists(self.config.base_dir):
+            return
+        temp_path = self.statistics_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf8') as f:
+            json.dump({'version': PROFILE_VERSION, 'data_version': self.data_version(), 'levels': statistics}, f)
+        os.replace(temp_path, self.statistics_path)
+
+    def invalidate_statistics(self, level=None, properties=None):
+        """
+        Remove stored property statistics that are out of date, so that they are recomputed when next requested
+
+        Parameters
+        ----------
+        level : str, optional
+            Annotation type, 'Speaker' or 'Discourse' whose statistics changed, defaults to all levels
+        properties : iterable, optional
+            Names of the properties that changed, defaults to all properties of the level
+        """
+        if not os.path.exists(self.statistics_path):
+            return
+        if level is None:
+            os.remove(self.statistics_path)
+            return
+        statistics = self.load_statistics()
+        if level not in statistics:
+            return
+        if properties is None:
+            del statistics[level]
+        else:
+            for k in properties:
+                for section in statistics[level].values():
+                    section.pop(k, None)
+        self.save_statistics(statistics)
 
     def __enter__(self):
         if self.corpus_name:
             if not os.path.exists(self.hierarchy_path):
                 self.hierarchy = self.generate_hierarchy()
+                self._synced_hierarchy = self.hierarchy.snapshot()
                 self.cache_hierarchy()
             else:
                 self.load_hierarchy()
@@ -166,13 +620,30 @@ class BaseContext(object):
         """
         return os.path.join(self.config.base_dir, 'hierarchy')
 
+    @property
+    def in_hierarchy_transaction(self):
+        """
+        Check whether changes to the Hierarchy are currently being deferred by a hierarchy transaction
+
+        Returns
+        -------
+        bool
+            True if a hierarchy transaction is open
+        """
+        return self._hierarchy_transaction_depth > 0
+
     def cache_hierarchy(self):
         """
         Save corpus Hierarchy to the disk
         """
         import json
-        with open(self.hierarchy_path, 'w', encoding='utf8') as f:
+        if self.in_hierarchy_transaction:
+            self._hierarchy_dirty = True
+            return
+        temp_path = self.hierarchy_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf8') as f:
             json.dump(self.hierarchy.to_json(), f)
+        os.replace(temp_path, self.hierarchy_path)
 
     def load_hierarchy(self):
         """
@@ -182,9 +653,18 @@ class BaseContext(object):
         with open(self.hierarchy_path, 'r', encoding='utf8') as f:
             self.hierarchy = Hierarchy(corpus_name=self.corpus_name)
             self.hierarchy.from_json(json.load(f))
+        self._synced_hierarchy = self.hierarchy.snapshot()
 
     def __exit__(self, exc_type, exc, exc_tb):
-        self.graph_driver.close()
+        try:
+            if self._data_changed:
+                # Invalidate cached query results in other processes
+                self.data_version()
+        except Exception:
+            if exc_type is None:
+                raise
+        finally:
+            self.graph_driver.close()
         if exc_type is None:
             # try:
             #    shutil.rmtree(self.config.temp_dir)
@@ -281,56 +761,230 @@ class BaseContext(object):
             name = 'phone'
         return name
 
-    def reset_graph(self, call_back=None, stop_check=None):
+    def reset_graph(self, call_back=None, stop_check=None, num_workers=1, batch_size=None, memory_budget=None):
         """
         Remove all nodes and relationships in the corpus.
-        """
-
-        delete_statement = '''MATCH (n:{corpus}:{anno})-[:spoken_by]->(s:{corpus}:Speaker)
-        where s.name = {{speaker}}
-        with n LIMIT 1000 DETACH DELETE n return count(n) as deleted_count'''
 
-        delete_type_statement = '''MATCH (n:{corpus}:{anno}_type)
-        with n LIMIT 1000 DETACH DELETE n return count(n) as deleted_count'''
+        Annotations are deleted discourse by discourse in batches of node IDs (see :meth:`delete_discourses`),
+        followed by any remaining nodes of the corpus.  If the reset is stopped part way, calling it again
+        continues from where it stopped.
 
+        Parameters
+        ----------
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function the check whether the process should terminate early
+        num_workers : int
+            Number of discourses to delete at once, defaults to 1
+        batch_size : int, optional
+            Number of nodes to delete per transaction, defaults to a size based on ``memory_budget``
+        memory_budget : int, optional
+            Approximate memory in bytes to allow for each deletion transaction
+        """
+        batch_size = self._deletion_batch_size(batch_size, memory_budget)
+        progress = _BatchProgress(call_back)
         if call_back is not None:
             call_back('Resetting database...')
             number = self.execute_cypher(
-                '''MATCH (n:{}) return count(*) as number '''.format(self.cypher_safe_name))['number']
+                '''MATCH (n:{}) return count(n) as number '''.format(self.cypher_safe_name)).single()['number']
             call_back(0, number)
-        num_deleted = 0
-        for a in self.hierarchy.annotation_types:
-            if stop_check is not None and stop_check():
-                break
-            for s in self.speakers:
-                if stop_check is not None and stop_check():
-                    break
-                deleted = 1000
-                while deleted > 0:
-                    if stop_check is not None and stop_check():
-                        break
-                    deleted = self.execute_cypher(delete_statement.format(corpus=self.cypher_safe_name, anno=a),
-                                                  speaker=s).single()['deleted_count']
-                    num_deleted += deleted
-                    if call_back is not None:
-                        call_back(num_deleted)
-
-            deleted = 1000
-            while deleted > 0:
-                if stop_check is not None and stop_check():
-                    break
-                deleted = self.execute_cypher(
-                    delete_type_statement.format(corpus=self.cypher_safe_name, anno=a)).single()['deleted_count']
-                num_deleted += deleted
-                if call_back is not None:
-                    call_back(num_deleted)
-
-        self.execute_cypher('''MATCH (n:{}:Speaker) DETACH DELETE n '''.format(self.cypher_safe_name))
-        self.execute_cypher('''MATCH (n:{}:Discourse) DETACH DELETE n '''.format(self.cypher_safe_name))
+        discourses = self._discourses_in_graph()
+        if not self._delete_discourses(discourses, num_workers, batch_size, progress, stop_check):
+            return
+        statement = '''MATCH (n:{}) RETURN id(n) AS node_id'''.format(self.cypher_safe_name)
+        ids = [r['node_id'] for r in self.execute_cypher(statement)]
+        if not self._delete_node_ids(ids, batch_size, progress, stop_check):
+            return
         self.reset_hierarchy()
         self.execute_cypher('''MATCH (n:Corpus) where n.name = {corpus_name} DELETE n ''', corpus_name=self.corpus_name)
         self.hierarchy = Hierarchy(corpus_name=self.corpus_name)
         self.cache_hierarchy()
+        self.clear_metadata_cache()
+        self.invalidate_statistics()
+
+    def _deletion_batch_size(self, batch_size=None, memory_budget=None):
+        if batch_size is not None:
+            return max(int(batch_size), 1)
+        return deletion_batch_size(memory_budget)
+
+    def _discourses_in_graph(self):
+        statement = '''MATCH (d:{corpus_name}:Discourse) RETURN d.name AS name'''.format(
+            corpus_name=self.cypher_safe_name)
+        return sorted(r['name'] for r in self.execute_cypher(statement))
+
+    def _delete_node_ids(self, ids, batch_size, progress=None, stop_check=None):
+        """
+        Delete nodes by ID in separate transactions of at most ``batch_size`` nodes
+
+        Returns
+        -------
+        bool
+            False if the deletion was stopped before all nodes were deleted
+        """
+
+        def _delete_batch(tx, node_ids):
+            tx.run('''UNWIND {node_ids} AS node_id
+            MATCH (n) WHERE id(n) = node_id
+            DETACH DELETE n''', node_ids=node_ids)
+
+        with self.graph_driver.session() as session:
+            for i in range(0, len(ids), batch_size):
+                if stop_check is not None and stop_check():
+                    return False
+                batch = ids[i:i + batch_size]
+                session.write_transaction(_delete_batch, batch)
+                if progress is not None:
+                    progress.update(len(batch))
+        return True
+
+    def _discourse_node_ids(self, discourse):
+        statement = '''MATCH (d:{corpus_name}:Discourse)<-[:spoken_in]-(n:{corpus_name})
+        WHERE d.name = {{discourse}}
+        OPTIONAL MATCH (n)<-[:annotates]-(s)
+        RETURN id(n) AS node_id, id(s) AS subannotation_id'''.format(corpus_name=self.cypher_safe_name)
+        subannotation_ids = []
+        node_ids = []
+        seen = set()
+        for r in self.execute_cypher(statement, discourse=discourse):
+            if r['node_id'] not in seen:
+                seen.add(r['node_id'])
+                node_ids.append(r['node_id'])
+            if r['subannotation_id'] is not None and r['subannotation_id'] not in seen:
+                seen.add(r['subannotation_id'])
+                subannotation_ids.append(r['subannotation_id'])
+        return subannotation_ids + node_ids
+
+    def _delete_discourse(self, discourse, batch_size, progress=None, stop_check=None):
+        ids = self._discourse_node_ids(discourse)
+        if not self._delete_node_ids(ids, batch_size, progress, stop_check):
+            return False
+        statement = '''MATCH (d:{corpus_name}:Discourse)
+        WHERE d.name = {{discourse}}
+        DETACH DELETE d'''.format(corpus_name=self.cypher_safe_name)
+        self.execute_cypher(statement, discourse=discourse)
+        return True
+
+    def _delete_discourses(self, discourses, num_workers, batch_size, progress=None, stop_check=None):
+        if not discourses:
+            return True
+        statement = '''UNWIND {{discourses}} AS discourse
+        MATCH (d:{corpus_name}:Discourse) WHERE d.name = discourse
+        SET d.pending_deletion = true'''.format(corpus_name=self.cypher_safe_name)
+        self.execute_cypher(statement, discourses=list(discourses))
+        self.bump_metadata_version()
+        self.invalidate_statistics()
+        if num_workers <= 1:
+            for d in discourses:
+                if not self._delete_discourse(d, batch_size, progress, stop_check):
+                    return False
+            return True
+        completed = True
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(self._delete_discourse, d, batch_size, progress, stop_check)
+                       for d in discourses]
+            for f in as_completed(futures):
+                if not f.result():
+                    completed = False
+        return completed
+
+    def _delete_orphaned_nodes(self, batch_size, progress=None, stop_check=None):
+        statements = ['''MATCH (t:{type}_type:{corpus_name})
+            WHERE NOT (t)<-[:is_a]-()
+            RETURN id(t) AS node_id'''.format(type=a, corpus_name=self.cypher_safe_name)
+                      for a in self.hierarchy.annotation_types]
+        statements.append('''MATCH (s:Speaker:{corpus_name})
+        WHERE NOT (s)<-[:spoken_by]-()
+        RETURN id(s) AS node_id'''.format(corpus_name=self.cypher_safe_name))
+        for statement in statements:
+            ids = [r['node_id'] for r in self.execute_cypher(statement)]
+            if not self._delete_node_ids(ids, batch_size, progress, stop_check):
+                return False
+        return True
+
+    def delete_discourses(self, discourses, num_workers=1, batch_size=None, memory_budget=None, call_back=None,
+                          stop_check=None):
+        """
+        Remove the nodes and relationships of several discourses, along with any type and speaker nodes that
+        are no longer used
+
+        Nodes are deleted in batches of IDs, each in its own transaction, so that no single transaction has
+        to hold a whole discourse.  Discourses are flagged before deletion starts, so a deletion that is
+        stopped or interrupted can be finished with :meth:`resume_deletions`.
+
+        Parameters
+        ----------
+        discourses : list
+            Names of the discourses to remove
+        num_workers : int
+            Number of discourses to delete at once, defaults to 1
+        batch_size : int, optional
+            Number of nodes to delete per transaction, defaults to a size based on ``memory_budget``
+        memory_budget : int, optional
+            Approximate memory in bytes to allow for each deletion transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function the check whether the process should terminate early
+
+        Returns
+        -------
+        bool
+            True if all discourses were removed, False if the deletion was stopped
+        """
+        discourses = sorted(discourses)
+        batch_size = self._deletion_batch_size(batch_size, memory_budget)
+        progress = _BatchProgress(call_back)
+        if call_back is not None:
+            call_back('Removing {} discourse(s)...'.format(len(discourses)))
+        completed = self._delete_discourses(discourses, num_workers, batch_size, progress, stop_check)
+        if completed:
+            completed = self._delete_orphaned_nodes(batch_size, progress, stop_check)
+        self.bump_metadata_version()
+        return completed
+
+    def discourses_pending_deletion(self):
+        """
+        Get the discourses whose deletion was started but not finished
+
+        Returns
+        -------
+        list
+            Names of discourses flagged for deletion
+        """
+        statement = '''MATCH (d:{corpus_name}:Discourse)
+        WHERE d.pending_deletion = true
+        RETURN d.name AS name'''.format(corpus_name=self.cypher_safe_name)
+        return sorted(r['name'] for r in self.execute_cypher(statement))
+
+    def resume_deletions(self, num_workers=1, batch_size=None, memory_budget=None, call_back=None,
+                         stop_check=None):
+        """
+        Finish removing any discourses whose deletion was stopped or interrupted
+
+        Parameters
+        ----------
+        num_workers : int
+            Number of discourses to delete at once, defaults to 1
+        batch_size : int, optional
+            Number of nodes to delete per transaction, defaults to a size based on ``memory_budget``
+        memory_budget : int, optional
+            Approximate memory in bytes to allow for each deletion transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function the check whether the process should terminate early
+
+        Returns
+        -------
+        bool
+            True if all pending deletions were completed
+        """
+        pending = self.discourses_pending_deletion()
+        if not pending:
+            return True
+        return self.delete_discourses(pending, num_workers=num_workers, batch_size=batch_size,
+                                      memory_budget=memory_budget, call_back=call_back, stop_check=stop_check)
 
     def reset(self, call_back=None, stop_check=None):
         """
@@ -438,7 +1092,7 @@ class BaseContext(object):
         """
         return self.hierarchy.lowest
 
-    def remove_discourse(self, name):
+    def remove_discourse(self, name, batch_size=None, memory_budget=None, call_back=None, stop_check=None):
         """
         Remove the nodes and relationships associated with a single
         discourse in the corpus.
@@ -447,6 +1101,19 @@ class BaseContext(object):
         ----------
         name : str
             Name of the discourse to remove
+        batch_size : int, optional
+            Number of nodes to delete per transaction, defaults to a size based on ``memory_budget``
+        memory_budget : int, optional
+            Approximate memory in bytes to allow for each deletion transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function the check whether the process should terminate early
+
+        Returns
+        -------
+        bool
+            True if the discourse was removed, False if the deletion was stopped
         """
         if name not in self.discourses:
             raise GraphQueryError('{} is not a discourse in this corpus.'.format(name))
@@ -456,51 +1123,8 @@ class BaseContext(object):
             if self.config.debug:
                 print('Removing', directory)
             shutil.rmtree(directory, ignore_errors=True)
-
-        # Remove orphaned type nodes
-        for a in self.hierarchy.annotation_types:
-            # Remove tokens in discourse
-            statement = '''MATCH (d:{corpus_name}:Discourse)<-[:spoken_in]-(n:{corpus_name}:{atype})
-            WHERE d.name = {{discourse}}
-            DETACH DELETE n'''.format(corpus_name=self.cypher_safe_name, atype=a)
-            if self.config.debug:
-                print(statement)
-            result = self.execute_cypher(statement, discourse=name)
-            if self.config.debug:
-                for r in result:
-                    print('RESULT', r)
-        # Remove discourse node
-        statement = '''MATCH (d:{corpus_name}:Discourse)
-        WHERE d.name = {{discourse}}
-        DETACH DELETE d'''.format(corpus_name=self.cypher_safe_name)
-        if self.config.debug:
-            print(statement)
-        result = self.execute_cypher(statement, discourse=name)
-        if self.config.debug:
-            for r in result:
-                print('RESULT', r)
-
-        for a in self.hierarchy.annotation_types:
-            statement = '''MATCH (t:{type}_type:{corpus_name})
-            WHERE NOT (t)<-[:is_a]-()
-            DETACH DELETE t'''.format(type=a, corpus_name=self.cypher_safe_name)
-            if self.config.debug:
-                print(statement)
-            result = self.execute_cypher(statement)
-            if self.config.debug:
-                for r in result:
-                    print('RESULT', r)
-
-        # Remove orphaned speaker nodes
-        statement = '''MATCH (s:Speaker:{corpus_name})
-        WHERE NOT (s)<-[:spoken_by]-()
-        DETACH DELETE s'''.format(corpus_name=self.cypher_safe_name)
-        if self.config.debug:
-            print(statement)
-        result = self.execute_cypher(statement)
-        if self.config.debug:
-            for r in result:
-                print('RESULT', r)
+        return self.delete_discourses([name], batch_size=batch_size, memory_budget=memory_budget,
+                                      call_back=call_back, stop_check=stop_check)
 
     @property
     def phones(self):
@@ -512,10 +1136,14 @@ class BaseContext(object):
         list
             All phone labels in the corpus
         """
-        statement = '''MATCH (p:{phone_name}_type:{corpus_name}) return p.label as label'''.format(
-            phone_name=self.phone_name, corpus_name=self.cypher_safe_name)
-        results = self.execute_cypher(statement)
-        return [r['label'] for r in results]
+
+        def generate():
+            statement = '''MATCH (p:{phone_name}_type:{corpus_name}) return p.label as label'''.format(
+                phone_name=self.phone_name, corpus_name=self.cypher_safe_name)
+            results = self.execute_cypher(statement)
+            return [r['label'] for r in results]
+
+        return list(self.cached_metadata('phones', generate))
 
     @property
     def words(self):
@@ -527,7 +1155,11 @@ class BaseContext(object):
         list
             All word labels in the corpus
         """
-        statement = '''MATCH (p:{word_name}_type:{corpus_name}) return p.label as label'''.format(
-            word_name=self.word_name, corpus_name=self.cypher_safe_name)
-        results = self.execute_cypher(statement)
-        return [r['label'] for r in results]
+
+        def generate():
+            statement = '''MATCH (p:{word_name}_type:{corpus_name}) return p.label as label'''.format(
+                word_name=self.word_name, corpus_name=self.cypher_safe_name)
+            results = self.execute_cypher(statement)
+            return [r['label'] for r in results]
+
+        return list(self.cached_metadata('words', generate))
@@ -1,7 +1,7 @@
-from .annotated import AnnotatedContext
+from .enrichment import EnrichmentContext
 
 
-class CorpusContext(AnnotatedContext):
+class CorpusContext(EnrichmentContext):
     """
     Main corpus context, inherits from the more specialized contexts.
 
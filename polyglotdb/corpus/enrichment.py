@@ -0,0 +1,472 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .annotated import AnnotatedContext
+from ..exceptions import EnrichmentError
+
+
+def base_stop_check():
+    return False
+
+
+class EnrichmentStep(object):
+    """
+    Declaration of a single enrichment in an :class:`EnrichmentPipeline`
+
+    Parameters
+    ----------
+    name : str
+        Unique name of the step, used to record completion state on Discourse nodes
+    function : str or callable
+        Either the name of a :class:`~polyglotdb.corpus.CorpusContext` method (i.e., ``'encode_pauses'``)
+        or a callable.  Corpus-wide steps are called as ``function(corpus_context, **parameters)`` (or
+        ``corpus_context.function(**parameters)`` for method names), per-discourse steps are called
+        as ``function(corpus_context, discourse, **parameters)``
+    parameters : dict, optional
+        Keyword arguments to pass to the function, changing these makes the step stale for all discourses
+    depends_on : list, optional
+        Names of steps that must be run before this one
+    per_discourse : bool
+        Whether the function can be run on a single discourse at a time, defaults to False
+    prepare : str or callable, optional
+        Name of a :class:`~polyglotdb.corpus.CorpusContext` method or a callable run once as
+        ``prepare(corpus_context)`` before a per-discourse step is run for any discourse
+
+    Notes
+    -----
+    Per-discourse steps are run on worker threads that share a single
+    :class:`~polyglotdb.corpus.CorpusContext`, so their functions must only change the data of their discourse and
+    must not update the Hierarchy.  Hierarchy changes (new annotation types, subsets or properties) belong in
+    ``prepare``, which is run in the calling thread.
+    """
+
+    def __init__(self, name, function, parameters=None, depends_on=None, per_discourse=False, prepare=None):
+        self.name = name
+        self.function = function
+        if parameters is None:
+            parameters = {}
+        self.parameters = parameters
+        if depends_on is None:
+            depends_on = []
+        self.depends_on = list(depends_on)
+        self.per_discourse = per_discourse
+        self.prepare = prepare
+
+    def __repr__(self):
+        return '<EnrichmentStep {}>'.format(self.name)
+
+    @property
+    def function_name(self):
+        if isinstance(self.function, str):
+            return self.function
+        return '{}.{}'.format(getattr(self.function, '__module__', ''),
+                              getattr(self.function, '__name__', repr(self.function)))
+
+    @property
+    def state_property(self):
+        """
+        Name of the Discourse node property storing the fingerprint of the step
+
+        Returns
+        -------
+        str
+            Property name
+        """
+        return 'enrichment_{}'.format(self.name)
+
+    def prepare_corpus(self, corpus_context):
+        """
+        Run the step's ``prepare`` function, if it has one
+
+        Parameters
+        ----------
+        corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+            Corpus to enrich
+        """
+        if self.prepare is None:
+            return
+        with corpus_context.span('enrichment_prepare', step=self.name):
+            if isinstance(self.prepare, str):
+                return getattr(corpus_context, self.prepare)()
+            return self.prepare(corpus_context)
+
+    def run(self, corpus_context, discourse=None):
+        """
+        Run the step on the corpus (or a single discourse for per-discourse steps)
+
+        Parameters
+        ----------
+        corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+            Corpus to enrich
+        discourse : str, optional
+            Discourse to enrich, only used for per-discourse steps
+        """
+        with corpus_context.span('enrichment_step', step=self.name, discourse=discourse):
+            if self.per_discourse:
+                if isinstance(self.function, str):
+                    return getattr(corpus_context, self.function)(discourse, **self.parameters)
+                return self.function(corpus_context, discourse, **self.parameters)
+            if isinstance(self.function, str):
+                return getattr(corpus_context, self.function)(**self.parameters)
+            return self.function(corpus_context, **self.parameters)
+
+
+#: Registered enrichment steps, mapping step names to the function they run, the steps they depend on by default,
+#: whether they run per discourse and the function preparing the corpus for them
+ENRICHMENT_STEPS = {}
+
+
+def register_enrichment_step(name, function, depends_on=None, per_discourse=False, prepare=None):
+    """
+    Register a step so that it can be added to pipelines by name with :func:`enrichment_step`
+
+    Parameters
+    ----------
+    name : str
+        Name of the step
+    function : str or callable
+        Name of a :class:`~polyglotdb.corpus.CorpusContext` method or a callable, see :class:`EnrichmentStep`
+    depends_on : list, optional
+        Names of steps that must be run before this one by default
+    per_discourse : bool
+        Whether the function can be run on a single discourse at a time, defaults to False
+    prepare : str or callable, optional
+        Function run once before a per-discourse step, see :class:`EnrichmentStep`
+    """
+    if depends_on is None:
+        depends_on = []
+    ENRICHMENT_STEPS[name] = {'function': function, 'depends_on': list(depends_on), 'per_discourse': per_discourse,
+                              'prepare': prepare}
+
+
+def enrichment_step(name, parameters=None, depends_on=None):
+    """
+    Create a step from a registered enrichment
+
+    Parameters
+    ----------
+    name : str
+        Name of a registered step, see :data:`ENRICHMENT_STEPS`
+    parameters : dict, optional
+        Keyword arguments to pass to the function
+    depends_on : list, optional
+        Names of steps that must be run before this one, defaults to the registered dependencies
+
+    Returns
+    -------
+    :class:`EnrichmentStep`
+        Step that can be added to a pipeline
+    """
+    if name not in ENRICHMENT_STEPS:
+        raise EnrichmentError('There is no registered enrichment step named {}, available steps are: {}.'.format(
+            name, ', '.join(sorted(ENRICHMENT_STEPS))))
+    registered = ENRICHMENT_STEPS[name]
+    if depends_on is None:
+        depends_on = registered['depends_on']
+    return EnrichmentStep(name, registered['function'], parameters=parameters, depends_on=depends_on,
+                          per_discourse=registered['per_discourse'], prepare=registered['prepare'])
+
+
+register_enrichment_step('pauses', 'encode_discourse_pauses', per_discourse=True, prepare='_register_pauses')
+register_enrichment_step('utterances', 'encode_discourse_utterances', depends_on=['pauses'], per_discourse=True,
+                         prepare='_register_utterances')
+register_enrichment_step('utterance_position', 'encode_discourse_utterance_position', depends_on=['utterances'],
+                         per_discourse=True, prepare='_register_utterance_position')
+register_enrichment_step('syllabic_segments', 'encode_syllabic_segments')
+register_enrichment_step('syllables', 'encode_discourse_syllables', depends_on=['syllabic_segments'],
+                         per_discourse=True, prepare='_register_syllables')
+register_enrichment_step('speech_rate', 'encode_discourse_speech_rate', depends_on=['utterances'],
+                         per_discourse=True, prepare='_register_speech_rate')
+register_enrichment_step('stress_to_syllables', 'encode_stress_to_syllables', depends_on=['syllables'])
+register_enrichment_step('tone_to_syllables', 'encode_tone_to_syllables', depends_on=['syllables'])
+register_enrichment_step('stress_from_word_property', 'encode_stress_from_word_property')
+register_enrichment_step('features', 'encode_features')
+register_enrichment_step('class', 'encode_class')
+register_enrichment_step('measure', 'encode_measure')
+register_enrichment_step('baseline', 'encode_baseline')
+register_enrichment_step('relativized', 'encode_relativized')
+register_enrichment_step('acoustic_statistic', 'encode_acoustic_statistic')
+
+
+class EnrichmentPipeline(object):
+    """
+    Declarative directed acyclic graph of enrichment steps
+
+    Parameters
+    ----------
+    steps : list, optional
+        List of :class:`EnrichmentStep` objects
+    """
+
+    def __init__(self, steps=None):
+        self.steps = {}
+        self._order = []
+        if steps is not None:
+            for s in steps:
+                self.add_step(s)
+
+    def __contains__(self, item):
+        return item in self.steps
+
+    def __getitem__(self, item):
+        return self.steps[item]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def add_step(self, step):
+        """
+        Add a step to the pipeline
+
+        Parameters
+        ----------
+        step : :class:`EnrichmentStep`
+            Step to add
+        """
+        if step.name in self.steps:
+            raise EnrichmentError('An enrichment step named {} already exists.'.format(step.name))
+        self.steps[step.name] = step
+        self._order.append(step.name)
+
+    def topological_order(self):
+        """
+        Get the steps of the pipeline in an order that respects their dependencies
+
+        Returns
+        -------
+        list
+            Steps sorted so that every step comes after the steps it depends on
+        """
+        for name in self._order:
+            for d in self.steps[name].depends_on:
+                if d not in self.steps:
+                    raise EnrichmentError('The step {} depends on {}, which is not in the pipeline.'.format(name, d))
+        ordered = []
+        visited = {}
+
+        def visit(name, path):
+            state = visited.get(name)
+            if state == 'done':
+                return
+            if state == 'visiting':
+                raise EnrichmentError('Circular dependency in enrichment steps: {}'.format(
+                    ' -> '.join(path + [name])))
+            visited[name] = 'visiting'
+            for d in self.steps[name].depends_on:
+                visit(d, path + [name])
+            visited[name] = 'done'
+            ordered.append(self.steps[name])
+
+        for name in self._order:
+            visit(name, [])
+        return ordered
+
+    def fingerprints(self):
+        """
+        Generate a fingerprint for each step from its function, parameters and the fingerprints of the steps
+        it depends on, so that changing an upstream parameter invalidates everything downstream
+
+        Returns
+        -------
+        dict
+            Mapping of step names to fingerprint strings
+        """
+        fingerprints = {}
+        for step in self.topological_order():
+            data = {'function': step.function_name,
+                    'parameters': step.parameters,
+                    'depends_on': sorted(fingerprints[d] for d in step.depends_on)}
+            encoded = json.dumps(data, sort_keys=True, default=repr).encode('utf8')
+            fingerprints[step.name] = hashlib.sha1(encoded).hexdigest()
+        return fingerprints
+
+
+class EnrichmentContext(AnnotatedContext):
+    """
+    Class that contains methods for running enrichment pipelines incrementally, recording which discourses each
+    enrichment step has been completed for
+    """
+
+    def enrichment_state(self, step_name):
+        """
+        Get the recorded fingerprint of an enrichment step for each discourse
+
+        Parameters
+        ----------
+        step_name : str
+            Name of the enrichment step
+
+        Returns
+        -------
+        dict
+            Mapping of discourse names to fingerprints (None if the step has not been run)
+        """
+        statement = '''MATCH (d:Discourse:{corpus_name})
+        RETURN d.name AS discourse, d.`enrichment_{step_name}` AS fingerprint'''.format(
+            corpus_name=self.cypher_safe_name, step_name=step_name)
+        return {x['discourse']: x['fingerprint'] for x in self.execute_cypher(statement)}
+
+    def mark_enrichment(self, step_name, fingerprint, discourses):
+        """
+        Record that an enrichment step has been completed for a set of discourses
+
+        Parameters
+        ----------
+        step_name : str
+            Name of the enrichment step
+        fingerprint : str
+            Fingerprint of the step's parameters
+        discourses : list
+            Discourses that the step has been completed for
+        """
+        statement = '''UNWIND {{discourses}} AS discourse_name
+        MATCH (d:Discourse:{corpus_name}) WHERE d.name = discourse_name
+        SET d.`enrichment_{step_name}` = {{fingerprint}}'''.format(
+            corpus_name=self.cypher_safe_name, step_name=step_name)
+        self.execute_cypher(statement, discourses=list(discourses), fingerprint=fingerprint)
+
+    def reset_enrichment_state(self, step_name=None):
+        """
+        Remove recorded completion state, so that steps will be recomputed on the next run
+
+        Parameters
+        ----------
+        step_name : str, optional
+            Name of the step to reset, if not specified, state for all steps is removed
+        """
+        statement = '''MATCH (d:Discourse:{corpus_name}) RETURN d LIMIT 1'''.format(corpus_name=self.cypher_safe_name)
+        properties = set()
+        for r in self.execute_cypher(statement):
+            properties.update(x for x in r['d'].keys() if x.startswith('enrichment_'))
+        if step_name is not None:
+            properties = {'enrichment_{}'.format(step_name)}
+        if not properties:
+            return
+        statement = '''MATCH (d:Discourse:{corpus_name})
+        REMOVE {properties}'''.format(corpus_name=self.cypher_safe_name,
+                                      properties=', '.join('d.`{}`'.format(x) for x in sorted(properties)))
+        self.execute_cypher(statement)
+
+    def stale_discourses(self, pipeline):
+        """
+        Get the discourses that each step of a pipeline needs to be recomputed for, based only on the
+        recorded state in the graph
+
+        Parameters
+        ----------
+        pipeline : :class:`~polyglotdb.corpus.enrichment.EnrichmentPipeline`
+            Pipeline to check
+
+        Returns
+        -------
+        dict
+            Mapping of step names to sorted lists of stale discourses
+        """
+        fingerprints = pipeline.fingerprints()
+        stale = {}
+        for step in pipeline.topological_order():
+            state = self.enrichment_state(step.name)
+            stale[step.name] = sorted(k for k, v in state.items() if v != fingerprints[step.name])
+        return stale
+
+    def run_enrichment_pipeline(self, pipeline, num_workers=1, call_back=None, stop_check=None):
+        """
+        Run an enrichment pipeline, recomputing each step only for discourses whose recorded state is out of date
+        (because the step has not been run, its parameters changed, a previous run failed part way, or a step it
+        depends on was recomputed for that discourse)
+
+        Per-discourse steps are run independently for each stale discourse, across ``num_workers`` threads, after
+        their ``prepare`` function has made any Hierarchy changes.  Corpus-wide steps are run once if any discourse
+        is stale.
+
+        Parameters
+        ----------
+        pipeline : :class:`~polyglotdb.corpus.enrichment.EnrichmentPipeline`
+            Pipeline to run
+        num_workers : int
+            Number of discourses to enrich at once for per-discourse steps, defaults to 1
+        call_back : callable
+            Function to report progress
+        stop_check : callable
+            Function to check whether to terminate early
+
+        Returns
+        -------
+        dict
+            Mapping of step names to the discourses they were recomputed for
+        """
+        if stop_check is None:
+            stop_check = base_stop_check
+        fingerprints = pipeline.fingerprints()
+        steps = pipeline.topological_order()
+        all_discourses = sorted(self.discourses)
+        recomputed = {}
+        for i, step in enumerate(steps):
+            if stop_check():
+                return recomputed
+            state = self.enrichment_state(step.name)
+            fingerprint = fingerprints[step.name]
+            upstream = set()
+            for d in step.depends_on:
+                upstream.update(recomputed.get(d, []))
+            stale = [x for x in all_discourses if state.get(x) != fingerprint or x in upstream]
+            if call_back is not None:
+                call_back('Enrichment step {} of {} ({}): {} of {} discourses out of date...'.format(
+                    i + 1, len(steps), step.name, len(stale), len(all_discourses)))
+            if not stale:
+                recomputed[step.name] = []
+                continue
+            if not step.per_discourse:
+                step.run(self)
+                if stop_check():
+                    return recomputed
+                self.mark_enrichment(step.name, fingerprint, all_discourses)
+                recomputed[step.name] = all_discourses
+                continue
+            step.prepare_corpus(self)
+            recomputed[step.name] = self._run_per_discourse_step(step, fingerprint, stale, num_workers,
+                                                                 call_back, stop_check)
+            if len(recomputed[step.name]) != len(stale):
+                return recomputed
+        return recomputed
+
+    def _run_per_discourse_step(self, step, fingerprint, discourses, num_workers, call_back, stop_check):
+        if call_back is not None:
+            call_back(0, len(discourses))
+        done = []
+        errors = []
+
+        def finish(d, error):
+            if error is not None:
+                errors.append((d, error))
+                return
+            self.mark_enrichment(step.name, fingerprint, [d])
+            done.append(d)
+            if call_back is not None:
+                call_back(len(done))
+
+        if num_workers <= 1:
+            for d in discourses:
+                if stop_check():
+                    break
+                finish(d, self._run_discourse(step, d))
+        else:
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                futures = {executor.submit(self._run_discourse, step, d): d for d in discourses}
+                for f in as_completed(futures):
+                    finish(futures[f], f.result())
+                    if stop_check():
+                        for other in futures:
+                            other.cancel()
+        if errors:
+            raise EnrichmentError('Enrichment step {} failed for {} discourse(s): {}'.format(
+                step.name, len(errors), ', '.join('{} ({})'.format(d, e) for d, e in sorted(errors, key=lambda x: x[0]))))
+        return sorted(done)
+
+    def _run_discourse(self, step, discourse):
+        try:
+            step.run(self, discourse)
+        except Exception as e:
+            return e
+        return None
@@ -82,7 +82,8 @@ class ImportContext(StructuredContext):
         stop_check : callable or None
             Function to check whether process should be terminated early
         """
-        import_csvs(self, speakers, token_headers, hierarchy, call_back, stop_check)
+        with self.span('load_csv'):
+            import_csvs(self, speakers, token_headers, hierarchy, call_back, stop_check)
         self.encode_hierarchy()
 
     def add_discourse(self, data):
@@ -114,8 +115,11 @@ class ImportContext(StructuredContext):
                     session.write_transaction(_create_speaker_discourse, s, data.name, data.speaker_channel_mapping[s])
                 else:
                     session.write_transaction(_create_speaker_discourse, s, data.name, 0)
+        self.bump_metadata_version()
+        self.invalidate_statistics()
         data.corpus_name = self.corpus_name
-        data_to_graph_csvs(self, data)
+        with self.span('csv_write', discourse=data.name):
+            data_to_graph_csvs(self, data)
         self.hierarchy.update(data.hierarchy)
         setup_audio(self, data)
 
@@ -164,7 +168,8 @@ class ImportContext(StructuredContext):
         empty list
 
         """
-        data = parser.parse_discourse(path)
+        with self.span('parse', path=path):
+            data = parser.parse_discourse(path)
 
         # If there is no data, e.g. empty TextGrid, return the empty list early.
         if data is None:
@@ -267,7 +272,8 @@ class ImportContext(StructuredContext):
                 call_back(i)
             path = os.path.join(root, filename)
             try:
-                data = parser.parse_discourse(path)
+                with self.span('parse', path=path):
+                    data = parser.parse_discourse(path)
             except ParseError:
                 continue
             self.add_discourse(data)
@@ -1,4 +1,4 @@
-from ..io.importer import lexicon_data_to_csvs, import_lexicon_csvs
+from ..io.importer import import_lexicon_data
 from ..io.enrichment.lexical import enrich_lexicon_from_csv, parse_file
 from .spoken import SpokenContext
 
@@ -26,8 +26,7 @@ class LexicalContext(SpokenContext):
         type_data = {k: v for k,v in type_data.items() if k not in removed}
         if not type_data:
             return
-        lexicon_data_to_csvs(self, lexicon_data, case_sensitive=case_sensitive)
-        import_lexicon_csvs(self, type_data, case_sensitive=case_sensitive)
+        import_lexicon_data(self, lexicon_data, type_data, case_sensitive=case_sensitive)
         self.hierarchy.add_type_properties(self, self.word_name, type_data.items())
         self.encode_hierarchy()
 
@@ -1,4 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import _BatchProgress
 from .importable import ImportContext
+from ..instrumentation import spanned
+
+PAUSE_BATCH_SIZE = 5000
+
+
+def pause_batches(groups, batch_size=PAUSE_BATCH_SIZE):
+    """
+    Pack the node IDs of discourses into batches for bulk pause updates
+
+    Word-to-word relationships never cross discourses, so all the batches of a discourse are kept in the same
+    job, and separate jobs can be run in parallel without touching the same relationships.  Small discourses are
+    packed together so that the number of transactions depends on the number of nodes rather than the number of
+    discourses.
+
+    Parameters
+    ----------
+    groups : iterable
+        Lists of node IDs, one per discourse
+    batch_size : int
+        Maximum number of node IDs per batch
+
+    Returns
+    -------
+    list
+        Jobs, each a list of batches of node IDs to be processed in order
+    """
+    jobs = []
+    current = []
+    for ids in groups:
+        if not ids:
+            continue
+        if len(ids) > batch_size:
+            jobs.append([ids[i:i + batch_size] for i in range(0, len(ids), batch_size)])
+            continue
+        if len(current) + len(ids) > batch_size:
+            jobs.append([current])
+            current = []
+        current = current + ids
+    if current:
+        jobs.append([current])
+    return jobs
 
 
 class PauseContext(ImportContext):
@@ -17,7 +61,41 @@ class PauseContext(ImportContext):
         """
         return 'pause' in self.hierarchy.subset_tokens[self.word_name]
 
-    def encode_pauses(self, pause_words, call_back=None, stop_check=None):
+    def _run_pause_jobs(self, jobs, transaction, num_workers=1, call_back=None, stop_check=None):
+        """
+        Run batches of node IDs through a transaction function, with one job per worker at a time
+
+        Returns
+        -------
+        bool
+            False if processing was stopped before all batches were run
+        """
+        progress = _BatchProgress(call_back)
+
+        def run_job(batches):
+            with self.graph_driver.session() as session:
+                for batch in batches:
+                    if stop_check is not None and stop_check():
+                        return False
+                    session.write_transaction(transaction, batch)
+                    progress.update(len(batch))
+            return True
+
+        try:
+            if num_workers <= 1:
+                return all(run_job(batches) for batches in jobs)
+            with ThreadPoolExecutor(max_workers=num_workers) as executor:
+                return all(list(executor.map(run_job, jobs)))
+        finally:
+            # Batches committed before a stop or an error still changed the data
+            if progress.processed:
+                self.mark_data_changed()
+
+    def _pause_node_ids(self, statement, **parameters):
+        return [r['node_ids'] for r in self.execute_cypher(statement, **parameters)]
+
+    @spanned('encode_pauses')
+    def encode_pauses(self, pause_words, call_back=None, stop_check=None, num_workers=1, batch_size=PAUSE_BATCH_SIZE):
         """
         Set words to be pauses, as opposed to speech.
 
@@ -30,94 +108,184 @@ class PauseContext(ImportContext):
             Function to monitor progress
         stop_check : callable
             Function to check whether process should be terminated early
+        num_workers : int
+            Number of batches of discourses to update at once
+        batch_size : int
+            Maximum number of words to update per transaction
         """
-        self.reset_pauses()
-        word = getattr(self, self.word_name)
-        for s in self.speakers:
-            discourses = self.get_discourses_of_speaker(s)
-            for d in discourses:
-                q = self.query_graph(word)
-                q = q.filter(word.speaker.name == s)
-                q = q.filter(word.discourse.name == d)
-                if call_back is not None:
-                    q.call_back = call_back
-                if stop_check is not None:
-                    q.stop_check = stop_check
-                if isinstance(pause_words, (list, tuple, set)):
-                    q = q.filter(word.label.in_(pause_words))
-                elif isinstance(pause_words, str):
-                    q = q.filter(word.label.regex(pause_words))
-                else:
-                    raise (NotImplementedError)
-                q.set_pause()
+        condition, pause_words = self._pause_condition(pause_words)
+        self.reset_pauses(call_back=call_back, stop_check=stop_check, num_workers=num_workers,
+                          batch_size=batch_size)
+        if not self._encode_pause_data(condition, pause_words, call_back=call_back, stop_check=stop_check,
+                                       num_workers=num_workers, batch_size=batch_size):
+            return
+        self._register_pauses()
 
-        if call_back is not None:
-            call_back('Finishing up...')
-        for s in self.speakers:
-            discourses = self.get_discourses_of_speaker(s)
-            for d in discourses:
-                statement = '''MATCH (prec:{corpus}:{word_type}:speech)-[:spoken_by]->(s:Speaker:{corpus}),
-                (prec)-[:spoken_in]->(d:Discourse:{corpus})
-                WHERE not (prec)-[:precedes]->()
-                AND s.name = {{speaker}}
-                AND d.name = {{discourse}}
-                WITH prec
-                MATCH p = (prec)-[:precedes_pause*]->(foll:{corpus}:{word_type}:speech)
-                WITH prec, foll, p
-                WHERE NONE (x in nodes(p)[1..-1] where x:speech)
-                MERGE (prec)-[:precedes]->(foll)'''.format(corpus=self.cypher_safe_name,
-                                                           word_type=self.word_name)
-
-                self.execute_cypher(statement, speaker=s, discourse=d)
-
-                statement = '''MATCH (s:Speaker:{corpus})<-[:spoken_by]-(w:{word_type}:{corpus}:speech)-[:spoken_in]->(d:Discourse:{corpus})
-                WHERE s.name = {{speaker}}
-                AND d.name = {{discourse}}
-                    with d, max(w.end) as speech_end, min(w.begin) as speech_begin
-                    set d.speech_begin = speech_begin,
-                        d.speech_end = speech_end
-                    return d'''.format(corpus=self.cypher_safe_name,
-                                       word_type=self.word_name)
-
-                results = self.execute_cypher(statement, speaker=s, discourse=d)
+    def encode_discourse_pauses(self, discourse, pause_words, batch_size=PAUSE_BATCH_SIZE):
+        """
+        Set words in a single discourse to be pauses, replacing any pauses previously encoded for it
+
+        Only the data for the discourse is changed, so that discourses can be encoded concurrently.  The pause
+        subset is added to the Hierarchy once for the whole corpus by the ``pauses`` enrichment step.
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        pause_words : str, list, tuple, or set
+            Either a list of words that are pauses or a string containing
+            a regular expression that specifies pause words
+        batch_size : int
+            Maximum number of words to update per transaction
+        """
+        condition, pause_words = self._pause_condition(pause_words)
+        if self._reset_pause_data([discourse], batch_size=batch_size):
+            self._encode_pause_data(condition, pause_words, [discourse], batch_size=batch_size)
+
+    def _register_pauses(self):
         self.hierarchy.add_token_subsets(self, self.word_name, ['pause'])
         self.hierarchy.add_discourse_properties(self, [('speech_begin', float), ('speech_end', float)])
         self.encode_hierarchy()
 
-    def reset_pauses(self):
+    def _pause_condition(self, pause_words):
+        if isinstance(pause_words, (list, tuple, set)):
+            return 'IN {pause_words}', list(pause_words)
+        elif isinstance(pause_words, str):
+            return '=~ {pause_words}', pause_words
+        raise (NotImplementedError)
+
+    def _encode_pause_data(self, condition, pause_words, discourses=None, call_back=None, stop_check=None,
+                           num_workers=1, batch_size=PAUSE_BATCH_SIZE):
+        if self.hierarchy.has_token_property(self.word_name, 'label'):
+            label = 'w.label'
+        else:
+            label = 't.label'
+        discourse_filter = ''
+        speech_filter = ''
+        if discourses is not None:
+            discourse_filter = 'AND d.name IN {discourses}'
+            speech_filter = 'WHERE d.name IN {discourses}'
+        statement = '''MATCH (w:{corpus}:{word_type}:speech)-[:is_a]->(t:{corpus}:{word_type}_type),
+        (w)-[:spoken_in]->(d:Discourse:{corpus})
+        WHERE {label} {condition} {discourse_filter}
+        RETURN d.name AS discourse, collect(id(w)) AS node_ids'''.format(corpus=self.cypher_safe_name,
+                                                                         word_type=self.word_name, label=label,
+                                                                         condition=condition,
+                                                                         discourse_filter=discourse_filter)
+        jobs = pause_batches(self._pause_node_ids(statement, pause_words=pause_words, discourses=discourses),
+                             batch_size)
+
+        def encode_batch(tx, node_ids):
+            tx.run('''UNWIND {node_ids} AS node_id
+            MATCH (w)-[:is_a]->(t) WHERE id(w) = node_id
+            SET w :pause, t :pause_type
+            REMOVE w:speech
+            WITH w
+            OPTIONAL MATCH (prec)-[r1:precedes]->(w)
+                FOREACH (o IN CASE WHEN prec IS NOT NULL THEN [prec] ELSE [] END |
+                  CREATE (prec)-[:precedes_pause]->(w)
+                )
+            DELETE r1
+            WITH w
+            OPTIONAL MATCH (w)-[r2:precedes]->(foll)
+                FOREACH (o IN CASE WHEN foll IS NOT NULL THEN [foll] ELSE [] END |
+                  CREATE (w)-[:precedes_pause]->(foll)
+                )
+            DELETE r2''', node_ids=node_ids)
+
+        if call_back is not None:
+            call_back('Encoding pauses...')
+            call_back(0, sum(len(b) for batches in jobs for b in batches))
+        if not self._run_pause_jobs(jobs, encode_batch, num_workers, call_back, stop_check):
+            return False
+
+        if call_back is not None:
+            call_back('Finishing up...')
+        statement = '''MATCH (prec:{corpus}:{word_type}:speech)-[:precedes_pause]->(),
+        (prec)-[:spoken_in]->(d:Discourse:{corpus})
+        WHERE NOT (prec)-[:precedes]->() {discourse_filter}
+        RETURN d.name AS discourse, collect(id(prec)) AS node_ids'''.format(corpus=self.cypher_safe_name,
+                                                                            word_type=self.word_name,
+                                                                            discourse_filter=discourse_filter)
+        jobs = pause_batches(self._pause_node_ids(statement, discourses=discourses), batch_size)
+
+        def link_batch(tx, node_ids):
+            tx.run('''UNWIND {{node_ids}} AS node_id
+            MATCH (prec) WHERE id(prec) = node_id
+            MATCH p = (prec)-[:precedes_pause*]->(foll:{corpus}:{word_type}:speech)
+            WITH prec, foll, p
+            WHERE NONE (x in nodes(p)[1..-1] where x:speech)
+            MERGE (prec)-[:precedes]->(foll)'''.format(corpus=self.cypher_safe_name, word_type=self.word_name),
+                   node_ids=node_ids)
+
+        if not self._run_pause_jobs(jobs, link_batch, num_workers, stop_check=stop_check):
+            return False
+
+        statement = '''MATCH (w:{word_type}:{corpus}:speech)-[:spoken_in]->(d:Discourse:{corpus})
+        {speech_filter}
+        WITH d, max(w.end) AS speech_end, min(w.begin) AS speech_begin
+        SET d.speech_begin = speech_begin,
+            d.speech_end = speech_end'''.format(corpus=self.cypher_safe_name, word_type=self.word_name,
+                                                 speech_filter=speech_filter)
+        self.execute_cypher(statement, discourses=discourses)
+        return True
+
+    def reset_pauses(self, call_back=None, stop_check=None, num_workers=1, batch_size=PAUSE_BATCH_SIZE):
         """
         Revert all words marked as pauses to regular words marked as speech
+
+        Parameters
+        ----------
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function to check whether process should be terminated early
+        num_workers : int
+            Number of batches of discourses to update at once
+        batch_size : int
+            Maximum number of pauses to update per transaction
         """
-        for s in self.speakers:
-            discourses = self.get_discourses_of_speaker(s)
-            for d in discourses:
-                statement = '''MATCH (n:{corpus}:{word_type}:speech)-[r:precedes]->(m:{corpus}:{word_type}:speech),
-                (m)-[:spoken_by]->(s:Speaker:{corpus}),
-                (m)-[:spoken_in]->(d:Discourse:{corpus})
-                WHERE (n)-[:precedes_pause]->()
-                AND s.name = {{speaker}}
-                AND d.name = {{discourse}}
-                DELETE r'''.format(corpus=self.cypher_safe_name, word_type=self.word_name)
-                self.execute_cypher(statement, speaker=s, discourse=d)
-
-                statement = '''MATCH (n:{corpus}:{word_type})-[r:precedes_pause]->(m:{corpus}:{word_type}),
-                (m)-[:spoken_by]->(s:Speaker:{corpus}),
-                (m)-[:spoken_in]->(d:Discourse:{corpus})
-                WHERE s.name = {{speaker}}
-                AND d.name = {{discourse}}
-                MERGE (n)-[:precedes]->(m)
-                DELETE r'''.format(corpus=self.cypher_safe_name, word_type=self.word_name)
-                self.execute_cypher(statement, speaker=s, discourse=d)
-
-                statement = '''MATCH (n:pause:{corpus})-[:spoken_by]->(s:Speaker:{corpus}),
-                (n)-[:spoken_in]->(d:Discourse:{corpus})
-                WHERE s.name = {{speaker}}
-                AND d.name = {{discourse}}
-                SET n :speech
-                REMOVE n:pause'''.format(corpus=self.cypher_safe_name)
-                self.execute_cypher(statement, speaker=s, discourse=d)
+        if not self._reset_pause_data(call_back=call_back, stop_check=stop_check, num_workers=num_workers,
+                                      batch_size=batch_size):
+            return
         try:
             self.hierarchy.subset_tokens[self.word_name].remove('pause')
             self.encode_hierarchy()
         except (KeyError, ValueError):
             pass
+
+    def _reset_pause_data(self, discourses=None, call_back=None, stop_check=None, num_workers=1,
+                          batch_size=PAUSE_BATCH_SIZE):
+        discourse_filter = ''
+        if discourses is not None:
+            discourse_filter = 'WHERE d.name IN {discourses}'
+        statement = '''MATCH (n:pause:{corpus})-[:spoken_in]->(d:Discourse:{corpus})
+        {discourse_filter}
+        RETURN d.name AS discourse, collect(id(n)) AS node_ids'''.format(corpus=self.cypher_safe_name,
+                                                                         discourse_filter=discourse_filter)
+        jobs = pause_batches(self._pause_node_ids(statement, discourses=discourses), batch_size)
+
+        def reset_batch(tx, node_ids):
+            tx.run('''UNWIND {{node_ids}} AS node_id
+            MATCH (n:{corpus}:{word_type}:speech)-[:precedes_pause]->(p)
+            WHERE id(p) = node_id
+            MATCH (n)-[r:precedes]->(:{corpus}:{word_type}:speech)
+            DELETE r'''.format(corpus=self.cypher_safe_name, word_type=self.word_name), node_ids=node_ids)
+            tx.run('''UNWIND {node_ids} AS node_id
+            MATCH (p)-[r:precedes_pause]-()
+            WHERE id(p) = node_id
+            WITH DISTINCT r, startNode(r) AS n, endNode(r) AS m
+            MERGE (n)-[:precedes]->(m)
+            DELETE r''', node_ids=node_ids)
+            tx.run('''UNWIND {node_ids} AS node_id
+            MATCH (p) WHERE id(p) = node_id
+            SET p :speech
+            REMOVE p:pause''', node_ids=node_ids)
+
+        if jobs:
+            if call_back is not None:
+                call_back('Resetting pauses...')
+                call_back(0, sum(len(b) for batches in jobs for b in batches))
+            if not self._run_pause_jobs(jobs, reset_batch, num_workers, call_back, stop_check):
+                return False
+        return True
@@ -1,8 +1,11 @@
 import re
-from ..io.importer import feature_data_to_csvs, import_feature_csvs
+from ..io.importer import import_feature_data, python_type
 from .lexical import LexicalContext
 from ..exceptions import SubsetError
 from ..io.enrichment.features import enrich_features_from_csv, parse_file
+from .base import _BatchProgress
+
+RELABEL_BATCH_SIZE = 5000
 
 
 class PhonologicalContext(LexicalContext):
@@ -61,18 +64,33 @@ class PhonologicalContext(LexicalContext):
 
     def encode_features(self, feature_dict):
         """
-        gets the phone if it exists, queries for each phone and sets type to kwargs (?)
+        Sets properties on phone types, in batches rather than one query per phone.  Setting a feature to ``None``
+        removes it from the phone, and features that are ``None`` for every phone are removed from the hierarchy.
 
         Parameters
         ----------
         feature_dict : dict
-            features to encode
+            features to encode, keyed by phone label
         """
-        phone = getattr(self, 'lexicon_' + self.phone_name)
-        for k, v in feature_dict.items():
-            q = self.query_lexicon(phone).filter(phone.label == k)
-            q.set_properties(**v)
-        self.encode_hierarchy()
+        names = set()
+        type_data = {}
+        for v in feature_dict.values():
+            names.update(v)
+            for name, value in v.items():
+                if value is not None and name not in type_data:
+                    type_data[name] = python_type(type(value))
+        to_remove = sorted(names - set(type_data))
+        with self.hierarchy_transaction():
+            import_feature_data(self, feature_dict, dict(type_data, **{k: type(None) for k in to_remove}))
+            if type_data:
+                to_add = [(k, v) for k, v in sorted(type_data.items())
+                          if not self.hierarchy.has_type_property(self.phone_name, k)]
+                if to_add:
+                    self.hierarchy.add_type_properties(self, self.phone_name, to_add)
+                self.invalidate_statistics(self.phone_name, type_data.keys())
+            if to_remove:
+                self.hierarchy.remove_type_properties(self, self.phone_name, to_remove)
+            self.encode_hierarchy()
 
     def reset_features(self, feature_names):
         """
@@ -105,12 +123,120 @@ class PhonologicalContext(LexicalContext):
             type_data = {k: type(v) for k, v in next(iter(feature_data.values())).items()}
         labels = set(self.phones)
         feature_data = {k: v for k, v in feature_data.items() if k in labels}
-        feature_data_to_csvs(self, feature_data)
-        import_feature_csvs(self, type_data)
+        import_feature_data(self, feature_data, type_data)
         self.hierarchy.add_type_properties(self, self.phone_name, type_data.items())
         self.encode_hierarchy()
 
-    def remove_pattern(self, pattern='[0-2]'):
+    def _update_node_ids(self, id_statement, update_statement, batch_size, call_back=None, stop_check=None):
+        """
+        Run an update over the nodes returned by a statement, in order of ID and with one transaction per batch
+
+        Returns
+        -------
+        bool
+            False if the update was stopped before all batches were run
+        """
+        ids = sorted(r['node_id'] for r in self.execute_cypher(id_statement))
+        progress = _BatchProgress(call_back)
+        if call_back is not None:
+            call_back(0, len(ids))
+
+        def _update_batch(tx, node_ids):
+            tx.run(update_statement, node_ids=node_ids)
+
+        with self.graph_driver.session() as session:
+            for i in range(0, len(ids), batch_size):
+                if stop_check is not None and stop_check():
+                    return False
+                batch = ids[i:i + batch_size]
+                session.write_transaction(_update_batch, batch)
+                progress.update(len(batch))
+        return True
+
+    def relabel(self, annotation_type, pattern, replacement='', dry_run=False, batch_size=RELABEL_BATCH_SIZE,
+                call_back=None, stop_check=None):
+        """
+        Replace matches of a regular expression in the labels of an annotation type
+
+        The new labels are computed once per type node, so only the distinct labels are brought to the client.
+        Tokens then take the label of their type in batches of node IDs, each in its own transaction.  The previous
+        labels are kept as ``oldlabel`` so that they can be restored with :meth:`reset_to_old_label`.
+
+        Parameters
+        ----------
+        annotation_type : str
+            Annotation type to relabel, i.e. ``'phone'``
+        pattern : str
+            Regular expression to replace, as used by :func:`re.sub`
+        replacement : str
+            Replacement for each match, defaults to removing the matches
+        dry_run : bool
+            If True, only return the label mapping without changing the database
+        batch_size : int
+            Maximum number of tokens to update per transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function to check whether process should be terminated early
+
+        Returns
+        -------
+        dict
+            Mapping of old labels to new labels, for the labels that change
+        """
+        if annotation_type not in self.hierarchy.annotation_types:
+            raise (ValueError('Annotation type must be one of: {}.'.format(
+                ', '.join(sorted(self.hierarchy.annotation_types)))))
+        regex = re.compile(pattern)
+        statement = '''MATCH (t:{annotation_type}_type:{corpus_name})
+        RETURN DISTINCT t.label AS label'''.format(annotation_type=annotation_type,
+                                                   corpus_name=self.cypher_safe_name)
+        mapping = {}
+        for r in self.execute_cypher(statement):
+            label = r['label']
+            if label is None:
+                continue
+            new_label = regex.sub(replacement, label)
+            if new_label != label:
+                mapping[label] = new_label
+        if dry_run:
+            return mapping
+
+        if call_back is not None:
+            call_back('Relabeling {} types...'.format(annotation_type))
+        pairs = sorted(mapping.items())
+        statement = '''UNWIND {{pairs}} AS pair
+        MATCH (t:{annotation_type}_type:{corpus_name})
+        WHERE t.label = pair[0]
+        SET t.oldlabel = t.label, t.label = pair[1]'''.format(annotation_type=annotation_type,
+                                                             corpus_name=self.cypher_safe_name)
+        for i in range(0, len(pairs), batch_size):
+            self.execute_cypher(statement, pairs=[list(p) for p in pairs[i:i + batch_size]])
+
+        if call_back is not None:
+            call_back('Relabeling {} tokens...'.format(annotation_type))
+        # Tokens still carrying the old label of their type, so an interrupted update picks up where it stopped
+        id_statement = '''MATCH (n:{annotation_type}:{corpus_name})-[:is_a]->(t:{annotation_type}_type:{corpus_name})
+        WHERE t.oldlabel IS NOT NULL AND t.label <> t.oldlabel AND n.label = t.oldlabel
+        RETURN id(n) AS node_id'''.format(annotation_type=annotation_type, corpus_name=self.cypher_safe_name)
+        update_statement = '''UNWIND {node_ids} AS node_id
+        MATCH (n)-[:is_a]->(t) WHERE id(n) = node_id
+        SET n.oldlabel = n.label, n.label = t.label'''
+        self._update_node_ids(id_statement, update_statement, batch_size, call_back, stop_check)
+        self.mark_data_changed()
+        self.bump_metadata_version()
+        self.invalidate_statistics(annotation_type, ['label', 'oldlabel'])
+        return mapping
+
+    def _relabeled_types(self, annotation_type):
+        statement = '''MATCH (t:{annotation_type}_type:{corpus_name})
+        WHERE t.oldlabel IS NOT NULL AND t.label <> t.oldlabel
+        RETURN t.oldlabel AS oldlabel, t.label AS label'''.format(annotation_type=annotation_type,
+                                                                 corpus_name=self.cypher_safe_name)
+        return {r['oldlabel']: r['label'] for r in self.execute_cypher(statement)}
+
+    def remove_pattern(self, pattern='[0-2]', dry_run=False, batch_size=RELABEL_BATCH_SIZE, call_back=None,
+                       stop_check=None):
         """
         removes a stress or tone pattern from all phones
 
@@ -119,57 +245,79 @@ class PhonologicalContext(LexicalContext):
         pattern : str
             the regular expression for the pattern to remove
             Defaults to '[0-2]'
+        dry_run : bool
+            If True, only return the label mapping without changing the database
+        batch_size : int
+            Maximum number of phones to update per transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function to check whether process should be terminated early
 
+        Returns
+        -------
+        dict
+            Mapping of old phone labels to new phone labels, for the labels that change, or that were changed by
+            an earlier run if none change now
         """
-        phone = getattr(self, self.phone_name)
         if pattern == '':
             pattern = '[0-2]'
-        q = self.query_graph(phone)
-        results = q.all()
-        oldphones = []
-        length = 0
-        newphones = []
-        toAdd = {}
-        for c in results.cursors:
-            for item in c:
-                phone = item[0]['label']
-                if re.search(pattern, phone) is not None:
-                    newphone = re.sub(pattern, "", phone)
-                    length = len(phone) - len(newphone)
-                    oldphones.append(phone)
-                    newphones.append(newphone)
-                    toAdd.update({'label': newphone})
-        statement = '''MATCH (n:{phone_name}{type}:{corpus_name}) WHERE n.label in {{oldphones}} 
-        SET n.oldlabel = n.label 
-        SET n.label=substring(n.label,0,length(n.label)-{length})'''
-        norm_statement = statement.format(phone_name=self.phone_name, type='',
-                                          corpus_name=self.cypher_safe_name, length=length)
-        type_statement = statement.format(phone_name=self.phone_name, type='_type',
-                                          corpus_name=self.cypher_safe_name, length=length)
-        self.execute_cypher(norm_statement, oldphones=oldphones)
-        self.execute_cypher(type_statement, oldphones=oldphones)
-        self.encode_syllabic_segments(newphones)
+        mapping = self.relabel(self.phone_name, pattern, dry_run=dry_run, batch_size=batch_size,
+                               call_back=call_back, stop_check=stop_check)
+        if dry_run or (stop_check is not None and stop_check()):
+            return mapping
+        if not mapping:
+            # Phone types were relabeled by an earlier run, which may have stopped before encoding syllables
+            mapping = self._relabeled_types(self.phone_name)
+        if not mapping:
+            return mapping
+        self.encode_syllabic_segments(sorted(set(mapping.values())))
         self.encode_syllables('maxonset')
+        return mapping
 
-    def reset_to_old_label(self):
-        """
-        Reset phones back to their old labels which include stress and tone
-        """
-        phones = []
-        phone = getattr(self, self.phone_name)
-        getphone = '''MATCH (n:{phone_name}_type:{corpus_name})
-        WHERE n.oldlabel IS NOT NULL
-        RETURN n.oldlabel'''.format(phone_name=self.phone_name,
-                                    corpus_name=self.cypher_safe_name)
-        results = self.execute_cypher(getphone)
-        for item in results:
-            phones.append(item['n.oldlabel'])
-
-        statement = '''MATCH (n:{phone_name}{type}:{corpus_name}) 
-        WHERE n.oldlabel IS NOT NULL SET n.label = n.oldlabel'''
-        norm_statement = statement.format(phone_name=self.phone_name, type="", corpus_name=self.cypher_safe_name)
-        type_statement = statement.format(phone_name=self.phone_name, type="_type", corpus_name=self.cypher_safe_name)
-        self.execute_cypher(norm_statement)
-        self.execute_cypher(type_statement)
-        self.encode_syllabic_segments(phones)
-        self.encode_syllables('maxonset')
+    def reset_to_old_label(self, annotation_type=None, batch_size=RELABEL_BATCH_SIZE, call_back=None,
+                           stop_check=None):
+        """
+        Reset annotations back to their old labels, such as phones with their stress and tone
+
+        Parameters
+        ----------
+        annotation_type : str, optional
+            Annotation type to reset, defaults to phones
+        batch_size : int
+            Maximum number of tokens to update per transaction
+        call_back : callable
+            Function to monitor progress
+        stop_check : callable
+            Function to check whether process should be terminated early
+        """
+        if annotation_type is None:
+            annotation_type = self.phone_name
+        statement = '''MATCH (t:{annotation_type}_type:{corpus_name})
+        WHERE t.oldlabel IS NOT NULL
+        RETURN DISTINCT t.oldlabel AS label'''.format(annotation_type=annotation_type,
+                                                      corpus_name=self.cypher_safe_name)
+        labels = [r['label'] for r in self.execute_cypher(statement)]
+
+        if call_back is not None:
+            call_back('Resetting {} types...'.format(annotation_type))
+        statement = '''MATCH (t:{annotation_type}_type:{corpus_name})
+        WHERE t.oldlabel IS NOT NULL AND t.label <> t.oldlabel
+        SET t.label = t.oldlabel'''.format(annotation_type=annotation_type, corpus_name=self.cypher_safe_name)
+        self.execute_cypher(statement)
+
+        if call_back is not None:
+            call_back('Resetting {} tokens...'.format(annotation_type))
+        id_statement = '''MATCH (n:{annotation_type}:{corpus_name})
+        WHERE n.oldlabel IS NOT NULL AND n.label <> n.oldlabel
+        RETURN id(n) AS node_id'''.format(annotation_type=annotation_type, corpus_name=self.cypher_safe_name)
+        update_statement = '''UNWIND {node_ids} AS node_id
+        MATCH (n) WHERE id(n) = node_id
+        SET n.label = n.oldlabel'''
+        finished = self._update_node_ids(id_statement, update_statement, batch_size, call_back, stop_check)
+        self.mark_data_changed()
+        self.bump_metadata_version()
+        self.invalidate_statistics(annotation_type, ['label'])
+        if finished and annotation_type == self.phone_name:
+            self.encode_syllabic_segments(labels)
+            self.encode_syllables('maxonset')
@@ -1,5 +1,4 @@
-from ..io.importer import (speaker_data_to_csvs, import_speaker_csvs,
-                           discourse_data_to_csvs, import_discourse_csvs)
+from ..io.importer import import_speaker_data, import_discourse_data
 from .audio import AudioContext
 from ..io.enrichment.spoken import enrich_speakers_from_csv, enrich_discourses_from_csv, parse_file
 
@@ -64,6 +63,14 @@ class SpokenContext(AudioContext):
         """
         enrich_discourses_from_csv(self, path)
 
+    def _speaker_discourse_pairs(self):
+        def generate():
+            query = '''MATCH (d:Discourse:{corpus_name})<-[:speaks_in]-(s:Speaker:{corpus_name})
+                    RETURN s.name as speaker, d.name as discourse'''.format(corpus_name=self.cypher_safe_name)
+            return [[x['speaker'], x['discourse']] for x in self.execute_cypher(query)]
+
+        return self.cached_metadata('speaker_discourses', generate)
+
     def get_speakers_in_discourse(self, discourse):
         """
         Get a list of all speakers that spoke in a given discourse
@@ -78,12 +85,7 @@ class SpokenContext(AudioContext):
         list
             All speakers who spoke in the discourse
         """
-        query = '''MATCH (d:Discourse:{corpus_name})<-[:speaks_in]-(s:Speaker:{corpus_name})
-                WHERE d.name = {{discourse_name}}
-                RETURN s.name as speaker'''.format(corpus_name=self.cypher_safe_name)
-        results = self.execute_cypher(query, discourse_name=discourse)
-        speakers = [x['speaker'] for x in results]
-        return speakers
+        return [s for s, d in self._speaker_discourse_pairs() if d == discourse]
 
     def get_discourses_of_speaker(self, speaker):
         """
@@ -99,12 +101,7 @@ class SpokenContext(AudioContext):
         list
             All discourses the speaker spoke in
         """
-        query = '''MATCH (d:Discourse:{corpus_name})<-[:speaks_in]-(s:Speaker:{corpus_name})
-                WHERE s.name = {{speaker_name}}
-                RETURN d.name as discourse'''.format(corpus_name=self.cypher_safe_name)
-        results = self.execute_cypher(query, speaker_name=speaker)
-        discourses = [x['discourse'] for x in results]
-        return discourses
+        return [d for s, d in self._speaker_discourse_pairs() if s == speaker]
 
     def enrich_speakers(self, speaker_data, type_data=None):
         """
@@ -124,8 +121,7 @@ class SpokenContext(AudioContext):
         speakers = set(self.speakers)
         speaker_data = {k: v for k, v in speaker_data.items() if k in speakers}
 
-        speaker_data_to_csvs(self, speaker_data)
-        import_speaker_csvs(self, type_data)
+        import_speaker_data(self, speaker_data, type_data)
         self.hierarchy.add_speaker_properties(self, type_data.items())
         self.encode_hierarchy()
 
@@ -162,7 +158,6 @@ class SpokenContext(AudioContext):
 
         discourses = set(self.discourses)
         discourse_data = {k: v for k, v in discourse_data.items() if k in discourses}
-        discourse_data_to_csvs(self, discourse_data)
-        import_discourse_csvs(self, type_data)
+        import_discourse_data(self, discourse_data, type_data)
         self.hierarchy.add_discourse_properties(self, type_data.items())
         self.encode_hierarchy()
@@ -1,4 +1,6 @@
 import time
+from contextlib import contextmanager
+
 from ..query import value_for_cypher
 from ..query.annotations.query import SplitQuery
 from ..query.metadata.query import MetaDataQuery
@@ -35,6 +37,92 @@ def generate_cypher_property_list(property_set):
     return ', '.join(props)
 
 
+def _property_defaults(properties):
+    return {name: value for name, value in properties if name != 'id'}
+
+
+def generate_hierarchy_diff(old, new):
+    """
+    Generates the Cypher statements to update the hierarchy schema in the Neo4j database from one state of
+    a Hierarchy to another
+
+    Parameters
+    ----------
+    old : dict
+        Snapshot of the Hierarchy as it was last synced (see :meth:`~polyglotdb.structure.Hierarchy.snapshot`)
+    new : dict
+        Snapshot of the current Hierarchy
+
+    Returns
+    -------
+    list or None
+        List of tuples of the form (`statement`, `parameters`), or None if the annotation types changed and the
+        schema has to be rebuilt
+    """
+    if old is None or old['_data'] != new['_data']:
+        return None
+    match = 'MATCH (c:Corpus) WHERE c.name = {corpus_name}\n'
+    statements = []
+
+    def update(pattern, old_properties, new_properties, old_subsets=None, new_subsets=None):
+        old_properties = _property_defaults(old_properties)
+        new_properties = _property_defaults(new_properties)
+        parameters = {}
+        sets = []
+        for name, value in sorted(new_properties.items()):
+            if name in old_properties and old_properties[name] == value \
+                    and type(old_properties[name]) is type(value):
+                continue
+            key = 'p{}'.format(len(parameters))
+            parameters[key] = value
+            sets.append('n.{} = {{{}}}'.format(name, key))
+        if new_subsets is not None and sorted(old_subsets or []) != sorted(new_subsets):
+            parameters['subsets'] = sorted(new_subsets)
+            sets.append('n.subsets = {subsets}')
+        removes = ['n.{}'.format(name) for name in sorted(old_properties) if name not in new_properties]
+        if not sets and not removes:
+            return
+        statement = match + 'MATCH ' + pattern
+        if sets:
+            statement += '\nSET ' + ', '.join(sets)
+        if removes:
+            statement += '\nREMOVE ' + ', '.join(removes)
+        statements.append((statement, parameters))
+
+    for at in sorted(set(old['token_properties']) | set(new['token_properties'])):
+        update('(c)<-[:contained_by*]-(n:{})'.format(at),
+               old['token_properties'].get(at, []), new['token_properties'].get(at, []),
+               old['subset_tokens'].get(at, []), new['subset_tokens'].get(at, []))
+    for at in sorted(set(old['type_properties']) | set(new['type_properties'])):
+        update('(c)<-[:contained_by*]-(:{0})-[:is_a]->(n:{0}_type)'.format(at),
+               old['type_properties'].get(at, []), new['type_properties'].get(at, []),
+               old['subset_types'].get(at, []), new['subset_types'].get(at, []))
+    update('(c)-[:spoken_by]->(n:Speaker)', old['speaker_properties'], new['speaker_properties'])
+    update('(c)-[:spoken_in]->(n:Discourse)', old['discourse_properties'], new['discourse_properties'])
+
+    old_acoustics = old.get('acoustic_properties', {})
+    new_acoustics = new.get('acoustic_properties', {})
+    for a in sorted(set(old_acoustics) - set(new_acoustics)):
+        statements.append((match + 'MATCH (c)-[:has_acoustics]->(n:{}) DETACH DELETE n'.format(a), {}))
+    for a in sorted(set(new_acoustics) - set(old_acoustics)):
+        statements.append((match + 'MERGE (c)-[:has_acoustics]->(n:{})'.format(a), {}))
+    for a in sorted(new_acoustics):
+        update('(c)-[:has_acoustics]->(n:{})'.format(a), old_acoustics.get(a, []), new_acoustics[a])
+
+    old_subannotations = {(k, x) for k, v in old['subannotations'].items() for x in v}
+    new_subannotations = {(k, x) for k, v in new['subannotations'].items() for x in v}
+    for at, sub in sorted(old_subannotations - new_subannotations):
+        statements.append((match + 'MATCH (c)<-[:contained_by*]-(:{})<-[:annotates]-(n:{})\nDETACH DELETE n'.format(
+            at, sub), {}))
+    for at, sub in sorted(new_subannotations - old_subannotations):
+        statements.append((match + 'MATCH (c)<-[:contained_by*]-(a:{})\nMERGE (a)<-[:annotates]-(n:{})\n'
+                                   "SET n.label = '', n.begin = 0, n.end = 0".format(at, sub), {}))
+    for at, sub in sorted(new_subannotations):
+        update('(c)<-[:contained_by*]-(:{})<-[:annotates]-(n:{})'.format(at, sub),
+               old['subannotation_properties'].get(sub, []), new['subannotation_properties'].get(sub, []))
+    return statements
+
+
 class StructuredContext(BaseContext):
     """
     Class that contains methods for dealing specifically with metadata for the corpus
@@ -139,6 +227,7 @@ class StructuredContext(BaseContext):
         h = self.generate_hierarchy()
         h.corpus_name = self.corpus_name
         self.hierarchy = h
+        self._synced_hierarchy = h.snapshot()
         self.cache_hierarchy()
 
     def reset_hierarchy(self):
@@ -154,12 +243,72 @@ class StructuredContext(BaseContext):
                                 WITH n, t, c, s, d, a
                                 OPTIONAL MATCH (c)-[:has_acoustics]->(ac)
                                 DETACH DELETE a, t, n, s, d, ac''', corpus=self.corpus_name)
+        self._synced_hierarchy = None
+
+    @contextmanager
+    def hierarchy_transaction(self):
+        """
+        Context manager that defers syncing changes to the Hierarchy until the end of the block, at which point
+        all changes are written to the Neo4j database as a single update of only the properties that changed,
+        and the Hierarchy is cached to the disk once
+
+        Transactions can be nested, changes are flushed when the outermost transaction exits.  If the outermost
+        transaction exits with an exception, nothing is flushed and the Hierarchy is restored to its state at the
+        start of the transaction.
+
+        Yields
+        ------
+        :class:`~polyglotdb.structure.Hierarchy`
+            The corpus Hierarchy
+        """
+        outermost = not self.in_hierarchy_transaction
+        if outermost:
+            initial = self.hierarchy.to_json()
+        self._hierarchy_transaction_depth += 1
+        try:
+            yield self.hierarchy
+        except BaseException:
+            self._hierarchy_transaction_depth -= 1
+            if outermost:
+                self._hierarchy_dirty = False
+                self.hierarchy = Hierarchy(corpus_name=self.corpus_name)
+                self.hierarchy.from_json(initial)
+            raise
+        self._hierarchy_transaction_depth -= 1
+        if outermost and self._hierarchy_dirty:
+            self._hierarchy_dirty = False
+            self.encode_hierarchy()
 
     def encode_hierarchy(self):
         """
         Sync the current Hierarchy to the Neo4j database and to the disk
+
+        Only properties that changed since the last sync are updated, unless annotation types were added or removed,
+        in which case the hierarchy schema is rebuilt.  Inside of a :meth:`hierarchy_transaction`, syncing is
+        deferred until the transaction exits.
         """
+        if self.in_hierarchy_transaction:
+            self._hierarchy_dirty = True
+            return
+        for at in self.hierarchy.annotation_types:
+            if at in self.hierarchy.token_properties:
+                self.hierarchy.token_properties[at].add(('duration', float))
+        snapshot = self.hierarchy.snapshot()
+        statements = generate_hierarchy_diff(self._synced_hierarchy, snapshot)
+        if statements is None:
+            self._rebuild_hierarchy()
+        elif statements:
+            def _update_hierarchy(tx, corpus_name, statements):
+                for statement, parameters in statements:
+                    tx.run(statement, corpus_name=corpus_name, **parameters)
+
+            with self.graph_driver.session() as session:
+                session.write_transaction(_update_hierarchy, self.corpus_name, statements)
+        self._synced_hierarchy = snapshot
+        self.cache_hierarchy()
+        self.bump_metadata_version()
 
+    def _rebuild_hierarchy(self):
         self.reset_hierarchy()
         hierarchy_template = '''({super})<-[:contained_by]-({sub})-[:is_a]->({sub_type})'''
         subannotation_template = '''({super})<-[:annotates]-({sub})'''
@@ -225,7 +374,6 @@ class StructuredContext(BaseContext):
         statement = statement.format(merge_statement='\nMERGE '.join(merge_statements))
 
         self.execute_cypher(statement, corpus_name=self.corpus_name)
-        self.cache_hierarchy()
 
     def encode_position(self, higher_annotation_type, lower_annotation_type, name, subset=None):
         """
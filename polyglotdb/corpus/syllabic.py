@@ -7,6 +7,7 @@ from ..io.importer import (syllables_data_to_csvs, import_syllable_csv,
                            syllables_enrichment_data_to_csvs, import_syllable_enrichment_csvs)
 
 from ..io.helper import make_type_id
+from ..instrumentation import spanned
 
 from ..syllabification.probabilistic import norm_count_dict, split_nonsyllabic_prob, split_ons_coda_prob
 from ..syllabification.maxonset import split_nonsyllabic_maxonset, split_ons_coda_maxonset
@@ -157,69 +158,74 @@ class SyllabicContext(UtteranceContext):
             number = self.execute_cypher(
                 '''MATCH (n:syllable:%s) return count(*) as number ''' % self.cypher_safe_name).single()['number']
             call_back(0, number)
+        num_deleted = 0
         for s in self.speakers:
             discourses = self.get_discourses_of_speaker(s)
             for d in discourses:
-                phone_rel_statement = '''
-                        MATCH (p:{phone_name}:{corpus})-[:contained_by]->(s:syllable:{corpus}),
-                        (s)-[:contained_by]->(w:{word_name}:{corpus}),
-                        (s)-[:spoken_by]->(sp:Speaker:{corpus}),
-                        (s)-[:spoken_in]->(d:Discourse:{corpus})
-                        WHERE sp.name = {{speaker_name}}
-                        AND d.name = {{discourse_name}}
-                        with p,w
-                        CREATE (p)-[:contained_by]->(w)
-                '''.format(corpus=self.cypher_safe_name,
-                           word_name=self.word_name,
-                           phone_name=self.phone_name)
-                self.execute_cypher(phone_rel_statement, speaker_name=s, discourse_name=d)
-
-                phone_label_statement = '''
-                        MATCH (p:{phone_name}:{corpus})-[:spoken_by]->(sp:Speaker:{corpus}),
-                        (p)-[:spoken_in]->(d:Discourse:{corpus})
-                        WHERE sp.name = {{speaker_name}}
-                        AND d.name = {{discourse_name}}
-                        with p
-                        REMOVE p:onset, p:nucleus, p:coda, p.syllable_position
-                '''.format(corpus=self.cypher_safe_name,
-                           word_name=self.word_name,
-                           phone_name=self.phone_name)
-                self.execute_cypher(phone_label_statement, speaker_name=s, discourse_name=d)
-                num_deleted = 0
-                deleted = 1000
-                delete_statement = '''
-                MATCH (s:syllable:{corpus})-[:spoken_by]->(sp:Speaker:{corpus}),
-                        (s)-[:spoken_in]->(d:Discourse:{corpus})
-                        WHERE sp.name = {{speaker_name}}
-                        AND d.name = {{discourse_name}}
-                        WITH s
-                        LIMIT 1000
-                        DETACH DELETE s
-                        RETURN count(s) as deleted_count
-                '''.format(corpus=self.cypher_safe_name)
-                while deleted > 0:
-                    if stop_check is not None and stop_check():
-                        break
-                    deleted = self.execute_cypher(delete_statement, speaker_name=s, discourse_name=d).single()[
-                        'deleted_count']
-
-                    num_deleted += deleted
-                    if call_back is not None:
-                        call_back(num_deleted)
+                num_deleted = self._reset_discourse_syllables(s, d, call_back, stop_check, num_deleted)
 
         statement = '''MATCH (st:syllable_type:{corpus})
                                WITH st
                                DETACH DELETE st'''.format(corpus=self.cypher_safe_name)
         self.execute_cypher(statement)
         try:
-            self.hierarchy.remove_annotation_type('syllable')
-            self.hierarchy.remove_token_subsets(self, self.phone_name, ['onset', 'coda', 'nucleus'])
-            self.hierarchy.remove_token_properties(self, self.phone_name, ['syllable_position'])
-            # self.reset_to_old_label()
-            self.encode_hierarchy()
+            with self.hierarchy_transaction():
+                self.hierarchy.remove_annotation_type('syllable')
+                self.hierarchy.remove_token_subsets(self, self.phone_name, ['onset', 'coda', 'nucleus'])
+                self.hierarchy.remove_token_properties(self, self.phone_name, ['syllable_position'])
+                # self.reset_to_old_label()
+                self.encode_hierarchy()
         except KeyError:
             pass
 
+    def _reset_discourse_syllables(self, speaker, discourse, call_back=None, stop_check=None, num_deleted=0):
+        phone_rel_statement = '''
+                MATCH (p:{phone_name}:{corpus})-[:contained_by]->(s:syllable:{corpus}),
+                (s)-[:contained_by]->(w:{word_name}:{corpus}),
+                (s)-[:spoken_by]->(sp:Speaker:{corpus}),
+                (s)-[:spoken_in]->(d:Discourse:{corpus})
+                WHERE sp.name = {{speaker_name}}
+                AND d.name = {{discourse_name}}
+                with p,w
+                CREATE (p)-[:contained_by]->(w)
+        '''.format(corpus=self.cypher_safe_name,
+                   word_name=self.word_name,
+                   phone_name=self.phone_name)
+        self.execute_cypher(phone_rel_statement, speaker_name=speaker, discourse_name=discourse)
+
+        phone_label_statement = '''
+                MATCH (p:{phone_name}:{corpus})-[:spoken_by]->(sp:Speaker:{corpus}),
+                (p)-[:spoken_in]->(d:Discourse:{corpus})
+                WHERE sp.name = {{speaker_name}}
+                AND d.name = {{discourse_name}}
+                with p
+                REMOVE p:onset, p:nucleus, p:coda, p.syllable_position
+        '''.format(corpus=self.cypher_safe_name,
+                   word_name=self.word_name,
+                   phone_name=self.phone_name)
+        self.execute_cypher(phone_label_statement, speaker_name=speaker, discourse_name=discourse)
+        deleted = 1000
+        delete_statement = '''
+        MATCH (s:syllable:{corpus})-[:spoken_by]->(sp:Speaker:{corpus}),
+                (s)-[:spoken_in]->(d:Discourse:{corpus})
+                WHERE sp.name = {{speaker_name}}
+                AND d.name = {{discourse_name}}
+                WITH s
+                LIMIT 1000
+                DETACH DELETE s
+                RETURN count(s) as deleted_count
+        '''.format(corpus=self.cypher_safe_name)
+        while deleted > 0:
+            if stop_check is not None and stop_check():
+                break
+            deleted = self.execute_cypher(delete_statement, speaker_name=speaker, discourse_name=discourse).single()[
+                'deleted_count']
+
+            num_deleted += deleted
+            if call_back is not None:
+                call_back(num_deleted)
+        return num_deleted
+
     @property
     def has_syllabics(self):
         """
@@ -244,6 +250,7 @@ class SyllabicContext(UtteranceContext):
         """
         return 'syllable' in self.hierarchy.annotation_types
 
+    @spanned('encode_syllables')
     def encode_syllables(self, algorithm='maxonset', syllabic_label='syllabic', call_back=None, stop_check=None):
         """
         Encodes syllables to a corpus
@@ -262,28 +269,11 @@ class SyllabicContext(UtteranceContext):
 
         self.reset_syllables(call_back, stop_check)
 
-        onsets = self.find_onsets(syllabic_label=syllabic_label)
-        if algorithm == 'probabilistic':
-            onsets = norm_count_dict(onsets, onset=True)
-            codas = self.find_codas(syllabic_label=syllabic_label)
-            codas = norm_count_dict(codas, onset=False)
-        elif algorithm == 'maxonset':
-            onsets = set(onsets.keys())
-        else:
-            raise NotImplementedError
-
-        statement = '''MATCH (n:{}:{}) return n.label as label'''.format(self.cypher_safe_name,
-                                                                         make_label_safe_for_cypher(syllabic_label))
-        res = self.execute_cypher(statement)
-        syllabics = set(x['label'] for x in res)
-
-        word_type = getattr(self, self.word_name)
-        phone_type = getattr(word_type, self.phone_name)
+        onsets, codas, syllabics = self._syllabification_inventory(algorithm, syllabic_label)
 
         create_syllabic_csvs(self)
         create_nonsyllabic_csvs(self)
 
-        splits = self.speakers
         process_string = 'Processing speaker {} of {} ({})...'
         if call_back is not None:
             call_back(0, len(self.speakers))
@@ -296,104 +286,7 @@ class SyllabicContext(UtteranceContext):
                 call_back(process_string.format(speaker_ind, len(self.speakers), s))
             discourses = self.get_discourses_of_speaker(s)
             for d in discourses:
-                syllables = []
-                non_syllables = []
-                q = self.query_graph(word_type)
-                q = q.filter(word_type.speaker.name == s)
-                q = q.filter(word_type.discourse.name == d)
-                q = q.order_by(word_type.begin)
-                q = q.columns(word_type.id.column_name('id'), phone_type.id.column_name('phone_id'),
-                              word_type.begin.column_name('begin'),
-                              word_type.label.column_name('label'),
-                              word_type.end.column_name('end'),
-                              phone_type.label.column_name('phones'),
-                              phone_type.begin.column_name('begins'),
-                              phone_type.end.column_name('ends'))
-                results = q.all()
-                prev_id = None
-                for w in results:
-                    phones = w['phones']
-                    phone_ids = w['phone_id']
-
-                    if not phone_ids:
-                        print('The word {} in file {} ({} to {}) did not have any phones.'.format(w['label'], d,
-                                                                                                  w['begin'], w['end']))
-                        continue
-                    phone_begins = w['begins']
-                    phone_ends = w['ends']
-                    vow_inds = [i for i, x in enumerate(phones) if x in syllabics]
-                    if len(vow_inds) == 0:
-                        cur_id = uuid1()
-                        if algorithm == 'probabilistic':
-                            split = split_nonsyllabic_prob(phones, onsets, codas)
-                        else:
-                            split = split_nonsyllabic_maxonset(phones, onsets)
-                        label = '.'.join(phones)
-                        row = {'id': cur_id, 'prev_id': prev_id,
-                               'onset_id': phone_ids[0],
-                               'break': split,
-                               'coda_id': phone_ids[-1],
-                               'begin': phone_begins[0],
-                               'label': label,
-                               'type_id': make_type_id([label], self.corpus_name),
-                               'end': phone_ends[-1]}
-                        non_syllables.append(row)
-                        prev_id = cur_id
-                        continue
-                    for j, i in enumerate(vow_inds):
-                        cur_id = uuid1()
-                        cur_vow_id = phone_ids[i]
-                        if j == 0:
-                            begin_ind = 0
-                            if i != 0:
-                                cur_ons_id = phone_ids[begin_ind]
-                            else:
-                                cur_ons_id = None
-                        else:
-                            prev_vowel_ind = vow_inds[j - 1]
-                            cons_string = phones[prev_vowel_ind + 1:i]
-                            if algorithm == 'probabilistic':
-                                split = split_ons_coda_prob(cons_string, onsets, codas)
-                            else:
-                                split = split_ons_coda_maxonset(cons_string, onsets)
-                            if split is None:
-                                cur_ons_id = None
-                                begin_ind = i
-                            else:
-                                begin_ind = prev_vowel_ind + 1 + split
-                                cur_ons_id = phone_ids[begin_ind]
-
-                        if j == len(vow_inds) - 1:
-                            end_ind = len(phones) - 1
-                            if i != len(phones) - 1:
-                                cur_coda_id = phone_ids[end_ind]
-                            else:
-                                cur_coda_id = None
-                        else:
-                            foll_vowel_ind = vow_inds[j + 1]
-                            cons_string = phones[i + 1:foll_vowel_ind]
-                            if algorithm == 'probabilistic':
-                                split = split_ons_coda_prob(cons_string, onsets, codas)
-                            else:
-                                split = split_ons_coda_maxonset(cons_string, onsets)
-                            if split is None:
-                                cur_coda_id = None
-                                end_ind = i
-                            else:
-                                end_ind = i + split
-                                cur_coda_id = phone_ids[end_ind]
-                        begin = phone_begins[begin_ind]
-                        end = phone_ends[end_ind]
-                        label = '.'.join(phones[begin_ind:end_ind + 1])
-                        row = {'id': cur_id, 'prev_id': prev_id,
-                               'vowel_id': cur_vow_id, 'onset_id': cur_ons_id,
-                               'label': label,
-                               'type_id': make_type_id([label], self.corpus_name),
-                               'coda_id': cur_coda_id, 'begin': begin, 'end': end}
-                        syllables.append(row)
-                        prev_id = cur_id
-                syllables_data_to_csvs(self, s, d, syllables)
-                nonsyls_data_to_csvs(self, s, d, non_syllables)
+                self._syllabify(s, d, algorithm, onsets, codas, syllabics)
         import_syllable_csv(self, call_back, stop_check)
         import_nonsyl_csv(self, call_back, stop_check)
         if stop_check is not None and stop_check():
@@ -404,20 +297,198 @@ class SyllabicContext(UtteranceContext):
         for s in self.speakers:
             discourses = self.get_discourses_of_speaker(s)
             for d in discourses:
-                self.execute_cypher(
-                    '''MATCH (s:{corpus_name}:Speaker)<-[:spoken_by]-(n:{corpus_name}:syllable)-[:spoken_in]->(d:{corpus_name}:Discourse)
-                    where s.name = {{speaker_name}} 
-                    AND d.name = {{discourse_name}} and n.prev_id is not Null 
-                    REMOVE n.prev_id'''.format(corpus_name=self.cypher_safe_name), speaker_name=s, discourse_name=d)
-
-        self.hierarchy.add_annotation_type('syllable', above=self.phone_name, below=self.word_name)
-        self.hierarchy.add_token_subsets(self, self.phone_name, ['onset', 'coda', 'nucleus'])
-        self.hierarchy.add_token_properties(self, self.phone_name, [('syllable_position', str)])
-        self.encode_hierarchy()
+                self._remove_syllable_prev_ids(s, d)
+
+        self._register_syllables()
         if call_back is not None:
             call_back('Finished!')
             call_back(1, 1)
 
+    def encode_discourse_syllables(self, discourse, algorithm='maxonset', syllabic_label='syllabic'):
+        """
+        Encodes syllables for a single discourse, replacing any syllables previously encoded for it
+
+        Onsets and codas are still found over the whole corpus, so the syllabification matches
+        :meth:`encode_syllables`.  Only the data for the discourse is changed, so that discourses can be encoded
+        concurrently.  The syllable annotation type is added to the Hierarchy once for the whole corpus by the
+        ``syllables`` enrichment step.
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        algorithm : str, defaults to 'maxonset'
+            determines which algorithm will be used to encode syllables
+        syllabic_label : str
+            Subset to use for syllabic segments (i.e., nuclei)
+        """
+        speakers = self.get_speakers_in_discourse(discourse)
+        for s in speakers:
+            self._reset_discourse_syllables(s, discourse)
+        onsets, codas, syllabics = self._syllabification_inventory(algorithm, syllabic_label)
+        create_syllabic_csvs(self, [discourse])
+        create_nonsyllabic_csvs(self, [discourse])
+        for s in speakers:
+            self._syllabify(s, discourse, algorithm, onsets, codas, syllabics,
+                            results=self._unsyllabified_words(s, discourse))
+        import_syllable_csv(self, discourses=[discourse])
+        import_nonsyl_csv(self, discourses=[discourse])
+        for s in speakers:
+            self._remove_syllable_prev_ids(s, discourse)
+
+    def _register_syllables(self):
+        with self.hierarchy_transaction():
+            self.hierarchy.add_annotation_type('syllable', above=self.phone_name, below=self.word_name)
+            self.hierarchy.add_token_subsets(self, self.phone_name, ['onset', 'coda', 'nucleus'])
+            self.hierarchy.add_token_properties(self, self.phone_name, [('syllable_position', str)])
+
+    def _syllabification_inventory(self, algorithm, syllabic_label):
+        onsets = self.find_onsets(syllabic_label=syllabic_label)
+        codas = None
+        if algorithm == 'probabilistic':
+            onsets = norm_count_dict(onsets, onset=True)
+            codas = self.find_codas(syllabic_label=syllabic_label)
+            codas = norm_count_dict(codas, onset=False)
+        elif algorithm == 'maxonset':
+            onsets = set(onsets.keys())
+        else:
+            raise NotImplementedError
+
+        statement = '''MATCH (n:{}:{}) return n.label as label'''.format(self.cypher_safe_name,
+                                                                         make_label_safe_for_cypher(syllabic_label))
+        res = self.execute_cypher(statement)
+        syllabics = set(x['label'] for x in res)
+        return onsets, codas, syllabics
+
+    def _syllabify(self, speaker, discourse, algorithm, onsets, codas, syllabics, results=None):
+        if results is None:
+            word_type = getattr(self, self.word_name)
+            phone_type = getattr(word_type, self.phone_name)
+            q = self.query_graph(word_type)
+            q = q.filter(word_type.speaker.name == speaker)
+            q = q.filter(word_type.discourse.name == discourse)
+            q = q.order_by(word_type.begin)
+            q = q.columns(word_type.id.column_name('id'), phone_type.id.column_name('phone_id'),
+                          word_type.begin.column_name('begin'),
+                          word_type.label.column_name('label'),
+                          word_type.end.column_name('end'),
+                          phone_type.label.column_name('phones'),
+                          phone_type.begin.column_name('begins'),
+                          phone_type.end.column_name('ends'))
+            results = q.all()
+        syllables = []
+        non_syllables = []
+        prev_id = None
+        for w in results:
+            phones = w['phones']
+            phone_ids = w['phone_id']
+
+            if not phone_ids:
+                print('The word {} in file {} ({} to {}) did not have any phones.'.format(w['label'], discourse,
+                                                                                          w['begin'], w['end']))
+                continue
+            phone_begins = w['begins']
+            phone_ends = w['ends']
+            vow_inds = [i for i, x in enumerate(phones) if x in syllabics]
+            if len(vow_inds) == 0:
+                cur_id = uuid1()
+                if algorithm == 'probabilistic':
+                    split = split_nonsyllabic_prob(phones, onsets, codas)
+                else:
+                    split = split_nonsyllabic_maxonset(phones, onsets)
+                label = '.'.join(phones)
+                row = {'id': cur_id, 'prev_id': prev_id,
+                       'onset_id': phone_ids[0],
+                       'break': split,
+                       'coda_id': phone_ids[-1],
+                       'begin': phone_begins[0],
+                       'label': label,
+                       'type_id': make_type_id([label], self.corpus_name),
+                       'end': phone_ends[-1]}
+                non_syllables.append(row)
+                prev_id = cur_id
+                continue
+            for j, i in enumerate(vow_inds):
+                cur_id = uuid1()
+                cur_vow_id = phone_ids[i]
+                if j == 0:
+                    begin_ind = 0
+                    if i != 0:
+                        cur_ons_id = phone_ids[begin_ind]
+                    else:
+                        cur_ons_id = None
+                else:
+                    prev_vowel_ind = vow_inds[j - 1]
+                    cons_string = phones[prev_vowel_ind + 1:i]
+                    if algorithm == 'probabilistic':
+                        split = split_ons_coda_prob(cons_string, onsets, codas)
+                    else:
+                        split = split_ons_coda_maxonset(cons_string, onsets)
+                    if split is None:
+                        cur_ons_id = None
+                        begin_ind = i
+                    else:
+                        begin_ind = prev_vowel_ind + 1 + split
+                        cur_ons_id = phone_ids[begin_ind]
+
+                if j == len(vow_inds) - 1:
+                    end_ind = len(phones) - 1
+                    if i != len(phones) - 1:
+                        cur_coda_id = phone_ids[end_ind]
+                    else:
+                        cur_coda_id = None
+                else:
+                    foll_vowel_ind = vow_inds[j + 1]
+                    cons_string = phones[i + 1:foll_vowel_ind]
+                    if algorithm == 'probabilistic':
+                        split = split_ons_coda_prob(cons_string, onsets, codas)
+                    else:
+                        split = split_ons_coda_maxonset(cons_string, onsets)
+                    if split is None:
+                        cur_coda_id = None
+                        end_ind = i
+                    else:
+                        end_ind = i + split
+                        cur_coda_id = phone_ids[end_ind]
+                begin = phone_begins[begin_ind]
+                end = phone_ends[end_ind]
+                label = '.'.join(phones[begin_ind:end_ind + 1])
+                row = {'id': cur_id, 'prev_id': prev_id,
+                       'vowel_id': cur_vow_id, 'onset_id': cur_ons_id,
+                       'label': label,
+                       'type_id': make_type_id([label], self.corpus_name),
+                       'coda_id': cur_coda_id, 'begin': begin, 'end': end}
+                syllables.append(row)
+                prev_id = cur_id
+        syllables_data_to_csvs(self, speaker, discourse, syllables)
+        nonsyls_data_to_csvs(self, speaker, discourse, non_syllables)
+
+    def _unsyllabified_words(self, speaker, discourse):
+        # Other discourses may already have syllables between their phones and words, so the phones are matched
+        # directly rather than through a query built from the Hierarchy
+        statement = '''MATCH (w:{word_name}:{corpus}:speech)-[:spoken_by]->(sp:Speaker:{corpus}),
+        (w)-[:spoken_in]->(d:Discourse:{corpus}), (w)-[:is_a]->(wt:{word_name}_type:{corpus})
+        WHERE sp.name = {{speaker_name}}
+        AND d.name = {{discourse_name}}
+        OPTIONAL MATCH (p:{phone_name}:{corpus})-[:contained_by]->(w), (p)-[:is_a]->(pt:{phone_name}_type:{corpus})
+        WITH w, wt, p, pt
+        ORDER BY p.begin
+        WITH w, wt, collect(p.id) AS phone_id, collect(coalesce(p.label, pt.label)) AS phones,
+        collect(p.begin) AS begins, collect(p.end) AS ends
+        RETURN w.id AS id, w.begin AS begin, w.end AS end, coalesce(w.label, wt.label) AS label,
+        phone_id, phones, begins, ends
+        ORDER BY begin'''.format(corpus=self.cypher_safe_name, word_name=self.word_name,
+                                  phone_name=self.phone_name)
+        return self.execute_cypher(statement, speaker_name=speaker, discourse_name=discourse)
+
+    def _remove_syllable_prev_ids(self, speaker, discourse):
+        self.execute_cypher(
+            '''MATCH (s:{corpus_name}:Speaker)<-[:spoken_by]-(n:{corpus_name}:syllable)-[:spoken_in]->(d:{corpus_name}:Discourse)
+            where s.name = {{speaker_name}}
+            AND d.name = {{discourse_name}} and n.prev_id is not Null
+            REMOVE n.prev_id'''.format(corpus_name=self.cypher_safe_name), speaker_name=speaker,
+            discourse_name=discourse)
+
     def enrich_syllables(self, syllable_data, type_data=None):
         """
         Sets the data type and syllable data, initializes importers for syllable data,
@@ -3,6 +3,7 @@ from uuid import uuid1
 from ..query.annotations import SplitQuery
 from ..query.base.func import Max, Min
 from ..exceptions import GraphQueryError
+from ..instrumentation import spanned
 from ..io.importer import utterance_data_to_csvs, import_utterance_csv, create_utterance_csvs, \
     utterance_enriched_data_to_csvs, import_utterance_enrichment_csvs
 from .pause import PauseContext
@@ -28,6 +29,7 @@ class UtteranceContext(PauseContext):
     def has_utterances(self):
         return 'utterance' in self.hierarchy.annotation_types
 
+    @spanned('encode_utterances')
     def encode_utterances(self, min_pause_length=0.5, min_utterance_length=0,
                           call_back=None, stop_check=None):
         """
@@ -64,19 +66,7 @@ class UtteranceContext(PauseContext):
             if call_back is not None:
                 call_back(i)
                 call_back('Parsing utterances for discourse {} of {} ({})...'.format(i, len(discourses), d))
-            utt_data = self.get_utterance_ids(d, min_pause_length, min_utterance_length)
-            speaker_data = {}
-            for s, utterances in utt_data.items():
-                speaker_data = []
-                prev_id = None
-                for u in utterances:
-                    cur_id = uuid1()
-                    row = {'id': cur_id, 'prev_id': prev_id,
-                           'begin_word_id': u[0],
-                           'end_word_id': u[1]}
-                    speaker_data.append(row)
-                    prev_id = cur_id
-                utterance_data_to_csvs(self, s, d, speaker_data)
+            self._utterance_data_to_csvs(d, min_pause_length, min_utterance_length)
         import_utterance_csv(self, call_back, stop_check)
         for m in self.hierarchy.acoustics:
             self.reassess_utterances(m)
@@ -89,6 +79,54 @@ class UtteranceContext(PauseContext):
             call_back(i + 1)
             call_back('Finished!')
 
+    def encode_discourse_utterances(self, discourse, min_pause_length=0.5, min_utterance_length=0):
+        """
+        Encode utterance annotations for a single discourse, replacing any utterances previously encoded for it
+
+        Only the data for the discourse is changed, so that discourses can be encoded concurrently.  The utterance
+        annotation type is added to the Hierarchy once for the whole corpus by the ``utterances`` enrichment step.
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        min_pause_length : float, defaults to 0.5
+            Time in seconds that is the minimum duration of a pause to count
+            as an utterance boundary
+        min_utterance_length : float, defaults to 0.0
+            Time in seconds that is the minimum duration of a stretch of
+            speech to count as an utterance
+        """
+        q = self.query_graph(self.utterance)
+        q = q.filter(self.utterance.discourse.name == discourse)
+        q.delete()
+        create_utterance_csvs(self, [discourse])
+        self._utterance_data_to_csvs(discourse, min_pause_length, min_utterance_length)
+        import_utterance_csv(self, discourses=[discourse])
+        for m in self.hierarchy.acoustics:
+            self.reassess_utterances(m, discourse=discourse)
+
+    def _register_utterances(self):
+        if 'utterance' not in self.hierarchy.annotation_types:
+            self.hierarchy.add_annotation_type('utterance', above=self.word_name, below=None)
+        if 'pitch' in self.hierarchy.acoustics:
+            self.hierarchy.add_token_properties(self, 'utterance', [('pitch_last_edited', int)])
+        self.encode_hierarchy()
+
+    def _utterance_data_to_csvs(self, discourse, min_pause_length, min_utterance_length):
+        utt_data = self.get_utterance_ids(discourse, min_pause_length, min_utterance_length)
+        for s, utterances in utt_data.items():
+            speaker_data = []
+            prev_id = None
+            for u in utterances:
+                cur_id = uuid1()
+                row = {'id': cur_id, 'prev_id': prev_id,
+                       'begin_word_id': u[0],
+                       'end_word_id': u[1]}
+                speaker_data.append(row)
+                prev_id = cur_id
+            utterance_data_to_csvs(self, s, discourse, speaker_data)
+
     def get_utterance_ids(self, discourse,
                           min_pause_length=0.5, min_utterance_length=0):
         """
@@ -293,46 +331,12 @@ ORDER BY begin'''.format(corpus=self.cypher_safe_name, word_type=word_type)
     def encode_utterance_position(self, call_back=None, stop_check=None):
         """ Encodes position_in_utterance for a word """
         w_type = self.word_name
+        statement = self._utterance_position_statement(self.config.query_behavior)
         if self.config.query_behavior == 'speaker':
-            statement = '''MATCH (node_utterance:utterance:speech:{corpus_name})-[:spoken_by]->(speaker:Speaker:{corpus_name}),
-            (node_word_in_node_utterance:{w_type}:{corpus_name})-[:contained_by]->(node_utterance)
-            WHERE speaker.name = {{split_name}}
-            WITH node_utterance, node_word_in_node_utterance
-            ORDER BY node_word_in_node_utterance.begin
-            WITH node_utterance,collect(node_word_in_node_utterance) as nodes
-            WITH node_utterance,nodes,
-            range(0, size(nodes)) as pos
-            UNWIND pos as p
-            WITH node_utterance, p, nodes[p] as n
-            SET n.position_in_utterance = p + 1
-            '''.format(w_type=w_type, corpus_name=self.cypher_safe_name)
             split_names = self.speakers
         elif self.config.query_behavior == 'discourse':
-            statement = '''MATCH (node_utterance:utterance:speech:{corpus_name})-[:spoken_in]->(discourse:Discourse:{corpus_name}),
-            (node_word_in_node_utterance:{w_type}:{corpus_name})-[:contained_by]->(node_utterance)
-            WHERE discourse.name = {{split_name}}
-            WITH node_utterance, node_word_in_node_utterance
-            ORDER BY node_word_in_node_utterance.begin
-            WITH node_utterance, collect(node_word_in_node_utterance) as nodes
-            WITH node_utterance, nodes,
-            range(0, size(nodes)) as pos
-            UNWIND pos as p
-            WITH node_utterance, p, nodes[p] as n
-            SET n.position_in_utterance = p + 1
-            '''.format(w_type=w_type, corpus_name=self.cypher_safe_name)
             split_names = self.discourses
         else:
-            statement = '''MATCH (node_utterance:utterance:speech:{corpus_name}),
-            (node_word_in_node_utterance:{w_type}:{corpus_name})-[:contained_by]->(node_utterance)
-            WITH node_utterance, node_word_in_node_utterance
-            ORDER BY node_word_in_node_utterance.begin
-            WITH node_utterance, collect(node_word_in_node_utterance) as nodes
-            WITH node_utterance, nodes,
-            range(0, size(nodes)) as pos
-            UNWIND pos as p
-            WITH node_utterance, p, nodes[p] as n
-            SET n.position_in_utterance = p + 1
-            '''.format(w_type=w_type, corpus_name=self.cypher_safe_name)
             split_names = None
 
         if split_names is None:
@@ -353,6 +357,44 @@ ORDER BY begin'''.format(corpus=self.cypher_safe_name, word_type=word_type)
                 self.execute_cypher(statement, split_name=s)
         self.hierarchy.add_token_properties(self, w_type, [('position_in_utterance', float)])
 
+    def encode_discourse_utterance_position(self, discourse):
+        """
+        Encodes position_in_utterance for the words of a single discourse, without updating the Hierarchy
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        """
+        self.execute_cypher(self._utterance_position_statement('discourse'), split_name=discourse)
+
+    def _register_utterance_position(self):
+        self.hierarchy.add_token_properties(self, self.word_name, [('position_in_utterance', float)])
+
+    def _utterance_position_statement(self, query_behavior):
+        if query_behavior == 'speaker':
+            match = '''MATCH (node_utterance:utterance:speech:{corpus_name})-[:spoken_by]->(speaker:Speaker:{corpus_name}),
+            (node_word_in_node_utterance:{w_type}:{corpus_name})-[:contained_by]->(node_utterance)
+            WHERE speaker.name = {{split_name}}'''
+        elif query_behavior == 'discourse':
+            match = '''MATCH (node_utterance:utterance:speech:{corpus_name})-[:spoken_in]->(discourse:Discourse:{corpus_name}),
+            (node_word_in_node_utterance:{w_type}:{corpus_name})-[:contained_by]->(node_utterance)
+            WHERE discourse.name = {{split_name}}'''
+        else:
+            match = '''MATCH (node_utterance:utterance:speech:{corpus_name}),
+            (node_word_in_node_utterance:{w_type}:{corpus_name})-[:contained_by]->(node_utterance)'''
+        statement = match + '''
+            WITH node_utterance, node_word_in_node_utterance
+            ORDER BY node_word_in_node_utterance.begin
+            WITH node_utterance, collect(node_word_in_node_utterance) as nodes
+            WITH node_utterance, nodes,
+            range(0, size(nodes)) as pos
+            UNWIND pos as p
+            WITH node_utterance, p, nodes[p] as n
+            SET n.position_in_utterance = p + 1
+            '''
+        return statement.format(w_type=self.word_name, corpus_name=self.cypher_safe_name)
+
     def reset_utterance_position(self):
         """resets position_in_utterance"""
         self.reset_property(self.word_name, 'position_in_utterance')
@@ -369,6 +411,28 @@ ORDER BY begin'''.format(corpus=self.cypher_safe_name, word_type=word_type)
         """
         self.encode_rate('utterance', self.phone_name, 'speech_rate', subset=subset_label)
 
+    def encode_discourse_speech_rate(self, discourse, subset_label):
+        """
+        Encodes speech rate for the utterances of a single discourse, without updating the Hierarchy
+
+        Parameters
+        ----------
+        discourse : str
+            Name of the discourse
+        subset_label : str
+            the name of the subset to encode
+        """
+        lower = getattr(self.utterance, self.phone_name)
+        if subset_label is not None:
+            lower = lower.filter_by_subset(subset_label)
+        q = self.query_graph(self.utterance)
+        q = q.filter(self.utterance.discourse.name == discourse)
+        q.cache(lower.rate.column_name('speech_rate'))
+
+    def _register_speech_rate(self):
+        self.hierarchy.add_token_properties(self, 'utterance', [('speech_rate', float)])
+        self.encode_hierarchy()
+
     def reset_speech_rate(self):
         """ resets speech_rate """
         self.reset_property('utterance', 'speech_rate')
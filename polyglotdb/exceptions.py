@@ -258,6 +258,13 @@ class ClientError(PGError):
     pass
 
 
+class EnrichmentError(PGError):
+    """
+    Exception class for errors in declaring or running enrichment pipelines
+    """
+    pass
+
+
 class NodeAttributeError(GraphQueryError):
     """
     Exception class for errors in attributes for base nodes in constructing queries
@@ -0,0 +1,484 @@
+import functools
+import hashlib
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+STRING_LITERAL_PATTERN = re.compile(r"'(?:[^'\\]|\\.)*'")
+
+NUMBER_LITERAL_PATTERN = re.compile(r'(?<![\w`])-?\d+(?:\.\d+)?(?:ms|s)?\b')
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+UNPROFILABLE_PREFIXES = ('PROFILE', 'EXPLAIN', 'CREATE INDEX', 'CREATE CONSTRAINT', 'DROP INDEX', 'DROP CONSTRAINT',
+                         'CALL DB.')
+
+
+def normalize_statement(statement):
+    """
+    Normalize a Cypher or InfluxQL statement so that statements differing only in literal values and whitespace
+    are grouped together
+
+    Parameters
+    ----------
+    statement : str
+        Statement to normalize
+
+    Returns
+    -------
+    str
+        Statement with literals replaced by ``?`` and whitespace collapsed
+    """
+    statement = STRING_LITERAL_PATTERN.sub('?', statement)
+    statement = NUMBER_LITERAL_PATTERN.sub('?', statement)
+    return WHITESPACE_PATTERN.sub(' ', statement).strip()
+
+
+def fingerprint_statement(statement):
+    """
+    Generate a short fingerprint identifying the normalized form of a statement
+
+    Parameters
+    ----------
+    statement : str
+        Statement to fingerprint
+
+    Returns
+    -------
+    str
+        Fingerprint of the statement
+    """
+    return hashlib.sha1(normalize_statement(statement).encode('utf8')).hexdigest()[:12]
+
+
+def parameters_size(parameters):
+    """
+    Get the approximate size of query parameters as the length of their JSON encoding
+
+    Parameters
+    ----------
+    parameters : dict
+        Query parameters
+
+    Returns
+    -------
+    int
+        Size in characters
+    """
+    if not parameters:
+        return 0
+    return len(json.dumps(parameters, default=str))
+
+
+def plan_to_dict(plan):
+    """
+    Convert a Neo4j query plan or profile into a dictionary for exporting
+
+    Parameters
+    ----------
+    plan : :class:`neo4j.ProfiledPlan`
+        Plan returned in a result summary
+
+    Returns
+    -------
+    dict
+        Operator, arguments, rows and database hits of the plan and its children
+    """
+    if plan is None:
+        return None
+    arguments = getattr(plan, 'arguments', {}) or {}
+    return {'operator': getattr(plan, 'operator_type', None),
+            'identifiers': list(getattr(plan, 'identifiers', []) or []),
+            'arguments': {k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in arguments.items()},
+            'rows': getattr(plan, 'rows', None),
+            'db_hits': getattr(plan, 'db_hits', None),
+            'children': [plan_to_dict(x) for x in getattr(plan, 'children', []) or []]}
+
+
+def count_influxdb_rows(result):
+    """
+    Count the points returned by an InfluxDB query (or list of results for multiple statements)
+    """
+    if isinstance(result, list):
+        return sum(count_influxdb_rows(x) for x in result)
+    raw = getattr(result, 'raw', None) or {}
+    return sum(len(x.get('values', [])) for x in raw.get('series', []))
+
+
+def spanned(name):
+    """
+    Decorator for :class:`~polyglotdb.corpus.CorpusContext` methods that times each call as a span when
+    instrumentation is enabled
+
+    Parameters
+    ----------
+    name : str
+        Name of the span
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            with self.span(name):
+                return function(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Instrumentation(object):
+    """
+    Collects timing events for database calls and processing phases, and passes them on to hooks
+
+    Every event is a dictionary with a ``type`` key.  Database calls produce ``cypher``, ``influxdb``
+    and ``influxdb_write`` events with the statement, its fingerprint, the size of its parameters, the number
+    of rows returned or written and the time taken on the client (and on the server, for Cypher).  Phases
+    produce ``span`` events when they finish.  Database events record the innermost span that was active in
+    their thread.
+
+    Parameters
+    ----------
+    hooks : list, optional
+        Callables to pass each event to, such as :class:`StatementAggregator` or :class:`JsonLogExporter`
+    profile : bool
+        Whether to run Cypher statements with ``PROFILE`` and record the profiled plan, defaults to False
+    """
+
+    def __init__(self, hooks=None, profile=False):
+        if hooks is None:
+            hooks = []
+        self.hooks = list(hooks)
+        self.profile = profile
+        self._local = threading.local()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def emit(self, event):
+        """
+        Pass an event to every hook
+
+        Parameters
+        ----------
+        event : dict
+            Event to emit
+        """
+        for hook in self.hooks:
+            hook(event)
+
+    @property
+    def current_span(self):
+        stack = getattr(self._local, 'spans', None)
+        if not stack:
+            return None
+        return stack[-1]
+
+    @contextmanager
+    def span(self, name, **info):
+        """
+        Time a processing phase, emitting a ``span`` event when it finishes
+
+        Parameters
+        ----------
+        name : str
+            Name of the phase
+        info : kwargs
+            Extra information to record with the span
+        """
+        stack = getattr(self._local, 'spans', None)
+        if stack is None:
+            stack = self._local.spans = []
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started = time.time()
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - begin
+            stack.pop()
+            self.emit({'type': 'span', 'name': name, 'parent': parent, 'timestamp': started,
+                       'duration': duration, 'info': info})
+
+    def _query_event(self, event_type, statement, parameters, rows, client_time, **kwargs):
+        event = {'type': event_type,
+                 'fingerprint': fingerprint_statement(statement),
+                 'statement': statement,
+                 'parameters_size': parameters_size(parameters),
+                 'rows': rows,
+                 'client_time': client_time,
+                 'span': self.current_span,
+                 'timestamp': time.time()}
+        event.update(kwargs)
+        self.emit(event)
+
+    def run_cypher(self, run, statement, parameters=None, **kwparameters):
+        """
+        Run a Cypher statement through a session or transaction's ``run`` method and emit a ``cypher`` event
+
+        The result is fully fetched so that rows and server timings can be recorded, and is returned
+        ready to be used as normal.
+        """
+        if parameters is None:
+            parameters = {}
+        parameters = dict(parameters, **kwparameters)
+        run_statement = statement
+        profiled = self.profile and not statement.lstrip().upper().startswith(UNPROFILABLE_PREFIXES)
+        if profiled:
+            run_statement = 'PROFILE ' + statement
+        begin = time.perf_counter()
+        result = run(run_statement, parameters)
+        rows = result.detach()
+        client_time = time.perf_counter() - begin
+        summary = result.summary()
+        server_time = None
+        available = getattr(summary, 'result_available_after', None)
+        consumed = getattr(summary, 'result_consumed_after', None)
+        if available is not None:
+            server_time = (available + (consumed or 0)) / 1000
+        profile = None
+        if profiled:
+            profile = plan_to_dict(getattr(summary, 'profile', None))
+        self._query_event('cypher', statement, parameters, rows, client_time, server_time=server_time,
+                          profile=profile)
+        return result
+
+    def wrap_graph_driver(self, driver):
+        return InstrumentedDriver(driver, self)
+
+    def wrap_acoustic_client(self, client):
+        return InstrumentedInfluxDBClient(client, self)
+
+
+class InstrumentedDriver(object):
+    """
+    Neo4j driver proxy whose sessions report their statements to an :class:`Instrumentation`
+    """
+
+    def __init__(self, driver, instrumentation):
+        self.driver = driver
+        self.instrumentation = instrumentation
+
+    def session(self, *args, **kwargs):
+        return InstrumentedSession(self.driver.session(*args, **kwargs), self.instrumentation)
+
+    def __getattr__(self, key):
+        return getattr(self.driver, key)
+
+
+class InstrumentedTransaction(object):
+    """
+    Neo4j transaction proxy that reports its statements to an :class:`Instrumentation`
+    """
+
+    def __init__(self, wrapped, instrumentation):
+        self.wrapped = wrapped
+        self.instrumentation = instrumentation
+
+    def run(self, statement, parameters=None, **kwparameters):
+        return self.instrumentation.run_cypher(self.wrapped.run, statement, parameters, **kwparameters)
+
+    def __enter__(self):
+        self.wrapped.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, exc_tb):
+        return self.wrapped.__exit__(exc_type, exc, exc_tb)
+
+    def __getattr__(self, key):
+        return getattr(self.wrapped, key)
+
+
+class InstrumentedSession(InstrumentedTransaction):
+    """
+    Neo4j session proxy that reports statements run directly or in transactions to an :class:`Instrumentation`
+    """
+
+    def begin_transaction(self, *args, **kwargs):
+        return InstrumentedTransaction(self.wrapped.begin_transaction(*args, **kwargs), self.instrumentation)
+
+    def _wrap_unit_of_work(self, unit_of_work):
+        def instrumented(tx, *args, **kwargs):
+            return unit_of_work(InstrumentedTransaction(tx, self.instrumentation), *args, **kwargs)
+
+        return instrumented
+
+    def read_transaction(self, unit_of_work, *args, **kwargs):
+        return self.wrapped.read_transaction(self._wrap_unit_of_work(unit_of_work), *args, **kwargs)
+
+    def write_transaction(self, unit_of_work, *args, **kwargs):
+        return self.wrapped.write_transaction(self._wrap_unit_of_work(unit_of_work), *args, **kwargs)
+
+
+class InstrumentedInfluxDBClient(object):
+    """
+    InfluxDB client proxy that reports queries and writes to an :class:`Instrumentation`
+    """
+
+    def __init__(self, client, instrumentation):
+        self.client = client
+        self.instrumentation = instrumentation
+
+    def query(self, query, *args, **kwargs):
+        begin = time.perf_counter()
+        result = self.client.query(query, *args, **kwargs)
+        client_time = time.perf_counter() - begin
+        self.instrumentation._query_event('influxdb', query, kwargs.get('params'), count_influxdb_rows(result),
+                                          client_time, server_time=None)
+        return result
+
+    def write_points(self, points, *args, **kwargs):
+        points = list(points)
+        begin = time.perf_counter()
+        result = self.client.write_points(points, *args, **kwargs)
+        client_time = time.perf_counter() - begin
+        if kwargs.get('protocol') == 'line':
+            measurements = sorted({re.split(r'(?<!\\)[, ]', x, 1)[0] for x in points})
+        else:
+            measurements = sorted({x.get('measurement', '') for x in points if isinstance(x, dict)})
+        self.instrumentation._query_event('influxdb_write', 'WRITE {}'.format(', '.join(measurements)), None,
+                                          len(points), client_time, server_time=None)
+        return result
+
+    def __getattr__(self, key):
+        return getattr(self.client, key)
+
+
+class StatementAggregator(object):
+    """
+    Instrumentation hook that aggregates database events by statement fingerprint and spans by name
+
+    Parameters
+    ----------
+    keep_profiles : bool
+        Whether to keep the profile of the slowest call of each statement, defaults to True
+    """
+
+    def __init__(self, keep_profiles=True):
+        self.keep_profiles = keep_profiles
+        self.statements = {}
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if event['type'] == 'span':
+                s = self.spans.setdefault(event['name'], {'name': event['name'], 'count': 0, 'total_time': 0.0,
+                                                           'max_time': 0.0})
+                s['count'] += 1
+                s['total_time'] += event['duration']
+                s['max_time'] = max(s['max_time'], event['duration'])
+                return
+            s = self.statements.get(event['fingerprint'])
+            if s is None:
+                s = self.statements[event['fingerprint']] = {
+                    'fingerprint': event['fingerprint'], 'type': event['type'],
+                    'statement': normalize_statement(event['statement']), 'count': 0, 'rows': 0,
+                    'parameters_size': 0, 'total_time': 0.0, 'max_time': 0.0, 'server_time': None,
+                    'spans': [], 'profile': None}
+            s['count'] += 1
+            s['rows'] += event['rows'] or 0
+            s['parameters_size'] += event['parameters_size']
+            s['total_time'] += event['client_time']
+            if event.get('server_time') is not None:
+                s['server_time'] = (s['server_time'] or 0.0) + event['server_time']
+            if event['span'] is not None and event['span'] not in s['spans']:
+                s['spans'].append(event['span'])
+            if event['client_time'] >= s['max_time']:
+                s['max_time'] = event['client_time']
+                if self.keep_profiles and event.get('profile') is not None:
+                    s['profile'] = event['profile']
+
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.spans = {}
+
+    def slowest(self, n=10, key='total_time'):
+        """
+        Get the statements that took the most time
+
+        Parameters
+        ----------
+        n : int
+            Number of statements to return, defaults to 10
+        key : str
+            Statistic to rank by, one of ``total_time``, ``max_time``, ``count`` or ``rows``
+
+        Returns
+        -------
+        list
+            Aggregated statistics for the top statements
+        """
+        with self._lock:
+            statements = [dict(x) for x in self.statements.values()]
+        return sorted(statements, key=lambda x: x[key], reverse=True)[:n]
+
+    def report(self, n=10, key='total_time'):
+        """
+        Summarize the run, with the top ``n`` statements and the time spent in each span
+
+        Returns
+        -------
+        dict
+            Report of the run
+        """
+        with self._lock:
+            spans = sorted((dict(x) for x in self.spans.values()), key=lambda x: x['total_time'], reverse=True)
+            total = sum(x['total_time'] for x in self.statements.values())
+            count = sum(x['count'] for x in self.statements.values())
+        return {'statement_count': count,
+                'statement_time': total,
+                'slowest': self.slowest(n, key),
+                'spans': spans}
+
+
+class JsonLogExporter(object):
+    """
+    Instrumentation hook that appends every event to a log file as a line of JSON
+
+    Parameters
+    ----------
+    path : str
+        Path to the log file
+    include_statements : bool
+        Whether to write full statements as well as their fingerprints, defaults to True
+    """
+
+    def __init__(self, path, include_statements=True):
+        self.path = path
+        self.include_statements = include_statements
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if not self.include_statements and 'statement' in event:
+            event = {k: v for k, v in event.items() if k != 'statement'}
+        line = json.dumps(event, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf8') as f:
+                f.write(line + '\n')
+
+
+def write_instrumentation_report(path, aggregator, n=10, key='total_time'):
+    """
+    Save the report of a :class:`StatementAggregator` as JSON
+
+    Parameters
+    ----------
+    path : str
+        Path to save the report
+    aggregator : :class:`StatementAggregator`
+        Aggregator to report
+    n : int
+        Number of slowest statements to include, defaults to 10
+    key : str
+        Statistic to rank statements by
+    """
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump(aggregator.report(n, key), f, indent=2, default=str)
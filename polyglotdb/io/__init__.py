@@ -1,16 +1,51 @@
+import importlib
 
-from .helper import guess_textgrid_format
+# Parsers, inspectors, exporters and enrichment readers are only imported when first used, so that importing
+# the importer or enrichment subpackages does not load every parser
+_lazy_imports = {
+    'guess_textgrid_format': '.helper',
+    'BuckeyeParser': '.parsers',
+    'IlgParser': '.parsers',
+    'OrthographyTextParser': '.parsers',
+    'TranscriptionTextParser': '.parsers',
+    'TextgridParser': '.parsers',
+    'TimitParser': '.parsers',
+    'MfaParser': '.parsers',
+    'MausParser': '.parsers',
+    'LabbCatParser': '.parsers',
+    'FaveParser': '.parsers',
+    'PartiturParser': '.parsers',
+    'inspect_buckeye': '.inspect',
+    'inspect_orthography': '.inspect',
+    'inspect_transcription': '.inspect',
+    'inspect_textgrid': '.inspect',
+    'inspect_timit': '.inspect',
+    'inspect_ilg': '.inspect',
+    'inspect_mfa': '.inspect',
+    'inspect_labbcat': '.inspect',
+    'inspect_fave': '.inspect',
+    'inspect_partitur': '.inspect',
+    'inspect_maus': '.inspect',
+    'save_results': '.exporters',
+    'export_textgrids': '.exporters',
+    'export_discourse_textgrid': '.exporters',
+    'export_query_textgrids': '.exporters',
+    'enrich_lexicon_from_csv': '.enrichment',
+    'enrich_features_from_csv': '.enrichment',
+    'enrich_speakers_from_csv': '.enrichment',
+    'enrich_discourses_from_csv': '.enrichment',
+}
 
-from .parsers import (BuckeyeParser, IlgParser, OrthographyTextParser,
-                    TranscriptionTextParser, TextgridParser, TimitParser,
-                    MfaParser, MausParser, LabbCatParser, FaveParser, PartiturParser)
+__all__ = sorted(_lazy_imports)
 
-from .inspect import (inspect_buckeye, inspect_orthography,
-                    inspect_transcription, inspect_textgrid, inspect_timit,
-                    inspect_ilg, inspect_mfa, inspect_labbcat,
-                    inspect_fave, inspect_partitur, inspect_maus)
 
-from .exporters import save_results
+def __getattr__(name):
+    if name in _lazy_imports:
+        value = getattr(importlib.import_module(_lazy_imports[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
 
-from .enrichment import (enrich_lexicon_from_csv,enrich_features_from_csv,
-                        enrich_speakers_from_csv, enrich_discourses_from_csv)
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
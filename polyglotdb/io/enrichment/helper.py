@@ -1,7 +1,14 @@
 import csv
+import warnings
 from collections import defaultdict
 from ...exceptions import ParseError
 
+SNIFF_SAMPLE_SIZE = 64 * 1024
+
+TYPE_SAMPLE_ROWS = 1000
+
+ENRICHMENT_BATCH_SIZE = 5000
+
 
 def sanitize_name(string):
     """
@@ -54,6 +61,190 @@ def parse_string(value):
         return value
 
 
+def infer_type(counts):
+    """
+    Infer the type of a column from the types of its values, falling back to a wider type on conflict
+
+    Parameters
+    ----------
+    counts : dict
+        Number of values of each type in the column
+
+    Returns
+    -------
+    type
+        The single type of the values, float if they mix ints and floats, and str for any other mix or when there
+        are no values
+    """
+    types = set(t for t, c in counts.items() if c)
+    if len(types) == 1:
+        return types.pop()
+    if types and types <= {int, float}:
+        return float
+    return str
+
+
+def convert_cell(value, column_type):
+    """
+    Parse a cell of a CSV file to the type of its column
+
+    Parameters
+    ----------
+    value : str
+        Text of the cell
+    column_type : type
+        Type of the column, see :func:`infer_type`
+
+    Returns
+    -------
+    object
+        Parsed value, keeping the text of the cell for string columns, None for missing values and values that do
+        not fit their column
+    """
+    v = parse_string(value)
+    if v is None:
+        return None
+    if column_type == str:
+        return value.strip()
+    if column_type == float and type(v) == int:
+        return float(v)
+    if type(v) != column_type:
+        return None
+    return v
+
+
+class CsvEnrichmentReader(object):
+    """
+    Streaming reader for CSV files used for enrichment
+
+    Only a sample of the file is held in memory: the dialect is sniffed on its first ``sample_size`` characters and
+    column types are inferred from its first ``sample_rows`` rows.  Rows are then parsed one at a time, each cell
+    only once, so memory use does not depend on the size of the file.  Later values that do not fit the type of
+    their column are read as None, with a warning for each column where this happens, and are counted in
+    ``coerced``.
+
+    Parameters
+    ----------
+    path : str
+        Path to the CSV file
+    key_column : str, optional
+        Column identifying each row, defaults to the first column
+    sanitize_names : bool
+        Whether to sanitize the names of the other columns, see :func:`sanitize_name`, defaults to True
+    sample_size : int
+        Number of characters to sniff the dialect from
+    sample_rows : int
+        Number of rows to infer column types from
+    """
+    def __init__(self, path, key_column=None, sanitize_names=True, sample_size=SNIFF_SAMPLE_SIZE,
+                 sample_rows=TYPE_SAMPLE_ROWS):
+        self.path = path
+        self.key_column = key_column
+        self.sanitize_names = sanitize_names
+        self.sample_size = sample_size
+        self.sample_rows = sample_rows
+        self.header = None
+        self.type_data = None
+        self.coerced = {}
+        self._file = None
+        self._reader = None
+        self._sample = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'r', encoding='utf-8-sig', newline='')
+        sample = self._file.read(self.sample_size)
+        if len(sample) == self.sample_size and '\n' in sample:
+            sample = sample[:sample.rindex('\n') + 1]
+        dialect = csv.Sniffer().sniff(sample)
+        if dialect.delimiter == '-':
+            dialect.delimiter = ','
+        self._file.seek(0)
+        self._reader = csv.reader(self._file, dialect=dialect)
+        self.header = [x.strip() for x in next(self._reader)]
+        if self.key_column is None:
+            self.key_column = self.header[0]
+        if self.key_column not in self.header:
+            raise ParseError('Column "{}" was not found in {}'.format(self.key_column, self.path))
+        self._key_index = self.header.index(self.key_column)
+        self._columns = [(i, sanitize_name(x) if self.sanitize_names else x) for i, x in enumerate(self.header)
+                         if i != self._key_index]
+
+        counts = {k: defaultdict(int) for _, k in self._columns}
+        self._sample = []
+        for line in self._reader:
+            self._sample.append(line)
+            for i, k in self._columns:
+                if i < len(line):
+                    v = parse_string(line[i])
+                    if v is not None:
+                        counts[k][type(v)] += 1
+            if len(self._sample) >= self.sample_rows:
+                break
+        self.type_data = {k: infer_type(counts[k]) for _, k in self._columns}
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._file.close()
+
+    def __iter__(self):
+        """
+        Iterate over the rows of the file
+
+        Yields
+        ------
+        str
+            Value of the key column
+        dict
+            Parsed values of the other columns
+        """
+        types = [(i, k, self.type_data[k]) for i, k in self._columns]
+        sample, self._sample = self._sample, []
+        for lines in (sample, self._reader):
+            for line in lines:
+                if not line:
+                    continue
+                values = {}
+                for i, k, t in types:
+                    if i >= len(line):
+                        values[k] = None
+                        continue
+                    values[k] = convert_cell(line[i], t)
+                    if values[k] is None and parse_string(line[i]) is not None:
+                        self._coerce(k, line[i])
+                yield line[self._key_index], values
+
+    def _coerce(self, column, value):
+        if column not in self.coerced:
+            self.coerced[column] = 0
+            warnings.warn('Values of column "{}" in {} that are not {}, such as "{}", are read as None; increase '
+                          'sample_rows to infer the type of the column from more rows.'.format(
+                              column, self.path, self.type_data[column].__name__, value.strip()))
+        self.coerced[column] += 1
+
+    def batches(self, batch_size=ENRICHMENT_BATCH_SIZE):
+        """
+        Iterate over the rows of the file in batches
+
+        Parameters
+        ----------
+        batch_size : int
+            Maximum number of rows per batch
+
+        Yields
+        ------
+        list
+            Tuples of key and parsed values, see :meth:`__iter__`
+        """
+        batch = []
+        for row in self:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
 def parse_file(path, labels=None, case_sensitive=True):
     """
     Parses a csv file into data and type_data
@@ -72,62 +263,12 @@ def parse_file(path, labels=None, case_sensitive=True):
     tuple
         data and type_data for a csv file
     """
-    with open(path, 'r', encoding='utf-8-sig') as csvfile:
-        dialect = csv.Sniffer().sniff(csvfile.read())
-        if dialect.delimiter == '-':
-            dialect.delimiter = ','
-        csvfile.seek(0)
-        reader = csv.DictReader(csvfile, dialect=dialect)
-        header = reader.fieldnames
-        key_name = header[0]
-        sanitized_names = [sanitize_name(x) for x in header]
-        data = {}
-        type_data = {}
-        if not labels:
-            for line in reader:
-                p = line[key_name]
-
-                for i, f in enumerate(header):
-                    if f == key_name:
-                        continue
-                    k = sanitized_names[i]
-                    if k not in type_data:
-                        type_data[k] = defaultdict(int)
-                    v = parse_string(line[f])
-                    if v is not None:
-                        type_data[k][type(v)] += 1
-                if not case_sensitive:
-                    p = p.lower()
-                data[p] = {}
-                for i, f in enumerate(header):
-                    if f == key_name:
-                        continue
-                    k = sanitized_names[i]
-                    v = parse_string(line[f])
-                    data[p][k] = v
-        else:
-            for line in reader:
-                p = line[key_name]
-
-                for i, f in enumerate(header):
-                    if f == key_name:
-                        continue
-                    k = sanitized_names[i]
-                    if k not in type_data:
-                        type_data[k] = defaultdict(int)
-                    v = parse_string(line[f])
-                    if v is not None:
-                        type_data[k][type(v)] += 1
-                if not case_sensitive:
-                    p = p.lower()
-                if labels is not None and p not in labels:
-                    continue
-                data[p] = {}
-                for i, f in enumerate(header):
-                    if f == key_name:
-                        continue
-                    k = sanitized_names[i]
-                    v = parse_string(line[f])
-                    data[p][k] = v
-        type_data = {k: max(v.keys(), key=lambda x: v[x]) for k, v in type_data.items()}
-        return data, type_data
+    data = {}
+    with CsvEnrichmentReader(path) as reader:
+        for p, values in reader:
+            if not case_sensitive:
+                p = p.lower()
+            if labels and p not in labels:
+                continue
+            data[p] = values
+        return data, reader.type_data
@@ -1 +1,2 @@
 from .csv import save_results
+from .textgrid import export_textgrids, export_discourse_textgrid, export_query_textgrids
@@ -1 +1,369 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .csv import make_safe
+from ...exceptions import GraphQueryError
+
+TEXTGRID_COLUMN_PREFIX = 'textgrid_'
+
+
+class TierData(object):
+    """
+    Intervals or points for a single tier, added in time order
+
+    Parameters
+    ----------
+    name : str
+        Name of the tier
+    points : bool
+        Whether the tier is a point tier rather than an interval tier
+    """
+
+    def __init__(self, name, points=False):
+        self.name = name
+        self.points = points
+        self.items = []
+        self._last_time = None
+
+    def add_interval(self, begin, end, label):
+        """
+        Add an interval, skipping intervals with no duration or that overlap the previous interval
+        """
+        if begin is None or end is None or end <= begin:
+            return
+        if self._last_time is not None and begin < self._last_time:
+            return
+        self.items.append((begin, end, label))
+        self._last_time = end
+
+    def add_point(self, time, label):
+        """
+        Add a point, skipping points at or before the time of the previous point
+        """
+        if time is None:
+            return
+        if self._last_time is not None and time <= self._last_time:
+            return
+        self.items.append((time, label))
+        self._last_time = time
+
+    @property
+    def max_time(self):
+        if not self.items:
+            return 0
+        return self.items[-1][-2]
+
+
+def tier_name(speaker, name, include_speaker):
+    if include_speaker:
+        return '{} - {}'.format(speaker, name)
+    return name
+
+
+def write_textgrid(path, tiers, max_time=None):
+    """
+    Save tiers to a Praat TextGrid, with gaps between intervals filled with empty intervals
+
+    Parameters
+    ----------
+    path : str
+        Path to save the TextGrid
+    tiers : list
+        List of :class:`TierData` objects
+    max_time : float, optional
+        End time of the TextGrid, defaults to the end of the last interval or point
+    """
+    from textgrid import TextGrid, IntervalTier, PointTier, Interval, Point
+    end = max([t.max_time for t in tiers] + [max_time or 0])
+    tg = TextGrid(maxTime=end)
+    for t in tiers:
+        if t.points:
+            tier = PointTier(t.name, 0, end)
+            tier.points = [Point(time, label) for time, label in t.items]
+        else:
+            tier = IntervalTier(t.name, 0, end)
+            tier.intervals = [Interval(begin, end, label) for begin, end, label in t.items]
+        tg.append(tier)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tg.write(path)
+
+
+def _property_sources(corpus_context, annotation_type, properties):
+    sources = []
+    for p in properties:
+        if corpus_context.hierarchy.has_token_property(annotation_type, p):
+            sources.append((p, 'n'))
+        elif corpus_context.hierarchy.has_type_property(annotation_type, p):
+            sources.append((p, 't'))
+        else:
+            raise GraphQueryError('{} is not a property of {}.'.format(p, annotation_type))
+    return sources
+
+
+def _annotation_statement(corpus_context, annotation_type, sources):
+    columns = ''.join(', {}.`{}` AS `{}{}`'.format(alias, p, TEXTGRID_COLUMN_PREFIX, p) for p, alias in sources)
+    return '''MATCH (n:{atype}:{corpus_name})-[:spoken_in]->(d:Discourse:{corpus_name}),
+    (n)-[:spoken_by]->(s:Speaker:{corpus_name})
+    WHERE d.name = {{discourse}}
+    OPTIONAL MATCH (n)-[:is_a]->(t:{atype}_type:{corpus_name})
+    RETURN s.name AS speaker, n.begin AS begin, n.end AS end, t.label AS label{columns}
+    ORDER BY n.begin'''.format(atype=annotation_type, corpus_name=corpus_context.cypher_safe_name, columns=columns)
+
+
+def _subannotation_statement(corpus_context, annotation_type, subannotation_type):
+    return '''MATCH (sub:{stype}:{corpus_name})-[:annotates]->(n:{atype}:{corpus_name}),
+    (n)-[:spoken_in]->(d:Discourse:{corpus_name}),
+    (n)-[:spoken_by]->(s:Speaker:{corpus_name})
+    WHERE d.name = {{discourse}}
+    RETURN s.name AS speaker, sub.begin AS begin, sub.end AS end, sub.label AS label
+    ORDER BY sub.begin'''.format(stype=subannotation_type, atype=annotation_type,
+                                 corpus_name=corpus_context.cypher_safe_name)
+
+
+def _discourse_levels(corpus_context, annotation_types, properties, subannotations):
+    if annotation_types is None:
+        annotation_types = corpus_context.hierarchy.highest_to_lowest
+    if properties is None:
+        properties = {}
+    levels = []
+    for a in annotation_types:
+        if a not in corpus_context.hierarchy.annotation_types:
+            raise GraphQueryError('{} is not an annotation type in this corpus.'.format(a))
+        sources = _property_sources(corpus_context, a, properties.get(a, []))
+        levels.append((a, _annotation_statement(corpus_context, a, sources), sources))
+        if subannotations:
+            for s in sorted(corpus_context.hierarchy.subannotations.get(a, [])):
+                levels.append((s, _subannotation_statement(corpus_context, a, s), []))
+    return levels
+
+
+def _export_discourse(corpus_context, discourse, directory, levels, split_by_speaker):
+    speakers = sorted(corpus_context.get_speakers_in_discourse(discourse))
+    include_speaker = len(speakers) > 1 and not split_by_speaker
+    tiers = OrderedDict()
+    for s in speakers:
+        for name, statement, sources in levels:
+            tiers[(s, name)] = TierData(tier_name(s, name, include_speaker))
+            for p, _ in sources:
+                tiers[(s, name, p)] = TierData(tier_name(s, '{} - {}'.format(name, p), include_speaker))
+    for name, statement, sources in levels:
+        # Each level is read in a single pass ordered by time, and rows are appended to tiers as they arrive
+        for r in corpus_context.execute_cypher(statement, discourse=discourse):
+            speaker = r['speaker']
+            if (speaker, name) not in tiers:
+                continue
+            tiers[(speaker, name)].add_interval(r['begin'], r['end'], make_safe(r['label'], '.'))
+            for p, _ in sources:
+                tiers[(speaker, name, p)].add_interval(r['begin'], r['end'],
+                                                       make_safe(r[TEXTGRID_COLUMN_PREFIX + p], '.'))
+    paths = []
+    if split_by_speaker:
+        for s in speakers:
+            path = os.path.join(directory, s, discourse + '.TextGrid')
+            write_textgrid(path, [v for k, v in tiers.items() if k[0] == s])
+            paths.append(path)
+    else:
+        path = os.path.join(directory, discourse + '.TextGrid')
+        write_textgrid(path, list(tiers.values()))
+        paths.append(path)
+    return paths
+
+
+def export_discourse_textgrid(corpus_context, discourse, directory, annotation_types=None, properties=None,
+                              subannotations=False, split_by_speaker=False):
+    """
+    Export the annotations of a single discourse to TextGrids, see :func:`export_textgrids`
+
+    Returns
+    -------
+    list
+        Paths of the TextGrids that were saved
+    """
+    levels = _discourse_levels(corpus_context, annotation_types, properties, subannotations)
+    return _export_discourse(corpus_context, discourse, directory, levels, split_by_speaker)
+
+
+def export_textgrids(corpus_context, directory, discourses=None, annotation_types=None, properties=None,
+                     subannotations=False, split_by_speaker=False, num_workers=1, call_back=None, stop_check=None):
+    """
+    Export the annotations of a corpus to one TextGrid per discourse (or per discourse and speaker)
+
+    Each annotation level of a discourse is read in one query ordered by time, so only a single discourse per
+    worker is held in memory at once.  When a discourse has multiple speakers and ``split_by_speaker`` is False,
+    tiers are named ``speaker - level``, as in Montreal Forced Aligner output.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to export
+    directory : str
+        Directory to save TextGrids to
+    discourses : list, optional
+        Discourses to export, defaults to all discourses
+    annotation_types : list, optional
+        Annotation types to export as tiers, defaults to all annotation types from highest to lowest
+    properties : dict, optional
+        Mapping of annotation types to lists of token or type properties to export as additional tiers
+        (named ``level - property``)
+    subannotations : bool
+        Whether to export the subannotations of each annotation type as tiers, defaults to False
+    split_by_speaker : bool
+        Whether to save a separate TextGrid for each speaker of a discourse in a speaker directory,
+        defaults to False
+    num_workers : int
+        Number of discourses to export at once, defaults to 1
+    call_back : callable
+        Function to monitor progress
+    stop_check : callable
+        Function to check whether the process should terminate early
+
+    Returns
+    -------
+    list
+        Paths of the TextGrids that were saved
+    """
+    if discourses is None:
+        discourses = corpus_context.discourses
+    discourses = sorted(discourses)
+    levels = _discourse_levels(corpus_context, annotation_types, properties, subannotations)
+    os.makedirs(directory, exist_ok=True)
+    if call_back is not None:
+        call_back('Exporting TextGrids...')
+        call_back(0, len(discourses))
+    paths = []
+    if num_workers <= 1:
+        for i, d in enumerate(discourses):
+            if stop_check is not None and stop_check():
+                break
+            paths.extend(_export_discourse(corpus_context, d, directory, levels, split_by_speaker))
+            if call_back is not None:
+                call_back(i + 1)
+        return paths
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(_export_discourse, corpus_context, d, directory, levels, split_by_speaker)
+                   for d in discourses]
+        for i, f in enumerate(as_completed(futures)):
+            paths.extend(f.result())
+            if call_back is not None:
+                call_back(i + 1)
+            if stop_check is not None and stop_check():
+                for other in futures:
+                    other.cancel()
+    return sorted(paths)
+
+
+def _query_by_discourse(query):
+    from ...query.annotations.query import SplitQuery
+    if isinstance(query, SplitQuery):
+        splitter = query.splitter
+        query.splitter = 'discourse'
+        try:
+            for q in query.split_queries():
+                yield q
+        finally:
+            query.splitter = splitter
+    else:
+        yield query
+
+
+def _export_query_results(query, directory, label_columns, point_column, tier_prefix, extra_columns):
+    to_find = query.to_find
+    added = extra_columns + [to_find.discourse.name.column_name(TEXTGRID_COLUMN_PREFIX + 'discourse'),
+             to_find.speaker.name.column_name(TEXTGRID_COLUMN_PREFIX + 'speaker'),
+             to_find.begin.column_name(TEXTGRID_COLUMN_PREFIX + 'begin'),
+             to_find.end.column_name(TEXTGRID_COLUMN_PREFIX + 'end')]
+    columns, order_by = query._columns, query._order_by
+    query._columns = list(columns) + added
+    query._order_by = [(added[-4], False), (added[-2], False)]
+    try:
+        results = query.all()
+        paths = []
+        current = None
+        tiers = OrderedDict()
+        for r in results:
+            discourse = r[TEXTGRID_COLUMN_PREFIX + 'discourse']
+            if discourse != current:
+                if current is not None:
+                    paths.append(_write_query_tiers(directory, current, tiers))
+                current = discourse
+                tiers = OrderedDict()
+            speaker = r[TEXTGRID_COLUMN_PREFIX + 'speaker']
+            for c in label_columns:
+                key = (speaker, c)
+                if key not in tiers:
+                    tiers[key] = TierData(tier_prefix + c, points=point_column is not None)
+                label = make_safe(r[c], '.')
+                if point_column is not None:
+                    tiers[key].add_point(r[point_column], label)
+                else:
+                    tiers[key].add_interval(r[TEXTGRID_COLUMN_PREFIX + 'begin'], r[TEXTGRID_COLUMN_PREFIX + 'end'],
+                                            label)
+        if current is not None:
+            paths.append(_write_query_tiers(directory, current, tiers))
+        return paths
+    finally:
+        query._columns, query._order_by = columns, order_by
+
+
+def _write_query_tiers(directory, discourse, tiers):
+    include_speaker = len({k[0] for k in tiers}) > 1
+    for (speaker, _), t in tiers.items():
+        t.name = tier_name(speaker, t.name, include_speaker)
+    path = os.path.join(directory, discourse + '.TextGrid')
+    write_textgrid(path, list(tiers.values()))
+    return path
+
+
+def export_query_textgrids(query, directory, label_columns=None, point_column=None, tier_prefix='',
+                           num_workers=1):
+    """
+    Export the results of a query over annotations to one TextGrid per discourse
+
+    Each result becomes an interval spanning the annotation that was queried for (or a point at the time in
+    ``point_column``), in one tier per label column and speaker.  Results that overlap the previous result of
+    the same tier are skipped, as TextGrid tiers cannot contain overlapping intervals.
+
+    Parameters
+    ----------
+    query : :class:`~polyglotdb.query.annotations.query.GraphQuery`
+        Query to export, split queries are run one discourse at a time
+    directory : str
+        Directory to save TextGrids to
+    label_columns : list, optional
+        Names of the query's columns to export as tiers, defaults to all columns other than ``point_column``,
+        or the annotation's label if the query has no columns
+    point_column : str, optional
+        Name of a column containing times, to export point tiers rather than interval tiers
+    tier_prefix : str
+        String to add to the start of each tier name
+    num_workers : int
+        Number of discourses to export at once, defaults to 1
+
+    Returns
+    -------
+    list
+        Paths of the TextGrids that were saved
+    """
+    extra_columns = []
+    if not query._columns:
+        extra_columns.append(query.to_find.label.column_name('label'))
+    names = [x.output_alias.replace('`', '') for x in query._columns + extra_columns]
+    if point_column is not None and point_column not in names:
+        raise GraphQueryError('The point column {} is not a column of the query.'.format(point_column))
+    if label_columns is None:
+        label_columns = [x for x in names if x != point_column]
+    for c in label_columns:
+        if c not in names:
+            raise GraphQueryError('{} is not a column of the query.'.format(c))
+    os.makedirs(directory, exist_ok=True)
+    queries = list(_query_by_discourse(query))
+    paths = []
+    with ThreadPoolExecutor(max_workers=max(num_workers, 1)) as executor:
+        futures = [executor.submit(_export_query_results, q, directory, label_columns, point_column, tier_prefix,
+                                   extra_columns) for q in queries]
+        for f in as_completed(futures):
+            paths.extend(f.result())
+    return sorted(paths)
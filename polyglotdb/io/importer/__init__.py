@@ -12,3 +12,6 @@ from .from_csv import (import_type_csvs, import_csvs, import_lexicon_csvs,
                        import_feature_csvs, import_speaker_csvs,
                        import_discourse_csvs, import_syllable_enrichment_csvs, import_utterance_enrichment_csvs,
                        import_token_csv)
+
+from .bulk import (bulk_update_properties, ensure_indexes, import_lexicon_data, import_feature_data,
+                   import_speaker_data, import_discourse_data, python_type)
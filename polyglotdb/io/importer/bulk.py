@@ -0,0 +1,254 @@
+BULK_BATCH_SIZE = 5000
+
+
+def python_type(value_type):
+    """
+    Get the Python type corresponding to the type of a property value, so that numpy scalar types such as
+    ``numpy.int64`` are stored as ``int``
+
+    Parameters
+    ----------
+    value_type : type
+        Type of a property value
+
+    Returns
+    -------
+    type
+        Python type
+    """
+    if hasattr(value_type, 'dtype'):
+        return type(value_type().tolist())
+    return value_type
+
+
+def convert_value(value, value_type):
+    """
+    Convert a value to the type of its property, following the conversions used when loading from CSV files
+
+    Parameters
+    ----------
+    value : object
+        Value to convert, numpy scalars are converted to the equivalent Python values
+    value_type : type
+        Type of the property
+
+    Returns
+    -------
+    object
+        Converted value, None if the value is missing or cannot be converted
+    """
+    if hasattr(value, 'dtype'):
+        value = value.tolist()
+    value_type = python_type(value_type)
+    if value is None or value == '':
+        return None
+    if value_type == bool:
+        if isinstance(value, bool):
+            return value
+        return value != 'False'
+    if value_type == int:
+        try:
+            return int(float(value))
+        except (TypeError, ValueError):
+            return None
+    if value_type == float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return str(value)
+
+
+def property_rows(data, typed_data, key_transform=None):
+    """
+    Convert data keyed by node into rows for :func:`bulk_update_properties`
+
+    Parameters
+    ----------
+    data : dict
+        Properties of each node, keyed by the value identifying the node
+    typed_data : dict
+        Types of the properties to include
+    key_transform : callable, optional
+        Function to apply to the keys, i.e. to lower case them
+
+    Returns
+    -------
+    list
+        Rows with the ``key`` of the node and its typed ``properties``
+    """
+    rows = []
+    for k, v in sorted(data.items()):
+        if key_transform is not None:
+            k = key_transform(k)
+        rows.append({'key': k, 'properties': {name: convert_value(v.get(name), value_type)
+                                              for name, value_type in typed_data.items()}})
+    return rows
+
+
+def existing_indexes(corpus_context):
+    """
+    Get the indexes in the database
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to check
+
+    Returns
+    -------
+    set
+        Descriptions of the indexes, in the form ``INDEX ON :label(property)``
+    """
+    return {r['description'] for r in corpus_context.execute_cypher('CALL db.indexes()')}
+
+
+def ensure_indexes(corpus_context, label, properties):
+    """
+    Create indexes on properties of a node label, skipping the ones that already exist
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to create indexes for
+    label : str
+        Node label to index
+    properties : iterable
+        Names of the properties to index
+    """
+    existing = existing_indexes(corpus_context)
+    for p in properties:
+        if 'INDEX ON :{}({})'.format(label, p) not in existing:
+            corpus_context.execute_cypher('CREATE INDEX ON :{}({})'.format(label, p))
+
+
+def bulk_update_properties(corpus_context, label, key_property, rows, batch_size=BULK_BATCH_SIZE, call_back=None,
+                           stop_check=None):
+    """
+    Set properties on nodes in batches of rows sent as query parameters, one transaction per batch
+
+    No files are written, so the database does not need access to the client's file system.  Properties set to
+    None are removed from their nodes.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to update
+    label : str
+        Node label of the nodes to update, i.e. ``'word_type'`` or ``'Speaker'``
+    key_property : str
+        Property of the nodes matched against the ``key`` of each row
+    rows : list
+        Output of :func:`property_rows`
+    batch_size : int
+        Maximum number of rows per transaction
+    call_back : callable, optional
+        Function to monitor progress
+    stop_check : callable, optional
+        Function to check whether process should be terminated early
+
+    Returns
+    -------
+    bool
+        False if the update was stopped before all rows were written
+    """
+    statement = '''UNWIND {{rows}} AS row
+    MATCH (n:{label}:{corpus_name}) WHERE n.{key_property} = row.key
+    SET n += row.properties'''.format(label=label, corpus_name=corpus_context.cypher_safe_name,
+                                      key_property=key_property)
+
+    def _update_batch(tx, batch):
+        tx.run(statement, rows=batch)
+
+    if call_back is not None:
+        call_back(0, len(rows))
+    corpus_context.mark_data_changed()
+    with corpus_context.graph_driver.session() as session:
+        for i in range(0, len(rows), batch_size):
+            if stop_check is not None and stop_check():
+                return False
+            batch = rows[i:i + batch_size]
+            session.write_transaction(_update_batch, batch)
+            if call_back is not None:
+                call_back(i + len(batch))
+    return True
+
+
+def import_lexicon_data(corpus_context, data, typed_data, case_sensitive=False):
+    """
+    Set properties on word types
+
+    Parameters
+    ----------
+    corpus_context: :class:`~polyglotdb.corpus.CorpusContext`
+        the corpus to load into
+    data : dict
+        Properties of each word, keyed by label
+    typed_data : dict
+        Types of the properties
+    case_sensitive : boolean
+        defaults to false
+    """
+    label = '{}_type'.format(corpus_context.word_name)
+    if case_sensitive:
+        rows = property_rows(data, typed_data)
+        key_property = 'label'
+    else:
+        rows = property_rows(data, typed_data, str.lower)
+        key_property = 'label_insensitive'
+    ensure_indexes(corpus_context, label, [key_property] + sorted(typed_data))
+    bulk_update_properties(corpus_context, label, key_property, rows)
+
+
+def import_feature_data(corpus_context, data, typed_data):
+    """
+    Set properties on phone types
+
+    Parameters
+    ----------
+    corpus_context: :class:`~polyglotdb.corpus.CorpusContext`
+        the corpus to load into
+    data : dict
+        Properties of each phone, keyed by label
+    typed_data : dict
+        Types of the properties, properties typed as ``NoneType`` are removed from the phones
+    """
+    label = '{}_type'.format(corpus_context.phone_name)
+    ensure_indexes(corpus_context, label, ['label'] + sorted(k for k, v in typed_data.items() if v is not type(None)))
+    bulk_update_properties(corpus_context, label, 'label', property_rows(data, typed_data))
+
+
+def import_speaker_data(corpus_context, data, typed_data):
+    """
+    Set properties on speakers
+
+    Parameters
+    ----------
+    corpus_context: :class:`~polyglotdb.corpus.spoken.SpokenContext`
+        the corpus to load into
+    data : dict
+        Properties of each speaker, keyed by name
+    typed_data : dict
+        Types of the properties
+    """
+    ensure_indexes(corpus_context, 'Speaker', ['name'] + sorted(typed_data))
+    bulk_update_properties(corpus_context, 'Speaker', 'name', property_rows(data, typed_data, str))
+
+
+def import_discourse_data(corpus_context, data, typed_data):
+    """
+    Set properties on discourses
+
+    Parameters
+    ----------
+    corpus_context: :class:`~polyglotdb.corpus.spoken.SpokenContext`
+        the corpus to load into
+    data : dict
+        Properties of each discourse, keyed by name
+    typed_data : dict
+        Types of the properties
+    """
+    ensure_indexes(corpus_context, 'Discourse', ['name'] + sorted(typed_data))
+    bulk_update_properties(corpus_context, 'Discourse', 'name', property_rows(data, typed_data, str))
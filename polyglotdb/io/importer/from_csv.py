@@ -2,6 +2,9 @@ import os
 import logging
 import time
 
+from .bulk import bulk_update_properties
+from ..enrichment.helper import CsvEnrichmentReader, ENRICHMENT_BATCH_SIZE
+
 
 def make_path_safe(path):
     '''Takes a path and returns it with the associated Javascript URL-safe characters'''
@@ -563,7 +566,7 @@ def import_discourse_csvs(corpus_context, typed_data):
     os.remove(path)
 
 
-def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
+def import_utterance_csv(corpus_context, call_back=None, stop_check=None, discourses=None):
     """
     Import an utterance from csv file
 
@@ -571,8 +574,8 @@ def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
     ----------
     corpus_context: :class:`~polyglotdb.corpus.CorpusContext`
         the corpus to load into
-    discourse : str
-        the discourse the utterance is in
+    discourses : list, optional
+        Discourses to import utterances for, defaults to all discourses
     """
     import time
     speakers = corpus_context.speakers
@@ -581,8 +584,10 @@ def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
         call_back(0, len(speakers))
     corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:utterance) ASSERT node.id IS UNIQUE')
     for i, s in enumerate(speakers):
-        discourses = corpus_context.get_discourses_of_speaker(s)
-        for d in discourses:
+        speaker_discourses = corpus_context.get_discourses_of_speaker(s)
+        if discourses is not None:
+            speaker_discourses = [x for x in speaker_discourses if x in discourses]
+        for d in speaker_discourses:
             if stop_check is not None and stop_check():
                 return
             if call_back is not None:
@@ -669,7 +674,7 @@ def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
             os.remove(path)
 
 
-def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
+def import_syllable_csv(corpus_context, call_back=None, stop_check=None, discourses=None):
     """
     Import a syllable from csv file
 
@@ -677,6 +682,8 @@ def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
     ----------
     corpus_context: :class:`~polyglotdb.corpus.syllabic.SyllabicContext`
         the corpus to load into
+    discourses : list, optional
+        Discourses to import syllables for, defaults to all discourses
     """
     import time
     speakers = corpus_context.speakers
@@ -696,8 +703,10 @@ def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
         if call_back is not None:
             call_back('Importing syllables for speaker {} of {} ({})...'.format(i, len(speakers), s))
             call_back(i)
-        discourses = corpus_context.get_discourses_of_speaker(s)
-        for d in discourses:
+        speaker_discourses = corpus_context.get_discourses_of_speaker(s)
+        if discourses is not None:
+            speaker_discourses = [x for x in speaker_discourses if x in discourses]
+        for d in speaker_discourses:
             path = os.path.join(corpus_context.config.temporary_directory('csv'),
                                 '{}_{}_syllable.csv'.format(s, d))
             if corpus_context.config.debug:
@@ -884,7 +893,7 @@ def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
             os.remove(path)
 
 
-def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
+def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None, discourses=None):
     """
     Import a nonsyllable from csv file
 
@@ -892,8 +901,8 @@ def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
     ----------
     corpus_context: :class:`~polyglotdb.corpus.syllabic.SyllabicContext`
         the corpus to load into
-    split_name : str
-        the identifier of the file
+    discourses : list, optional
+        Discourses to import degenerate syllables for, defaults to all discourses
     """
     import time
     speakers = corpus_context.speakers
@@ -912,8 +921,10 @@ def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
         if call_back is not None:
             call_back('Importing degenerate syllables for speaker {} of {} ({})...'.format(i, len(speakers), s))
             call_back(i)
-        discourses = corpus_context.get_discourses_of_speaker(s)
-        for d in discourses:
+        speaker_discourses = corpus_context.get_discourses_of_speaker(s)
+        if discourses is not None:
+            speaker_discourses = [x for x in speaker_discourses if x in discourses]
+        for d in speaker_discourses:
             path = os.path.join(corpus_context.config.temporary_directory('csv'),
                                 '{}_{}_nonsyl.csv'.format(s, d))
 
@@ -1096,10 +1107,14 @@ def import_subannotation_csv(corpus_context, type, annotated_type, props):
     os.remove(path)
 
 
-def import_token_csv(corpus_context, path, annotated_type, id_column, properties=None):
+def import_token_csv(corpus_context, path, annotated_type, id_column, properties=None,
+                     batch_size=ENRICHMENT_BATCH_SIZE, call_back=None, stop_check=None):
     """
     Adds new properties to a list of tokens of a given type.
 
+    The file is streamed in batches of rows, with the types of the columns inferred from the first rows, so memory
+    use does not depend on the size of the file and the database does not need access to it.
+
     Parameters
     ----------
     corpus_context: :class:`~polyglotdb.corpus.AnnotatedContext`
@@ -1112,11 +1127,13 @@ def import_token_csv(corpus_context, path, annotated_type, id_column, properties
         the header name for the column containing IDs
     properties : list
         a list of column names to update, if None, assume all columns will be updated(default)
+    batch_size : int
+        Maximum number of tokens to update per transaction
+    call_back : callable
+        Function to monitor progress
+    stop_check : callable
+        Function to check whether process should be terminated early
     """
-    if properties is None:
-        with open(path, 'r') as f:
-            properties = [x.strip() for x in f.readline().split(',') if x.strip() != id_column]
-
     is_subann = not annotated_type in corpus_context.hierarchy.annotation_types
 
     if is_subann:
@@ -1127,28 +1144,36 @@ def import_token_csv(corpus_context, path, annotated_type, id_column, properties
         if not found_subann:
             raise KeyError("Subannotation {} does not exist in this corpus".format(annotated_type))
 
-    props_to_add = []
-    for p in properties:
-        if is_subann:
-            if not corpus_context.hierarchy.has_subannotation_property(annotated_type, p):
-                props_to_add.append((p, str))
-        else:
-            if not corpus_context.hierarchy.has_token_property(annotated_type, p):
-                props_to_add.append((p, str))
+    with CsvEnrichmentReader(path, key_column=id_column, sanitize_names=False) as reader:
+        if properties is None:
+            properties = [x for x in reader.header if x != id_column]
+        type_data = {p: reader.type_data.get(p, str) for p in properties}
 
-    if props_to_add:
-        if is_subann:
-            corpus_context.hierarchy.add_subannotation_properties(corpus_context, annotated_type, props_to_add)
-        else:
-            corpus_context.hierarchy.add_token_properties(corpus_context, annotated_type, props_to_add)
-        corpus_context.encode_hierarchy()
-
-    property_update = ', '.join(["x.{} = csvLine.{}".format(p, p) for p in properties])
-    statement = '''USING PERIODIC COMMIT 500
-            LOAD CSV WITH HEADERS FROM "file://{path}" AS csvLine
-            MATCH (x:{a_type}:{corpus} {{id: csvLine.{id_column}}})
-            SET {property_update}
-            '''.format(path=path, a_type=annotated_type, corpus=corpus_context.cypher_safe_name,
-                       id_column=id_column, property_update=property_update)
-    corpus_context.execute_cypher(statement)
-    os.remove(path)
+        props_to_add = []
+        for p in properties:
+            if is_subann:
+                if not corpus_context.hierarchy.has_subannotation_property(annotated_type, p):
+                    props_to_add.append((p, type_data[p]))
+            else:
+                if not corpus_context.hierarchy.has_token_property(annotated_type, p):
+                    props_to_add.append((p, type_data[p]))
+
+        if props_to_add:
+            if is_subann:
+                corpus_context.hierarchy.add_subannotation_properties(corpus_context, annotated_type, props_to_add)
+            else:
+                corpus_context.hierarchy.add_token_properties(corpus_context, annotated_type, props_to_add)
+            corpus_context.encode_hierarchy()
+
+        if call_back is not None:
+            call_back('Importing {} properties...'.format(annotated_type))
+        done = 0
+        for batch in reader.batches(batch_size):
+            if stop_check is not None and stop_check():
+                break
+            rows = [{'key': key, 'properties': {p: values.get(p) for p in properties}} for key, values in batch]
+            bulk_update_properties(corpus_context, annotated_type, 'id', rows, batch_size)
+            done += len(rows)
+            if call_back is not None:
+                call_back(done)
+    corpus_context.invalidate_statistics(annotated_type, properties)
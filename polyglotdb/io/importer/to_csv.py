@@ -307,11 +307,13 @@ def discourse_data_to_csvs(corpus_context, data):
             writer.writerow(v)
 
 
-def create_utterance_csvs(corpus_context):
+def create_utterance_csvs(corpus_context, discourses=None):
     header = ['id', 'prev_id', 'begin_word_id', 'end_word_id']
     for s in corpus_context.speakers:
-        discourses = corpus_context.get_discourses_of_speaker(s)
-        for d in discourses:
+        speaker_discourses = corpus_context.get_discourses_of_speaker(s)
+        if discourses is not None:
+            speaker_discourses = [x for x in speaker_discourses if x in discourses]
+        for d in speaker_discourses:
             path = os.path.join(corpus_context.config.temporary_directory('csv'),
                                 '{}_{}_utterance.csv'.format(s, d))
             with open(path, 'w', newline='', encoding='utf8') as f:
@@ -319,11 +321,13 @@ def create_utterance_csvs(corpus_context):
                 writer.writeheader()
 
 
-def create_syllabic_csvs(corpus_context):
+def create_syllabic_csvs(corpus_context, discourses=None):
     header = ['id', 'prev_id', 'vowel_id', 'onset_id', 'coda_id', 'begin', 'end', 'label', 'type_id']
     for s in corpus_context.speakers:
-        discourses = corpus_context.get_discourses_of_speaker(s)
-        for d in discourses:
+        speaker_discourses = corpus_context.get_discourses_of_speaker(s)
+        if discourses is not None:
+            speaker_discourses = [x for x in speaker_discourses if x in discourses]
+        for d in speaker_discourses:
             path = os.path.join(corpus_context.config.temporary_directory('csv'),
                                 '{}_{}_syllable.csv'.format(s, d))
             with open(path, 'w', newline='', encoding='utf8') as f:
@@ -331,11 +335,13 @@ def create_syllabic_csvs(corpus_context):
                 writer.writeheader()
 
 
-def create_nonsyllabic_csvs(corpus_context):
+def create_nonsyllabic_csvs(corpus_context, discourses=None):
     header = ['id', 'prev_id', 'break', 'onset_id', 'coda_id', 'begin', 'end', 'label', 'type_id']
     for s in corpus_context.speakers:
-        discourses = corpus_context.get_discourses_of_speaker(s)
-        for d in discourses:
+        speaker_discourses = corpus_context.get_discourses_of_speaker(s)
+        if discourses is not None:
+            speaker_discourses = [x for x in speaker_discourses if x in discourses]
+        for d in speaker_discourses:
             path = os.path.join(corpus_context.config.temporary_directory('csv'),
                                 '{}_{}_nonsyl.csv'.format(s, d))
             with open(path, 'w', newline='', encoding='utf8') as f:
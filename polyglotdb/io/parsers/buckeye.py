@@ -100,7 +100,8 @@ class BuckeyeParser(BaseParser):
         except Exception as e:
             print(e)
             return
-        phones = read_phones(phone_path)
+        phones = iter_phones(phone_path)
+        phone = next(phones, None)
 
         if self.call_back is not None:
             cur = 0
@@ -123,14 +124,13 @@ class BuckeyeParser(BaseParser):
 
             found = []
 
-            while len(phones):
-                if contained_by(w, phones[0]):
-                    cur_phone = phones.pop(0)
-                    found.append(cur_phone)
-                elif phones[0][0][0] == '{' or phones[0][1] < beg:
-                    phones.pop(0)
-                else:
+            # Phones are consumed in order, so each phone is only looked at once
+            while phone is not None:
+                if contained_by(w, phone):
+                    found.append(phone)
+                elif phone[0][0] != '{' and phone[1] >= beg:
                     break
+                phone = next(phones, None)
             if not found:
                 ba = ('?', w['begin'], w['end'])
                 found.append(ba)
@@ -149,6 +149,7 @@ class BuckeyeParser(BaseParser):
             self.annotation_tiers[2].add([(w['surface_transcription'], beg, end)])
             self.annotation_tiers[3].add([(w['category'], beg, end)])
             self.annotation_tiers[4].add(found)
+        phones.close()
 
         pg_annotations = self._parse_annotations(types_only)
 
@@ -160,39 +161,79 @@ class BuckeyeParser(BaseParser):
         return data
 
 
-def read_phones(path):
+def data_lines(file_handle):
     """
-    From a buckeye file, reads the phone lines, appends label, begin, and end to output
-    
+    Iterate over the lines of a Buckeye file between the end of its header (a line ending in ``#``) and the
+    next line ending in ``#``, if any
+
+    Parameters
+    ----------
+    file_handle : file
+        Buckeye file opened in text mode
+
+    Yields
+    ------
+    str
+        Lines of the body of the file
+    """
+    in_body = False
+    for line in file_handle:
+        if line.endswith('#\n'):
+            if in_body:
+                if line[:-2]:
+                    yield line[:-2]
+                return
+            in_body = True
+            continue
+        if in_body:
+            yield line
+
+
+def iter_phones(path):
+    """
+    From a buckeye file, reads the phone lines one at a time
+
     Parameters
     ----------
     path : str
         path to file
-    
-    Returns
-    -------
-    output : list of tuples
-        each tuple is label, begin, end for a phone
+
+    Yields
+    ------
+    tuple
+        label, begin, end for a phone
     """
-    output = []
+    line_pattern = re.compile("\s+\d{3}\s+")
+    label_pattern = re.compile(" {0,1};| {0,1}\+")
     with open(path, 'r') as file_handle:
-        header_pattern = re.compile("#\r{0,1}\n")
-        line_pattern = re.compile("\s+\d{3}\s+")
-        label_pattern = re.compile(" {0,1};| {0,1}\+")
-        f = header_pattern.split(file_handle.read())[1]
-        flist = f.splitlines()
         begin = 0.0
-        for l in flist:
+        for l in data_lines(file_handle):
             line = line_pattern.split(l.strip())
             try:
                 end = float(line[0])
             except ValueError:  # Missing phone label
-                print('Warning: no label found in line: \'{}\''.format(l))
+                print('Warning: no label found in line: \'{}\''.format(l.rstrip('\n')))
                 continue
             label = label_pattern.split(line[1])[0]
-            output.append((label, begin, end))
+            yield label, begin, end
             begin = end
-    return output
+
+
+def read_phones(path):
+    """
+    From a buckeye file, reads the phone lines, appends label, begin, and end to output
+    
+    Parameters
+    ----------
+    path : str
+        path to file
+    
+    Returns
+    -------
+    output : list of tuples
+        each tuple is label, begin, end for a phone
+    """
+    return list(iter_phones(path))
 
 
 def read_words(path):
@@ -212,12 +253,10 @@ def read_words(path):
     """
     output = []
     misparsed_lines = []
+    line_pattern = re.compile("; | \d{3} ")
     with open(path, 'r') as file_handle:
-        f = re.split(r"#\r{0,1}\n", file_handle.read())[1]
-        line_pattern = re.compile("; | \d{3} ")
         begin = 0.0
-        flist = f.splitlines()
-        for l in flist:
+        for l in data_lines(file_handle):
             line = line_pattern.split(l.strip())
             try:
                 end = float(line[0])
@@ -236,7 +275,7 @@ def read_words(path):
                     phonetic = None
                     category = None
             except IndexError:
-                misparsed_lines.append(l)
+                misparsed_lines.append(l.rstrip('\n'))
                 continue
             line = {'spelling': word, 'begin': begin, 'end': end,
                     'transcription': citation, 'surface_transcription': phonetic,
@@ -48,29 +48,16 @@ class PartiturParser(BaseParser):
         :class:`~polyglotdb.io.discoursedata.DiscourseData`
             Parsed data from the file
         '''
-        speaker = parse_speaker(path)
+        speaker, words, phones = read_partitur(path)
         for a in self.annotation_tiers:
             a.reset()
             a.speaker = speaker
 
         name = os.path.splitext(os.path.split(path)[1])[0]
 
-        phones = read_phones(path)
-        scrambled = match_words(read_words(path), phones)
-        words = sorted(scrambled.values(), key=lambda x: x[1])
-
-        for i, tup in enumerate(words):
-            # tup = (key, words[key][0], words[key][1])
-
-            word = tup[0]
-            self.annotation_tiers[0].add([tup[0:3]])
-            self.annotation_tiers[1].add([(str(tup[3]), tup[1], tup[2])])
-
-
-            # self.annotation_tiers[0][-1].type_properties['transcription'] = tup[3]
-
-        for tup in phones.values():
-            self.annotation_tiers[2].add(((x for x in tup)))
+        self.annotation_tiers[0].add(tup[0:3] for tup in words)
+        self.annotation_tiers[1].add((str(tup[3]), tup[1], tup[2]) for tup in words)
+        self.annotation_tiers[2].add(phones)
         pg_annotations = self._parse_annotations(types_only)
         data = DiscourseData(name, pg_annotations, self.hierarchy)
 
@@ -79,9 +66,12 @@ class PartiturParser(BaseParser):
         return data
 
 
-def parse_speaker(path):
+def read_partitur(path):
     """
-    Get speaker id from a BAS partitur file
+    Read the speaker, words and phones of a BAS partitur file in a single pass
+
+    The begin and end of each word are the earliest begin and latest end of the phones with its index, updated
+    as phones are read, so the words and phones never need to be rescanned.
 
     Parameters
     ----------
@@ -92,113 +82,39 @@ def parse_speaker(path):
     -------
     str or None
         the speaker id
+    list
+        words as tuples of label, begin, end and transcription, in order of their begin
+    list
+        phones as tuples of label, begin and end, in the order of the file
     """
-    speaker = ''
-    with open(path, 'r', encoding='utf8') as f:
-        lines = f.readlines()
-    for line in lines:
-        splitline = re.split("\s", line)
-        if splitline[0] == 'SPN:':
-            return splitline[1].strip()
-
-    return None
-
-
-def read_words(path):
-    """
-    Get all word info from a BAS partitur file
-
-    Parameters
-    ----------
-    path : str
-        a path to the file
-
-    Returns
-    -------
-    dict
-        dictionary of words and their indexes
-    """
+    speaker = None
     words = {}
+    bounds = {}
+    phones = []
     with open(path, 'r', encoding='utf8') as f:
-        lines = f.readlines()
-    for line in lines:
-        splitline = re.split("\s", line)
-        if splitline[0] == 'ORT:':
-            try:
-                words[splitline[1]][0] = splitline[2]
-            except KeyError:
-                words[splitline[1]] = [None, None]
-                words[splitline[1]][0] = splitline[2]
-                # words.update({splitline[1].strip():splitline[2].strip()})
-        if splitline[0] == 'KAN:':
-            try:
-                words[splitline[1]][-1] = splitline[2]
-            except KeyError:
-                words[splitline[1]] = [None, None]
-                words[splitline[1]][-1] = splitline[2]
-    return words
-
-
-def read_phones(path):
-    """
-    Get all phone info from a BAS partitur file
+        for line in f:
+            splitline = re.split("\s", line)
+            tier = splitline[0]
+            if tier == 'MAU:':
+                begin = float(splitline[1].strip()) / 10000
+                end = begin + float(splitline[2].strip()) / 10000
+                index = splitline[3]
+                phones.append((splitline[4].strip(), begin, end))
+                word_bounds = bounds.get(index)
+                if word_bounds is None:
+                    bounds[index] = [begin, end]
+                else:
+                    if begin < word_bounds[0]:
+                        word_bounds[0] = begin
+                    if end > word_bounds[1]:
+                        word_bounds[1] = end
+            elif tier == 'ORT:':
+                words.setdefault(splitline[1], [None, None])[0] = splitline[2]
+            elif tier == 'KAN:':
+                words.setdefault(splitline[1], [None, None])[1] = splitline[2]
+            elif tier == 'SPN:' and speaker is None:
+                speaker = splitline[1].strip()
+    matched = [(v[0], bounds[k][0], bounds[k][1], v[1]) for k, v in words.items() if k in bounds]
+    matched.sort(key=lambda x: x[1])
+    return speaker, matched, phones
 
-    Parameters
-    ----------
-    path : str
-        a path to the file
-
-    Returns
-    -------
-    dict
-        dictionary of phones, their word indexes, and their begin and end
-    """
-    phones = {}
-    with open(path, 'r', encoding='utf8') as f:
-        lines = f.readlines()
-    for i, line in enumerate(lines):
-        splitline = re.split("\s", line)
-        if splitline[0] == 'MAU:':
-            begin = float(splitline[1].strip()) / 10000
-            end = begin + float(splitline[2].strip()) / 10000
-            index = splitline[3]
-            try:
-                phones[index].append((splitline[4].strip(), begin, end))
-            except KeyError:
-                phones[index] = [(splitline[4].strip(), begin, end)]
-
-    return phones
-
-
-def match_words(words, phones):
-    """
-    Matches a dict of phones to a dict of words using their indexes
-    produces a dict of words with begin time (begin of first phone)
-    and end time (end of last phone)
-
-    Parameters
-    ----------
-    words : dict
-        a dict of words and their indexes
-    phones : dict
-        a dict of phones, their indexes, and their begins and ends
-    """
-    newwords = {}
-    for i, key in enumerate(words):
-        v = words[key]
-        word = words[key][0]
-        transcription = words[key][1]
-        # "Kuchen": '3'
-        in_word = phones[key]
-        begmin = in_word[0][2]
-        endmax = in_word[0][1]
-        for tup in in_word:
-            if tup[1] < begmin:
-                begmin = tup[1]
-            if tup[2] > endmax:
-                endmax = tup[2]
-
-        # words[key] = (key, begmin, endmax)
-        newwords[word] = (word, begmin, endmax, transcription)
-
-    return newwords
@@ -157,16 +157,23 @@ class LinguisticAnnotation(BaseAnnotation):
         data = [{'amplitude': float(p), 'time': i * step + self.begin} for i, p in enumerate(signal)]
         return data
 
+    def waveform_envelope(self, width=1000):
+        """
+        Get the minimum and maximum amplitude of the annotation's audio for each pixel, see
+        :meth:`~polyglotdb.corpus.AudioContext.waveform_envelope`
+        """
+        return self.corpus_context.waveform_envelope(self.discourse.name, begin=self.begin, end=self.end,
+                                                     width=width)
+
     @property
     def spectrogram(self):
-        orig, time_step, freq_step = self.corpus_context.generate_spectrogram(self.discourse.name, 'consonant',
-                                                                              begin=self.begin,
-                                                                              end=self.end)
+        orig, begin, time_step, freq_step = self.corpus_context.spectrogram_window(self.discourse.name,
+                                                                                  begin=self.begin, end=self.end)
         reshaped = []
 
         for i in range(orig.shape[0]):
             for j in range(orig.shape[1]):
-                reshaped.append({'time': j * time_step + self.begin, 'frequency': i * freq_step,
+                reshaped.append({'time': j * time_step + begin, 'frequency': i * freq_step,
                                  'power': float(orig[i, j])})
         data = {'values': reshaped,
                 'time_step': time_step,
@@ -177,9 +184,8 @@ class LinguisticAnnotation(BaseAnnotation):
 
     @property
     def spectrogram_fast(self):
-        orig, time_step, freq_step = self.corpus_context.generate_spectrogram(self.discourse.name, 'consonant',
-                                                                              begin=self.begin,
-                                                                              end=self.end)
+        orig, begin, time_step, freq_step = self.corpus_context.spectrogram_window(self.discourse.name,
+                                                                                  begin=self.begin, end=self.end)
         data = {'values': orig,
                 'time_step': time_step,
                 'freq_step': freq_step,
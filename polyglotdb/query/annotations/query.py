@@ -168,6 +168,20 @@ class GraphQuery(BaseQuery):
         self._preload_acoustics.extend(args)
         return self
 
+    def to_textgrids(self, directory, label_columns=None, point_column=None, tier_prefix='', num_workers=1):
+        """
+        Same as ``all``, but the results of the query are output to one TextGrid per discourse in the
+        specified directory, see :func:`~polyglotdb.io.exporters.textgrid.export_query_textgrids`.
+
+        Returns
+        -------
+        list
+            Paths of the TextGrids that were saved
+        """
+        from ...io.exporters.textgrid import export_query_textgrids
+        return export_query_textgrids(self, directory, label_columns=label_columns, point_column=point_column,
+                                      tier_prefix=tier_prefix, num_workers=num_workers)
+
     def all(self):
         """
         Returns all results for the query
@@ -225,7 +239,23 @@ class GraphQuery(BaseQuery):
                         self._hidden_columns.append(a.node.id.column_name(a.utterance_alias))
                     else:
                         self._hidden_columns.append(a.node.utterance.id.column_name(a.utterance_alias))
-        return QueryResults(self)
+        cache = self.corpus.query_result_cache() if self._columns else None
+        if cache is None:
+            return QueryResults(self)
+        from ..result_cache import encode_records, decode_records
+        key = self._result_cache_key('all', self.cypher(), self.cypher_params())
+        data = cache.get(key)
+        if data is not None:
+            return QueryResults(self, records=decode_records(data))
+        results = QueryResults(self)
+        records = list(results)
+        if self.stop_check is None or not self.stop_check():
+            cache.put(key, encode_records(records))
+        return results
+
+    def _acoustic_cache_signature(self):
+        return [[repr(a), a.output_label, a.output_columns, a.attribute.relative, a.attribute.relative_time,
+                 getattr(a, 'num_points', None)] for a in self._acoustic_columns]
 
     def create_subset(self, label):
         labels_to_add = []
@@ -145,8 +145,8 @@ def hydrate_model(r, to_find, to_find_type, to_preload, to_preload_acoustics, co
 
 
 class QueryResults(BaseQueryResults):
-    def __init__(self, query):
-        super(QueryResults, self).__init__(query)
+    def __init__(self, query, records=None):
+        super(QueryResults, self).__init__(query, records=records)
         self.speaker_discourse_channels = {}
         self.num_tracks = 0
         self.track_columns = []
@@ -158,7 +158,7 @@ class QueryResults(BaseQueryResults):
                     self.track_columns.extend(y for y in x.output_columns if y not in self.track_columns)
                 else:
                     self._columns.extend(x.output_columns)
-        if query._columns and self._acoustic_columns:
+        if query._columns and self._acoustic_columns and records is None:
             statement = '''MATCH (s:Speaker:{corpus_name})-[r:speaks_in]->(d:Discourse:{corpus_name})
             RETURN s.name as speaker, d.name as discourse, r.channel as channel'''.format(corpus_name=self.corpus.cypher_safe_name)
             results = self.corpus.execute_cypher(statement)
@@ -180,6 +180,9 @@ class QueryResults(BaseQueryResults):
         return self._columns + self.track_columns
 
     def _sanitize_record(self, r):
+        if isinstance(r, AnnotationRecord):
+            # Records from cached results are already complete
+            return r
         if self.models:
             r = hydrate_model(r, self._to_find, self._to_find_type, self._preload, self._preload_acoustics, self.corpus)
         else:
@@ -229,13 +232,32 @@ class QueryResults(BaseQueryResults):
 
 class AnnotationRecord(BaseRecord):
     def __init__(self, result):
-        self.columns = result.keys()
-        self.values = result.values()
+        self.columns = list(result.keys())
+        self.values = list(result.values())
         self.acoustic_columns = []
         self.acoustic_values = []
         self.track = Track()
         self.track_columns = []
 
+    @classmethod
+    def from_values(cls, columns, values):
+        """
+        Create a record from column names and values, such as results loaded from the query result cache
+
+        Parameters
+        ----------
+        columns : list
+            Column names
+        values : list
+            Values of the columns
+
+        Returns
+        -------
+        :class:`~polyglotdb.query.annotations.results.AnnotationRecord`
+            Record with the columns
+        """
+        return cls(dict(zip(columns, values)))
+
     def __getitem__(self, key):
         if key in self.columns:
             return self.values[self.columns.index(key)]
@@ -150,9 +150,46 @@ class BaseQuery(object):
         """
         self._aggregate = [Count()]
         cypher = self.cypher()
-        value = self.corpus.execute_cypher(cypher, **self.cypher_params())
+        params = self.cypher_params()
         self._aggregate = []
-        return value.single().values()[0]
+        cache = self.corpus.query_result_cache()
+        key = None
+        if cache is not None:
+            key = self._result_cache_key('count', cypher, params)
+            count = cache.get(key)
+            if count is not None:
+                return count
+        value = self.corpus.execute_cypher(cypher, **params)
+        count = value.single().values()[0]
+        if key is not None:
+            cache.put(key, count)
+        return count
+
+    def _acoustic_cache_signature(self):
+        return []
+
+    def _result_cache_key(self, kind, cypher, params):
+        """
+        Generate the key of the query's results in the query result cache, which changes with the Cypher
+        statement, its parameters, any acoustic columns and the version of the corpus data
+
+        Parameters
+        ----------
+        kind : str
+            Kind of result, such as 'all' or 'count'
+        cypher : str
+            Cypher statement of the query
+        params : dict
+            Parameters of the Cypher statement
+
+        Returns
+        -------
+        str
+            Key of the results
+        """
+        from ..result_cache import result_cache_key
+        return result_cache_key(kind, self.corpus.corpus_name, cypher, params, self._acoustic_cache_signature(),
+                                self.corpus.data_version())
 
     def aggregate(self, *args):
         """
@@ -274,11 +311,13 @@ class BaseQuery(object):
         """
         self._delete = True
         self.corpus.execute_cypher(self.cypher(), **self.cypher_params())
+        self.corpus.invalidate_statistics(self.to_find.node_type)
 
     def set_properties(self, **kwargs):
         self._set_properties = {k: v for k,v in kwargs.items()}
         self.corpus.execute_cypher(self.cypher(), **self.cypher_params())
         self._set_properties = {}
+        self.corpus.invalidate_statistics(self.to_find.node_type, list(kwargs.keys()))
 
     def all(self):
         return BaseQueryResults(self)
@@ -12,12 +12,16 @@ class BaseRecord(object):
         return ', '.join('{}: {}'.format(k, v) for k, v in zip(self.columns, self.values))
 
 class BaseQueryResults(object):
-    def __init__(self, query):
+    def __init__(self, query, records=None):
         self.corpus = query.corpus
         self.call_back = query.call_back
         self.stop_check = query.stop_check
-        self.cursors = [self.corpus.execute_cypher(query.cypher(), **query.cypher_params()).records()]
-        self.cache = []
+        if records is None:
+            self.cursors = [self.corpus.execute_cypher(query.cypher(), **query.cypher_params()).records()]
+            self.cache = []
+        else:
+            self.cursors = []
+            self.cache = list(records)
         self.evaluated = []
         self.current_ind = 0
         if query._columns:
@@ -73,8 +77,11 @@ class BaseQueryResults(object):
 
     def add_results(self, query):
         ## Add some validation
-        cursor = query.all().cursors[0]
-        self.cursors.append(cursor)
+        results = query.all()
+        if results.cursors:
+            self.cursors.append(results.cursors[0])
+        else:
+            self.cursors.append(iter(results.cache))
 
     def next(self, number):
         next_ind = number + self.current_ind
@@ -0,0 +1,175 @@
+from collections import Counter
+
+#: Version of the stored statistics format, statistics with other versions are recomputed
+PROFILE_VERSION = 2
+
+PROFILE_TOP_LEVELS = 100
+
+PROFILE_HISTOGRAM_BINS = 20
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class PropertyProfiler(object):
+    """
+    Accumulates the values of a property in one pass and summarizes them
+
+    Factor properties keep a count of each distinct value, so memory use grows with the number of distinct values.
+    Numeric properties only keep their count, range and a histogram with a fixed number of bins, so memory use
+    does not depend on the data.
+
+    Parameters
+    ----------
+    numeric : bool
+        Whether the property is numeric, in which case the summary includes its range and a histogram
+    minimum : float, optional
+        Smallest value of a numeric property (i.e., computed by the database), used for the histogram edges
+    maximum : float, optional
+        Largest value of a numeric property, used for the histogram edges
+    bins : int
+        Number of histogram bins for numeric properties
+    """
+
+    def __init__(self, numeric=False, minimum=None, maximum=None, bins=PROFILE_HISTOGRAM_BINS):
+        self.numeric = numeric
+        self.null_count = 0
+        self.count = 0
+        self.counts = Counter()
+        self.minimum = None
+        self.maximum = None
+        self.edges = []
+        self.binned = []
+        if numeric and _is_number(minimum) and _is_number(maximum):
+            self.edges = histogram_edges(minimum, maximum, bins)
+            self.binned = [0] * (len(self.edges) - 1)
+
+    def add(self, value):
+        """
+        Add a value of the property
+
+        Parameters
+        ----------
+        value : object
+            Value of the property for one node, None if the node does not have the property
+        """
+        if value is None:
+            self.null_count += 1
+            return
+        self.count += 1
+        if self.numeric:
+            if not _is_number(value):
+                return
+            if self.minimum is None or value < self.minimum:
+                self.minimum = value
+            if self.maximum is None or value > self.maximum:
+                self.maximum = value
+            if self.binned:
+                self.binned[bin_index(value, self.edges)] += 1
+            return
+        if isinstance(value, list):
+            value = tuple(value)
+        self.counts[value] += 1
+
+    def statistics(self, top_levels=PROFILE_TOP_LEVELS):
+        """
+        Summarize the values of the property
+
+        Parameters
+        ----------
+        top_levels : int
+            Number of most frequent values to include for factor properties
+
+        Returns
+        -------
+        dict
+            Number of values (``count``) and missing values (``null_count``), plus distinct values
+            (``distinct_count``) and the most frequent values with their counts (``top``) for factor properties, or
+            ``min``, ``max`` and ``histogram`` (with ``edges`` and ``counts``) for numeric properties
+        """
+        statistics = {'count': self.count,
+                      'null_count': self.null_count}
+        if self.numeric:
+            statistics['min'] = self.minimum
+            statistics['max'] = self.maximum
+            statistics['histogram'] = {'edges': list(self.edges), 'counts': list(self.binned)}
+        else:
+            statistics['distinct_count'] = len(self.counts)
+            statistics['top'] = [[list(v) if isinstance(v, tuple) else v, c]
+                                 for v, c in self.counts.most_common(top_levels)]
+        return statistics
+
+
+def histogram_edges(minimum, maximum, bins=PROFILE_HISTOGRAM_BINS):
+    """
+    Generate the edges of equal-width bins between a minimum and a maximum
+
+    Parameters
+    ----------
+    minimum : float
+        Lower edge of the first bin
+    maximum : float
+        Upper edge of the last bin
+    bins : int
+        Number of bins, a single bin is used if the minimum and maximum are equal
+
+    Returns
+    -------
+    list
+        Bin edges, one more than the number of bins
+    """
+    if maximum == minimum:
+        return [minimum, maximum]
+    width = (maximum - minimum) / bins
+    return [minimum + i * width for i in range(bins)] + [maximum]
+
+
+def bin_index(value, edges):
+    """
+    Find the bin of a value, values outside of the edges are put in the first or last bin
+
+    Parameters
+    ----------
+    value : float
+        Value to bin
+    edges : list
+        Bin edges, as generated by :func:`histogram_edges`
+
+    Returns
+    -------
+    int
+        Index of the bin
+    """
+    bins = len(edges) - 1
+    if bins == 1:
+        return 0
+    width = (edges[-1] - edges[0]) / bins
+    return max(min(int((value - edges[0]) / width), bins - 1), 0)
+
+
+def histogram(counts, minimum, maximum, bins=PROFILE_HISTOGRAM_BINS):
+    """
+    Bin counted values into equal-width bins between a minimum and a maximum
+
+    Parameters
+    ----------
+    counts : iterable
+        Tuples of (value, count)
+    minimum : float
+        Lower edge of the first bin
+    maximum : float
+        Upper edge of the last bin, which includes values equal to it
+    bins : int
+        Number of bins
+
+    Returns
+    -------
+    dict
+        Bin ``edges`` (one more than the number of bins) and the ``counts`` in each bin
+    """
+    edges = histogram_edges(minimum, maximum, bins)
+    binned = [0] * (len(edges) - 1)
+    for value, count in counts:
+        binned[bin_index(value, edges)] += count
+    return {'edges': edges, 'counts': binned}
@@ -2,6 +2,8 @@ from ..annotations.attributes.base import AnnotationNode
 from ..discourse.attributes import DiscourseNode
 from ..speaker.attributes import SpeakerNode
 from ..base.func import Min, Max, Count
+from ..base.helper import key_for_cypher
+from .profile import PropertyProfiler
 
 
 class MetaDataQuery(object):
@@ -76,22 +78,131 @@ class MetaDataQuery(object):
             All factors that can be used for reasonable grouping
 
         """
+        profile = self.profile()
         grouping = []
         for f in self.factors():
-            if isinstance(self.to_find, AnnotationNode):
-                q = self.corpus.query_graph(self.to_find).group_by(f.column_name('label')).aggregate(Count())
-                if any(x['count_all'] > 1 for x in q):
-                    grouping.append(f)
-            elif isinstance(self.to_find, DiscourseNode):
-                q = self.corpus.query_discourses().group_by(getattr(self.to_find, f).column_name('label')).aggregate(Count())
-                if any(x['count_all'] > 1 for x in q):
-                    grouping.append(f)
-            elif isinstance(self.to_find, SpeakerNode):
-                q = self.corpus.query_speakers().group_by(getattr(self.to_find, f).column_name('label')).aggregate(Count())
-                if any(x['count_all'] > 1 for x in q):
-                    grouping.append(f)
+            statistics = profile['token'].get(f, profile['type'].get(f))
+            if statistics is not None and statistics['top'] and statistics['top'][0][1] > 1:
+                grouping.append(f)
         return grouping
 
+    def _profiled_properties(self):
+        hierarchy = self.corpus.hierarchy
+        if isinstance(self.to_find, AnnotationNode):
+            token_properties = hierarchy.token_properties.get(self.to_find.node_type, set())
+            type_properties = hierarchy.type_properties.get(self.to_find.node_type, set())
+        elif isinstance(self.to_find, DiscourseNode):
+            token_properties = hierarchy.discourse_properties
+            type_properties = set()
+        else:
+            token_properties = hierarchy.speaker_properties
+            type_properties = set()
+        return ([x for x in sorted(token_properties, key=lambda x: x[0]) if x[0] != 'id'],
+                [x for x in sorted(type_properties, key=lambda x: x[0]) if x[0] != 'id'])
+
+    def _profile_pass(self, token_properties, type_properties):
+        """
+        Compute statistics for token and type properties in a single pass over the nodes of the level
+
+        The ranges of numeric properties are computed by the database beforehand, so that their histograms can be
+        filled while the values are streamed without keeping the values in memory.
+        """
+        token_values = []
+        for name, _ in token_properties:
+            if name == 'duration' and isinstance(self.to_find, AnnotationNode):
+                token_values.append('n.end - n.begin')
+            else:
+                token_values.append('n.{}'.format(key_for_cypher(name)))
+        type_values = ['t.{}'.format(key_for_cypher(name)) for name, _ in type_properties]
+        if isinstance(self.to_find, AnnotationNode):
+            match = '''MATCH (n:{type}:{corpus})-[:is_a]->(t:{type}_type:{corpus})'''.format(
+                type=self.to_find.node_type, corpus=self.corpus.cypher_safe_name)
+        else:
+            match = '''MATCH (n:{type}:{corpus})'''.format(type=self.to_find.node_type,
+                                                          corpus=self.corpus.cypher_safe_name)
+
+        ranges = []
+        for prefix, properties, values in [('token', token_properties, token_values),
+                                           ('type', type_properties, type_values)]:
+            for i, ((_, t), value) in enumerate(zip(properties, values)):
+                if t in (int, float):
+                    ranges.append('min({value}) AS {prefix}_min_{i}, max({value}) AS {prefix}_max_{i}'.format(
+                        value=value, prefix=prefix, i=i))
+        extremes = {}
+        if ranges:
+            statement = '''{match}
+            RETURN {ranges}'''.format(match=match, ranges=', '.join(ranges))
+            for r in self.corpus.execute_cypher(statement):
+                extremes = dict(r.items())
+
+        def profilers(prefix, properties):
+            return [PropertyProfiler(t in (int, float), extremes.get('{}_min_{}'.format(prefix, i)),
+                                     extremes.get('{}_max_{}'.format(prefix, i)))
+                    for i, (_, t) in enumerate(properties)]
+
+        token_profilers = profilers('token', token_properties)
+        type_profilers = profilers('type', type_properties)
+        returns = ['{} AS token_{}'.format(value, i) for i, value in enumerate(token_values)]
+        returns.extend('{} AS type_{}'.format(value, i) for i, value in enumerate(type_values))
+        if isinstance(self.to_find, AnnotationNode):
+            returns.insert(0, 'id(t) AS type_id')
+        statement = '''{match}
+        RETURN {returns}'''.format(match=match, returns=', '.join(returns))
+        seen_types = set()
+        for r in self.corpus.execute_cypher(statement):
+            for i, p in enumerate(token_profilers):
+                p.add(r['token_{}'.format(i)])
+            if type_profilers and r['type_id'] not in seen_types:
+                seen_types.add(r['type_id'])
+                for i, p in enumerate(type_profilers):
+                    p.add(r['type_{}'.format(i)])
+        return ({name: p.statistics() for (name, _), p in zip(token_properties, token_profilers)},
+                {name: p.statistics() for (name, _), p in zip(type_properties, type_profilers)})
+
+    def profile(self, refresh=False):
+        """
+        Get statistics of every property of the level (annotation type, speakers or discourses), computed in one
+        pass over its nodes and stored alongside the Hierarchy
+
+        Stored statistics are reused until the properties are encoded, set, removed or imported again, in which
+        case only the affected properties are recomputed.
+
+        Parameters
+        ----------
+        refresh : bool
+            Whether to recompute all statistics of the level
+
+        Returns
+        -------
+        dict
+            Statistics of ``token`` and ``type`` properties, keyed by property name, as generated by
+            :meth:`~polyglotdb.query.metadata.profile.PropertyProfiler.statistics` (properties of speakers and
+            discourses are under ``token``)
+        """
+        level = self.to_find.node_type
+        statistics = self.corpus.load_statistics()
+        stored = statistics.get(level, {'token': {}, 'type': {}})
+        if refresh:
+            stored = {'token': {}, 'type': {}}
+        token_properties, type_properties = self._profiled_properties()
+        missing_token = [x for x in token_properties if x[0] not in stored['token']]
+        missing_type = [x for x in type_properties if x[0] not in stored['type']]
+        if missing_token or missing_type:
+            token_statistics, type_statistics = self._profile_pass(missing_token, missing_type)
+            stored['token'].update(token_statistics)
+            stored['type'].update(type_statistics)
+            stored = {'token': {x[0]: stored['token'][x[0]] for x in token_properties},
+                      'type': {x[0]: stored['type'][x[0]] for x in type_properties}}
+            statistics[level] = stored
+            self.corpus.save_statistics(statistics)
+        return stored
+
+    def _attribute_statistics(self, attribute):
+        section = 'token'
+        if isinstance(self.to_find, AnnotationNode) and attribute.requires_type():
+            section = 'type'
+        return self.profile()[section].get(attribute.label)
+
     def levels(self, attribute):
         """
         Get the levels (i.e., string values) of a factor
@@ -108,6 +219,9 @@ class MetaDataQuery(object):
         """
         if attribute.label in self.numerics():
             raise Exception('Levels is only valid for factors.')
+        statistics = self._attribute_statistics(attribute)
+        if statistics is not None and statistics['distinct_count'] <= len(statistics['top']):
+            return [x[0] for x in statistics['top']]
         if isinstance(self.to_find, AnnotationNode):
             q = self.corpus.query_graph(self.to_find).group_by(attribute.column_name('label')).aggregate(Count())
         elif isinstance(self.to_find, DiscourseNode):
@@ -134,6 +248,9 @@ class MetaDataQuery(object):
         """
         if attribute.label in self.factors():
             raise Exception('Range function is only valid for numerics.')
+        statistics = self._attribute_statistics(attribute)
+        if statistics is not None and 'min' in statistics:
+            return statistics['min'], statistics['max']
         if isinstance(self.to_find, AnnotationNode):
             q = self.corpus.query_graph(self.to_find).aggregate(Min(attribute).column_name('min'), Max(attribute).column_name('max'))
         if isinstance(self.to_find, DiscourseNode):
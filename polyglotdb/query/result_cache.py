@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import zlib
+
+#: Version of the on-disk format of cached results, entries with other versions are ignored
+RESULT_CACHE_VERSION = 1
+
+RESULT_CACHE_SIZE = 1024 ** 3
+
+RESULT_CACHE_ENTRIES = 1000
+
+ENTRY_EXTENSION = '.result'
+
+
+def result_cache_key(*parts):
+    """
+    Generate a key for a cached result from the parts that determine it (such as a Cypher statement, its
+    parameters and the version of the corpus data)
+
+    Parameters
+    ----------
+    parts : args
+        JSON serializable objects, other objects are converted to strings
+
+    Returns
+    -------
+    str
+        Hexadecimal hash of the parts
+    """
+    canonical = json.dumps([RESULT_CACHE_VERSION] + list(parts), sort_keys=True, default=str)
+    return hashlib.sha1(canonical.encode('utf8')).hexdigest()
+
+
+def encode_records(records):
+    """
+    Convert query records to a columnar form for caching
+
+    Parameters
+    ----------
+    records : list
+        List of :class:`~polyglotdb.query.annotations.results.AnnotationRecord` objects
+
+    Returns
+    -------
+    dict
+        Column names and a list of values per column for the columns and acoustic columns, and the
+        (time, values) pairs of each record's track
+    """
+    records = list(records)
+    if not records:
+        return {'length': 0, 'columns': [], 'values': [], 'acoustic_columns': [], 'acoustic_values': [],
+                'tracks': None}
+    first = records[0]
+    columns = list(first.columns)
+    acoustic_columns = list(first.acoustic_columns)
+    return {'length': len(records),
+            'columns': columns,
+            'values': [[r.values[i] for r in records] for i in range(len(columns))],
+            'acoustic_columns': acoustic_columns,
+            'acoustic_values': [[r.acoustic_values[i] for r in records] for i in range(len(acoustic_columns))],
+            'tracks': [[(p.time, p.values) for p in r.track] for r in records]
+            if any(r.track_columns for r in records) else None}
+
+
+def decode_records(data):
+    """
+    Convert cached columnar results back into query records
+
+    Parameters
+    ----------
+    data : dict
+        Output of :func:`encode_records`
+
+    Returns
+    -------
+    list
+        List of :class:`~polyglotdb.query.annotations.results.AnnotationRecord` objects
+    """
+    from .annotations.results import AnnotationRecord
+    from ..acoustics.classes import Track, TimePoint
+    records = []
+    for i in range(data['length']):
+        r = AnnotationRecord.from_values(data['columns'], [x[i] for x in data['values']])
+        for c, values in zip(data['acoustic_columns'], data['acoustic_values']):
+            r.add_acoustic(c, values[i])
+        if data['tracks'] is not None:
+            track = Track()
+            for time, values in data['tracks'][i]:
+                point = TimePoint(time)
+                point.values.update(values)
+                track.add(point)
+            r.add_track(track)
+        records.append(r)
+    return records
+
+
+class QueryResultCache(object):
+    """
+    Disk-backed cache of query results, evicting the least recently used entries beyond a total size or number
+    of entries
+
+    Entries are compressed pickles written atomically, so the cache can be shared by several processes.
+
+    Parameters
+    ----------
+    directory : str
+        Directory to store cached results
+    max_size : int
+        Maximum total size of cached results in bytes
+    max_entries : int
+        Maximum number of cached results
+    """
+
+    def __init__(self, directory, max_size=RESULT_CACHE_SIZE, max_entries=RESULT_CACHE_ENTRIES):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ENTRY_EXTENSION)
+
+    def get(self, key):
+        """
+        Get a cached result
+
+        Parameters
+        ----------
+        key : str
+            Key of the result, from :func:`result_cache_key`
+
+        Returns
+        -------
+        object
+            Cached result, or None if the key is not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+            # The modification time records when an entry was last used
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Cache a result, evicting older results if the cache is over its limits
+
+        Parameters
+        ----------
+        key : str
+            Key of the result, from :func:`result_cache_key`
+        value : object
+            Result to cache, which must be picklable
+
+        Returns
+        -------
+        bool
+            True if the result was cached, False if it could not be pickled or is larger than the cache
+        """
+        try:
+            data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+        if len(data) > self.max_size:
+            return False
+        path = self._path(key)
+        temp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self.evict()
+        return True
+
+    def entries(self):
+        """
+        Get the cached entries, from least to most recently used
+
+        Returns
+        -------
+        list
+            List of (path, size, last used time) tuples
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_EXTENSION):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda x: x[2])
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is within its size and entry limits
+        """
+        entries = self.entries()
+        total = sum(x[1] for x in entries)
+        count = len(entries)
+        for path, size, _ in entries:
+            if total <= self.max_size and count <= self.max_entries:
+                break
+            self._remove(path)
+            total -= size
+            count -= 1
+
+    def clear(self):
+        """
+        Remove all cached results
+        """
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    def statistics(self):
+        """
+        Get the hits, misses, number of entries and total size of the cache
+
+        Returns
+        -------
+        dict
+            Statistics of the cache
+        """
+        entries = self.entries()
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(entries),
+                    'size': sum(x[1] for x in entries)}
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -1,3 +1,5 @@
+import json
+
 from .exceptions import HierarchyError, GraphQueryError
 from .query.annotations.attributes import PauseAnnotation, AnnotationNode
 from datetime import datetime
@@ -144,6 +146,17 @@ class Hierarchy(object):
         data['discourse_properties'] = sorted((name, t()) for name, t in self.discourse_properties)
         return data
 
+    def snapshot(self):
+        """
+        Get an independent copy of the JSON representation of the Hierarchy, for comparing against later states
+
+        Returns
+        -------
+        dict
+            JSON-compatible representation of the Hierarchy
+        """
+        return json.loads(json.dumps(self.to_json()))
+
     def from_json(self, json):
         """
         Set all properties from a dictionary deserialized from JSON
@@ -166,6 +179,27 @@ class Hierarchy(object):
         self.speaker_properties = set((name, type(t)) for name, t in json['speaker_properties'])
         self.discourse_properties = set((name, type(t)) for name, t in json['discourse_properties'])
 
+    def _sync(self, corpus_context, statement, **kwargs):
+        """
+        Run a statement that updates the hierarchy schema in the Neo4j database, unless a hierarchy transaction is
+        open, in which case the change is applied when the transaction is flushed
+        """
+        if getattr(corpus_context, 'in_hierarchy_transaction', False):
+            return
+        corpus_context.execute_cypher(statement, corpus_name=corpus_context.corpus_name, **kwargs)
+
+    def _current_subsets(self, corpus_context, statement, annotation_type, subsets):
+        if getattr(corpus_context, 'in_hierarchy_transaction', False):
+            return sorted(subsets.get(annotation_type, []))
+        res = list(corpus_context.execute_cypher(statement, corpus_name=corpus_context.corpus_name))
+        try:
+            cur_subsets = res[0]['subsets']
+        except (IndexError, AttributeError):
+            cur_subsets = []
+        if cur_subsets is None:
+            cur_subsets = []
+        return cur_subsets
+
     def add_type_subsets(self, corpus_context, annotation_type, subsets):
         """
         Adds type subsets to the Hierarchy object for a corpus, and syncs it to the hierarchy schema in a Neo4j database
@@ -180,15 +214,10 @@ class Hierarchy(object):
             List of subsets to add for the annotation type
         """
         statement = self.get_type_subset_template.format(type=annotation_type)
-        res = list(corpus_context.execute_cypher(statement, corpus_name=corpus_context.corpus_name))
-        try:
-            cur_subsets = res[0]['subsets']
-        except (IndexError, AttributeError):
-            cur_subsets = []
+        cur_subsets = self._current_subsets(corpus_context, statement, annotation_type, self.subset_types)
         updated = set(cur_subsets + subsets)
         statement = self.set_type_subset_template.format(type=annotation_type)
-        corpus_context.execute_cypher(statement, subsets=sorted(updated),
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement, subsets=sorted(updated))
         self.subset_types[annotation_type] = updated
         corpus_context.cache_hierarchy()
 
@@ -206,15 +235,10 @@ class Hierarchy(object):
             List of subsets to remove for the annotation type
         """
         statement = self.get_type_subset_template.format(type=annotation_type)
-        res = list(corpus_context.execute_cypher(statement, corpus_name=corpus_context.corpus_name))
-        try:
-            cur_subsets = res[0]['subsets']
-        except (IndexError, AttributeError):
-            cur_subsets = []
+        cur_subsets = self._current_subsets(corpus_context, statement, annotation_type, self.subset_types)
         updated = set(cur_subsets) - set(subsets)
         statement = self.set_type_subset_template.format(type=annotation_type)
-        corpus_context.execute_cypher(statement, subsets=sorted(updated),
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement, subsets=sorted(updated))
         self.subset_types[annotation_type] = updated
         corpus_context.cache_hierarchy()
 
@@ -232,15 +256,10 @@ class Hierarchy(object):
             List of subsets to add for the annotation tokens
         """
         statement = self.get_token_subset_template.format(type=annotation_type)
-        res = list(corpus_context.execute_cypher(statement, corpus_name=corpus_context.corpus_name))
-        try:
-            cur_subsets = res[0]['subsets']
-        except (IndexError, AttributeError):
-            cur_subsets = []
+        cur_subsets = self._current_subsets(corpus_context, statement, annotation_type, self.subset_tokens)
         updated = set(cur_subsets + subsets)
         statement = self.set_token_subset_template.format(type=annotation_type)
-        corpus_context.execute_cypher(statement, subsets=sorted(updated),
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement, subsets=sorted(updated))
         self.subset_tokens[annotation_type] = updated
         corpus_context.cache_hierarchy()
 
@@ -258,15 +277,10 @@ class Hierarchy(object):
             List of subsets to remove for the annotation tokens
         """
         statement = self.get_token_subset_template.format(type=annotation_type)
-        res = list(corpus_context.execute_cypher(statement, corpus_name=corpus_context.corpus_name))
-        try:
-            cur_subsets = res[0]['subsets']
-        except (IndexError, AttributeError):
-            cur_subsets = []
+        cur_subsets = self._current_subsets(corpus_context, statement, annotation_type, self.subset_tokens)
         updated = set(cur_subsets) - set(subsets)
         statement = self.set_token_subset_template.format(type=annotation_type)
-        corpus_context.execute_cypher(statement, subsets=sorted(updated),
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement, subsets=sorted(updated))
         self.subset_tokens[annotation_type] = updated
         corpus_context.cache_hierarchy()
 
@@ -364,12 +378,12 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(a:{type})-[:is_a]->(n:{type}_type)
         SET {sets}""".format(type=annotation_type, sets=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name, **kwargs)
+        self._sync(corpus_context, statement, **kwargs)
 
         if annotation_type not in self.type_properties:
             self.type_properties[annotation_type] = {('id', str)}
         self.type_properties[annotation_type].update(k for k in properties)
+        corpus_context.invalidate_statistics(annotation_type, [x[0] for x in properties])
         corpus_context.cache_hierarchy()
 
     def remove_type_properties(self, corpus_context, annotation_type, properties):
@@ -393,13 +407,13 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(a:{type})-[:is_a]->(n:{type}_type)
         REMOVE {removes}""".format(type=annotation_type, removes=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         if annotation_type not in self.type_properties:
             self.type_properties[annotation_type] = {('id', str)}
 
         to_remove = set(x for x in self.type_properties[annotation_type] if x[0] in properties)
         self.type_properties[annotation_type].difference_update(to_remove)
+        corpus_context.invalidate_statistics(annotation_type, properties)
         corpus_context.cache_hierarchy()
 
     def add_acoustic_properties(self, corpus_context, acoustic_type, properties):
@@ -439,8 +453,7 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)-[:has_acoustics]->(n:{type})
         SET {sets}""".format(type=acoustic_type, sets=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name, **kwargs)
+        self._sync(corpus_context, statement, **kwargs)
         if acoustic_type not in self.acoustic_properties:
             self.acoustic_properties[acoustic_type] = set()
         self.acoustic_properties[acoustic_type].update(k for k in properties)
@@ -467,8 +480,7 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)-[:has_acoustics]->(n:{type})
         REMOVE {removes}""".format(type=acoustic_type, removes=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         if acoustic_type not in self.acoustic_properties:
             self.acoustic_properties[acoustic_type] = {}
         to_remove = set(x for x in self.acoustic_properties[acoustic_type] if x[0] in properties)
@@ -512,11 +524,11 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(n:{type})
         SET {sets}""".format(type=annotation_type, sets=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name, **kwargs)
+        self._sync(corpus_context, statement, **kwargs)
         if annotation_type not in self.token_properties:
             self.token_properties[annotation_type] = {('id', str)}
         self.token_properties[annotation_type].update(k for k in properties)
+        corpus_context.invalidate_statistics(annotation_type, [x[0] for x in properties])
         corpus_context.cache_hierarchy()
 
     def remove_token_properties(self, corpus_context, annotation_type, properties):
@@ -540,12 +552,12 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(n:{type})
         REMOVE {removes}""".format(type=annotation_type, removes=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         if annotation_type not in self.token_properties:
             self.token_properties[annotation_type] = {('id', str)}
         to_remove = set(x for x in self.token_properties[annotation_type] if x[0] in properties)
         self.token_properties[annotation_type].difference_update(to_remove)
+        corpus_context.invalidate_statistics(annotation_type, properties)
         corpus_context.cache_hierarchy()
 
     def add_speaker_properties(self, corpus_context, properties):
@@ -583,11 +595,11 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)-[:spoken_by]->(s:Speaker)
         SET {sets}""".format(sets=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name, **kwargs)
+        self._sync(corpus_context, statement, **kwargs)
         to_add_names = [x[0] for x in properties]
         self.speaker_properties = {x for x in self.speaker_properties if x[0] not in to_add_names}
         self.speaker_properties.update(k for k in properties)
+        corpus_context.invalidate_statistics('Speaker', [x[0] for x in properties])
         corpus_context.cache_hierarchy()
 
     def remove_speaker_properties(self, corpus_context, properties):
@@ -609,10 +621,10 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)-[:spoken_by]->(s:Speaker)
         REMOVE {removes}""".format(removes=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         to_remove = set(x for x in self.speaker_properties if x[0] in properties)
         self.speaker_properties.difference_update(to_remove)
+        corpus_context.invalidate_statistics('Speaker', properties)
         corpus_context.cache_hierarchy()
 
     def add_discourse_properties(self, corpus_context, properties):
@@ -650,12 +662,12 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)-[:spoken_in]->(d:Discourse)
         SET {sets}""".format(sets=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name, **kwargs)
+        self._sync(corpus_context, statement, **kwargs)
 
         to_add_names = [x[0] for x in properties]
         self.discourse_properties = {x for x in self.discourse_properties if x[0] not in to_add_names}
         self.discourse_properties.update(k for k in properties)
+        corpus_context.invalidate_statistics('Discourse', [x[0] for x in properties])
         corpus_context.cache_hierarchy()
 
     def remove_discourse_properties(self, corpus_context, properties):
@@ -677,10 +689,10 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)-[:spoken_in]->(d:Discourse)
         REMOVE {removes}""".format(removes=', '.join(ps))
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         to_remove = set(x for x in self.discourse_properties if x[0] in properties)
         self.discourse_properties.difference_update(to_remove)
+        corpus_context.invalidate_statistics('Discourse', properties)
         corpus_context.cache_hierarchy()
 
     def keys(self):
@@ -961,15 +973,13 @@ class Hierarchy(object):
                     CREATE (a)<-[:annotates]-(s:{s_type})
                     WITH s
                     SET {sets}""".format(sets=', '.join(ps), a_type= annotation_type, s_type=subannotation_type)
-            corpus_context.execute_cypher(statement,
-                                          corpus_name=corpus_context.corpus_name, **kwargs)
+            self._sync(corpus_context, statement, **kwargs)
 
         else:
             statement = """MATCH (c:Corpus), (c)<-[:contained_by*]-(a:{a_type}) WHERE c.name = {{corpus_name}}
                     WITH a
                     MERGE (a)<-[:annotates]-(s:{s_type})""".format(a_type= annotation_type, s_type=subannotation_type)
-            corpus_context.execute_cypher(statement,
-                                          corpus_name=corpus_context.corpus_name)
+            self._sync(corpus_context, statement)
         corpus_context.cache_hierarchy()
 
     def remove_subannotation_type(self, corpus_context, subannotation_type):
@@ -993,8 +1003,7 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(a)<-[:annotates]-(s:{s_type})
         DETACH DELETE s""".format(s_type=subannotation_type)
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         corpus_context.cache_hierarchy()
 
     def add_subannotation_properties(self, corpus_context, subannotation_type, properties):
@@ -1035,8 +1044,7 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(a)<-[:annotates]-(s:{s_type})
         SET {sets}""".format(sets=', '.join(ps), s_type=subannotation_type)
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name, **kwargs)
+        self._sync(corpus_context, statement, **kwargs)
 
         self.subannotation_properties[subannotation_type].update(k for k in properties)
         corpus_context.cache_hierarchy()
@@ -1062,8 +1070,7 @@ class Hierarchy(object):
         statement = """MATCH (c:Corpus) WHERE c.name = {{corpus_name}}
         MATCH (c)<-[:contained_by*]-(a)<-[:annotates]-(s:{s_type})
         REMOVE {removes}""".format(removes=', '.join(ps), s_type=subannotation_type)
-        corpus_context.execute_cypher(statement,
-                                      corpus_name=corpus_context.corpus_name)
+        self._sync(corpus_context, statement)
         to_remove = set(x for x in self.subannotation_properties[subannotation_type] if x[0] in properties)
         self.subannotation_properties[subannotation_type].difference_update(to_remove)
         corpus_context.cache_hierarchy()
@@ -30,3 +30,30 @@ def test_wav_info(acoustic_utt_config):
 
 
 
+
+
+def test_migrate_acoustic_schema(acoustic_utt_config):
+    with CorpusContext(acoustic_utt_config) as g:
+        g.hierarchy.add_acoustic_properties(g, 'legacy', [('F0', float)])
+        g.encode_hierarchy()
+        speaker = sorted(g.get_speakers_in_discourse('acoustic_corpus'))[0]
+        client = g.acoustic_client()
+        client.write_points([{'measurement': 'legacy',
+                              'tags': {'discourse': 'acoustic_corpus', 'speaker': speaker, 'channel': 0},
+                              'time': 1000000500 + i * 10000000,
+                              'fields': {'F0': 100.0 + i, 'phone': 'aa', 'utterance_id': 'u{}'.format(i % 2)}}
+                             for i in range(10)], time_precision='n')
+        g._write_acoustic_schema_version(client, 1)
+        g.migrate_acoustic_schema()
+        assert g.acoustic_schema_version() == 2
+        tag_keys = [x['tagKey'] for x in client.query('SHOW TAG KEYS FROM "legacy";').get_points()]
+        field_keys = [x['fieldKey'] for x in client.query('SHOW FIELD KEYS FROM "legacy";').get_points()]
+        assert 'utterance_id' in tag_keys
+        assert 'utterance_id' not in field_keys
+        measurements = [x['name'] for x in client.query('SHOW MEASUREMENTS;').get_points()]
+        assert 'legacy_v2' not in measurements
+        assert 'acoustic_schema_migration' not in measurements
+        result = client.query('''SELECT "F0" FROM "legacy" WHERE "utterance_id" = 'u1';''', epoch='ns')
+        points = list(result.get_points('legacy'))
+        assert [x['time'] for x in points] == [1000000500 + i * 10000000 for i in range(1, 10, 2)]
+        g.reset_acoustic_measure('legacy')
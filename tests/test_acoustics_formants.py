@@ -1,12 +1,16 @@
 import os
 from decimal import Decimal
 
+import numpy as np
 import pytest
+from scipy.spatial.distance import mahalanobis
 
 from polyglotdb import CorpusContext
 from polyglotdb.acoustics.formants.base import analyze_formant_points
+from polyglotdb.acoustics.formants import refined
+from polyglotdb.acoustics.formants.helper import get_mahalanobis_batch
 from polyglotdb.acoustics.formants.refined import get_mean_SD, \
-    analyze_formant_points_refinement, save_formant_point_data
+    analyze_formant_points_refinement, save_formant_point_data, candidate_array, refine_formant_candidates
 
 acoustic = pytest.mark.skipif(
     pytest.config.getoption("--skipacoustics"),
@@ -14,6 +18,121 @@ acoustic = pytest.mark.skipif(
 )
 
 
+def test_mahalanobis_batch():
+    rng = np.random.RandomState(1234)
+    prototype = rng.normal(size=3)
+    observations = rng.normal(size=(4, 5, 3))
+    covariance = np.cov(rng.normal(size=(3, 20)))
+    inverse_covariance = np.linalg.inv(covariance)
+    distances = get_mahalanobis_batch(prototype.tolist(), observations, inverse_covariance.tolist())
+    assert distances.shape == (4, 5)
+    for i in range(4):
+        for j in range(5):
+            assert distances[i, j] == pytest.approx(mahalanobis(observations[i, j], prototype, inverse_covariance))
+
+
+def formant_candidate(frequencies, amplitudes):
+    measurements = {}
+    for i, (frequency, amplitude) in enumerate(zip(frequencies, amplitudes), start=1):
+        measurements['F{}'.format(i)] = frequency
+        measurements['A{}'.format(i)] = amplitude
+        if i <= 3:
+            measurements['B{}'.format(i)] = 100
+    return measurements
+
+
+def test_candidate_array():
+    output = {'a': {5: {'F1': 500, 'F2': 1500}, 6: {'F1': 450, 'F2': None}},
+              'b': {5: {'F1': 520, 'F2': 1480}}}
+    segments, candidates, values, present = candidate_array(output, ['F1', 'F2'])
+    assert segments == ['a', 'b']
+    assert candidates == [5, 6]
+    assert values.shape == (2, 2, 2)
+    assert values[0, 1].tolist() == [450, 0]
+    assert present.tolist() == [[True, True], [True, False]]
+    assert values[1, 1].tolist() == [0, 0]
+
+
+FIRST_FORMANTS = [480, 490, 500, 510, 520]
+
+SECOND_FORMANTS = [1480, 1520, 1490, 1510, 1500]
+
+
+def formant_candidates():
+    output = {}
+    for i, (f1, f2) in enumerate(zip(FIRST_FORMANTS, SECOND_FORMANTS)):
+        output['token_{}'.format(i)] = {5: formant_candidate((f1, f2, 2500, 3500), (60, 50, 45, 20)),
+                                        6: formant_candidate((300, 900, f2, 2500), (60, 50, 45, 20))}
+    # A spurious weak formant between F1 and F2 shifts the later formants up for this token
+    output['spurious'] = {5: formant_candidate((500, 800, 1500, 2500), (60, 10, 50, 40)),
+                          6: formant_candidate((300, 800, 1500, 2500), (60, 10, 50, 40))}
+    return output
+
+
+def test_refine_formant_candidates():
+    best, metadata, iterations = refine_formant_candidates(formant_candidates(), 'i', ['F1', 'F2'],
+                                                           num_iterations=3)
+    for i in range(5):
+        assert best['token_{}'.format(i)]['num_formants'] == 5.0
+        assert best['token_{}'.format(i)]['drop_formant'] == 0
+    assert best['spurious']['F2'] == 800
+    assert list(metadata) == ['i']
+    assert 1 <= iterations <= 3
+
+    best, metadata, iterations = refine_formant_candidates(formant_candidates(), 'i', ['F1', 'F2'],
+                                                           num_iterations=3, drop_formant=True)
+    for i in range(5):
+        assert best['token_{}'.format(i)]['num_formants'] == 5.0
+        assert best['token_{}'.format(i)]['drop_formant'] == 0
+    assert best['spurious']['num_formants'] == 5.0
+    assert best['spurious']['drop_formant'] == 2
+    assert best['spurious']['F2'] == 1500
+    assert best['spurious']['Ax'] == 10
+    assert metadata['i'][0][1] == pytest.approx(np.mean(SECOND_FORMANTS + [1500]))
+
+
+class StubSegment(dict):
+    def __hash__(self):
+        return hash((self['speaker'], self['label'], self['begin']))
+
+
+class StubHierarchy(object):
+    def has_type_subset(self, annotation_type, subset):
+        return True
+
+
+class StubCorpus(object):
+    hierarchy = StubHierarchy()
+
+
+def test_refinement_submission_order(monkeypatch):
+    segments = [StubSegment(speaker=speaker, label=vowel, begin=i)
+                for i, (speaker, vowel) in enumerate([('s2', 'a'), ('s1', 'i'), ('s1', 'a'), ('s2', 'i')])]
+    saved = {}
+
+    def refine(group_output, vowel, **kwargs):
+        speaker = next(iter(group_output))['speaker']
+        return {s: {'F1': 500} for s in group_output}, {vowel: speaker}, 1
+
+    monkeypatch.setattr(refined, 'generate_vowel_segments', lambda *args, **kwargs: segments)
+    monkeypatch.setattr(refined, 'generate_variable_formants_point_function', lambda *args: None)
+    monkeypatch.setattr(refined, 'analyze_segments',
+                        lambda mapping, function, **kwargs: {s: {5: {'F1': 500}} for s in mapping})
+    monkeypatch.setattr(refined, 'refine_formant_candidates', refine)
+    monkeypatch.setattr(refined, 'save_formant_point_data', lambda corpus_context, data, **kwargs: saved.update(data))
+
+    messages = []
+    metadata = analyze_formant_points_refinement(StubCorpus(), multiprocessing=False,
+                                                 call_back=lambda *args: messages.extend(
+                                                     x for x in args if isinstance(x, str)))
+    refined_groups = [x.split(' had ')[0] for x in messages if x.startswith('Speaker ')]
+    assert refined_groups == ['Speaker s1 for vowel a', 'Speaker s1 for vowel i',
+                              'Speaker s2 for vowel a', 'Speaker s2 for vowel i']
+    # The last group submitted for each vowel determines its prototype
+    assert metadata == {'a': 's2', 'i': 's2'}
+    assert set(saved) == set(segments)
+
+
 @acoustic
 def test_analyze_formants_basic_praat(acoustic_utt_config, praat_path, results_test_dir):
     with CorpusContext(acoustic_utt_config) as g:
@@ -1,8 +1,10 @@
 import os
 
 import pytest
+from conch.analysis.segments import FileSegment
 
 from polyglotdb import CorpusContext
+from polyglotdb.acoustics.io import save_point_measures
 
 acoustic = pytest.mark.skipif(
     pytest.config.getoption("--skipacoustics"),
@@ -75,3 +77,35 @@ def test_analyze_track_script(acoustic_utt_config, praat_path, praatscript_test_
 
         g.reset_acoustic_measure('formants_other')
         assert not g.discourse_has_acoustics('formants_other', g.discourses[0])
+
+
+def test_save_point_measures(acoustic_utt_config, monkeypatch):
+    with CorpusContext(acoustic_utt_config) as g:
+        q = g.query_graph(g.phone).columns(g.phone.id.column_name('id'), g.phone.begin.column_name('begin'),
+                                           g.phone.end.column_name('end')).limit(3)
+        phones = list(q.all())
+        assert len(phones) == 3
+        data = {FileSegment('', x['begin'], x['end'], id=x['id']): {'existing_measure': i, 'new_measure': i * 2.5}
+                for i, x in enumerate(phones)}
+        g.hierarchy.add_token_properties(g, 'phone', [('existing_measure', float)])
+
+        statements = []
+        execute_cypher = g.execute_cypher
+
+        def recording_execute_cypher(statement, **parameters):
+            statements.append(statement)
+            return execute_cypher(statement, **parameters)
+
+        monkeypatch.setattr(g, 'execute_cypher', recording_execute_cypher)
+        save_point_measures(g, data, {'existing_measure': float, 'new_measure': float}, batch_size=2)
+        monkeypatch.undo()
+
+        assert len([x for x in statements if 'UNWIND' in x]) == 2
+        assert [x for x in statements if x.startswith('CREATE INDEX')] == ['CREATE INDEX ON :phone(new_measure)']
+        assert g.hierarchy.has_token_property('phone', 'new_measure')
+
+        q = g.query_graph(g.phone).filter(g.phone.id.in_([x['id'] for x in phones]))
+        q = q.columns(g.phone.id.column_name('id'), g.phone.existing_measure.column_name('existing_measure'),
+                      g.phone.new_measure.column_name('new_measure'))
+        saved = {x['id']: (x['existing_measure'], x['new_measure']) for x in q.all()}
+        assert saved == {x['id']: (i, i * 2.5) for i, x in enumerate(phones)}
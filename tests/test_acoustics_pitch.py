@@ -4,6 +4,7 @@ from decimal import Decimal
 import pytest
 
 from polyglotdb import CorpusContext
+from polyglotdb.acoustics.pitch.base import _changed_range, _track_to_points
 
 acoustic = pytest.mark.skipif(
     pytest.config.getoption("--skipacoustics"),
@@ -52,6 +53,63 @@ def test_save_new_pitch_track(acoustic_utt_config, praat_path):
                 assert point['F0'] == 100
 
 
+def test_changed_range():
+    old_points = {100: ('a', 120.0), 110: ('a', 121.0), 120: ('b', 122.0)}
+    assert _changed_range(old_points, dict(old_points)) is None
+
+    new_points = dict(old_points)
+    new_points[110] = ('a', 150.0)
+    assert _changed_range(old_points, new_points) == (110, 110)
+
+    del new_points[120]
+    new_points[90] = ('a', 100.0)
+    assert _changed_range(old_points, new_points) == (90, 120)
+
+
+def test_track_to_points():
+    begins = [0.5, 1.0, 1.5]
+    labels = ['a', 'b', 'c']
+    track = [{'time': 0.25, 'F0': 100},
+             {'time': 0.5, 'F0': 110},
+             {'time': 0.75, 'F0': None},
+             {'time': 0.8, 'F0': 0},
+             {'time': 0.9, 'F0': -1},
+             {'time': 1.0, 'F0': 120},
+             {'time': 1.25, 'F0': '130'},
+             {'time': 2.0, 'F0': 140}]
+    assert _track_to_points(track, begins, labels) == {500: ('a', 110.0),
+                                                      1000: ('b', 120.0),
+                                                      1250: ('b', 130.0),
+                                                      2000: ('c', 140.0)}
+
+
+@acoustic
+def test_save_edited_pitch_range(acoustic_utt_config, praat_path):
+    with CorpusContext(acoustic_utt_config) as g:
+        g.config.praat_path = praat_path
+        g.reset_acoustics()
+        g.analyze_pitch('praat')
+        q = g.query_graph(g.utterance).columns(g.utterance.id, g.utterance.pitch.track)
+        utterance = None
+        for r in q.all():
+            if len(r.track) > 2:
+                utterance = r
+                break
+        assert utterance is not None
+        original = {point.time: point['F0'] for point in utterance.track}
+        edited_time = sorted(original)[len(original) // 2]
+        track = [{'time': t, 'F0': 300 if t == edited_time else v} for t, v in sorted(original.items())]
+
+        g.update_utterance_pitch_track(utterance.id, track)
+
+        q = g.query_graph(g.utterance).filter(g.utterance.id == utterance.id)
+        q = q.columns(g.utterance.pitch.track)
+        updated = {point.time: point['F0'] for point in q.all()[0].track}
+        assert updated[edited_time] == 300
+        assert {t: v for t, v in updated.items() if t != edited_time} == \
+               {t: v for t, v in original.items() if t != edited_time}
+
+
 @acoustic
 def test_analyze_pitch_basic_praat(acoustic_utt_config, praat_path):
     with CorpusContext(acoustic_utt_config) as g:
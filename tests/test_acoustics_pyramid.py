@@ -0,0 +1,48 @@
+import os
+import wave
+
+import numpy as np
+
+from polyglotdb.acoustics.pyramid import build_pyramid, pyramid_is_current, AudioPyramid, ENVELOPE_BLOCK_SIZE
+
+
+def write_tone(path, sr=16000, duration=30, frequency=1000):
+    t = np.arange(int(sr * duration)) / sr
+    signal = 0.5 * np.sin(2 * np.pi * frequency * t) * (t % 2 < 1)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.writeframes((signal * 32767).astype('<i2').tobytes())
+
+
+def test_audio_pyramid(results_test_dir):
+    path = os.path.join(results_test_dir, 'tone.wav')
+    directory = os.path.join(results_test_dir, 'tone_pyramid')
+    write_tone(path)
+    assert not pyramid_is_current(path, directory)
+    build_pyramid(path, directory)
+    assert pyramid_is_current(path, directory)
+    pyramid = AudioPyramid(directory)
+    assert pyramid.duration == 30
+    assert len(pyramid.envelope_levels) > 1
+
+    minima, maxima, begin, time_step = pyramid.waveform(0, 30, 600)
+    assert len(minima) == len(maxima) == 600
+    assert abs(maxima.max() - 0.5) < 0.01
+    assert abs(minima.min() + 0.5) < 0.01
+    assert abs(time_step * 600 - 30) < 0.01
+
+    minima, maxima, begin, time_step = pyramid.waveform(1.5, 1.6, 100)
+    assert np.allclose(minima, 0) and np.allclose(maxima, 0)
+
+    minima, maxima, begin, time_step = pyramid.waveform(0.5, 0.5 + 10 / 16000, 100)
+    assert len(minima) < 100
+    assert time_step < ENVELOPE_BLOCK_SIZE / 16000
+
+    data, begin, time_step, freq_step = pyramid.spectrogram(0.2, 0.7, 50)
+    assert data.shape == (129, 50)
+    assert data[:, 10].argmax() * freq_step == 1000
+    data, begin, time_step, freq_step = pyramid.spectrogram(0, 30, 100, height=32)
+    assert data.shape == (32, 100)
+    assert abs(time_step * 100 - 30) < 0.1
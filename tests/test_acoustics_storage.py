@@ -0,0 +1,120 @@
+import time
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from influxdb.exceptions import InfluxDBClientError, InfluxDBServerError
+from influxdb.resultset import ResultSet
+
+from polyglotdb.acoustics.client import BatchingWriter, convert_time, pipelined_queries, points_to_lines
+from polyglotdb.corpus.audio import decode_points, points_to_track, ms_to_seconds, summarize_values, \
+    match_intervals, mask_runs
+
+
+class RecordingClient(object):
+    def __init__(self, failures=None):
+        self.batches = []
+        self.precisions = []
+        self.failures = list(failures or [])
+
+    def write_points(self, points, time_precision=None, protocol='json'):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.batches.append(list(points))
+        self.precisions.append(time_precision)
+        return True
+
+    def query(self, query, epoch=None):
+        return query.upper()
+
+
+def test_ms_to_seconds():
+    assert ms_to_seconds(1234) == Decimal('1.234')
+    assert ms_to_seconds(0) == Decimal('0')
+
+
+def test_decode_points():
+    result = ResultSet({'series': [{'name': 'pitch',
+                                    'columns': ['time', 'F0', 'phone'],
+                                    'values': [[1000, 120.5, 'aa'], [1010, None, 'aa']]}]})
+    times, values = decode_points(result, ['F0', 'Intensity'])
+    assert list(times) == [1000, 1010]
+    assert list(values['F0']) == [120.5, None]
+    assert list(values['Intensity']) == [None, None]
+    track = points_to_track(times, values)
+    assert len(track) == 2
+    assert track[Decimal('1.000')]['F0'] == 120.5
+
+
+def test_summarize_values():
+    values = np.array([1.0, 2.0, 2.0, 7.0])
+    assert summarize_values(values, 'mean') == 3.0
+    assert summarize_values(values, 'median') == 2.0
+    assert summarize_values(values, 'mode') == 2.0
+    assert summarize_values(values, 'sum') == 12.0
+    assert summarize_values(values, 'count') == 4
+    assert abs(summarize_values(values, 'stddev') - np.std(values, ddof=1)) < 1e-9
+    assert summarize_values(np.array([1.0]), 'stddev') is None
+    assert summarize_values(np.array([]), 'mean') is None
+
+
+def test_match_intervals():
+    begins = np.array([100, 500, 900])
+    ends = np.array([500, 800, 1200])
+    times = np.array([50, 100, 300, 500, 600, 850, 1000, 1500])
+    assert list(match_intervals(times, begins, ends)) == [0, 0, 0, 0, 1, 1, 2, 2]
+
+
+def test_mask_runs():
+    times = np.array([10, 20, 30, 40, 50])
+    mask = np.array([True, True, False, False, True])
+    assert mask_runs(times, mask) == [(10, 20), (50, 50)]
+    assert mask_runs(times, np.zeros(5, dtype=bool)) == []
+
+
+def test_points_to_lines():
+    lines = points_to_lines([{'measurement': 'pitch', 'tags': {'speaker': 'a b'}, 'time': 1000,
+                              'fields': {'F0': 120.5, 'phone': 'aa'}}])
+    assert lines == ['pitch,speaker=a\\ b F0=120.5,phone="aa" 1000']
+    points = [{'measurement': 'pitch', 'tags': {}, 'time': 1000, 'fields': {'F0': 1.0}},
+              {'measurement': 'pitch', 'tags': {}, 'time': 1000000500, 'time_precision': 'n', 'fields': {'F0': 2.0}}]
+    assert points_to_lines(points, write_precision='n') == ['pitch F0=1.0 1000000000', 'pitch F0=2.0 1000000500']
+    points = [{'measurement': 'pitch', 'tags': {}, 'time': np.int64(1000), 'fields': {'F0': 1.0}}]
+    assert points_to_lines(points, write_precision='n') == ['pitch F0=1.0 1000000000']
+    assert convert_time(1000000500, 'n', 'ms') == 1000
+
+
+def test_batching_writer():
+    points = [{'measurement': 'pitch', 'tags': {}, 'time': i, 'fields': {'F0': 100.0}} for i in range(25)]
+    client = RecordingClient([InfluxDBServerError('unavailable')])
+    writer = BatchingWriter(client, batch_size=10, flush_interval=0.01, max_pending=10, retry_delay=0)
+    writer.write(points)
+    writer.flush()
+    assert [len(x) for x in client.batches] == [10, 10, 5]
+    assert client.batches[0][1] == 'pitch F0=100.0 1000000'
+    assert set(client.precisions) == {'n'}
+    statistics = writer.statistics()
+    assert statistics['points'] == 25
+    assert statistics['retries'] == 1
+    assert statistics['pending'] == 0
+
+    client.failures.append(InfluxDBClientError('bad point'))
+    writer.write(points[:1])
+    with pytest.raises(InfluxDBClientError):
+        writer.flush()
+    client.failures.append(InfluxDBClientError('bad point'))
+    writer.write(points[:1])
+    while client.failures:
+        time.sleep(0.01)
+    writer.discard()
+    writer.flush()
+    writer.write(points[:1])
+    writer.close()
+    assert len(client.batches) == 4
+    with pytest.raises(RuntimeError):
+        writer.write(points)
+
+
+def test_pipelined_queries():
+    queries = ['select {}'.format(i) for i in range(10)]
+    assert list(pipelined_queries(RecordingClient(), queries, depth=3)) == [x.upper() for x in queries]
@@ -4,6 +4,7 @@ from decimal import Decimal
 import pytest
 
 from polyglotdb import CorpusContext
+from polyglotdb.acoustics.vot.base import window_vot_marks, unwindow_vot_output
 
 acoustic = pytest.mark.skipif(
     pytest.config.getoption("--skipacoustics"),
@@ -36,3 +37,12 @@ def test_analyze_vot(acoustic_utt_config, vot_classifier_path):
 
         for t, r in zip(p_true, p_returns):
             assert (r["node_vot_begin"][0], r["node_vot_end"][0]) == t
+
+
+def test_vot_windows():
+    marks = [(10.5, 10.6, 'stop1'), (12.0, 12.1, 'stop2', 'vot2')]
+    windowed = window_vot_marks(marks, 10.0)
+    assert [(round(b, 6), round(e, 6)) + tuple(extra) for b, e, *extra in windowed] == [
+        (0.5, 0.6, 'stop1'), (2.0, 2.1, 'stop2', 'vot2')]
+    output = unwindow_vot_output([(0.51, 0.02, 0.9, 'stop1')], 10.0)
+    assert output == [(10.51, 0.02, 0.9, 'stop1')]
@@ -4,6 +4,7 @@ import os
 from polyglotdb.io import inspect_mfa, inspect_textgrid
 
 from polyglotdb import CorpusContext
+from polyglotdb.corpus.base import deletion_batch_size, DELETION_MEMORY_BUDGET, DELETION_NODE_SIZE
 
 
 def test_load_discourse(graph_db, mfa_test_dir, textgrid_test_dir):
@@ -76,3 +77,149 @@ def test_remove_discourse(graph_db):
         c.remove_discourse('acoustic_corpus')
         assert not os.path.exists(d['consonant_file_path'])
 
+
+def test_deletion_batch_size():
+    assert deletion_batch_size(1024 * 1024, node_size=1024) == 1024
+    assert deletion_batch_size(10, node_size=1024) == 1
+    assert deletion_batch_size() == DELETION_MEMORY_BUDGET // DELETION_NODE_SIZE
+
+
+def count_discourse_nodes(corpus_context, discourse):
+    statement = '''MATCH (n:{corpus_name})-[:spoken_in]->(d:Discourse:{corpus_name})
+    WHERE d.name = {{discourse}}
+    RETURN count(n) AS number'''.format(corpus_name=corpus_context.cypher_safe_name)
+    return corpus_context.execute_cypher(statement, discourse=discourse).single()['number']
+
+
+def test_remove_discourse_small_batches(graph_db, textgrid_test_dir):
+    acoustic_path = os.path.join(textgrid_test_dir, 'acoustic_corpus.TextGrid')
+    with CorpusContext('batch_delete_test', **graph_db) as c:
+        c.reset()
+        c.load_discourse(inspect_textgrid(acoustic_path), acoustic_path)
+        assert count_discourse_nodes(c, 'acoustic_corpus') > 10
+        progress = []
+        assert c.remove_discourse('acoustic_corpus', batch_size=10,
+                                  call_back=lambda *args: progress.extend(x for x in args if isinstance(x, int)))
+        assert count_discourse_nodes(c, 'acoustic_corpus') == 0
+        assert 'acoustic_corpus' not in c.discourses
+        assert c.discourses_pending_deletion() == []
+        assert len(progress) > 1
+        assert progress == sorted(progress)
+
+
+def test_resume_deletions(graph_db, textgrid_test_dir):
+    acoustic_path = os.path.join(textgrid_test_dir, 'acoustic_corpus.TextGrid')
+    with CorpusContext('batch_delete_test', **graph_db) as c:
+        c.reset()
+        c.load_discourse(inspect_textgrid(acoustic_path), acoustic_path)
+        total = count_discourse_nodes(c, 'acoustic_corpus')
+        progress = []
+
+        assert not c.delete_discourses(['acoustic_corpus'], batch_size=10,
+                                       call_back=lambda *args: progress.extend(
+                                           x for x in args if isinstance(x, int)),
+                                       stop_check=lambda: len(progress) > 0)
+        assert progress == [10]
+        assert count_discourse_nodes(c, 'acoustic_corpus') == total - 10
+        assert c.discourses_pending_deletion() == ['acoustic_corpus']
+
+        assert c.resume_deletions(batch_size=10)
+        assert count_discourse_nodes(c, 'acoustic_corpus') == 0
+        assert c.discourses_pending_deletion() == []
+        assert c.resume_deletions()
+
+
+def test_metadata_cache(acoustic_config):
+    with CorpusContext(acoustic_config) as c, CorpusContext(acoustic_config) as other:
+        c.clear_metadata_cache()
+        speakers = c.speakers
+        assert os.path.exists(os.path.join(c.metadata_cache_path, 'speakers.json'))
+        assert not os.path.exists(os.path.join(c.metadata_cache_path, 'discourses.json'))
+        assert other.speakers == speakers
+
+        other.execute_cypher('''CREATE (s:Speaker:{corpus_name} {{name: 'cache_test'}})'''.format(
+            corpus_name=other.cypher_safe_name))
+        other.bump_metadata_version()
+        assert 'cache_test' not in c.speakers
+        c.load_metadata_cache()
+        assert 'cache_test' in c.speakers
+        other.execute_cypher('''MATCH (s:Speaker:{corpus_name}) WHERE s.name = 'cache_test' DELETE s'''.format(
+            corpus_name=other.cypher_safe_name))
+        other.bump_metadata_version()
+        c.load_metadata_cache()
+        assert sorted(c.speakers) == sorted(speakers)
+
+
+def test_metadata_cache_queries(acoustic_config, monkeypatch):
+    with CorpusContext(acoustic_config) as c:
+        speaker = c.speakers[0]
+        c.get_discourses_of_speaker(speaker)
+        c.discourses
+        statements = []
+        execute_cypher = c.execute_cypher
+
+        def counting_execute_cypher(statement, **parameters):
+            statements.append(statement)
+            return execute_cypher(statement, **parameters)
+
+        monkeypatch.setattr(c, 'execute_cypher', counting_execute_cypher)
+        for _ in range(10):
+            assert speaker in c.speakers
+            assert c.get_discourses_of_speaker(speaker)
+            assert c.discourses
+        assert statements == []
+
+
+def test_change_tracking_session():
+    from polyglotdb.corpus.base import ChangeTrackingDriver
+
+    class Counters(object):
+        def __init__(self, updates):
+            self.contains_updates = updates
+
+    class Result(object):
+        def __init__(self, updates):
+            self.updates = updates
+
+        def summary(self):
+            return type('Summary', (object,), {'counters': Counters(self.updates)})()
+
+    class Session(object):
+        def run(self, statement, parameters=None, **kwparameters):
+            return Result(statement.startswith('CREATE'))
+
+        def write_transaction(self, unit_of_work, *args, **kwargs):
+            return unit_of_work(None, *args, **kwargs)
+
+        def read_transaction(self, unit_of_work, *args, **kwargs):
+            return unit_of_work(None, *args, **kwargs)
+
+        def close(self):
+            pass
+
+    class Driver(object):
+        def session(self):
+            return Session()
+
+    class Context(object):
+        changed = False
+
+        def mark_data_changed(self):
+            self.changed = True
+
+    context = Context()
+    driver = ChangeTrackingDriver(Driver(), context)
+    with driver.session() as session:
+        session.run('MATCH (n) RETURN n')
+        session.read_transaction(lambda tx: None)
+    assert not context.changed
+    with driver.session() as session:
+        session.run('MATCH (n) RETURN n')
+        session.run('CREATE (n)')
+        assert not context.changed
+    assert context.changed
+
+    context.changed = False
+    with driver.session() as session:
+        session.write_transaction(lambda tx, x: x, 1)
+    assert context.changed
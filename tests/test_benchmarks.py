@@ -0,0 +1,46 @@
+import os
+
+from polyglotdb.io import inspect_mfa, inspect_buckeye
+
+from benchmarks.synthetic import generate_corpus
+from benchmarks.suite import compare_reports
+from benchmarks.parsing import benchmark_parsing, parsing_scaling
+
+
+def test_generate_corpus(results_test_dir):
+    mfa_dir = os.path.join(results_test_dir, 'synthetic_mfa')
+    summary = generate_corpus(mfa_dir, num_speakers=2, num_discourses=2, hours=0.01, num_words=50)
+    assert summary == generate_corpus(mfa_dir, num_speakers=2, num_discourses=2, hours=0.01, num_words=50)
+    assert summary['discourses'] == ['s010001', 's020002']
+    parser = inspect_mfa(mfa_dir)
+    data = parser.parse_discourse(os.path.join(mfa_dir, 's01', 's010001.TextGrid'))
+    assert data.speakers == ['s01']
+    assert os.path.exists(os.path.join(mfa_dir, 's02', 's020002.wav'))
+
+    buckeye_dir = os.path.join(results_test_dir, 'synthetic_buckeye')
+    generate_corpus(buckeye_dir, num_speakers=1, num_discourses=1, hours=0.01, num_words=50, format='buckeye',
+                    audio=False)
+    parser = inspect_buckeye(buckeye_dir)
+    data = parser.parse_discourse(os.path.join(buckeye_dir, 's010001.words'))
+    assert data.speakers == ['s01']
+    assert not os.path.exists(os.path.join(buckeye_dir, 's010001.wav'))
+
+
+def test_compare_reports():
+    baseline = {'benchmarks': [{'name': 'import', 'seconds': 10.0}, {'name': 'parse', 'seconds': 2.0}]}
+    current = {'benchmarks': [{'name': 'import', 'seconds': 12.0}, {'name': 'parse', 'seconds': 2.1},
+                              {'name': 'analyze_pitch', 'seconds': None, 'skipped': 'no praat'}]}
+    comparison = compare_reports(baseline, current, threshold=0.1)
+    assert [x[0] for x in comparison] == ['import', 'parse']
+    assert comparison[0][4]
+    assert not comparison[1][4]
+
+
+def test_benchmark_parsing(results_test_dir):
+    parsing_dir = os.path.join(results_test_dir, 'synthetic_parsing')
+    results = benchmark_parsing(parsing_dir, durations=(5, 10), num_words=50, repeats=1)
+    assert [(r['format'], r['duration']) for r in results] == [('buckeye', 5), ('buckeye', 10), ('timit', 5),
+                                                                ('timit', 10), ('partitur', 5), ('partitur', 10)]
+    assert all(r['seconds'] > 0 for r in results)
+    assert results[0]['phones'] == results[2]['phones'] == results[4]['phones']
+    assert sorted(parsing_scaling(results)) == ['buckeye', 'partitur', 'timit']
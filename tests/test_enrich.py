@@ -27,6 +27,28 @@ def test_stress_enrichment(stressed_config):
         assert (c.hierarchy.has_type_property("syllable", "stress"))
 
 
+def test_relabel(stressed_config):
+    with CorpusContext(stressed_config) as c:
+        c.reset_to_old_label()
+        mapping = c.relabel('phone', '[0-2]$', dry_run=True)
+        assert mapping
+        assert all(k[:-1] == v for k, v in mapping.items())
+        stressed = c.query_graph(c.phone).filter(c.phone.label.in_(list(mapping))).count()
+        assert stressed > 0
+
+        assert c.remove_pattern('[0-2]$', batch_size=10) == mapping
+        assert not set(mapping) & set(c.phones)
+        syllables = c.query_graph(c.syllable).count()
+        assert syllables > 0
+        assert c.remove_pattern('[0-2]$', batch_size=10) == mapping
+        assert c.query_graph(c.syllable).count() == syllables
+        assert c.query_graph(c.phone).filter(c.phone.label.in_(list(mapping))).count() == 0
+
+        c.reset_to_old_label(batch_size=10)
+        assert set(mapping) <= set(c.phones)
+        assert c.query_graph(c.phone).filter(c.phone.label.in_(list(mapping))).count() == stressed
+
+
 def test_relativized_enrichment_syllables(acoustic_config):
     with CorpusContext(acoustic_config) as c:
         # c.encode_measure("word_median")
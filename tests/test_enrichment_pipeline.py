@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+
+import pytest
+
+from polyglotdb import CorpusContext
+from polyglotdb.corpus import EnrichmentPipeline, EnrichmentStep, enrichment_step
+from polyglotdb.corpus.enrichment import ENRICHMENT_STEPS, EnrichmentContext
+from polyglotdb.exceptions import EnrichmentError
+
+
+def test_pipeline_order():
+    pipeline = EnrichmentPipeline([EnrichmentStep('syllables', 'encode_syllables', depends_on=['utterances']),
+                                   EnrichmentStep('utterances', 'encode_utterances', depends_on=['pauses']),
+                                   EnrichmentStep('pauses', 'encode_pauses', parameters={'pause_words': ['sil']})])
+    assert [x.name for x in pipeline.topological_order()] == ['pauses', 'utterances', 'syllables']
+
+
+def test_pipeline_errors():
+    pipeline = EnrichmentPipeline([EnrichmentStep('utterances', 'encode_utterances', depends_on=['pauses'])])
+    with pytest.raises(EnrichmentError):
+        pipeline.topological_order()
+    pipeline.add_step(EnrichmentStep('pauses', 'encode_pauses', depends_on=['utterances']))
+    with pytest.raises(EnrichmentError):
+        pipeline.topological_order()
+    with pytest.raises(EnrichmentError):
+        pipeline.add_step(EnrichmentStep('pauses', 'encode_pauses'))
+
+
+def test_pipeline_fingerprints():
+    pipeline = EnrichmentPipeline([EnrichmentStep('pauses', 'encode_pauses', parameters={'pause_words': ['sil']}),
+                                   EnrichmentStep('utterances', 'encode_utterances', depends_on=['pauses'])])
+    fingerprints = pipeline.fingerprints()
+    assert fingerprints == pipeline.fingerprints()
+
+    pipeline['pauses'].parameters['pause_words'] = ['sil', 'um']
+    changed = pipeline.fingerprints()
+    assert changed['pauses'] != fingerprints['pauses']
+    assert changed['utterances'] != fingerprints['utterances']
+
+
+def test_registered_steps():
+    for name, registered in ENRICHMENT_STEPS.items():
+        assert callable(getattr(CorpusContext, registered['function']))
+        if registered['prepare'] is not None:
+            assert callable(getattr(CorpusContext, registered['prepare']))
+    for name in ['pauses', 'utterances', 'utterance_position', 'syllables', 'speech_rate']:
+        assert ENRICHMENT_STEPS[name]['per_discourse']
+    step = enrichment_step('utterances', parameters={'min_pause_length': 0.15})
+    assert step.function == 'encode_discourse_utterances'
+    assert step.prepare == '_register_utterances'
+    assert step.per_discourse
+    assert step.depends_on == ['pauses']
+    with pytest.raises(EnrichmentError):
+        enrichment_step('not_a_step')
+
+
+class StubCorpus(object):
+    _run_per_discourse_step = EnrichmentContext._run_per_discourse_step
+    _run_discourse = EnrichmentContext._run_discourse
+
+    def __init__(self):
+        self.marked = []
+        self.prepared = 0
+
+    @contextmanager
+    def span(self, name, **attributes):
+        yield
+
+    def mark_enrichment(self, step_name, fingerprint, discourses):
+        self.marked.extend(discourses)
+
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_per_discourse_errors(num_workers):
+    def enrich(corpus_context, discourse):
+        if discourse == 'b':
+            raise ValueError('bad discourse')
+
+    def prepare(corpus_context):
+        corpus_context.prepared += 1
+
+    step = EnrichmentStep('test', enrich, per_discourse=True, prepare=prepare)
+    corpus = StubCorpus()
+    step.prepare_corpus(corpus)
+    assert corpus.prepared == 1
+    with pytest.raises(EnrichmentError) as excinfo:
+        corpus._run_per_discourse_step(step, 'fingerprint', ['a', 'b', 'c'], num_workers, None, lambda: False)
+    assert 'b (bad discourse)' in str(excinfo.value)
+    assert sorted(corpus.marked) == ['a', 'c']
+
+
+def test_run_registered_step(acoustic_config):
+    pipeline = EnrichmentPipeline([enrichment_step('pauses', parameters={'pause_words': ['sil']})])
+    with CorpusContext(acoustic_config) as c:
+        c.reset_enrichment_state()
+        recomputed = c.run_enrichment_pipeline(pipeline)
+        assert recomputed['pauses'] == sorted(c.discourses)
+        assert c.has_pauses
+        assert c.run_enrichment_pipeline(pipeline) == {'pauses': []}
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ['librosa', 'scipy', 'conch', 'influxdb', 'numba', 'polyglotdb.io.parsers']
+
+IMPORT_BUDGET = 3.0
+
+
+def test_import_is_lightweight():
+    script = ('import sys, json\n'
+              'from polyglotdb import CorpusContext, CorpusConfig\n'
+              'print(json.dumps([m for m in {} if m in sys.modules]))'.format(HEAVY_MODULES))
+    begin = time.time()
+    output = subprocess.check_output([sys.executable, '-c', script])
+    duration = time.time() - begin
+    assert output.decode('utf8').strip() == '[]'
+    assert duration < IMPORT_BUDGET
+
+
+def test_lazy_attributes():
+    import polyglotdb
+    import polyglotdb.io
+    from polyglotdb.io import inspect_textgrid
+    from polyglotdb.corpus import CorpusContext
+    assert polyglotdb.CorpusContext is CorpusContext
+    assert polyglotdb.io.inspect_textgrid is inspect_textgrid
+    assert 'inspect_textgrid' in dir(polyglotdb.io)
@@ -0,0 +1,49 @@
+import json
+import os
+
+from polyglotdb.instrumentation import (Instrumentation, StatementAggregator, JsonLogExporter, fingerprint_statement,
+                                        normalize_statement)
+
+
+def test_fingerprint_statement():
+    first = '''MATCH (n:`corpus1`:word) WHERE n.label = 'cat' AND n.begin > 1.5
+    RETURN n LIMIT 10'''
+    second = "MATCH (n:`corpus1`:word) WHERE n.label = 'dog' AND n.begin > 2 RETURN n LIMIT 100"
+    assert normalize_statement(first) == "MATCH (n:`corpus1`:word) WHERE n.label = ? AND n.begin > ? RETURN n LIMIT ?"
+    assert fingerprint_statement(first) == fingerprint_statement(second)
+    assert fingerprint_statement(first) != fingerprint_statement('MATCH (n:`corpus1`:phone) RETURN n')
+    assert normalize_statement('''SELECT "F1" FROM "formants" WHERE time >= 1500ms''') == \
+        'SELECT "F1" FROM "formants" WHERE time >= ?'
+
+
+def test_instrumentation_hooks(results_test_dir):
+    aggregator = StatementAggregator()
+    log_path = os.path.join(results_test_dir, 'instrumentation.log')
+    if os.path.exists(log_path):
+        os.remove(log_path)
+    instrumentation = Instrumentation([aggregator, JsonLogExporter(log_path)])
+    with instrumentation.span('import'):
+        with instrumentation.span('load_csv'):
+            for i in range(3):
+                instrumentation._query_event('cypher', 'MATCH (n) WHERE n.id = {} RETURN n'.format(i),
+                                             {'id': i}, 1, 0.5, server_time=0.25)
+        instrumentation._query_event('influxdb', 'SELECT * FROM "pitch"', None, 10, 2.0)
+
+    report = aggregator.report(n=1)
+    assert report['statement_count'] == 4
+    assert report['statement_time'] == 3.5
+    assert report['slowest'][0]['type'] == 'influxdb'
+    cypher = aggregator.slowest(key='count')[0]
+    assert cypher['count'] == 3
+    assert cypher['rows'] == 3
+    assert cypher['server_time'] == 0.75
+    assert cypher['spans'] == ['load_csv']
+    assert [x['name'] for x in report['spans']] == ['import', 'load_csv']
+
+    with open(log_path) as f:
+        events = [json.loads(x) for x in f]
+    assert len(events) == 6
+    assert [x['type'] for x in events] == ['cypher', 'cypher', 'cypher', 'span', 'influxdb', 'span']
+    assert events[3]['parent'] == 'import'
+    assert events[4]['span'] == 'import'
+    assert events[5]['parent'] is None
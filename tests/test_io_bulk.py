@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+from polyglotdb.io.enrichment.helper import CsvEnrichmentReader, parse_file
+from polyglotdb.io.importer.bulk import convert_value, property_rows, python_type
+
+
+def test_convert_value():
+    assert convert_value('3.0', int) == 3
+    assert convert_value('2.5', float) == 2.5
+    assert convert_value('abc', float) is None
+    assert convert_value('False', bool) is False
+    assert convert_value('True', bool) is True
+    assert convert_value(3, str) == '3'
+    assert convert_value('', str) is None
+    assert convert_value(None, bool) is None
+    assert convert_value(np.int64(3), np.int64) == 3
+    assert type(convert_value(np.int64(3), np.int64)) is int
+    assert type(convert_value(np.float64(2.5), np.float64)) is float
+    assert convert_value(np.bool_(True), np.bool_) is True
+    assert python_type(np.int64) is int
+    assert python_type(str) is str
+
+
+def test_property_rows():
+    data = {'Cat': {'frequency': '12', 'noun': 'True'}, 'dog': {'frequency': 4}}
+    rows = property_rows(data, {'frequency': int, 'noun': bool}, str.lower)
+    assert rows == [{'key': 'cat', 'properties': {'frequency': 12, 'noun': True}},
+                    {'key': 'dog', 'properties': {'frequency': 4, 'noun': None}}]
+
+
+def test_csv_enrichment_reader(results_test_dir):
+    path = os.path.join(results_test_dir, 'token_enrichment.csv')
+    with open(path, 'w') as f:
+        f.write('id,Confidence,count,note\n')
+        f.write('a,0.5,1,x\n')
+        f.write('b,1,2,NA\n')
+        f.write('c,0.25,three,1.50\n')
+        f.write('d,0.75,4,y\n')
+    with CsvEnrichmentReader(path, sample_rows=2) as reader:
+        assert reader.type_data == {'confidence': float, 'count': int, 'note': str}
+        with pytest.warns(UserWarning, match='count'):
+            batches = list(reader.batches(3))
+        assert reader.coerced == {'count': 1}
+    assert [len(b) for b in batches] == [3, 1]
+    assert batches[0][1] == ('b', {'confidence': 1.0, 'count': 2, 'note': None})
+    assert batches[0][2] == ('c', {'confidence': 0.25, 'count': None, 'note': '1.50'})
+
+    with CsvEnrichmentReader(path, key_column='id', sanitize_names=False) as reader:
+        assert reader.type_data['count'] == str
+        assert reader.type_data['Confidence'] == float
+
+    data, type_data = parse_file(path, labels=['a', 'd'])
+    assert sorted(data) == ['a', 'd']
+    assert type_data == {'confidence': float, 'count': str, 'note': str}
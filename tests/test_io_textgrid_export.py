@@ -0,0 +1,55 @@
+import os
+
+from textgrid import TextGrid
+
+from polyglotdb import CorpusContext
+from polyglotdb.io.exporters.textgrid import TierData, write_textgrid, export_textgrids
+
+
+def test_write_textgrid(results_test_dir):
+    words = TierData('words')
+    words.add_interval(0.1, 0.5, 'hello')
+    words.add_interval(0.4, 0.6, 'overlap')
+    words.add_interval(0.7, 0.7, 'empty')
+    words.add_interval(0.7, 1.2, 'world')
+    peaks = TierData('peaks', points=True)
+    peaks.add_point(0.3, '120')
+    peaks.add_point(0.3, '125')
+    peaks.add_point(0.9, '110')
+    assert len(words.items) == 2
+    assert len(peaks.items) == 2
+    assert words.max_time == 1.2
+    assert peaks.max_time == 0.9
+
+    path = os.path.join(results_test_dir, 'tiers.TextGrid')
+    write_textgrid(path, [words, peaks])
+    tg = TextGrid()
+    tg.read(path)
+    assert tg.maxTime == 1.2
+    assert [t.name for t in tg.tiers] == ['words', 'peaks']
+    assert [x.mark for x in tg.tiers[0] if x.mark] == ['hello', 'world']
+    assert [x.mark for x in tg.tiers[1]] == ['120', '110']
+
+
+def test_export_textgrids(acoustic_utt_config, export_test_dir):
+    directory = os.path.join(export_test_dir, 'textgrids')
+    with CorpusContext(acoustic_utt_config) as g:
+        paths = export_textgrids(g, directory, annotation_types=['word', 'phone'], num_workers=2)
+        assert len(paths) == len(g.discourses)
+        num_words = g.query_graph(g.word).count()
+    tg = TextGrid()
+    tg.read(paths[0])
+    assert [t.name for t in tg.tiers] == ['word', 'phone']
+    assert len([x for x in tg.tiers[0] if x.mark]) == num_words
+
+
+def test_query_to_textgrids(acoustic_utt_config, export_test_dir):
+    directory = os.path.join(export_test_dir, 'query_textgrids')
+    with CorpusContext(acoustic_utt_config) as g:
+        q = g.query_graph(g.phone).filter(g.phone.label == 'aa')
+        q = q.columns(g.phone.word.label.column_name('word'))
+        paths = q.to_textgrids(directory)
+    tg = TextGrid()
+    tg.read(paths[0])
+    assert [t.name for t in tg.tiers] == ['word']
+    assert len([x for x in tg.tiers[0] if x.mark]) == 3
@@ -1,4 +1,5 @@
 from polyglotdb import CorpusContext
+from polyglotdb.corpus.pause import PauseContext, pause_batches
 
 
 def test_encode_pause(acoustic_config):
@@ -150,3 +151,38 @@ def test_buckeye_pause(graph_db, buckeye_test_dir):
         parser = inspect_buckeye(word_path)
         c.load(parser, word_path)
         c.encode_pauses('^[<{].*$')
+
+
+def test_pause_batches():
+    jobs = pause_batches([[1, 2], [3], list(range(10, 17)), [], [4, 5, 6]], batch_size=4)
+    assert jobs == [[[10, 11, 12, 13], [14, 15, 16]], [[1, 2, 3]], [[4, 5, 6]]]
+    assert pause_batches([]) == []
+
+
+def test_run_pause_jobs():
+    class Session(object):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc, exc_tb):
+            pass
+
+        def write_transaction(self, unit_of_work, *args):
+            return unit_of_work(None, *args)
+
+    class Context(object):
+        changed = False
+        graph_driver = type('Driver', (object,), {'session': lambda self: Session()})()
+
+        def mark_data_changed(self):
+            self.changed = True
+
+    written = []
+    context = Context()
+    assert PauseContext._run_pause_jobs(context, [[[1, 2], [3]]], lambda tx, batch: written.extend(batch))
+    assert written == [1, 2, 3]
+    assert context.changed
+
+    context = Context()
+    assert not PauseContext._run_pause_jobs(context, [[[1, 2]]], lambda tx, batch: None, stop_check=lambda: True)
+    assert not context.changed
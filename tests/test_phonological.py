@@ -28,6 +28,28 @@ def test_encode_class(timed_config):
             g.phone.filter_by_subset(label)
 
 
+def test_encode_features(timed_config):
+    with CorpusContext(timed_config) as g:
+        g.encode_features({'ae': {'encoded_feature': 'low', 'encoded_height': 1},
+                           'aa': {'encoded_feature': 'back', 'encoded_height': None}})
+        assert g.hierarchy.has_type_property('phone', 'encoded_feature')
+
+        q = g.query_lexicon(g.lexicon_phone).filter(g.lexicon_phone.label == 'ae')
+        q = q.columns(g.lexicon_phone.encoded_feature.column_name('feature'),
+                      g.lexicon_phone.encoded_height.column_name('height'))
+        res = q.all()
+        assert res[0]['feature'] == 'low'
+        assert res[0]['height'] == 1
+        assert g.hierarchy.has_type_property('phone', 'encoded_height')
+
+        g.encode_features({'ae': {'encoded_height': None}, 'aa': {'encoded_height': None}})
+        assert not g.hierarchy.has_type_property('phone', 'encoded_height')
+        assert g.hierarchy.has_type_property('phone', 'encoded_feature')
+
+        g.reset_features(['encoded_feature', 'encoded_height'])
+        assert not g.hierarchy.has_type_property('phone', 'encoded_feature')
+
+
 def test_feature_enrichment(timed_config, csv_test_dir):
     path = os.path.join(csv_test_dir, 'timed_features.txt')
     with CorpusContext(timed_config) as c:
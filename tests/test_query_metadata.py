@@ -1,5 +1,6 @@
 from polyglotdb import CorpusContext
 import pytest
+from polyglotdb.query.metadata.profile import PropertyProfiler, histogram
 
 @pytest.mark.xfail
 def test_query_metadata_words(acoustic_config):
@@ -22,3 +23,54 @@ def test_query_metadata_discourses(acoustic_config):
         assert len(q.levels() == 5)
 
         assert len(q.grouping_factors() == 0)
+
+
+def test_property_profiler():
+    p = PropertyProfiler(numeric=True, minimum=0.5, maximum=3.0, bins=4)
+    for v in [0.5, 1.0, 1.0, None, 2.0, 3.0]:
+        p.add(v)
+    statistics = p.statistics()
+    assert statistics['count'] == 5
+    assert statistics['null_count'] == 1
+    assert statistics['min'] == 0.5
+    assert statistics['max'] == 3.0
+    assert statistics['histogram']['counts'] == [3, 0, 1, 1]
+    assert statistics['histogram']['edges'][0] == 0.5
+    assert statistics['histogram']['edges'][-1] == 3.0
+    assert 'top' not in statistics
+    assert not p.counts
+
+    p = PropertyProfiler(numeric=True)
+    for v in [2.0, None, 1.0]:
+        p.add(v)
+    statistics = p.statistics()
+    assert statistics['count'] == 2
+    assert (statistics['min'], statistics['max']) == (1.0, 2.0)
+    assert statistics['histogram'] == {'edges': [], 'counts': []}
+
+    p = PropertyProfiler()
+    for v in ['a', 'b', 'a', ['x', 'y']]:
+        p.add(v)
+    statistics = p.statistics()
+    assert statistics['count'] == 4
+    assert statistics['distinct_count'] == 3
+    assert statistics['top'] == [['a', 2], ['b', 1], [['x', 'y'], 1]]
+    assert 'histogram' not in statistics
+
+    assert histogram([(2, 3)], 2, 2) == {'edges': [2, 2], 'counts': [3]}
+    assert histogram([(0, 1), (5, 2), (10, 1)], 0, 10, bins=2) == {'edges': [0, 5.0, 10], 'counts': [1, 3]}
+
+
+def test_profile(acoustic_config):
+    with CorpusContext(acoustic_config) as g:
+        q = g.query_metadata(g.phone)
+        profile = q.profile(refresh=True)
+        assert profile['type']['label']['distinct_count'] == len(q.levels(g.phone.label))
+        assert profile['token']['begin']['min'] == q.range(g.phone.begin)[0]
+        assert sum(profile['token']['begin']['histogram']['counts']) == profile['token']['begin']['count']
+        assert g.load_statistics()['phone'] == profile
+        g.invalidate_statistics('phone', ['label'])
+        assert 'label' not in g.load_statistics()['phone']['type']
+        assert q.profile() == profile
+        g.mark_data_changed()
+        assert g.load_statistics() == {}
@@ -0,0 +1,86 @@
+import os
+import time
+
+from polyglotdb import CorpusContext
+from polyglotdb.config import CorpusConfig
+from polyglotdb.acoustics.classes import Track, TimePoint
+from polyglotdb.query.annotations.results import AnnotationRecord
+from polyglotdb.query.result_cache import QueryResultCache, result_cache_key, encode_records, decode_records
+
+
+def test_result_cache_key():
+    key = result_cache_key('all', 'MATCH (n) RETURN n', {'a': 1, 'b': [1, 2]}, 3)
+    assert key == result_cache_key('all', 'MATCH (n) RETURN n', {'b': [1, 2], 'a': 1}, 3)
+    assert key != result_cache_key('count', 'MATCH (n) RETURN n', {'a': 1, 'b': [1, 2]}, 3)
+    assert key != result_cache_key('all', 'MATCH (n) RETURN n', {'a': 2, 'b': [1, 2]}, 3)
+    assert key != result_cache_key('all', 'MATCH (n) RETURN n', {'a': 1, 'b': [1, 2]}, 4)
+
+
+def test_result_cache_eviction(results_test_dir):
+    directory = os.path.join(results_test_dir, 'query_cache')
+    cache = QueryResultCache(directory, max_entries=2)
+    cache.clear()
+    assert cache.get('first') is None
+    assert cache.put('first', list(range(100)))
+    assert cache.put('second', {'a': 1})
+    assert cache.get('first') == list(range(100))
+    # Make the second entry the least recently used
+    past = time.time() - 60
+    os.utime(os.path.join(directory, 'second.result'), (past, past))
+    assert cache.put('third', 3)
+    assert cache.get('second') is None
+    assert cache.get('first') == list(range(100))
+    assert cache.get('third') == 3
+    statistics = cache.statistics()
+    assert statistics['entries'] == 2
+    assert statistics['hits'] == 3
+    assert statistics['misses'] == 2
+
+    small = QueryResultCache(directory, max_size=10)
+    assert not small.put('large', list(range(1000)))
+    assert small.get('large') is None
+    cache.clear()
+    assert cache.statistics()['entries'] == 0
+
+
+def test_encode_records():
+    records = []
+    for i in range(3):
+        r = AnnotationRecord.from_values(['label', 'begin'], ['aa', i])
+        r.add_acoustic('Mean_F0', 100 + i)
+        track = Track()
+        point = TimePoint(i + 0.5)
+        point.add_value('F1', 500)
+        track.add(point)
+        r.add_track(track)
+        records.append(r)
+    data = encode_records(records)
+    assert data['values'] == [['aa', 'aa', 'aa'], [0, 1, 2]]
+    decoded = decode_records(data)
+    assert len(decoded) == 3
+    assert decoded[2]['begin'] == 2
+    assert decoded[2]['Mean_F0'] == 102
+    assert decoded[2].track_columns == ['F1']
+    assert [p.time for p in decoded[2].track] == [2.5]
+    assert decode_records(encode_records([])) == []
+
+
+def test_query_result_cache(acoustic_utt_config, graph_db):
+    config = CorpusConfig(acoustic_utt_config.corpus_name, query_cache=True, **graph_db)
+    with CorpusContext(config) as g:
+        g.clear_query_cache()
+        q = g.query_graph(g.phone).filter(g.phone.label == 'aa')
+        q = q.columns(g.phone.label.column_name('label'), g.phone.begin.column_name('begin'))
+        q = q.order_by(g.phone.begin)
+        expected = [(r['label'], r['begin']) for r in q.all()]
+        assert [(r['label'], r['begin']) for r in q.all()] == expected
+        assert q.count() == len(expected)
+        assert q.count() == len(expected)
+        statistics = g.query_result_cache().statistics()
+        assert statistics['hits'] == 2
+        version = g.data_version()
+        g.mark_data_changed()
+        assert g.data_version() == version + 1
+        assert q.count() == len(expected)
+        assert g.query_result_cache().statistics()['hits'] == 2
+        g.clear_query_cache()
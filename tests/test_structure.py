@@ -14,3 +14,42 @@ def test_generate_hierarchy_subannotations(subannotation_config):
         h = c.generate_hierarchy()
         assert (h._data == c.hierarchy._data)
         assert (h.subannotations['phone'] == c.hierarchy.subannotations['phone'])
+
+
+def test_hierarchy_diff():
+    from polyglotdb.structure import Hierarchy
+    from polyglotdb.corpus.structured import generate_hierarchy_diff
+    h = Hierarchy({'phone': 'word', 'word': None}, corpus_name='test')
+    h.token_properties = {'phone': {('id', str), ('label', str)}, 'word': {('id', str), ('label', str)}}
+    h.type_properties = {'phone': {('label', str)}, 'word': {('label', str)}}
+    old = h.snapshot()
+    assert generate_hierarchy_diff(old, h.snapshot()) == []
+    assert generate_hierarchy_diff(None, h.snapshot()) is None
+
+    h.token_properties['phone'].add(('duration', float))
+    h.type_properties['word'].discard(('label', str))
+    h.subset_types['phone'] = {'vowel'}
+    statements = generate_hierarchy_diff(old, h.snapshot())
+    assert len(statements) == 3
+    token_statement, token_parameters = statements[0]
+    assert '(n:phone)' in token_statement and 'SET n.duration = {p0}' in token_statement
+    assert token_parameters == {'p0': 0.0}
+    subset_statement, subset_parameters = statements[1]
+    assert '(n:phone_type)' in subset_statement and subset_parameters == {'subsets': ['vowel']}
+    remove_statement, remove_parameters = statements[2]
+    assert '(n:word_type)' in remove_statement and 'REMOVE n.label' in remove_statement
+
+    h.add_annotation_type('syllable', above='phone', below='word')
+    assert generate_hierarchy_diff(old, h.snapshot()) is None
+
+
+def test_hierarchy_transaction_rollback(acoustic_config):
+    with CorpusContext(acoustic_config) as c:
+        with pytest.raises(ValueError):
+            with c.hierarchy_transaction():
+                c.hierarchy.add_type_properties(c, 'phone', [('rollback_test', str)])
+                c.encode_hierarchy()
+                raise ValueError('stop')
+        assert not c.hierarchy.has_type_property('phone', 'rollback_test')
+        assert not c.generate_hierarchy().has_type_property('phone', 'rollback_test')
+        assert not c.in_hierarchy_transaction